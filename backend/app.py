@@ -9,9 +9,13 @@ from config import config
 from models import db
 from routes import register_blueprints
 from utils.migration_manager import init_migrations
+from utils.query_instrumentation import QueryInstrumentation
+from utils.metrics import Metrics
 import os
 
 mail = Mail()  # Initialize Mail instance globally
+query_instrumentation = QueryInstrumentation()
+metrics = Metrics()
 
 def create_app(config_name=None):
     """
@@ -30,9 +34,12 @@ def create_app(config_name=None):
     app.config.from_object(config[config_name])
     
     # Initialize extensions
+    metrics.init_app(app)  # Request/pool metrics; must precede db.init_app to pick the pool class
     db.init_app(app)
+    metrics.watch_pool(app)
     mail.init_app(app)  # Initialize Mail with app
     Session(app)  # Initialize Flask-Session
+    query_instrumentation.init_app(app)  # Per-request SQL counts and N+1 report
 
     CORS(app,
      origins=[
@@ -62,34 +69,7 @@ def initialize_database(app):
             db.create_all()
             print("✅ Database tables created successfully!")
             
-            # Step 3: Check and add missing columns for MySQL
-            from sqlalchemy import text
-            
-            try:
-                # Check if original_requirements column exists in purchase_order table
-                result = db.session.execute(text("""
-                    SELECT COLUMN_NAME 
-                    FROM INFORMATION_SCHEMA.COLUMNS 
-                    WHERE TABLE_SCHEMA = DATABASE() 
-                    AND TABLE_NAME = 'purchase_order' 
-                    AND COLUMN_NAME = 'original_requirements'
-                """))
-                
-                column_exists = result.fetchone() is not None
-                
-                if not column_exists:
-                    print("🔄 Adding missing original_requirements column...")
-                    db.session.execute(text("ALTER TABLE purchase_order ADD COLUMN original_requirements TEXT"))
-                    db.session.commit()
-                    print("✅ original_requirements column added successfully!")
-                else:
-                    print("ℹ️ original_requirements column already exists")
-                    
-            except Exception as e:
-                print(f"⚠️ Error checking/adding column: {e}")
-                db.session.rollback()
-            
-            # Step 4: Create admin user if it doesn't exist
+            # Step 3: Create admin user if it doesn't exist
             from models import User, UserStatus
             admin_created = User.create_admin_user()
             if admin_created:
@@ -97,7 +77,7 @@ def initialize_database(app):
             else:
                 print("ℹ️ Admin user already exists")
             
-            # Step 5: Initialize sample data if needed
+            # Step 4: Initialize sample data if needed
             from models import ShowroomProduct
             from datetime import datetime
             
@@ -110,6 +90,7 @@ def initialize_database(app):
                         'cost_price': 150.0,
                         'sale_price': 250.0,
                         'showroom_status': 'sold',
+                        'remaining_quantity': 0,
                         'sold_date': datetime.utcnow()
                     },
                     {
@@ -118,6 +99,7 @@ def initialize_database(app):
                         'cost_price': 45.0,
                         'sale_price': 75.0,
                         'showroom_status': 'sold',
+                        'remaining_quantity': 0,
                         'sold_date': datetime.utcnow()
                     },
                     {
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark for GateUser.face_encoding storage formats
+
+Compares payload size and decode time of the legacy JSON text encoding with the
+binary face encoding format for a population of registered users.
+
+Usage:
+    python benchmark_face_encoding.py [USERS] [FACES_PER_USER]
+"""
+import os
+import sys
+import json
+import time
+import numpy as np
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.face_recognition_utils import decode_face_encodings, pack_face_encodings
+
+DEFAULT_USERS = 500
+DEFAULT_FACES_PER_USER = 3
+
+
+def build_encodings(users, faces_per_user):
+    """Random 100x100 faces serialized in both formats"""
+    rng = np.random.default_rng(0)
+    json_encodings = []
+    binary_encodings = []
+    for _ in range(users):
+        faces = [rng.integers(0, 256, (100, 100), dtype=np.uint8) for _ in range(faces_per_user)]
+        json_encodings.append(json.dumps([json.dumps(face.tolist()) for face in faces]))
+        binary_encodings.append(pack_face_encodings(faces))
+    return json_encodings, binary_encodings
+
+
+def time_decode(encodings):
+    """Decode every encoding and return (milliseconds, faces decoded)"""
+    started = time.perf_counter()
+    faces = 0
+    for encoding in encodings:
+        faces += len(decode_face_encodings(encoding))
+    return (time.perf_counter() - started) * 1000, faces
+
+
+def run_benchmark(users, faces_per_user):
+    json_encodings, binary_encodings = build_encodings(users, faces_per_user)
+
+    json_bytes = sum(len(e.encode('utf-8')) for e in json_encodings)
+    binary_bytes = sum(len(e) for e in binary_encodings)
+    json_ms, json_faces = time_decode(json_encodings)
+    binary_ms, binary_faces = time_decode(binary_encodings)
+
+    print(f"Users: {users}, faces per user: {faces_per_user}\n")
+    print(f"{'format':>8} | {'total KB':>10} | {'KB/user':>8} | {'decode ms':>10} | {'faces':>6}")
+    print("-" * 56)
+    print(f"{'json':>8} | {json_bytes / 1024:>10.1f} | {json_bytes / 1024 / users:>8.1f} | {json_ms:>10.1f} | {json_faces:>6}")
+    print(f"{'binary':>8} | {binary_bytes / 1024:>10.1f} | {binary_bytes / 1024 / users:>8.1f} | {binary_ms:>10.1f} | {binary_faces:>6}")
+
+
+if __name__ == '__main__':
+    user_count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_USERS
+    faces_count = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_FACES_PER_USER
+    run_benchmark(user_count, faces_count)
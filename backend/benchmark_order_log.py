@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark for OrderTrackingService.get_current_order_log
+
+Seeds an in-memory SQLite database with N production orders (each with a
+purchase order, assembly order and showroom product) and compares the legacy
+per-order lookups against the batched resolution layer.
+
+Usage:
+    python benchmark_order_log.py [N ...]
+"""
+import os
+import sys
+import time
+from datetime import datetime
+from sqlalchemy import event
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from models import db, ProductionOrder, PurchaseOrder, AssemblyOrder, ShowroomProduct
+from services.order_tracking_service import OrderTrackingService
+
+DEFAULT_SIZES = [100, 500, 1000, 2000]
+
+
+class QueryCounter:
+    """Counts statements executed on an engine while active"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def seed_orders(count):
+    """Replace all order data with `count` fully linked production orders"""
+    db.drop_all()
+    db.create_all()
+
+    materials = [
+        {'name': 'Steel Frame', 'quantity': 2},
+        {'name': 'Bolts', 'quantity': 12}
+    ]
+    purchase_statuses = ['pending_request', 'pending_finance_approval', 'verified_in_store']
+    assembly_statuses = ['pending', 'in_progress', 'completed']
+
+    for i in range(count):
+        order = ProductionOrder(
+            product_name=f'Product {i}',
+            category='Furniture',
+            quantity=1 + i % 5,
+            created_at=datetime.utcnow(),
+            created_by='benchmark'
+        )
+        db.session.add(order)
+        db.session.flush()
+
+        purchase_order = PurchaseOrder(
+            production_order_id=order.id,
+            product_name=order.product_name,
+            quantity=order.quantity,
+            status=purchase_statuses[i % len(purchase_statuses)]
+        )
+        purchase_order.set_materials_list(materials)
+        db.session.add(purchase_order)
+        db.session.add(AssemblyOrder(
+            production_order_id=order.id,
+            product_name=order.product_name,
+            quantity=order.quantity,
+            status=assembly_statuses[i % len(assembly_statuses)],
+            progress=(i * 7) % 100
+        ))
+        if i % 4 == 0:
+            db.session.add(ShowroomProduct(
+                name=order.product_name,
+                category=order.category,
+                production_order_id=order.id,
+                showroom_status='available'
+            ))
+
+    db.session.commit()
+
+
+def legacy_order_log():
+    """Per-order lookups as performed before batching (3 queries per order)"""
+    orders = db.session.query(ProductionOrder).order_by(ProductionOrder.created_at.desc()).all()
+    for order in orders:
+        purchase_order = PurchaseOrder.query.filter_by(production_order_id=order.id).first()
+        assembly_order = AssemblyOrder.query.filter_by(production_order_id=order.id).first()
+        showroom_product = ShowroomProduct.query.filter_by(production_order_id=order.id).first()
+        OrderTrackingService._determine_order_status(order, purchase_order, assembly_order, showroom_product)
+        if purchase_order:
+            purchase_order.get_materials_list()
+
+
+def measure(func):
+    """Run func with an empty identity map and return (queries, milliseconds)"""
+    db.session.expunge_all()
+    with QueryCounter(db.engine) as counter:
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+    return counter.count, elapsed
+
+
+def run_benchmark(sizes):
+    app = create_app('testing')
+    with app.app_context():
+        print(f"{'orders':>8} | {'legacy queries':>14} | {'legacy ms':>10} | {'batched queries':>15} | {'batched ms':>10}")
+        print("-" * 70)
+        for size in sizes:
+            seed_orders(size)
+            legacy_queries, legacy_ms = measure(legacy_order_log)
+            batched_queries, batched_ms = measure(OrderTrackingService.get_current_order_log)
+            print(f"{size:>8} | {legacy_queries:>14} | {legacy_ms:>10.1f} | {batched_queries:>15} | {batched_ms:>10.1f}")
+
+
+if __name__ == '__main__':
+    requested = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    run_benchmark(requested)
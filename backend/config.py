@@ -52,6 +52,18 @@ class Config:
     # Frontend URL for OAuth redirects
     FRONTEND_BASE_URL = os.getenv('FRONTEND_BASE_URL', 'http://localhost:5173')
 
+    # SQL instrumentation: per-request query counts (X-DB-* headers in debug
+    # mode) and the per-route report at /api/admin/query-report
+    QUERY_INSTRUMENTATION = os.getenv('QUERY_INSTRUMENTATION', 'True').lower() == 'true'
+    QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 5))  # Repeats that flag an N+1 suspect
+
+    # Bearer token for /api/admin/* operational endpoints; they are disabled while unset
+    ADMIN_API_TOKEN = os.getenv('ADMIN_API_TOKEN')
+
+    # Prometheus metrics at /metrics (set PROMETHEUS_MULTIPROC_DIR to aggregate gunicorn workers)
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() == 'true'
+    HEALTH_POOL_SATURATION_THRESHOLD = float(os.getenv('HEALTH_POOL_SATURATION_THRESHOLD', 0.9))  # Reported as degraded above this
+
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
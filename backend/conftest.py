@@ -0,0 +1,4 @@
+"""
+Pytest configuration for the backend tests
+"""
+pytest_plugins = ['utils.pytest_query_budget', 'pytester']
@@ -0,0 +1,31 @@
+"""
+Gunicorn configuration
+
+Threaded workers, so long-lived requests (the notification SSE stream) hold
+one thread rather than a whole worker. Workers share Prometheus metrics
+through files in PROMETHEUS_MULTIPROC_DIR, so a scrape of /metrics on any
+worker reports the whole server.
+"""
+import os
+import shutil
+import tempfile
+
+# Must be set before prometheus_client is imported by the app
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'erp_prometheus_multiproc'))
+
+# Each open /api/notifications/stream occupies a thread for up to STREAM_MAX_SECONDS
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+
+
+def on_starting(server):
+    """Start every server with empty metric files"""
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop live gauges (e.g. checked-out connections) of a worker that exited"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -9,17 +9,19 @@ db = SQLAlchemy()
 # Import all models to ensure they're registered with SQLAlchemy
 from .user import User, UserStatus
 from .production import ProductionOrder, AssemblyOrder, AssemblyTestResult
-from .purchase import PurchaseOrder
+from .purchase import PurchaseOrder, PurchaseOrderMaterial
 from .inventory import StoreInventory
 from .showroom import ShowroomProduct, DispatchRequest, TransportJob, GatePass, Vehicle
-from .finance import FinanceTransaction
+from .finance import FinanceTransaction, FinanceLedgerRollup
 from .sales import SalesOrder, Customer, SalesTransaction
 from .transport import PartLoadDetail
 from .approval import ApprovalRequest
 from .password_reset_token import PasswordResetToken
-from .hr import Employee, Attendance, Leave, Payroll, JobPosting, LeaveType, LeaveStatus, AttendanceStatus, JobStatus, SalaryType, JobApplication, Interview, Candidate, ApplicationStatus, InterviewStatus
+from .hr import Employee, Attendance, Leave, Payroll, JobPosting, LeaveType, LeaveStatus, AttendanceStatus, JobStatus, SalaryType, JobApplication, Interview, Candidate, ApplicationStatus, InterviewStatus, HRDashboardCounter, AttendanceMonthlyRollup, PayrollRun
 from .gate_entry import GateUser, GateEntryLog, GoingOutLog, GateEntrySession
 from .guest_list import GuestList, GuestStatus
+from .notification import Notification, NotificationCounter
+from .loading import LIST_VIEW, DETAIL_VIEW, loading_profile
 
 # Export commonly used models
 __all__ = [
@@ -29,6 +31,7 @@ __all__ = [
     'ProductionOrder',
     'AssemblyOrder',
     'PurchaseOrder',
+    'PurchaseOrderMaterial',
     'StoreInventory',
     'ShowroomProduct',
     'DispatchRequest',
@@ -36,6 +39,7 @@ __all__ = [
     'GatePass',
     'Vehicle',
     'FinanceTransaction',
+    'FinanceLedgerRollup',
     'SalesOrder',
     'Customer',
     'SalesTransaction',
@@ -57,10 +61,18 @@ __all__ = [
     'Candidate',
     'ApplicationStatus',
     'InterviewStatus',
+    'HRDashboardCounter',
+    'AttendanceMonthlyRollup',
+    'PayrollRun',
     'GateUser',
     'GateEntryLog',
     'GoingOutLog',
     'GateEntrySession',
     'GuestList',
-    'GuestStatus'
+    'GuestStatus',
+    'Notification',
+    'NotificationCounter',
+    'LIST_VIEW',
+    'DETAIL_VIEW',
+    'loading_profile'
 ]
@@ -47,4 +47,15 @@ class FinanceTransaction(db.Model):
             description=description,
             reference_id=reference_id,
             reference_type=reference_type
-        )
\ No newline at end of file
+        )
+
+class FinanceLedgerRollup(db.Model):
+    """Revenue and expense totals per day and per month, maintained as transactions are written"""
+    
+    __tablename__ = 'finance_ledger_rollups'
+    
+    period = db.Column(db.String(10), primary_key=True)  # 'day' or 'month'
+    period_start = db.Column(db.Date, primary_key=True)  # The day, or the first day of the month
+    transaction_type = db.Column(db.String(20), primary_key=True)
+    amount = db.Column(db.Float, nullable=False, default=0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
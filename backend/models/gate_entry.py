@@ -2,6 +2,7 @@
 Gate Entry System Models
 """
 from datetime import datetime
+from sqlalchemy import event
 from models import db
 
 class GateUser(db.Model):
@@ -12,7 +13,8 @@ class GateUser(db.Model):
     name = db.Column(db.String(200), nullable=False)
     phone = db.Column(db.String(20), unique=True, nullable=False, index=True)
     photo = db.Column(db.Text, nullable=True)  # Base64 encoded photo
-    face_encoding = db.Column(db.Text, nullable=True)  # Serialized face encodings (JSON array)
+    face_encoding = db.Column(db.LargeBinary(length=16777215), nullable=True)  # Binary face encodings (MEDIUMBLOB, see utils.face_recognition_utils.pack_face_encodings)
+    face_encoding_version = db.Column(db.Integer, nullable=False, default=0)  # Bumped whenever face_encoding changes
     status = db.Column(db.String(50), default='active')  # active, inactive, blocked
     registered_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_entry = db.Column(db.DateTime, nullable=True)
@@ -41,6 +43,13 @@ class GateUser(db.Model):
         }
 
 
+@event.listens_for(GateUser.face_encoding, 'set')
+def _bump_face_encoding_version(target, value, oldvalue, initiator):
+    """Version face encodings so cached recognizers can tell which users changed"""
+    if value != oldvalue:
+        target.face_encoding_version = (target.face_encoding_version or 0) + 1
+
+
 class GateEntryLog(db.Model):
     """Model for gate entry/exit logs"""
     __tablename__ = 'gate_entry_logs'
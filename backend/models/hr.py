@@ -63,6 +63,9 @@ class Employee(db.Model):
     """Employee model for HR management"""
 
     __tablename__ = 'employees'
+    __table_args__ = (
+        db.Index('ix_employees_joining_date', 'joining_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.String(20), unique=True, nullable=False)
@@ -124,6 +127,9 @@ class Attendance(db.Model):
     """Attendance tracking model"""
 
     __tablename__ = 'attendance'
+    __table_args__ = (
+        db.Index('ix_attendance_date_status', 'date', 'status'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
@@ -322,6 +328,9 @@ class Leave(db.Model):
     """Leave management model"""
 
     __tablename__ = 'leaves'
+    __table_args__ = (
+        db.Index('ix_leaves_status_approved_at', 'status', 'approved_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
@@ -380,6 +389,10 @@ class Payroll(db.Model):
     """Payroll management model"""
 
     __tablename__ = 'payrolls'
+    __table_args__ = (
+        db.Index('ix_payrolls_period', 'pay_period_start', 'pay_period_end'),
+        db.UniqueConstraint('employee_id', 'pay_period_start', 'pay_period_end', name='uq_payrolls_employee_period'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), nullable=False)
@@ -427,6 +440,52 @@ class Payroll(db.Model):
         }
 
 
+class PayrollRun(db.Model):
+    """Batch payroll run for one pay period (one run per period)"""
+
+    __tablename__ = 'payroll_runs'
+    __table_args__ = (
+        db.UniqueConstraint('pay_period_start', 'pay_period_end', name='uq_payroll_runs_period'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    pay_period_start = db.Column(db.Date, nullable=False)
+    pay_period_end = db.Column(db.Date, nullable=False)
+    total_working_days = db.Column(db.Float, nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, running, completed, failed
+    total_employees = db.Column(db.Integer, default=0)
+    processed_employees = db.Column(db.Integer, default=0)
+    created_payrolls = db.Column(db.Integer, default=0)
+    skipped_employees = db.Column(db.Integer, default=0)  # Already had a payroll for the period
+    claim_token = db.Column(db.String(32))  # Owner of the current claim; a superseded executor stops
+    error = db.Column(db.Text)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        """Convert payroll run to dictionary"""
+        total = self.total_employees or 0
+        return {
+            'id': self.id,
+            'payPeriodStart': self.pay_period_start.isoformat(),
+            'payPeriodEnd': self.pay_period_end.isoformat(),
+            'totalWorkingDays': self.total_working_days,
+            'status': self.status,
+            'totalEmployees': total,
+            'processedEmployees': self.processed_employees or 0,
+            'createdPayrolls': self.created_payrolls or 0,
+            'skippedEmployees': self.skipped_employees or 0,
+            'progress': round(100 * (self.processed_employees or 0) / total, 1) if total else (100.0 if self.status == 'completed' else 0.0),
+            'error': self.error,
+            'startedAt': self.started_at.isoformat() if self.started_at else None,
+            'finishedAt': self.finished_at.isoformat() if self.finished_at else None,
+            'createdAt': self.created_at.isoformat() if self.created_at else None
+        }
+
+
 class JobPosting(db.Model):
     """Job posting model for recruitment"""
 
@@ -475,3 +534,37 @@ class JobPosting(db.Model):
             'createdAt': self.created_at.isoformat(),
             'applications': applications_count
         }
+
+
+class AttendanceMonthlyRollup(db.Model):
+    """Per-employee monthly attendance totals, maintained as attendance is written"""
+
+    __tablename__ = 'attendance_monthly_rollups'
+    __table_args__ = (
+        db.Index('ix_attendance_monthly_rollups_month', 'month'),
+    )
+
+    employee_id = db.Column(db.Integer, db.ForeignKey('employees.id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)  # First day of the month
+    total_days = db.Column(db.Integer, nullable=False, default=0)
+    present_days = db.Column(db.Integer, nullable=False, default=0)
+    absent_days = db.Column(db.Integer, nullable=False, default=0)
+    late_days = db.Column(db.Integer, nullable=False, default=0)
+    half_days = db.Column(db.Integer, nullable=False, default=0)
+    hours_worked = db.Column(db.Float, nullable=False, default=0)
+
+
+class HRDashboardCounter(db.Model):
+    """
+    Materialized HR dashboard counter
+
+    Dated metrics (present, absent, on_leave) are scoped by ISO date, department
+    counts by department name, and the remaining metrics use an empty scope.
+    """
+
+    __tablename__ = 'hr_dashboard_counters'
+
+    metric = db.Column(db.String(30), primary_key=True)
+    scope = db.Column(db.String(100), primary_key=True, default='')
+    value = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
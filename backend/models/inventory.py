@@ -7,6 +7,10 @@ from . import db
 class StoreInventory(db.Model):
     """Model for store inventory items"""
     
+    __table_args__ = (
+        db.Index('ux_store_inventory_name', 'name', unique=True),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=0)
@@ -0,0 +1,68 @@
+"""
+Named eager-loading profiles for the showroom, sales and transport models
+
+A profile lists the relationships an endpoint reads, so related rows are
+loaded with a fixed number of queries instead of one lookup per row:
+many-to-one links are joined into the main query (joinedload) and
+collections are fetched with one IN query each (selectinload).
+"""
+from sqlalchemy.orm import joinedload, selectinload
+from .showroom import DispatchRequest, TransportJob, GatePass
+from .sales import SalesOrder, TransportApprovalRequest
+
+# Profile names: LIST_VIEW loads what list rows show (order number, product,
+# gate pass, transport job); DETAIL_VIEW adds the delivery paperwork
+# (part load details, transport approval requests)
+LIST_VIEW = 'list'
+DETAIL_VIEW = 'detail'
+
+
+def _dispatch_request_loaders(profile):
+    loaders = [
+        joinedload(DispatchRequest.sales_order),
+        joinedload(DispatchRequest.showroom_product),
+        selectinload(DispatchRequest.gate_passes),
+        selectinload(DispatchRequest.transport_jobs)
+    ]
+    if profile == DETAIL_VIEW:
+        loaders.append(joinedload(DispatchRequest.sales_order).selectinload(SalesOrder.part_load_details))
+    return loaders
+
+
+def _profiles(profile):
+    return {
+        SalesOrder: [
+            joinedload(SalesOrder.showroom_product),
+            selectinload(SalesOrder.transactions),
+            selectinload(SalesOrder.dispatch_requests)
+        ] + ([
+            selectinload(SalesOrder.part_load_details),
+            selectinload(SalesOrder.transport_approval_requests)
+        ] if profile == DETAIL_VIEW else []),
+        DispatchRequest: _dispatch_request_loaders(profile),
+        TransportJob: [joinedload(TransportJob.dispatch_request).options(*_dispatch_request_loaders(profile))],
+        GatePass: [joinedload(GatePass.dispatch_request).options(*_dispatch_request_loaders(profile))],
+        TransportApprovalRequest: [
+            joinedload(TransportApprovalRequest.sales_order).options(
+                joinedload(SalesOrder.showroom_product),
+                selectinload(SalesOrder.transactions)
+            )
+        ]
+    }
+
+
+def loading_profile(model, profile=LIST_VIEW):
+    """
+    Loader options for ``model`` under a named profile
+
+    Usage: ``TransportJob.query.options(*loading_profile(TransportJob))``
+
+    Raises:
+        ValueError: If the model or profile has no loading profile
+    """
+    if profile not in (LIST_VIEW, DETAIL_VIEW):
+        raise ValueError(f"Unknown loading profile: {profile}")
+    profiles = _profiles(profile)
+    if model not in profiles:
+        raise ValueError(f"No loading profile for {model.__name__}")
+    return profiles[model]
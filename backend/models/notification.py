@@ -0,0 +1,50 @@
+import json
+from datetime import datetime
+from . import db
+
+
+class Notification(db.Model):
+    __tablename__ = 'notification'
+    __table_args__ = (
+        db.Index('ix_notification_department_read_created', 'department', 'is_read', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(50), nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    data = db.Column(db.Text, nullable=True)  # JSON payload
+    department = db.Column(db.String(50), nullable=True)
+    priority = db.Column(db.String(20), nullable=False, default='normal')  # low, normal, high, urgent
+    is_read = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self, read_through_id=0):
+        """Serialize; notifications at or below read_through_id were bulk-marked read"""
+        return {
+            'id': self.id,
+            'type': self.type,
+            'title': self.title,
+            'message': self.message,
+            'data': json.loads(self.data) if self.data else {},
+            'department': self.department,
+            'priority': self.priority,
+            'timestamp': self.created_at.isoformat(),
+            'read': bool(self.is_read) or self.id <= (read_through_id or 0)
+        }
+
+
+class NotificationCounter(db.Model):
+    """
+    Unread counter and bulk-read watermark per department
+
+    The row keyed '*' counts notifications without a department and its
+    read_through_id covers all departments; the overall unread count is the
+    sum of every row. mark-all-as-read moves read_through_id instead of
+    updating every notification row.
+    """
+    __tablename__ = 'notification_counter'
+
+    key = db.Column(db.String(50), primary_key=True)  # department name or '*' (no department)
+    unread = db.Column(db.Integer, nullable=False, default=0)
+    read_through_id = db.Column(db.Integer, nullable=False, default=0)
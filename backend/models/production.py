@@ -14,6 +14,7 @@ class ProductionOrder(db.Model):
     status = db.Column(db.String(50), default='pending_materials')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     created_by = db.Column(db.String(100))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     def to_dict(self):
         """Convert model instance to dictionary with fixed IST timestamp"""
@@ -49,6 +50,7 @@ class AssemblyOrder(db.Model):
     status = db.Column(db.String(50), default='pending')
     progress = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Optional tracking fields
     started_at = db.Column(db.DateTime, nullable=True)
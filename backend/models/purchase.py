@@ -1,10 +1,64 @@
 """
 Purchase-related database models
 """
-import json
 from datetime import datetime
 from . import db
 
+# PurchaseOrderMaterial.kind values
+PURCHASED_MATERIAL = 'purchase'       # Materials to buy (edited by Purchase, reduced to shortages by Store)
+REQUIRED_MATERIAL = 'requirement'     # Original production requirements
+
+
+def _material_int(value):
+    try:
+        return int(float(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _material_float(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class PurchaseOrderMaterial(db.Model):
+    """Model for one material line of a purchase order"""
+    
+    __tablename__ = 'purchase_order_material'
+    __table_args__ = (
+        db.Index('ix_purchase_order_material_order', 'purchase_order_id', 'kind'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    purchase_order_id = db.Column(db.Integer, db.ForeignKey('purchase_order.id', ondelete='CASCADE'), nullable=False)
+    kind = db.Column(db.String(20), nullable=False, default=PURCHASED_MATERIAL)
+    name = db.Column(db.String(200), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    unit_cost = db.Column(db.Float, nullable=False, default=0.0)
+    
+    @classmethod
+    def from_dict(cls, material, kind):
+        """Material line from an API material dict; None if it has no name"""
+        if not isinstance(material, dict) or not material.get('name'):
+            return None
+        return cls(
+            kind=kind,
+            name=str(material['name']),
+            quantity=_material_int(material.get('quantity')),
+            unit_cost=_material_float(material.get('unit_cost'))
+        )
+    
+    def to_dict(self):
+        """Convert model instance to the material dict used by the API"""
+        return {
+            'name': self.name,
+            'quantity': self.quantity,
+            'unit_cost': self.unit_cost
+        }
+
+
 class PurchaseOrder(db.Model):
     """Model for purchase orders"""
     
@@ -13,9 +67,17 @@ class PurchaseOrder(db.Model):
     product_name = db.Column(db.String(200), nullable=False)
     quantity = db.Column(db.Integer, nullable=False)
     status = db.Column(db.String(50), default='pending_request')
-    materials = db.Column(db.Text)  # JSON string of materials (purchased quantities)
-    original_requirements = db.Column(db.Text)  # JSON string of original required materials
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+    
+    # Purchased materials and original requirements, loaded for whole result sets at once
+    material_lines = db.relationship(
+        'PurchaseOrderMaterial',
+        order_by='PurchaseOrderMaterial.id',
+        cascade='all, delete-orphan',
+        passive_deletes=True,
+        lazy='selectin'
+    )
     
     def to_dict(self):
         """Convert model instance to dictionary with fixed IST timestamp"""
@@ -34,55 +96,44 @@ class PurchaseOrder(db.Model):
             # Fallback to original isoformat on any failure
             created_fixed = self.created_at.isoformat()
 
-        # Handle missing original_requirements column gracefully
-        try:
-            original_reqs = json.loads(self.original_requirements) if self.original_requirements else []
-        except (AttributeError, json.JSONDecodeError, TypeError):
-            original_reqs = []
-
         return {
             'id': self.id,
             'productionOrderId': self.production_order_id,
             'productName': self.product_name,
             'quantity': self.quantity,
             'status': self.status,
-            'materials': json.loads(self.materials) if self.materials else [],
-            'originalRequirements': original_reqs,
+            'materials': self.get_materials_list(),
+            'originalRequirements': self.get_original_requirements(),
             'createdAt': created_fixed
         }
     
+    def _get_lines(self, kind):
+        return [line.to_dict() for line in self.material_lines if line.kind == kind]
+    
+    def _set_lines(self, kind, materials_list):
+        lines = [PurchaseOrderMaterial.from_dict(material, kind) for material in materials_list or []]
+        self.material_lines = [line for line in self.material_lines if line.kind != kind] + [line for line in lines if line]
+    
     def get_materials_list(self):
         """Get materials as a list of dictionaries"""
-        if not self.materials:
-            return []
-        try:
-            materials = json.loads(self.materials) if isinstance(self.materials, str) else self.materials
-            # Ensure each material has a unit_cost field (default to 0 if missing)
-            for material in materials:
-                if isinstance(material, dict) and 'unit_cost' not in material:
-                    material['unit_cost'] = 0
-            return materials
-        except (json.JSONDecodeError, TypeError):
-            return []
+        return self._get_lines(PURCHASED_MATERIAL)
     
     def get_original_requirements(self):
         """Get original requirements as a list of dictionaries"""
-        try:
-            if not hasattr(self, 'original_requirements') or not self.original_requirements:
-                return []
-            return json.loads(self.original_requirements) if isinstance(self.original_requirements, str) else self.original_requirements
-        except (AttributeError, json.JSONDecodeError, TypeError):
-            return []
+        return self._get_lines(REQUIRED_MATERIAL)
+    
+    def has_materials(self):
+        """Whether the order has any materials to purchase"""
+        return any(line.kind == PURCHASED_MATERIAL for line in self.material_lines)
+    
+    def has_original_requirements(self):
+        """Whether the original requirements have been saved"""
+        return any(line.kind == REQUIRED_MATERIAL for line in self.material_lines)
     
     def set_materials_list(self, materials_list):
         """Set materials from a list of dictionaries"""
-        self.materials = json.dumps(materials_list) if materials_list else None
+        self._set_lines(PURCHASED_MATERIAL, materials_list)
     
     def set_original_requirements(self, requirements_list):
         """Set original requirements from a list of dictionaries"""
-        try:
-            if hasattr(self, 'original_requirements'):
-                self.original_requirements = json.dumps(requirements_list) if requirements_list else None
-        except AttributeError:
-            # Column doesn't exist yet, skip silently
-            pass
\ No newline at end of file
+        self._set_lines(REQUIRED_MATERIAL, requirements_list)
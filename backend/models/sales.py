@@ -2,6 +2,7 @@
 Sales-related database models
 """
 from datetime import datetime
+from sqlalchemy import inspect
 from . import db
 
 class SalesOrder(db.Model):
@@ -32,23 +33,35 @@ class SalesOrder(db.Model):
     bypass_reason = db.Column(db.Text, nullable=True)
     bypassed_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Relationship
     showroom_product = db.relationship('ShowroomProduct', backref='sales_orders')
     
+    @property
+    def dispatch_request(self):
+        """First dispatch request for this order, if any"""
+        return self.dispatch_requests[0] if self.dispatch_requests else None
+    
+    @property
+    def part_load_detail(self):
+        """First part load detail for this order, if any"""
+        return self.part_load_details[0] if self.part_load_details else None
+    
     def to_dict(self):
         """Convert model instance to dictionary"""
-        # Compute payment aggregates by querying database directly to ensure accuracy
         total_paid = 0.0
         try:
-            # Query database directly for current payment transactions
-            from . import db
-            payment_sum = db.session.query(db.func.coalesce(db.func.sum(SalesTransaction.amount), 0)).filter_by(
-                sales_order_id=self.id,
-                transaction_type='payment'
-            ).scalar()
-            total_paid = float(payment_sum or 0)
+            if 'transactions' not in inspect(self).unloaded:
+                # Transactions were eager-loaded with the order (list views)
+                total_paid = sum(float(t.amount or 0) for t in self.transactions if t.transaction_type == 'payment')
+            else:
+                # Query database directly for current payment transactions
+                payment_sum = db.session.query(db.func.coalesce(db.func.sum(SalesTransaction.amount), 0)).filter_by(
+                    sales_order_id=self.id,
+                    transaction_type='payment'
+                ).scalar()
+                total_paid = float(payment_sum or 0)
         except Exception:
             total_paid = 0.0
         balance_amount = float(self.final_amount or 0) - float(total_paid or 0)
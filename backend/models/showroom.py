@@ -7,15 +7,22 @@ from . import db
 class ShowroomProduct(db.Model):
     """Model for showroom products"""
     
+    __table_args__ = (
+        db.Index('ix_showroom_product_status_created', 'showroom_status', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
     category = db.Column(db.String(50), nullable=False)
     cost_price = db.Column(db.Float, default=0.0)
     sale_price = db.Column(db.Float, default=0.0)
     showroom_status = db.Column(db.String(50), default='available')  # available, sold, reserved
+    total_quantity = db.Column(db.Integer, nullable=False, default=1)  # Units received from assembly
+    remaining_quantity = db.Column(db.Integer, nullable=False, default=1)  # Units not held by active sales orders
     production_order_id = db.Column(db.Integer, db.ForeignKey('production_order.id'), nullable=True)
     sold_date = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     def to_dict(self):
         """Convert model instance to dictionary"""
@@ -26,6 +33,8 @@ class ShowroomProduct(db.Model):
             'costPrice': self.cost_price,
             'salePrice': self.sale_price,
             'showroomStatus': self.showroom_status,
+            'totalQuantity': self.total_quantity,
+            'remainingQuantity': self.remaining_quantity,
             'productionOrderId': self.production_order_id,
             'soldDate': self.sold_date.isoformat() if self.sold_date else None,
             'createdAt': self.created_at.isoformat()
@@ -49,7 +58,21 @@ class DispatchRequest(db.Model):
     status = db.Column(db.String(50), default='pending')  # pending, customer_details_required, ready_for_pickup, assigned_transport, in_transit, completed, cancelled
     dispatch_notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+    # Relationships
+    sales_order = db.relationship('SalesOrder', backref=db.backref('dispatch_requests', order_by='DispatchRequest.id'))
+    showroom_product = db.relationship('ShowroomProduct', backref=db.backref('dispatch_requests', order_by='DispatchRequest.id'))
+
+    @property
+    def transport_job(self):
+        """First transport job for this request, if any"""
+        return self.transport_jobs[0] if self.transport_jobs else None
+
+    @property
+    def gate_pass(self):
+        """First gate pass for this request, if any"""
+        return self.gate_passes[0] if self.gate_passes else None
 
     def to_dict(self):
         """Convert model instance to dictionary"""
@@ -81,6 +104,9 @@ class TransportJob(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Relationship
+    dispatch_request = db.relationship('DispatchRequest', backref=db.backref('transport_jobs', order_by='TransportJob.id'))
+
     def to_dict(self):
         """Convert model instance to dictionary"""
         return {
@@ -106,6 +132,9 @@ class GatePass(db.Model):
     issued_at = db.Column(db.DateTime, default=datetime.utcnow)
     verified_at = db.Column(db.DateTime, nullable=True)
 
+    # Relationship
+    dispatch_request = db.relationship('DispatchRequest', backref=db.backref('gate_passes', order_by='GatePass.id'))
+
     def to_dict(self):
         """Convert model instance to dictionary"""
         return {
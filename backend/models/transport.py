@@ -20,6 +20,9 @@ class PartLoadDetail(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Relationship
+    sales_order = db.relationship('SalesOrder', backref=db.backref('part_load_details', order_by='PartLoadDetail.id'))
+
     def to_dict(self):
         return {
             'id': self.id,
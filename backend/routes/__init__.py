@@ -20,6 +20,9 @@ from .auth import auth_bp
 from .gate_entry import gate_entry_bp
 from .approval import approval_bp
 from .hr import hr_bp
+from .notifications import notifications_bp
+from .admin import admin_bp
+from .metrics import metrics_bp
 
 # List of all blueprints
 blueprints = [
@@ -39,6 +42,9 @@ blueprints = [
     gate_entry_bp,
     approval_bp,
     hr_bp,
+    notifications_bp,
+    admin_bp,
+    metrics_bp,
 ]
 
 def register_blueprints(app):
@@ -49,6 +55,9 @@ def register_blueprints(app):
             app.register_blueprint(blueprint, url_prefix='/api/sales')
         elif getattr(blueprint, 'name', None) == 'approval':
             app.register_blueprint(blueprint, url_prefix='/api/approval')
+        # Prometheus scrapes /metrics at the root
+        elif getattr(blueprint, 'name', None) == 'metrics':
+            app.register_blueprint(blueprint)
         else:
             app.register_blueprint(blueprint, url_prefix='/api')
 
@@ -70,5 +79,8 @@ __all__ = [
     'auth_bp',
     'gate_entry_bp',
     'approval_bp',
+    'notifications_bp',
+    'admin_bp',
+    'metrics_bp',
     'unified_tracking_bp'
 ]
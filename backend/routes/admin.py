@@ -0,0 +1,55 @@
+"""
+Admin Routes Module
+API endpoints for operational reports
+"""
+import hmac
+from functools import wraps
+from flask import Blueprint, current_app, jsonify, request
+
+admin_bp = Blueprint('admin', __name__)
+
+
+def admin_token_required(view):
+    """Require ``Authorization: Bearer <ADMIN_API_TOKEN>``; the endpoint is disabled while no token is configured"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config.get('ADMIN_API_TOKEN')
+        if not token:
+            return jsonify({'error': 'Admin API is disabled (ADMIN_API_TOKEN is not set)'}), 403
+        scheme, _, provided = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not hmac.compare_digest(provided.strip().encode(), token.encode()):
+            return jsonify({'error': 'Admin authentication required'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@admin_bp.route('/admin/query-report', methods=['GET'])
+@admin_token_required
+def get_query_report():
+    """Per-route SQL statement counts, database time and N+1 suspects since startup or the last reset (admin only)"""
+    try:
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit <= 0:
+            raise ValueError('limit must be positive')
+
+        routes = current_app.extensions['query_report'].to_list()
+        return jsonify({
+            'enabled': current_app.config.get('QUERY_INSTRUMENTATION', False),
+            'repeatThreshold': current_app.config.get('QUERY_REPEAT_THRESHOLD'),
+            'routes': routes[:limit] if limit else routes
+        }), 200
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/admin/query-report', methods=['DELETE'])
+@admin_token_required
+def reset_query_report():
+    """Clear the per-route SQL report (admin only)"""
+    try:
+        current_app.extensions['query_report'].reset()
+        return jsonify({'message': 'Query report reset'}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
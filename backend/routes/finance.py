@@ -48,8 +48,14 @@ def finance_approve_purchase_order(order_id):
 def get_finance_dashboard():
     """Get financial summary for dashboard"""
     try:
-        dashboard_data = FinanceService.get_dashboard_data()
+        dashboard_data = FinanceService.get_dashboard_data(
+            start_date=request.args.get('startDate'),
+            end_date=request.args.get('endDate'),
+            granularity=request.args.get('granularity')
+        )
         return jsonify(dashboard_data), 200
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({
             'error': str(e),
@@ -61,6 +67,16 @@ def get_finance_dashboard():
         }), 200  # Return 200 with default values to prevent frontend crashes
 
 
+@finance_bp.route('/finance/ledger/rebuild', methods=['POST'])
+def rebuild_finance_ledger():
+    """Recompute the daily and monthly ledger rollups from all transactions"""
+    try:
+        result = FinanceService.rebuild_ledger()
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @finance_bp.route('/finance/transactions', methods=['GET'])
 def get_finance_transactions():
     """Get all financial transactions with filtering"""
@@ -5,7 +5,8 @@ from flask import Blueprint, request, jsonify, send_file
 from datetime import date, datetime
 from services.gate_entry_service_db import gate_entry_service_db
 from services.attendance_integration_service import AttendanceIntegrationService
-from utils.face_recognition_utils import recognize_face_from_database, is_face_recognition_available
+from utils.face_recognition_utils import is_face_recognition_available
+from utils.face_model_cache import face_model_cache
 from models.gate_entry import GateUser
 import pandas as pd
 from io import BytesIO
@@ -326,20 +327,16 @@ def recognize_face():
         return jsonify({'success': False, 'message': 'Photo is required'}), 400
     
     try:
-        # Get all users with face encodings
-        users = GateUser.query.filter(GateUser.face_encoding.isnot(None)).all()
-        
-        if not users:
+        # Check for users with face encodings without loading the encodings
+        face_versions = gate_entry_service_db.get_face_encoding_versions()
+        if not face_versions:
             return jsonify({
                 'success': False,
                 'message': 'No registered faces in database. Please register users first.'
             }), 404
         
-        # Build dictionary of face encodings
-        known_faces = {user.id: user.face_encoding for user in users}
-        
-        # Recognize face
-        result = recognize_face_from_database(photo, known_faces)
+        # Recognize face with the cached, incrementally trained model
+        result = gate_entry_service_db.recognize_face(photo, versions=face_versions)
         
         if not result['success']:
             return jsonify(result), 400
@@ -409,6 +406,7 @@ def face_recognition_status():
             'available': True,
             'users_with_faces': users_with_faces,
             'total_users': total_users,
+            'model': face_model_cache.stats(),
             'message': f'Face recognition (OpenCV) is available. {users_with_faces}/{total_users} users have face encodings.'
         })
     else:
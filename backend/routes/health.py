@@ -1,15 +1,18 @@
 """
 Health check API routes
 """
-from flask import Blueprint, jsonify
+from flask import Blueprint, current_app, jsonify
+from services.health_service import HealthService
 
 health_bp = Blueprint('health', __name__)
 
 @health_bp.route('/health', methods=['GET'])
 def health_check():
-    """Application health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'database': 'mysql',
-        'service': 'production_management'
-    }), 200
\ No newline at end of file
+    """Application health check endpoint: database connectivity and pool saturation"""
+    try:
+        health = HealthService.get_health(current_app.config.get('HEALTH_POOL_SATURATION_THRESHOLD', 0.9))
+        health['service'] = 'production_management'
+        # Degraded still serves traffic; only a lost database takes the instance out of rotation
+        return jsonify(health), 503 if health['status'] == 'unhealthy' else 200
+    except Exception as e:
+        return jsonify({'status': 'unhealthy', 'error': str(e), 'service': 'production_management'}), 503
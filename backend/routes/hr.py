@@ -19,6 +19,16 @@ def get_hr_dashboard():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@hr_bp.route('/hr/dashboard/consistency-check', methods=['POST'])
+def check_hr_dashboard_consistency():
+    """Compare the materialized dashboard with the source tables and rebuild it on drift"""
+    data = request.get_json(silent=True) or {}
+    try:
+        result = HRService.check_dashboard_consistency(repair=data.get('repair', True))
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Employee endpoints
 @hr_bp.route('/hr/employees', methods=['GET'])
 def get_employees():
@@ -177,6 +187,36 @@ def generate_payroll(employee_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@hr_bp.route('/hr/payroll-runs', methods=['POST'])
+def start_payroll_run():
+    """Generate payroll for all active employees in a pay period; poll the run for progress"""
+    data = request.get_json() or {}
+    try:
+        run, started = HRService.start_payroll_run(data, background=not data.get('wait', False))
+        return jsonify(run), 202 if started and run['status'] == 'running' else 200
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@hr_bp.route('/hr/payroll-runs', methods=['GET'])
+def get_payroll_runs():
+    try:
+        runs = HRService.get_payroll_runs()
+        return jsonify(runs), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@hr_bp.route('/hr/payroll-runs/<int:run_id>', methods=['GET'])
+def get_payroll_run(run_id):
+    try:
+        run = HRService.get_payroll_run(run_id)
+        return jsonify(run), 200
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @hr_bp.route('/hr/payrolls/<int:payroll_id>/process', methods=['PUT'])
 def process_payroll(payroll_id):
     try:
@@ -219,7 +259,19 @@ def get_payrolls():
 @hr_bp.route('/hr/payrolls/<int:payroll_id>/payslip', methods=['GET'])
 def download_payslip(payroll_id):
     try:
-        from flask import Response, make_response
+        from flask import make_response, send_file
+
+        if request.args.get('format') == 'pdf':
+            pdf = HRService.get_payslip_pdf(payroll_id)
+            if pdf['status'] == 'ready':
+                return send_file(pdf['path'], mimetype='application/pdf', as_attachment=True,
+                                 download_name=f'payslip_{payroll_id}.pdf')
+            if pdf['status'] == 'failed':
+                return jsonify({'error': f"PDF generation failed: {pdf['error']}"}), 500
+            # Conversion queued; poll again shortly
+            response = jsonify({'status': 'pending'})
+            response.headers['Retry-After'] = '2'
+            return response, 202
 
         # Generate HTML payslip
         payslip_html = HRService.generate_payslip(payroll_id)
@@ -232,21 +284,49 @@ def download_payslip(payroll_id):
 
     except ValueError as ve:
         return jsonify({'error': str(ve)}), 404
+    except RuntimeError as re:
+        return jsonify({'error': str(re)}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@hr_bp.route('/hr/payrolls/export', methods=['GET'])
-def export_payroll_report():
+@hr_bp.route('/hr/payslips/bulk', methods=['POST'])
+def generate_payslips_for_period():
+    """Generate PDF payslips for every payroll in a pay period; poll the job for progress"""
+    data = request.get_json() or {}
     try:
-        from flask import make_response
+        job = HRService.generate_payslips_for_period(data)
+        return jsonify(job), 202
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    except RuntimeError as re:
+        return jsonify({'error': str(re)}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # Generate Excel report
-        excel_buffer = HRService.export_payroll_report()
+@hr_bp.route('/hr/payslips/bulk/<job_id>', methods=['GET'])
+def get_payslip_job(job_id):
+    try:
+        job = HRService.get_payslip_job(job_id)
+        return jsonify(job), 200
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # Return Excel response
-        response = make_response(excel_buffer.getvalue())
-        response.headers['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        response.headers['Content-Disposition'] = 'attachment; filename=payroll_report.xlsx'
+@hr_bp.route('/hr/payrolls/export', methods=['GET'])
+def export_payroll_report():
+    """Stream the payroll report (format=xlsx|csv, optional startDate, endDate, department)"""
+    try:
+        from flask import Response, stream_with_context
+
+        chunks, content_type, filename = HRService.export_payroll_report(
+            start_date=request.args.get('startDate'),
+            end_date=request.args.get('endDate'),
+            department=request.args.get('department'),
+            export_format=request.args.get('format', 'xlsx')
+        )
+        response = Response(stream_with_context(chunks), content_type=content_type)
+        response.headers['Content-Disposition'] = f'attachment; filename={filename}'
         return response
 
     except ValueError as ve:
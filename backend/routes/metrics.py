@@ -0,0 +1,20 @@
+"""
+Metrics Routes Module
+Prometheus scrape endpoint
+"""
+from flask import Blueprint, Response, jsonify
+from utils.metrics import render_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Request, latency and database pool metrics in Prometheus text format (all workers)"""
+    try:
+        body, content_type = render_metrics()
+        return Response(body, status=200, content_type=content_type)
+    except RuntimeError as re:
+        return jsonify({'error': str(re)}), 503
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
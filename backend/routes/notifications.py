@@ -0,0 +1,79 @@
+"""
+Notification Routes Module
+API endpoints for system notifications, including a server-sent events stream
+"""
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from services.notification_service import NotificationService
+
+notifications_bp = Blueprint('notifications', __name__)
+
+
+@notifications_bp.route('/notifications', methods=['GET'])
+def get_notifications():
+    """Get recent notifications, newest first"""
+    try:
+        department = request.args.get('department') or None
+        unread_only = request.args.get('unread_only', 'false').lower() == 'true'
+        limit = request.args.get('limit', 50, type=int)
+        if limit <= 0:
+            raise ValueError('limit must be positive')
+
+        notifications = NotificationService.get_notifications(department, unread_only, limit)
+        return jsonify(notifications), 200
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@notifications_bp.route('/notifications/unread-count', methods=['GET'])
+def get_unread_count():
+    """Get the number of unread notifications"""
+    try:
+        department = request.args.get('department') or None
+        return jsonify({'unreadCount': NotificationService.get_unread_count(department)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@notifications_bp.route('/notifications/<int:notification_id>/read', methods=['POST'])
+def mark_notification_read(notification_id):
+    """Mark a single notification as read"""
+    try:
+        if not NotificationService.mark_as_read(notification_id):
+            return jsonify({'error': 'Notification not found'}), 404
+        return jsonify({'success': True}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@notifications_bp.route('/notifications/read-all', methods=['POST'])
+def mark_all_notifications_read():
+    """Mark all notifications as read, optionally for one department"""
+    try:
+        data = request.get_json(silent=True) or {}
+        department = data.get('department') or request.args.get('department') or None
+        count = NotificationService.mark_all_as_read(department)
+        return jsonify({'success': True, 'markedCount': count}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@notifications_bp.route('/notifications/stream', methods=['GET'])
+def stream_notifications():
+    """Server-sent events stream of notification changes (EventSource resumes via Last-Event-ID)"""
+    department = request.args.get('department') or None
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('since_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({'error': 'Invalid Last-Event-ID'}), 400
+
+    return Response(
+        stream_with_context(NotificationService.stream(department, last_event_id)),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Don't let nginx buffer the stream
+        }
+    )
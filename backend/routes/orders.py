@@ -26,10 +26,23 @@ def get_order_detailed_status(order_id):
 
 @orders_bp.route('/orders/status-tracking', methods=['GET'])
 def get_order_status_tracking():
-    """Get real-time order status tracking across all departments"""
+    """Get real-time order status tracking across all departments
+
+    Optional query params: q (search), updated_since (ISO timestamp from a previous
+    response's serverTime), cursor (nextCursor from a previous page) and limit.
+    """
     try:
         query = request.args.get('q')
-        result = OrderTrackingService.get_order_status_tracking(query)
+        updated_since = request.args.get('updated_since')
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit <= 0:
+            return jsonify({'error': 'limit must be a positive integer'}), 400
+        result = OrderTrackingService.get_order_status_tracking(
+            query, updated_since=updated_since, cursor=cursor, limit=limit
+        )
         return jsonify(result), 200
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -54,7 +54,21 @@ def bulk_add_inventory_items():
         if not isinstance(data, list):
             return jsonify({'error': 'Expected a list of items'}), 400
         result = InventoryService.bulk_add_inventory_items(data)
-        return jsonify(result), 201
+        return jsonify(result), 400 if result['invalid'] else 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@store_bp.route('/store/inventory/import', methods=['POST'])
+def import_inventory_file():
+    """Bulk add inventory items from an uploaded CSV or XLSX file"""
+    try:
+        file = request.files.get('file')
+        if not file or not file.filename:
+            return jsonify({'error': 'No file uploaded'}), 400
+        result = InventoryService.import_inventory_file(file)
+        return jsonify(result), 400 if result['invalid'] else 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
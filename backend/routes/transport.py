@@ -191,12 +191,20 @@ def search_transport_jobs():
         if not search_term:
             return jsonify({'error': 'Search term is required'}), 400
         
-        results = TransportService.search_transport_jobs(search_term)
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', type=int)
+        
+        search = TransportService.search_transport_jobs(search_term, page=page, per_page=per_page)
         return jsonify({
             'searchTerm': search_term,
-            'results': results,
-            'count': len(results)
+            'results': search['results'],
+            'count': len(search['results']),
+            'total': search['total'],
+            'page': search['page'],
+            'perPage': search['perPage']
         }), 200
+    except ValueError as ve:
+        return jsonify({'error': str(ve)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
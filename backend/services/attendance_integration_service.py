@@ -9,6 +9,8 @@ from sqlalchemy.exc import SQLAlchemyError
 
 from models import db
 from models.hr import Employee, Attendance, AttendanceStatus
+from services.hr_dashboard_service import HRDashboardService
+from services.attendance_rollup_service import AttendanceRollupService
 
 logger = logging.getLogger(__name__)
 
@@ -63,8 +65,13 @@ class AttendanceIntegrationService:
                 
                 # Update check-in time if this is earlier
                 if not existing_attendance.check_in_time or entry_time.time() < existing_attendance.check_in_time:
+                    before = (existing_attendance.status, existing_attendance.hours_worked)
                     existing_attendance.check_in_time = entry_time.time()
                     existing_attendance.status = AttendanceStatus.PRESENT
+                    HRDashboardService.attendance_changed(today, before[0], AttendanceStatus.PRESENT)
+                    AttendanceRollupService.attendance_changed(
+                        employee.id, today, before, (AttendanceStatus.PRESENT, existing_attendance.hours_worked)
+                    )
                     db.session.commit()
                     
                     logger.info(f"Updated check-in time for {employee.full_name} to {entry_time.time()}")
@@ -102,6 +109,8 @@ class AttendanceIntegrationService:
             )
             
             db.session.add(new_attendance)
+            HRDashboardService.attendance_changed(today, None, AttendanceStatus.PRESENT)
+            AttendanceRollupService.attendance_changed(employee.id, today, after=(AttendanceStatus.PRESENT, None))
             db.session.commit()
             
             logger.info(f"Attendance marked for {employee.full_name} at {entry_time.time()}")
@@ -181,6 +190,7 @@ class AttendanceIntegrationService:
             
             # Update checkout time
             if not attendance.check_out_time or exit_time.time() > attendance.check_out_time:
+                before = (attendance.status, attendance.hours_worked)
                 attendance.check_out_time = exit_time.time()
                 
                 # Calculate hours worked if both check-in and check-out exist
@@ -190,6 +200,9 @@ class AttendanceIntegrationService:
                     hours_worked = (check_out_datetime - check_in_datetime).total_seconds() / 3600
                     attendance.hours_worked = round(hours_worked, 2)
                 
+                AttendanceRollupService.attendance_changed(
+                    employee.id, today, before, (attendance.status, attendance.hours_worked)
+                )
                 db.session.commit()
                 
                 logger.info(f"Checkout time updated for {employee.full_name} to {exit_time.time()}")
@@ -0,0 +1,218 @@
+"""
+Attendance Rollup Service Module
+Monthly per-employee attendance rollups and the SQL-side attendance summary
+"""
+from datetime import date, timedelta
+from sqlalchemy import case, delete, extract, func, or_, update
+from sqlalchemy.exc import IntegrityError
+from models import db, Employee, Attendance, AttendanceStatus, AttendanceMonthlyRollup
+
+# Rollup column counting each attendance status
+STATUS_COLUMNS = {
+    AttendanceStatus.PRESENT: 'present_days',
+    AttendanceStatus.ABSENT: 'absent_days',
+    AttendanceStatus.LATE: 'late_days',
+    AttendanceStatus.HALF_DAY: 'half_days'
+}
+SUMMARY_KEYS = {
+    'total_days': 'totalDays',
+    'present_days': 'presentDays',
+    'absent_days': 'absentDays',
+    'late_days': 'lateDays',
+    'half_days': 'halfDays',
+    'hours_worked': 'hoursWorked'
+}
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _hours(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class AttendanceRollupService:
+    """
+    Service class for monthly attendance rollups
+
+    Write paths call attendance_changed() before committing so the rollup row
+    moves in the same transaction as the attendance row. Summaries read whole
+    months from the rollups and only aggregate raw attendance for partial months
+    at either end of the range.
+    """
+
+    @classmethod
+    def attendance_changed(cls, employee_id, day, before=None, after=None):
+        """
+        Apply an attendance change to the employee's monthly rollup
+
+        Args:
+            before: (status, hours_worked) of the row before the change, None if it is new
+            after: (status, hours_worked) after the change, None if it was deleted
+        """
+        deltas = {column: 0 for column in SUMMARY_KEYS}
+        for values, sign in ((before, -1), (after, 1)):
+            if values is None:
+                continue
+            status, hours = values
+            deltas['total_days'] += sign
+            if status in STATUS_COLUMNS:
+                deltas[STATUS_COLUMNS[status]] += sign
+            deltas['hours_worked'] += sign * _hours(hours)
+        deltas = {column: delta for column, delta in deltas.items() if delta}
+        if not deltas:
+            return
+
+        month = _month_start(day)
+        if not cls._apply_deltas(employee_id, month, deltas):
+            cls._create_rollup(employee_id, month, deltas)
+
+    @classmethod
+    def rebuild(cls, employee_id=None):
+        """Recompute rollups from the attendance table (all employees by default)"""
+        year = extract('year', Attendance.date)
+        month = extract('month', Attendance.date)
+        query = db.session.query(
+            Attendance.employee_id, year, month, *cls._aggregate_columns()
+        ).group_by(Attendance.employee_id, year, month)
+        removal = delete(AttendanceMonthlyRollup)
+        if employee_id is not None:
+            query = query.filter(Attendance.employee_id == employee_id)
+            removal = removal.where(AttendanceMonthlyRollup.employee_id == employee_id)
+
+        rows = [
+            dict(zip(['employee_id', 'month'] + list(SUMMARY_KEYS), (emp_id, date(int(y), int(m), 1)) + tuple(totals)))
+            for emp_id, y, m, *totals in query.all()
+        ]
+        db.session.execute(removal.execution_options(synchronize_session=False))
+        if rows:
+            db.session.execute(AttendanceMonthlyRollup.__table__.insert(), rows)
+        db.session.commit()
+        return len(rows)
+
+    @classmethod
+    def get_summary(cls, start_date, end_date):
+        """
+        Per-employee attendance totals for a date range
+
+        Whole months come from the rollups; the partial months at either end
+        are aggregated from attendance with one GROUP BY employee_id, status.
+        """
+        totals = {}
+        full_start = start_date if start_date.day == 1 else _next_month(start_date)
+        full_end = _month_start(end_date + timedelta(days=1))  # exclusive
+
+        if full_start < full_end:
+            cls._add_rollup_totals(totals, full_start, full_end)
+            raw_ranges = [(start_date, full_start - timedelta(days=1)), (full_end, end_date)]
+        else:
+            raw_ranges = [(start_date, end_date)]
+        raw_ranges = [(start, end) for start, end in raw_ranges if start <= end]
+        if raw_ranges:
+            cls._add_attendance_totals(totals, raw_ranges)
+
+        summary = sorted(totals.values(), key=lambda row: (row['employeeName'], row['employeeId']))
+        for row in summary:
+            row['hoursWorked'] = round(row['hoursWorked'], 2)
+        return summary
+
+    @staticmethod
+    def _aggregate_columns():
+        columns = [func.count(Attendance.id)]
+        columns += [
+            func.sum(case((Attendance.status == status, 1), else_=0))
+            for status in STATUS_COLUMNS
+        ]
+        columns.append(func.coalesce(func.sum(Attendance.hours_worked), 0))
+        return columns
+
+    @staticmethod
+    def _apply_deltas(employee_id, month, deltas):
+        table = AttendanceMonthlyRollup.__table__
+        result = db.session.execute(
+            update(AttendanceMonthlyRollup)
+            .where(AttendanceMonthlyRollup.employee_id == employee_id, AttendanceMonthlyRollup.month == month)
+            .values({column: table.c[column] + delta for column, delta in deltas.items()})
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount > 0
+
+    @classmethod
+    def _create_rollup(cls, employee_id, month, deltas):
+        """First change of the month: build the row from attendance, which already includes it"""
+        db.session.flush()
+        totals = db.session.query(*cls._aggregate_columns()).filter(
+            Attendance.employee_id == employee_id,
+            Attendance.date >= month,
+            Attendance.date < _next_month(month)
+        ).one()
+        row = dict(zip(SUMMARY_KEYS, (value or 0 for value in totals)))
+        try:
+            with db.session.begin_nested():
+                db.session.execute(
+                    AttendanceMonthlyRollup.__table__.insert().values(employee_id=employee_id, month=month, **row)
+                )
+        except IntegrityError:
+            # Created concurrently by another writer; apply our change on top
+            cls._apply_deltas(employee_id, month, deltas)
+
+    @staticmethod
+    def _new_summary(employee_id, first_name, last_name):
+        row = {'employeeId': employee_id, 'employeeName': f"{first_name} {last_name}"}
+        row.update({key: 0 for key in SUMMARY_KEYS.values()})
+        return row
+
+    @classmethod
+    def _add_rollup_totals(cls, totals, month_from, month_to):
+        rows = db.session.query(
+            AttendanceMonthlyRollup.employee_id,
+            Employee.first_name,
+            Employee.last_name,
+            *[func.sum(getattr(AttendanceMonthlyRollup, column)) for column in SUMMARY_KEYS]
+        ).join(
+            Employee, Employee.id == AttendanceMonthlyRollup.employee_id
+        ).filter(
+            AttendanceMonthlyRollup.month >= month_from,
+            AttendanceMonthlyRollup.month < month_to
+        ).group_by(
+            AttendanceMonthlyRollup.employee_id, Employee.first_name, Employee.last_name
+        ).all()
+
+        for employee_id, first_name, last_name, *values in rows:
+            if not values[0]:
+                continue
+            summary = totals.setdefault(employee_id, cls._new_summary(employee_id, first_name, last_name))
+            for key, value in zip(SUMMARY_KEYS.values(), values):
+                summary[key] += value or 0
+
+    @classmethod
+    def _add_attendance_totals(cls, totals, date_ranges):
+        rows = db.session.query(
+            Attendance.employee_id,
+            Employee.first_name,
+            Employee.last_name,
+            Attendance.status,
+            func.count(Attendance.id),
+            func.coalesce(func.sum(Attendance.hours_worked), 0)
+        ).join(
+            Employee, Employee.id == Attendance.employee_id
+        ).filter(
+            or_(*[Attendance.date.between(start, end) for start, end in date_ranges])
+        ).group_by(
+            Attendance.employee_id, Employee.first_name, Employee.last_name, Attendance.status
+        ).all()
+
+        for employee_id, first_name, last_name, status, count, hours in rows:
+            summary = totals.setdefault(employee_id, cls._new_summary(employee_id, first_name, last_name))
+            summary['totalDays'] += count
+            summary['hoursWorked'] += hours or 0
+            if status in STATUS_COLUMNS:
+                summary[SUMMARY_KEYS[STATUS_COLUMNS[status]]] += count
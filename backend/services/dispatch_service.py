@@ -3,7 +3,9 @@ Dispatch Service Module
 Handles business logic for dispatch operations
 """
 from datetime import datetime
-from models import db, DispatchRequest, SalesOrder, ShowroomProduct, TransportJob, GatePass
+from sqlalchemy import and_
+from models import db, DispatchRequest, SalesOrder, TransportJob, GatePass, loading_profile
+from utils.aggregates import conditional_counts
 
 
 class DispatchService:
@@ -13,13 +15,15 @@ class DispatchService:
     def get_pending_dispatch_orders():
         """Get all orders pending dispatch processing"""
         try:
-            dispatch_requests = DispatchRequest.query.filter_by(status='pending').order_by(DispatchRequest.created_at.desc()).all()
+            dispatch_requests = DispatchRequest.query.options(
+                *loading_profile(DispatchRequest)
+            ).filter_by(status='pending').order_by(DispatchRequest.created_at.desc()).all()
             
             orders = []
             for request in dispatch_requests:
-                # Get related sales order
-                sales_order = SalesOrder.query.get(request.sales_order_id)
-                showroom_product = ShowroomProduct.query.get(request.showroom_product_id)
+                # Related sales order and product are loaded with the requests
+                sales_order = request.sales_order
+                showroom_product = request.showroom_product
                 
                 orders.append({
                     'id': request.id,
@@ -47,15 +51,17 @@ class DispatchService:
     def get_all_dispatch_orders():
         """Get all dispatch orders with status filtering"""
         try:
-            dispatch_requests = DispatchRequest.query.order_by(DispatchRequest.created_at.desc()).all()
+            dispatch_requests = DispatchRequest.query.options(
+                *loading_profile(DispatchRequest)
+            ).order_by(DispatchRequest.created_at.desc()).all()
 
             orders = []
             for request in dispatch_requests:
                 # Get related sales order and showroom product
-                sales_order = SalesOrder.query.get(request.sales_order_id)
-                showroom_product = ShowroomProduct.query.get(request.showroom_product_id)
+                sales_order = request.sales_order
+                showroom_product = request.showroom_product
                 # Get gate pass for vehicle information
-                gate_pass = GatePass.query.filter_by(dispatch_request_id=request.id).first()
+                gate_pass = request.gate_pass
 
                 # Get company name from sales order or transport job
                 company_name = '-'
@@ -63,7 +69,7 @@ class DispatchService:
                     company_name = sales_order.transporter_name
                 elif request.delivery_type == 'transport':
                     # Try to get from transport job
-                    transport_job = TransportJob.query.filter_by(dispatch_request_id=request.id).first()
+                    transport_job = request.transport_job
                     if transport_job and transport_job.transporter_name:
                         company_name = transport_job.transporter_name
 
@@ -294,16 +300,16 @@ class DispatchService:
     def get_watchman_orders():
         """Get orders assigned to watchman (self pickup)"""
         try:
-            gate_passes = GatePass.query.filter(
+            gate_passes = GatePass.query.options(*loading_profile(GatePass)).filter(
                 GatePass.status.in_(['pending', 'verified'])
             ).order_by(GatePass.issued_at.desc()).all()
             
             orders = []
             for gate_pass in gate_passes:
-                dispatch_request = DispatchRequest.query.get(gate_pass.dispatch_request_id)
+                dispatch_request = gate_pass.dispatch_request
                 if dispatch_request:
-                    sales_order = SalesOrder.query.get(dispatch_request.sales_order_id)
-                    showroom_product = ShowroomProduct.query.get(dispatch_request.showroom_product_id)
+                    sales_order = dispatch_request.sales_order
+                    showroom_product = dispatch_request.showroom_product
                     
                     orders.append({
                         'gatePassId': gate_pass.id,
@@ -327,16 +333,16 @@ class DispatchService:
     def get_transport_orders():
         """Get orders assigned to transport (company delivery)"""
         try:
-            transport_jobs = TransportJob.query.filter(
+            transport_jobs = TransportJob.query.options(*loading_profile(TransportJob)).filter(
                 TransportJob.status.in_(['pending', 'assigned', 'in_transit'])
             ).order_by(TransportJob.created_at.desc()).all()
             
             orders = []
             for transport_job in transport_jobs:
-                dispatch_request = DispatchRequest.query.get(transport_job.dispatch_request_id)
+                dispatch_request = transport_job.dispatch_request
                 if dispatch_request:
-                    sales_order = SalesOrder.query.get(dispatch_request.sales_order_id)
-                    showroom_product = ShowroomProduct.query.get(dispatch_request.showroom_product_id)
+                    sales_order = dispatch_request.sales_order
+                    showroom_product = dispatch_request.showroom_product
                     
                     orders.append({
                         'transportJobId': transport_job.id,
@@ -444,54 +450,52 @@ class DispatchService:
     def get_dispatch_summary():
         """Get dispatch department summary statistics"""
         try:
-            # Count orders by status
-            pending_orders = DispatchRequest.query.filter_by(status='pending').count()
-            customer_details_required = DispatchRequest.query.filter_by(status='customer_details_required').count()
-            ready_for_pickup = DispatchRequest.query.filter_by(status='ready_for_pickup').count()
-            in_transit = DispatchRequest.query.filter_by(status='in_transit').count()
-            completed_orders = DispatchRequest.query.filter_by(status='completed').count()
-            
-            # Count self-delivery loading queue (ready_for_load or entered_for_pickup with delivery_type='self')
-            self_delivery_loading_queue = DispatchRequest.query.filter(
-                DispatchRequest.delivery_type == 'self',
-                DispatchRequest.status.in_(['ready_for_load', 'entered_for_pickup'])
-            ).count()
-            
-            # Count part load delivery loading queue (ready_for_pickup or entered_for_pickup with part load delivery type)
-            # Need to join with SalesOrder to check original delivery type
-            part_load_loading_queue = db.session.query(DispatchRequest).join(
-                SalesOrder, DispatchRequest.sales_order_id == SalesOrder.id
-            ).filter(
-                SalesOrder.Delivery_type == 'part load',
-                DispatchRequest.status.in_(['ready_for_pickup', 'entered_for_pickup'])
-            ).count()
-            
-            # Count by delivery type
-            self_delivery = DispatchRequest.query.filter_by(delivery_type='self').count()
-            transport_delivery = DispatchRequest.query.filter_by(delivery_type='transport').count()
-            
-            # Today's dispatch activity
             today = datetime.now().date()
-            today_dispatches = DispatchRequest.query.filter(
-                db.func.date(DispatchRequest.created_at) == today
-            ).count()
-            today_completed = DispatchRequest.query.filter(
-                db.func.date(DispatchRequest.updated_at) == today,
-                DispatchRequest.status == 'completed'
-            ).count()
-            
+
+            # All counters in one query; the sales order join supplies the part load type
+            counts = conditional_counts(
+                DispatchRequest.query.outerjoin(SalesOrder, DispatchRequest.sales_order_id == SalesOrder.id),
+                {
+                    # Orders by status
+                    'pending': DispatchRequest.status == 'pending',
+                    'customer_details_required': DispatchRequest.status == 'customer_details_required',
+                    'ready_for_pickup': DispatchRequest.status == 'ready_for_pickup',
+                    'in_transit': DispatchRequest.status == 'in_transit',
+                    'completed': DispatchRequest.status == 'completed',
+                    # Self-delivery loading queue (ready_for_load or entered_for_pickup with delivery_type='self')
+                    'self_delivery_loading_queue': and_(
+                        DispatchRequest.delivery_type == 'self',
+                        DispatchRequest.status.in_(['ready_for_load', 'entered_for_pickup'])
+                    ),
+                    # Part load loading queue (ready_for_pickup or entered_for_pickup on part load sales orders)
+                    'part_load_loading_queue': and_(
+                        SalesOrder.Delivery_type == 'part load',
+                        DispatchRequest.status.in_(['ready_for_pickup', 'entered_for_pickup'])
+                    ),
+                    # By delivery type
+                    'self_delivery': DispatchRequest.delivery_type == 'self',
+                    'transport_delivery': DispatchRequest.delivery_type == 'transport',
+                    # Today's dispatch activity
+                    'today_dispatches': db.func.date(DispatchRequest.created_at) == today,
+                    'today_completed': and_(
+                        db.func.date(DispatchRequest.updated_at) == today,
+                        DispatchRequest.status == 'completed'
+                    )
+                }
+            )
+
             return {
-                'pendingOrders': pending_orders,
-                'customerDetailsRequired': customer_details_required,
-                'readyForPickup': ready_for_pickup,
-                'selfDeliveryLoadingQueue': self_delivery_loading_queue,
-                'partLoadLoadingQueue': part_load_loading_queue,
-                'inTransit': in_transit,
-                'completedOrders': completed_orders,
-                'selfDelivery': self_delivery,
-                'transportDelivery': transport_delivery,
-                'todayDispatches': today_dispatches,
-                'todayCompleted': today_completed
+                'pendingOrders': counts['pending'],
+                'customerDetailsRequired': counts['customer_details_required'],
+                'readyForPickup': counts['ready_for_pickup'],
+                'selfDeliveryLoadingQueue': counts['self_delivery_loading_queue'],
+                'partLoadLoadingQueue': counts['part_load_loading_queue'],
+                'inTransit': counts['in_transit'],
+                'completedOrders': counts['completed'],
+                'selfDelivery': counts['self_delivery'],
+                'transportDelivery': counts['transport_delivery'],
+                'todayDispatches': counts['today_dispatches'],
+                'todayCompleted': counts['today_completed']
             }
         except Exception as e:
             raise Exception(f"Error getting dispatch summary: {str(e)}")
@@ -562,16 +566,16 @@ class DispatchService:
         """Get notifications for dispatch department about vehicles sent in for loading"""
         try:
             # Get orders that have been sent in for pickup (entered_for_pickup status)
-            dispatch_requests = DispatchRequest.query.filter(
+            dispatch_requests = DispatchRequest.query.options(*loading_profile(DispatchRequest)).filter(
                 DispatchRequest.status == 'entered_for_pickup',
                 DispatchRequest.delivery_type == 'self'
             ).order_by(DispatchRequest.updated_at.desc()).all()
             
             notifications = []
             for dispatch_request in dispatch_requests:
-                sales_order = SalesOrder.query.get(dispatch_request.sales_order_id)
-                showroom_product = ShowroomProduct.query.get(dispatch_request.showroom_product_id)
-                gate_pass = GatePass.query.filter_by(dispatch_request_id=dispatch_request.id).first()
+                sales_order = dispatch_request.sales_order
+                showroom_product = dispatch_request.showroom_product
+                gate_pass = dispatch_request.gate_pass
                 
                 notifications.append({
                     'id': dispatch_request.id,
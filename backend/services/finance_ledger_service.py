@@ -0,0 +1,214 @@
+"""
+Finance Ledger Service Module
+Daily and monthly revenue/expense rollups of finance transactions
+"""
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, delete, func, or_, update
+from sqlalchemy.exc import IntegrityError
+from models import db, FinanceTransaction, FinanceLedgerRollup
+
+# Rollup periods
+DAY = 'day'
+MONTH = 'month'
+TRANSACTION_TYPES = ('revenue', 'expense')
+
+
+def _month_start(day):
+    return day.replace(day=1)
+
+
+def _next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def _as_date(value):
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+class FinanceLedgerService:
+    """
+    Service class for finance ledger rollups
+
+    Every FinanceTransaction write calls record() before committing, so the day
+    and month rows move in the same transaction as the ledger entry. Totals for
+    a date range read whole months from the monthly rows and only the partial
+    months at either end from the daily rows, so the cost depends on the number
+    of periods rather than the number of transactions.
+    """
+
+    @classmethod
+    def record(cls, transaction):
+        """Add a new transaction to its day and month rollups"""
+        if transaction.created_at is None:
+            transaction.created_at = datetime.utcnow()
+        day = transaction.created_at.date()
+        amount = float(transaction.amount or 0)
+        for period, period_start in ((DAY, day), (MONTH, _month_start(day))):
+            if not cls._apply(period, period_start, transaction.transaction_type, amount):
+                cls._create(period, period_start, transaction.transaction_type, amount)
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every rollup from the finance transactions"""
+        day = func.date(FinanceTransaction.created_at)
+        rows = db.session.query(
+            day,
+            FinanceTransaction.transaction_type,
+            func.coalesce(func.sum(FinanceTransaction.amount), 0),
+            func.count(FinanceTransaction.id)
+        ).filter(
+            FinanceTransaction.created_at.isnot(None)
+        ).group_by(day, FinanceTransaction.transaction_type).all()
+
+        rollups = {}
+        for value, transaction_type, amount, count in rows:
+            day_start = _as_date(value)
+            for key in ((DAY, day_start, transaction_type), (MONTH, _month_start(day_start), transaction_type)):
+                totals = rollups.setdefault(key, [0.0, 0])
+                totals[0] += float(amount or 0)
+                totals[1] += count
+
+        db.session.execute(delete(FinanceLedgerRollup).execution_options(synchronize_session=False))
+        if rollups:
+            db.session.execute(FinanceLedgerRollup.__table__.insert(), [
+                {
+                    'period': period,
+                    'period_start': period_start,
+                    'transaction_type': transaction_type,
+                    'amount': amount,
+                    'transaction_count': count
+                }
+                for (period, period_start, transaction_type), (amount, count) in rollups.items()
+            ])
+        db.session.commit()
+        return {
+            'days': sum(1 for period, _, _ in rollups if period == DAY),
+            'months': sum(1 for period, _, _ in rollups if period == MONTH)
+        }
+
+    @classmethod
+    def get_totals(cls, start_date=None, end_date=None):
+        """
+        Revenue and expense totals for an inclusive date range (open-ended when a bound is None)
+
+        Returns:
+            dict: transaction type -> {'amount', 'count'}
+        """
+        totals = {transaction_type: {'amount': 0.0, 'count': 0} for transaction_type in TRANSACTION_TYPES}
+        rows = db.session.query(
+            FinanceLedgerRollup.transaction_type,
+            func.sum(FinanceLedgerRollup.amount),
+            func.sum(FinanceLedgerRollup.transaction_count)
+        ).filter(
+            cls._range_criteria(start_date, end_date)
+        ).group_by(FinanceLedgerRollup.transaction_type).all()
+
+        for transaction_type, amount, count in rows:
+            entry = totals.setdefault(transaction_type, {'amount': 0.0, 'count': 0})
+            entry['amount'] += float(amount or 0)
+            entry['count'] += int(count or 0)
+        return totals
+
+    @classmethod
+    def get_series(cls, start_date=None, end_date=None, granularity=MONTH):
+        """
+        Revenue, expenses and net per day or per month within the date range
+
+        Monthly buckets at either end only include the days inside the range.
+        """
+        if granularity not in (DAY, MONTH):
+            raise ValueError(f"Unsupported granularity: {granularity}")
+
+        criteria = (
+            cls._range_criteria(start_date, end_date) if granularity == MONTH
+            else and_(FinanceLedgerRollup.period == DAY, *cls._bounds(start_date, end_date))
+        )
+        rows = db.session.query(
+            FinanceLedgerRollup.period_start,
+            FinanceLedgerRollup.transaction_type,
+            FinanceLedgerRollup.amount
+        ).filter(criteria).all()
+
+        buckets = {}
+        for period_start, transaction_type, amount in rows:
+            key = _month_start(period_start) if granularity == MONTH else period_start
+            bucket = buckets.setdefault(key, {transaction_type: 0.0 for transaction_type in TRANSACTION_TYPES})
+            bucket[transaction_type] = bucket.get(transaction_type, 0.0) + float(amount or 0)
+
+        return [
+            {
+                'period': key.isoformat(),
+                'revenue': round(bucket['revenue'], 2),
+                'expenses': round(bucket['expense'], 2),
+                'net': round(bucket['revenue'] - bucket['expense'], 2)
+            }
+            for key, bucket in sorted(buckets.items())
+        ]
+
+    @staticmethod
+    def _bounds(start_date, end_date):
+        bounds = []
+        if start_date:
+            bounds.append(FinanceLedgerRollup.period_start >= start_date)
+        if end_date:
+            bounds.append(FinanceLedgerRollup.period_start <= end_date)
+        return bounds
+
+    @classmethod
+    def _range_criteria(cls, start_date, end_date):
+        """Monthly rows for whole months in the range, daily rows for the partial months"""
+        full_start = None if start_date is None else (
+            start_date if start_date.day == 1 else _next_month(start_date)
+        )
+        full_end = None if end_date is None else _month_start(end_date + timedelta(days=1))  # exclusive
+
+        if full_start is not None and full_end is not None and full_start >= full_end:
+            return and_(FinanceLedgerRollup.period == DAY, *cls._bounds(start_date, end_date))
+
+        monthly = [FinanceLedgerRollup.period == MONTH]
+        daily_ranges = []
+        if full_start is not None:
+            monthly.append(FinanceLedgerRollup.period_start >= full_start)
+            if start_date < full_start:
+                daily_ranges.append(FinanceLedgerRollup.period_start.between(start_date, full_start - timedelta(days=1)))
+        if full_end is not None:
+            monthly.append(FinanceLedgerRollup.period_start < full_end)
+            if full_end <= end_date:
+                daily_ranges.append(FinanceLedgerRollup.period_start.between(full_end, end_date))
+
+        criteria = [and_(*monthly)]
+        if daily_ranges:
+            criteria.append(and_(FinanceLedgerRollup.period == DAY, or_(*daily_ranges)))
+        return or_(*criteria)
+
+    @staticmethod
+    def _apply(period, period_start, transaction_type, amount):
+        result = db.session.execute(
+            update(FinanceLedgerRollup)
+            .where(
+                FinanceLedgerRollup.period == period,
+                FinanceLedgerRollup.period_start == period_start,
+                FinanceLedgerRollup.transaction_type == transaction_type
+            )
+            .values(
+                amount=FinanceLedgerRollup.amount + amount,
+                transaction_count=FinanceLedgerRollup.transaction_count + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount > 0
+
+    @classmethod
+    def _create(cls, period, period_start, transaction_type, amount):
+        try:
+            with db.session.begin_nested():
+                db.session.execute(FinanceLedgerRollup.__table__.insert().values(
+                    period=period,
+                    period_start=period_start,
+                    transaction_type=transaction_type,
+                    amount=amount,
+                    transaction_count=1
+                ))
+        except IntegrityError:
+            # Created concurrently by another writer; apply our change on top
+            cls._apply(period, period_start, transaction_type, amount)
@@ -2,9 +2,10 @@
 Finance Service Module
 Handles business logic for finance operations
 """
-from datetime import datetime
-from models import db, PurchaseOrder, ProductionOrder, FinanceTransaction, ShowroomProduct, SalesOrder, SalesTransaction
-import json
+from datetime import datetime, timedelta
+from models import db, PurchaseOrder, PurchaseOrderMaterial, ProductionOrder, FinanceTransaction, SalesOrder, SalesTransaction
+from models.purchase import PURCHASED_MATERIAL
+from services.finance_ledger_service import FinanceLedgerService
 import traceback
 
 
@@ -30,11 +31,7 @@ class FinanceService:
             order.status = 'finance_approved'
             
             # Calculate total cost and create expense transaction
-            materials = json.loads(order.materials) if order.materials else []
-            total_cost = sum(
-                material.get('quantity', 0) * material.get('unit_cost', 0)
-                for material in materials
-            )
+            total_cost = FinanceService._material_cost(PurchaseOrderMaterial.purchase_order_id == order.id)
             
             # Create expense transaction
             expense_transaction = FinanceTransaction(
@@ -45,6 +42,7 @@ class FinanceService:
                 reference_type='purchase_order'
             )
             db.session.add(expense_transaction)
+            FinanceLedgerService.record(expense_transaction)
             
             # Update production order status
             production_order = ProductionOrder.query.get(order.production_order_id)
@@ -66,31 +64,45 @@ class FinanceService:
         }
     
     @staticmethod
-    def get_dashboard_data():
-        """Get financial summary for dashboard"""
+    def _material_cost(*criteria):
+        """Sum of quantity * unit_cost over purchased material lines of the matching orders"""
+        return db.session.query(
+            db.func.coalesce(db.func.sum(PurchaseOrderMaterial.quantity * PurchaseOrderMaterial.unit_cost), 0)
+        ).join(
+            PurchaseOrder, PurchaseOrder.id == PurchaseOrderMaterial.purchase_order_id
+        ).filter(
+            PurchaseOrderMaterial.kind == PURCHASED_MATERIAL,
+            *criteria
+        ).scalar()
+    
+    @staticmethod
+    def get_dashboard_data(start_date=None, end_date=None, granularity=None):
+        """
+        Get financial summary for dashboard
+        
+        Totals come from the ledger rollups for the inclusive date range (all
+        time by default); granularity ('day' or 'month') adds a per-period series.
+        """
+        start_date = datetime.fromisoformat(start_date).date() if start_date else None
+        end_date = datetime.fromisoformat(end_date).date() if end_date else None
+        if start_date and end_date and end_date < start_date:
+            raise ValueError('endDate must not be before startDate')
+        if granularity and granularity not in ('day', 'month'):
+            raise ValueError(f'Unsupported granularity: {granularity}')
+        
         try:
-            # Calculate total revenue from sold products
-            sold_products = ShowroomProduct.query.filter_by(showroom_status='sold').all()
-            total_revenue = sum(product.sale_price or 0 for product in sold_products)
-
-            # Calculate total expenses from approved purchase orders
-            approved_orders = PurchaseOrder.query.filter(
-                PurchaseOrder.status.in_(['finance_approved', 'purchased', 'verified_in_store'])
-            ).all()
-
-            total_expenses = 0
-            for order in approved_orders:
-                try:
-                    materials = json.loads(order.materials) if order.materials else []
-                    order_cost = sum(material.get('quantity', 0) * material.get('unit_cost', 0) for material in materials if isinstance(material, dict))
-                    total_expenses += order_cost
-                except (json.JSONDecodeError, TypeError, AttributeError) as e:
-                    continue
-
+            totals = FinanceLedgerService.get_totals(start_date, end_date)
+            total_revenue = totals['revenue']['amount']
+            total_expenses = totals['expense']['amount']
             net_profit = total_revenue - total_expenses
 
             # Get recent transactions
-            recent_transactions = FinanceTransaction.query.order_by(
+            recent_query = FinanceTransaction.query
+            if start_date:
+                recent_query = recent_query.filter(FinanceTransaction.created_at >= start_date)
+            if end_date:
+                recent_query = recent_query.filter(FinanceTransaction.created_at < end_date + timedelta(days=1))
+            recent_transactions = recent_query.order_by(
                 FinanceTransaction.created_at.desc()
             ).limit(10).all()
 
@@ -102,8 +114,12 @@ class FinanceService:
                 'totalExpenses': float(total_expenses),
                 'netProfit': float(net_profit),
                 'recentTransactions': [txn.to_dict() for txn in recent_transactions],
-                'pendingApprovals': pending_count
+                'pendingApprovals': pending_count,
+                'startDate': start_date.isoformat() if start_date else None,
+                'endDate': end_date.isoformat() if end_date else None
             }
+            if granularity:
+                result['periods'] = FinanceLedgerService.get_series(start_date, end_date, granularity)
 
             return result
 
@@ -143,9 +159,15 @@ class FinanceService:
             reference_type=reference_type
         )
         db.session.add(transaction)
+        FinanceLedgerService.record(transaction)
         db.session.commit()
         return transaction.to_dict()
 
+    @staticmethod
+    def rebuild_ledger():
+        """Recompute the ledger rollups from all finance transactions"""
+        return FinanceLedgerService.rebuild()
+
     @staticmethod
     def get_sales_payments_pending_approval():
         """Sales orders payments awaiting finance approval"""
@@ -236,5 +258,6 @@ class FinanceService:
             reference_type=reference_type
         )
         db.session.add(transaction)
+        FinanceLedgerService.record(transaction)
         db.session.commit()
         return transaction.to_dict()
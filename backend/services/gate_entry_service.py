@@ -5,11 +5,25 @@ import json
 from typing import Dict, List, Optional
 import logging
 
+from utils.append_log import AppendLogTable
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+GATE_LOG_COLUMNS = ['timestamp', 'user_name', 'user_phone', 'action', 'method', 'details', 'status']
+GOING_OUT_LOG_COLUMNS = ['timestamp', 'user_name', 'user_phone', 'reason', 'details', 'status', 'return_time']
+USER_COLUMNS = ['user_id', 'name', 'phone', 'registered_at', 'last_entry', 'last_exit', 'status', 'photo']
+
 class GateEntryService:
+    """
+    File-backed gate entry service
+
+    Users and logs live in append-only JSON-lines tables (``*.jsonl`` beside the
+    workbooks) so each write appends one record under a file lock. The ``.xlsx``
+    files are produced on demand by export_to_excel().
+    """
+
     def __init__(self):
         self.data_dir = os.path.join(os.path.dirname(__file__), '..', 'data')
         self.gate_logs_file = os.path.join(self.data_dir, 'gate_entry_logs.xlsx')
@@ -19,64 +33,83 @@ class GateEntryService:
         # Ensure data directory exists
         os.makedirs(self.data_dir, exist_ok=True)
 
-        # Initialize Excel files if they don't exist
+        self.gate_logs = AppendLogTable(os.path.join(self.data_dir, 'gate_entry_logs.jsonl'), 'id')
+        self.going_out_logs = AppendLogTable(
+            os.path.join(self.data_dir, 'going_out_logs.jsonl'), 'id', index_column='user_phone'
+        )
+        self.users = AppendLogTable(os.path.join(self.data_dir, 'gate_users.jsonl'), 'phone')
+
+        # Import existing Excel files the first time the logs are used
         self._initialize_files()
 
     def _initialize_files(self):
-        """Initialize Excel files with proper headers if they don't exist"""
-        # Gate Entry Logs
-        if not os.path.exists(self.gate_logs_file):
-            df = pd.DataFrame(columns=[
-                'timestamp', 'user_name', 'user_phone', 'action',
-                'method', 'details', 'status'
-            ])
-            df.to_excel(self.gate_logs_file, index=False)
-
-        # Going Out Logs
-        if not os.path.exists(self.going_out_logs_file):
-            df = pd.DataFrame(columns=[
-                'timestamp', 'user_name', 'user_phone', 'reason',
-                'details', 'status', 'return_time'
-            ])
-            df.to_excel(self.going_out_logs_file, index=False)
-
-        # Users
-        if not os.path.exists(self.users_file):
-            df = pd.DataFrame(columns=[
-                'user_id', 'name', 'phone', 'registered_at',
-                'last_entry', 'last_exit', 'status', 'photo'
-            ])
-            df.to_excel(self.users_file, index=False)
+        """Seed each table from its workbook if the table doesn't exist yet"""
+        self._import_workbook(self.gate_logs, self.gate_logs_file, ['timestamp'], with_id=True)
+        self._import_workbook(self.going_out_logs, self.going_out_logs_file, ['timestamp', 'return_time'], with_id=True)
+        self._import_workbook(self.users, self.users_file, ['registered_at', 'last_entry', 'last_exit'])
+
+    @staticmethod
+    def _import_workbook(table: AppendLogTable, excel_file: str, time_columns: List[str], with_id: bool = False):
+        with table.transaction():
+            if table.exists():
+                return
+            rows = []
+            if os.path.exists(excel_file):
+                df = pd.read_excel(excel_file)
+                for column in time_columns:
+                    if column in df.columns:
+                        df[column] = pd.to_datetime(df[column], errors='coerce')
+                for record in df.to_dict('records'):
+                    row = {}
+                    for key, value in record.items():
+                        if pd.isna(value):
+                            value = None
+                        elif isinstance(value, pd.Timestamp):
+                            value = value.isoformat()
+                        elif hasattr(value, 'item'):
+                            value = value.item()  # numpy scalar
+                        row[key] = value
+                    rows.append(row)
+            if with_id:
+                for row_id, row in enumerate(rows, start=1):
+                    row['id'] = row_id
+            table.bulk_put(rows)
+            logger.info(f"Imported {len(rows)} rows from {excel_file} into {table.path}")
+
+    @staticmethod
+    def _next_id(table: AppendLogTable) -> int:
+        latest = table.latest(1)
+        return latest[0]['id'] + 1 if latest else 1
+
+    @staticmethod
+    def _public(row: Dict, columns: List[str]) -> Dict:
+        """Row restricted to the columns exposed by the workbook layout"""
+        return {column: row.get(column) for column in columns}
 
     def register_user(self, name: str, phone: str, photo: str = None) -> Dict:
         """Register a new user for gate entry system"""
         try:
-            # Read existing users
-            df = pd.read_excel(self.users_file)
-
-            # Check if user already exists
-            if phone in df['phone'].values:
-                return {
-                    'success': False,
-                    'message': 'User with this phone number already exists'
+            with self.users.transaction():
+                # Check if user already exists
+                if self.users.get(phone) is not None:
+                    return {
+                        'success': False,
+                        'message': 'User with this phone number already exists'
+                    }
+
+                # Create new user entry
+                user_id = max((user['user_id'] or 0 for user in self.users.rows()), default=0) + 1
+                new_user = {
+                    'user_id': user_id,
+                    'name': name,
+                    'phone': phone,
+                    'registered_at': datetime.now().isoformat(),
+                    'last_entry': None,
+                    'last_exit': None,
+                    'status': 'active',
+                    'photo': photo
                 }
-
-            # Create new user entry
-            user_id = len(df) + 1
-            new_user = {
-                'user_id': user_id,
-                'name': name,
-                'phone': phone,
-                'registered_at': datetime.now(),
-                'last_entry': None,
-                'last_exit': None,
-                'status': 'active',
-                'photo': photo
-            }
-
-            # Add to dataframe
-            df = pd.concat([df, pd.DataFrame([new_user])], ignore_index=True)
-            df.to_excel(self.users_file, index=False)
+                self.users.put(new_user)
 
             logger.info(f"New user registered: {name} ({phone})")
             return {
@@ -95,30 +128,7 @@ class GateEntryService:
     def get_users(self) -> List[Dict]:
         """Get all registered users"""
         try:
-            df = pd.read_excel(self.users_file)
-            users = df.to_dict('records')
-
-            # Convert timestamps to string format and handle NaN values
-            for user in users:
-                if pd.notna(user.get('registered_at')):
-                    user['registered_at'] = user['registered_at'].isoformat()
-                else:
-                    user['registered_at'] = None
-                if pd.notna(user.get('last_entry')):
-                    user['last_entry'] = user['last_entry'].isoformat()
-                else:
-                    user['last_entry'] = None
-                if pd.notna(user.get('last_exit')):
-                    user['last_exit'] = user['last_exit'].isoformat()
-                else:
-                    user['last_exit'] = None
-
-                # Handle NaN values in other fields
-                for key, value in user.items():
-                    if pd.isna(value):
-                        user[key] = None
-
-            return users
+            return [self._public(user, USER_COLUMNS) for user in self.users.rows()]
 
         except Exception as e:
             logger.error(f"Error getting users: {e}")
@@ -127,17 +137,15 @@ class GateEntryService:
     def delete_user(self, phone: str) -> Dict:
         """Delete a user from the system"""
         try:
-            df = pd.read_excel(self.users_file)
-
-            if phone not in df['phone'].values:
-                return {
-                    'success': False,
-                    'message': 'User not found'
-                }
+            with self.users.transaction():
+                if self.users.get(phone) is None:
+                    return {
+                        'success': False,
+                        'message': 'User not found'
+                    }
 
-            # Remove user
-            df = df[df['phone'] != phone]
-            df.to_excel(self.users_file, index=False)
+                # Remove user
+                self.users.delete(phone)
 
             logger.info(f"User deleted: {phone}")
             return {
@@ -152,41 +160,40 @@ class GateEntryService:
                 'message': f'Error deleting user: {str(e)}'
             }
 
+    def _record_gate_action(self, user_phone: str, action: str, details: str) -> Optional[str]:
+        """Append a manual entry/exit and stamp the user; returns the user's name or None"""
+        with self.users.transaction():
+            # Check if user exists
+            user = self.users.get(user_phone)
+            if user is None:
+                return None
+
+            now = datetime.now().isoformat()
+            self.users.update(user_phone, {'last_entry' if action == 'entry' else 'last_exit': now})
+
+            with self.gate_logs.transaction():
+                self.gate_logs.put({
+                    'id': self._next_id(self.gate_logs),
+                    'timestamp': now,
+                    'user_name': user['name'],
+                    'user_phone': user_phone,
+                    'action': action,
+                    'method': 'manual',
+                    'details': details,
+                    'status': 'completed'
+                })
+            return user['name']
+
     def manual_entry(self, user_phone: str, details: str = "") -> Dict:
         """Record manual entry for a user"""
         try:
-            # Check if user exists
-            df_users = pd.read_excel(self.users_file)
-            user = df_users[df_users['phone'] == user_phone]
-
-            if user.empty:
+            user_name = self._record_gate_action(user_phone, 'entry', details)
+            if user_name is None:
                 return {
                     'success': False,
                     'message': 'User not found. Please register first.'
                 }
 
-            user_name = user.iloc[0]['name']
-
-            # Record entry in gate logs
-            entry_data = {
-                'timestamp': datetime.now(),
-                'user_name': user_name,
-                'user_phone': user_phone,
-                'action': 'entry',
-                'method': 'manual',
-                'details': details,
-                'status': 'completed'
-            }
-
-            # Update user's last entry
-            df_users.loc[df_users['phone'] == user_phone, 'last_entry'] = datetime.now()
-            df_users.to_excel(self.users_file, index=False)
-
-            # Add to gate logs
-            df_logs = pd.read_excel(self.gate_logs_file)
-            df_logs = pd.concat([df_logs, pd.DataFrame([entry_data])], ignore_index=True)
-            df_logs.to_excel(self.gate_logs_file, index=False)
-
             logger.info(f"Manual entry recorded for {user_name}")
             return {
                 'success': True,
@@ -204,38 +211,13 @@ class GateEntryService:
     def manual_exit(self, user_phone: str, details: str = "") -> Dict:
         """Record manual exit for a user"""
         try:
-            # Check if user exists
-            df_users = pd.read_excel(self.users_file)
-            user = df_users[df_users['phone'] == user_phone]
-
-            if user.empty:
+            user_name = self._record_gate_action(user_phone, 'exit', details)
+            if user_name is None:
                 return {
                     'success': False,
                     'message': 'User not found. Please register first.'
                 }
 
-            user_name = user.iloc[0]['name']
-
-            # Record exit in gate logs
-            exit_data = {
-                'timestamp': datetime.now(),
-                'user_name': user_name,
-                'user_phone': user_phone,
-                'action': 'exit',
-                'method': 'manual',
-                'details': details,
-                'status': 'completed'
-            }
-
-            # Update user's last exit
-            df_users.loc[df_users['phone'] == user_phone, 'last_exit'] = datetime.now()
-            df_users.to_excel(self.users_file, index=False)
-
-            # Add to gate logs
-            df_logs = pd.read_excel(self.gate_logs_file)
-            df_logs = pd.concat([df_logs, pd.DataFrame([exit_data])], ignore_index=True)
-            df_logs.to_excel(self.gate_logs_file, index=False)
-
             logger.info(f"Manual exit recorded for {user_name}")
             return {
                 'success': True,
@@ -254,32 +236,28 @@ class GateEntryService:
         """Record going out for a user"""
         try:
             # Check if user exists
-            df_users = pd.read_excel(self.users_file)
-            user = df_users[df_users['phone'] == user_phone]
+            user = self.users.get(user_phone)
 
-            if user.empty:
+            if user is None:
                 return {
                     'success': False,
                     'message': 'User not found. Please register first.'
                 }
 
-            user_name = user.iloc[0]['name']
+            user_name = user['name']
 
             # Record going out in logs
-            going_out_data = {
-                'timestamp': datetime.now(),
-                'user_name': user_name,
-                'user_phone': user_phone,
-                'reason': reason,
-                'details': details,
-                'status': 'out',
-                'return_time': None
-            }
-
-            # Add to going out logs
-            df_logs = pd.read_excel(self.going_out_logs_file)
-            df_logs = pd.concat([df_logs, pd.DataFrame([going_out_data])], ignore_index=True)
-            df_logs.to_excel(self.going_out_logs_file, index=False)
+            with self.going_out_logs.transaction():
+                self.going_out_logs.put({
+                    'id': self._next_id(self.going_out_logs),
+                    'timestamp': datetime.now().isoformat(),
+                    'user_name': user_name,
+                    'user_phone': user_phone,
+                    'reason': reason,
+                    'details': details,
+                    'status': 'out',
+                    'return_time': None
+                })
 
             logger.info(f"Going out recorded for {user_name} - {reason}")
             return {
@@ -299,40 +277,37 @@ class GateEntryService:
         """Record coming back for a user"""
         try:
             # Check if user exists
-            df_users = pd.read_excel(self.users_file)
-            user = df_users[df_users['phone'] == user_phone]
+            user = self.users.get(user_phone)
 
-            if user.empty:
+            if user is None:
                 return {
                     'success': False,
                     'message': 'User not found. Please register first.'
                 }
 
-            user_name = user.iloc[0]['name']
+            user_name = user['name']
 
-            # Find the latest going out record for this user
-            df_logs = pd.read_excel(self.going_out_logs_file)
-            user_logs = df_logs[df_logs['user_phone'] == user_phone]
+            with self.going_out_logs.transaction():
+                # Find the latest going out record for this user
+                latest_log = self.going_out_logs.latest_for(user_phone)
 
-            if user_logs.empty:
-                return {
-                    'success': False,
-                    'message': 'No going out record found for this user'
-                }
-
-            # Get the latest going out record
-            latest_log = user_logs.iloc[-1]
+                if latest_log is None:
+                    return {
+                        'success': False,
+                        'message': 'No going out record found for this user'
+                    }
 
-            if latest_log['status'] == 'returned':
-                return {
-                    'success': False,
-                    'message': 'User has already returned'
-                }
+                if latest_log['status'] == 'returned':
+                    return {
+                        'success': False,
+                        'message': 'User has already returned'
+                    }
 
-            # Update the going out record with return time
-            df_logs.loc[df_logs.index[-1], 'return_time'] = datetime.now()
-            df_logs.loc[df_logs.index[-1], 'status'] = 'returned'
-            df_logs.to_excel(self.going_out_logs_file, index=False)
+                # Update the going out record with return time
+                self.going_out_logs.update(latest_log['id'], {
+                    'return_time': datetime.now().isoformat(),
+                    'status': 'returned'
+                })
 
             logger.info(f"Coming back recorded for {user_name}")
             return {
@@ -351,22 +326,8 @@ class GateEntryService:
     def get_gate_logs(self, limit: int = 100) -> List[Dict]:
         """Get gate entry logs"""
         try:
-            df = pd.read_excel(self.gate_logs_file)
-            logs = df.tail(limit).to_dict('records')
-
-            # Convert timestamps to string format and handle NaN values
-            for log in logs:
-                if pd.notna(log.get('timestamp')):
-                    log['timestamp'] = log['timestamp'].isoformat()
-                else:
-                    log['timestamp'] = None
-
-                # Handle NaN values in other fields
-                for key, value in log.items():
-                    if pd.isna(value):
-                        log[key] = None
-
-            return logs[::-1]  # Return in reverse chronological order
+            # Newest first
+            return [self._public(log, GATE_LOG_COLUMNS) for log in self.gate_logs.latest(limit)]
 
         except Exception as e:
             logger.error(f"Error getting gate logs: {e}")
@@ -375,26 +336,8 @@ class GateEntryService:
     def get_going_out_logs(self, limit: int = 100) -> List[Dict]:
         """Get going out logs"""
         try:
-            df = pd.read_excel(self.going_out_logs_file)
-            logs = df.tail(limit).to_dict('records')
-
-            # Convert timestamps to string format and handle NaN values
-            for log in logs:
-                if pd.notna(log.get('timestamp')):
-                    log['timestamp'] = log['timestamp'].isoformat()
-                else:
-                    log['timestamp'] = None
-                if pd.notna(log.get('return_time')):
-                    log['return_time'] = log['return_time'].isoformat()
-                else:
-                    log['return_time'] = None
-
-                # Handle NaN values in other fields
-                for key, value in log.items():
-                    if pd.isna(value):
-                        log[key] = None
-
-            return logs[::-1]  # Return in reverse chronological order
+            # Newest first
+            return [self._public(log, GOING_OUT_LOG_COLUMNS) for log in self.going_out_logs.latest(limit)]
 
         except Exception as e:
             logger.error(f"Error getting going out logs: {e}")
@@ -403,23 +346,20 @@ class GateEntryService:
     def get_today_logs(self) -> Dict:
         """Get today's logs summary"""
         try:
-            today = datetime.now().date()
+            today = datetime.now().date().isoformat()
 
-            # Gate logs
-            df_gate = pd.read_excel(self.gate_logs_file)
-            df_gate['timestamp'] = pd.to_datetime(df_gate['timestamp'])
-            today_gate_logs = df_gate[df_gate['timestamp'].dt.date == today]
+            # Logs are appended in time order, so today's rows are the newest ones
+            def is_today(log):
+                return (log.get('timestamp') or '')[:10] == today
 
-            # Going out logs
-            df_going_out = pd.read_excel(self.going_out_logs_file)
-            df_going_out['timestamp'] = pd.to_datetime(df_going_out['timestamp'])
-            today_going_out_logs = df_going_out[df_going_out['timestamp'].dt.date == today]
+            today_gate_logs = self.gate_logs.newest_while(is_today)
+            today_going_out_logs = self.going_out_logs.newest_while(is_today)
 
             return {
-                'gate_entries': len(today_gate_logs[today_gate_logs['action'] == 'entry']),
-                'gate_exits': len(today_gate_logs[today_gate_logs['action'] == 'exit']),
+                'gate_entries': sum(1 for log in today_gate_logs if log['action'] == 'entry'),
+                'gate_exits': sum(1 for log in today_gate_logs if log['action'] == 'exit'),
                 'going_out': len(today_going_out_logs),
-                'returned': len(today_going_out_logs[today_going_out_logs['status'] == 'returned'])
+                'returned': sum(1 for log in today_going_out_logs if log['status'] == 'returned')
             }
 
         except Exception as e:
@@ -431,5 +371,37 @@ class GateEntryService:
                 'returned': 0
             }
 
+    def export_to_excel(self) -> Dict:
+        """Write the current users and logs to the .xlsx workbooks"""
+        try:
+            exports = [
+                (self.gate_logs, self.gate_logs_file, GATE_LOG_COLUMNS, ['timestamp']),
+                (self.going_out_logs, self.going_out_logs_file, GOING_OUT_LOG_COLUMNS, ['timestamp', 'return_time']),
+                (self.users, self.users_file, USER_COLUMNS, ['registered_at', 'last_entry', 'last_exit'])
+            ]
+            for table, excel_file, columns, time_columns in exports:
+                df = pd.DataFrame([self._public(row, columns) for row in table.rows()], columns=columns)
+                for column in time_columns:
+                    df[column] = pd.to_datetime(df[column], errors='coerce')
+
+                # Write beside the target and swap in, so readers never see a partial workbook
+                tmp_file = excel_file + '.tmp.xlsx'
+                df.to_excel(tmp_file, index=False)
+                os.replace(tmp_file, excel_file)
+
+            logger.info("Gate entry workbooks exported")
+            return {
+                'success': True,
+                'message': 'Gate entry logs exported to Excel',
+                'files': [self.gate_logs_file, self.going_out_logs_file, self.users_file]
+            }
+
+        except Exception as e:
+            logger.error(f"Error exporting gate entry workbooks: {e}")
+            return {
+                'success': False,
+                'message': f'Error exporting logs: {str(e)}'
+            }
+
 # Global service instance
 gate_entry_service = GateEntryService()
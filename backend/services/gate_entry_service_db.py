@@ -2,16 +2,20 @@
 Gate Entry Service - Database Implementation
 Replaces Excel-based storage with MySQL database
 """
-import json
 import logging
 from datetime import datetime, date, timedelta
 from typing import Dict, List, Optional
 from sqlalchemy import and_, or_, func, desc
 from sqlalchemy.exc import SQLAlchemyError
+from flask import current_app, has_app_context
 
 from models import db
 from models.gate_entry import GateUser, GateEntryLog, GoingOutLog, GateEntrySession
-from utils.face_recognition_utils import generate_face_encoding, recognize_face_from_database, is_face_recognition_available
+from utils.face_recognition_utils import (
+    generate_face_encoding, recognize_face_with_model, is_face_recognition_available,
+    decode_face_encodings, pack_face_encodings, to_binary_face_encoding
+)
+from utils.face_model_cache import face_model_cache
 from services.attendance_integration_service import AttendanceIntegrationService
 
 # Configure logging
@@ -46,11 +50,11 @@ class GateEntryServiceDB:
                 for photo in photos:
                     encoding_result = generate_face_encoding(photo)
                     if encoding_result['success']:
-                        encodings.append(encoding_result['encoding'])
+                        encodings.extend(decode_face_encodings(encoding_result['encoding']))
                     else:
                         logger.warning(f"Face encoding failed for {name}: {encoding_result['message']}")
-            # Store all encodings as JSON array
-            face_encoding = json.dumps(encodings) if encodings else None
+            # Store all faces in one binary encoding
+            face_encoding = pack_face_encodings(encodings) if encodings else None
             # Store first photo for reference
             photo = photos[0] if photos else None
             # Create new user
@@ -64,6 +68,8 @@ class GateEntryServiceDB:
             db.session.add(new_user)
             db.session.commit()
             has_face_encoding = bool(encodings)
+            if has_face_encoding:
+                face_model_cache.add_user(new_user.id, new_user.face_encoding_version, face_encoding)
             logger.info(f"New user registered: {name} ({phone}) - Face encodings: {len(encodings)}")
             return {
                 'success': True,
@@ -131,12 +137,19 @@ class GateEntryServiceDB:
             
             # Update allowed fields
             allowed_fields = ['name', 'photo', 'face_encoding', 'status']
+            face_version = user.face_encoding_version
+            if kwargs.get('face_encoding') is not None:
+                # Clients may still send the legacy JSON encoding
+                kwargs['face_encoding'] = to_binary_face_encoding(kwargs['face_encoding'], user.id)
             for field in allowed_fields:
                 if field in kwargs:
                     setattr(user, field, kwargs[field])
             
             db.session.commit()
             
+            if user.face_encoding_version != face_version:
+                face_model_cache.invalidate_user(user.id, self.load_face_encodings, self._app())
+            
             logger.info(f"User updated: {phone}")
             return {
                 'success': True,
@@ -175,9 +188,14 @@ class GateEntryServiceDB:
             GateEntryLog.query.filter_by(user_id=user.id).delete()
             
             # Now delete the user
+            user_id = user.id
+            had_face_encoding = user.face_encoding is not None
             db.session.delete(user)
             db.session.commit()
             
+            if had_face_encoding:
+                face_model_cache.invalidate_user(user_id, self.load_face_encodings, self._app())
+            
             logger.info(f"User deleted: {phone}")
             return {
                 'success': True,
@@ -199,6 +217,44 @@ class GateEntryServiceDB:
                 'message': f'Error deleting user: {str(e)}'
             }
     
+    def get_face_encoding_versions(self) -> Dict[int, int]:
+        """Get {user_id: face_encoding_version} for users with face encodings"""
+        rows = db.session.query(GateUser.id, GateUser.face_encoding_version).filter(
+            GateUser.face_encoding.isnot(None)
+        ).all()
+        return {user_id: version or 0 for user_id, version in rows}
+    
+    def load_face_encodings(self, user_ids: list = None) -> Dict[int, tuple]:
+        """Load {user_id: (face_encoding_version, face_encoding)}, optionally for given users only"""
+        query = db.session.query(GateUser.id, GateUser.face_encoding_version, GateUser.face_encoding).filter(
+            GateUser.face_encoding.isnot(None)
+        )
+        if user_ids is not None:
+            if not user_ids:
+                return {}
+            query = query.filter(GateUser.id.in_(user_ids))
+        return {user_id: (version or 0, encoding) for user_id, version, encoding in query.all()}
+    
+    def recognize_face(self, photo: str, tolerance: float = 0.6, versions: Dict[int, int] = None) -> Dict:
+        """Recognize a face against registered users using the cached LBPH model"""
+        if versions is None:
+            versions = self.get_face_encoding_versions()
+        if not versions:
+            return {
+                'success': False,
+                'recognized': False,
+                'user_id': None,
+                'distance': None,
+                'message': 'No registered faces in database'
+            }
+        face_model_cache.sync(versions, self.load_face_encodings, self._app())
+        return recognize_face_with_model(photo, face_model_cache, tolerance)
+    
+    @staticmethod
+    def _app():
+        """Current Flask app, for running background work in an app context"""
+        return current_app._get_current_object() if has_app_context() else None
+    
     def get_user_status_and_history(self, user: GateUser) -> tuple:
         """
         Check user status and return (status, has_exited_today, last_action_time)
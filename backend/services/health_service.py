@@ -0,0 +1,62 @@
+"""
+Health Service Module
+Database connectivity and connection pool saturation for the health endpoint
+"""
+import time
+from sqlalchemy import text
+from models import db
+from utils.metrics import pool_status
+
+# Reported as degraded at or above this share of pool capacity in use
+DEFAULT_SATURATION_THRESHOLD = 0.9
+
+
+class HealthService:
+    """Service class for application health checks"""
+
+    @staticmethod
+    def check_database():
+        """
+        Run a trivial query against the database
+
+        Returns:
+            dict: connected flag, dialect, round-trip latency and the error if any
+        """
+        started = time.perf_counter()
+        try:
+            db.session.execute(text('SELECT 1')).scalar()
+            connected, error = True, None
+        except Exception as e:
+            db.session.rollback()
+            connected, error = False, str(e)
+        return {
+            'connected': connected,
+            'dialect': db.engine.dialect.name,
+            'latencyMs': round((time.perf_counter() - started) * 1000, 2),
+            'error': error
+        }
+
+    @staticmethod
+    def get_health(saturation_threshold=DEFAULT_SATURATION_THRESHOLD):
+        """
+        Overall health: unhealthy without a database, degraded when the pool is nearly exhausted
+
+        Returns:
+            dict: status ('healthy', 'degraded' or 'unhealthy'), database check and pool usage
+        """
+        database = HealthService.check_database()
+        # Pool usage of this worker process; /metrics aggregates across workers
+        pool = pool_status(db.engine)
+
+        if not database['connected']:
+            status = 'unhealthy'
+        elif pool['saturation'] is not None and pool['saturation'] >= saturation_threshold:
+            status = 'degraded'
+        else:
+            status = 'healthy'
+
+        return {
+            'status': status,
+            'database': database,
+            'pool': pool
+        }
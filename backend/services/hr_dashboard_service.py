@@ -0,0 +1,317 @@
+"""
+HR Dashboard Service Module
+Materialized HR dashboard counters kept current by the HR write paths
+"""
+import copy
+import threading
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from models import db, Employee, Attendance, Leave, JobPosting, HRDashboardCounter, AttendanceStatus, LeaveStatus, JobStatus
+from utils.aggregates import conditional_counts
+
+# How long a worker serves its cached dashboard before re-reading the counters
+DASHBOARD_CACHE_SECONDS = 30
+
+# Counter metrics
+BUILT = 'built'                    # Marker: undated counters have been materialized
+EMPLOYEES = 'employees'
+DEPARTMENT = 'department'          # Scoped by department name
+OPEN_POSITIONS = 'open_positions'
+PRESENT = 'present'                # Dated metrics are scoped by ISO date
+ABSENT = 'absent'
+ON_LEAVE = 'on_leave'
+DATED_METRICS = (PRESENT, ABSENT, ON_LEAVE)
+ATTENDANCE_METRICS = {AttendanceStatus.PRESENT: PRESENT, AttendanceStatus.ABSENT: ABSENT}
+
+
+class HRDashboardService:
+    """
+    Service class for the materialized HR dashboard
+
+    Counters live in hr_dashboard_counters and are adjusted inside the caller's
+    transaction by the hooks below, so reading the dashboard costs one small
+    query regardless of workforce size. Today's dated counters are computed on
+    first use each day; check_consistency() recomputes everything from scratch
+    and rebuilds the snapshot if it has drifted.
+    """
+
+    _cache = None  # (expires_at, day, dashboard)
+    _cache_lock = threading.Lock()
+
+    @classmethod
+    def get_dashboard(cls):
+        """Dashboard summary served from the per-worker cache or the counters"""
+        today = date.today()
+        with cls._cache_lock:
+            if cls._cache and cls._cache[0] > time.monotonic() and cls._cache[1] == today:
+                return copy.deepcopy(cls._cache[2])
+
+        counters = cls._read_counters(today)
+        if (BUILT, '') not in counters:
+            cls.rebuild()
+            counters = cls._read_counters(today)
+        elif any((metric, today.isoformat()) not in counters for metric in DATED_METRICS):
+            cls._materialize_day(today)
+            counters = cls._read_counters(today)
+
+        dashboard = cls._format(counters, today)
+        dashboard['recentActivities'] = cls._recent_activities(today)
+
+        with cls._cache_lock:
+            cls._cache = (time.monotonic() + DASHBOARD_CACHE_SECONDS, today, dashboard)
+        return copy.deepcopy(dashboard)
+
+    @classmethod
+    def invalidate(cls):
+        with cls._cache_lock:
+            cls._cache = None
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every counter from the source tables and replace the snapshot"""
+        today = date.today()
+        try:
+            expected = cls._compute(today)
+            db.session.execute(delete(HRDashboardCounter))
+            db.session.execute(
+                HRDashboardCounter.__table__.insert(),
+                [{'metric': metric, 'scope': scope, 'value': value, 'updated_at': datetime.utcnow()}
+                 for (metric, scope), value in expected.items()]
+            )
+            db.session.commit()
+        except IntegrityError:
+            # Another worker rebuilt concurrently; its snapshot is just as fresh
+            db.session.rollback()
+        cls.invalidate()
+
+    @classmethod
+    def check_consistency(cls, repair=True):
+        """
+        Compare the stored counters with a from-scratch computation
+
+        Returns:
+            dict: consistent flag, the mismatching counters and whether the snapshot was rebuilt
+        """
+        today = date.today()
+        stored = cls._read_counters(today)
+        expected = cls._compute(today)
+        mismatches = [
+            {'metric': metric, 'scope': scope, 'stored': stored.get((metric, scope)), 'actual': value}
+            for (metric, scope), value in expected.items()
+            if stored.get((metric, scope)) != value
+        ]
+        mismatches += [
+            {'metric': metric, 'scope': scope, 'stored': value, 'actual': 0}
+            for (metric, scope), value in stored.items()
+            if metric == DEPARTMENT and (metric, scope) not in expected and value
+        ]
+
+        rebuilt = False
+        if mismatches and repair:
+            cls.rebuild()
+            rebuilt = True
+        return {'consistent': not mismatches, 'mismatches': mismatches, 'rebuilt': rebuilt}
+
+    # Write hooks: call before the caller commits so counters change atomically with the data
+    @classmethod
+    def employee_added(cls, department):
+        if not cls._adjust(EMPLOYEES, '', 1):
+            return  # No snapshot yet; the next read builds it
+        if not cls._adjust(DEPARTMENT, department, 1):
+            cls._create_department_counter(department)  # First employee in a new department
+
+    @classmethod
+    def employee_moved(cls, old_department, new_department):
+        if old_department == new_department:
+            return
+        if not cls._adjust(DEPARTMENT, old_department, -1):
+            return  # No snapshot yet; the next read builds it
+        if not cls._adjust(DEPARTMENT, new_department, 1):
+            cls._create_department_counter(new_department)
+
+    @classmethod
+    def attendance_changed(cls, attendance_date, old_status, new_status):
+        """Attendance for a day was created (old_status None) or changed status"""
+        if old_status == new_status:
+            return
+        scope = attendance_date.isoformat()
+        if old_status in ATTENDANCE_METRICS:
+            cls._adjust(ATTENDANCE_METRICS[old_status], scope, -1)
+        if new_status in ATTENDANCE_METRICS:
+            cls._adjust(ATTENDANCE_METRICS[new_status], scope, 1)
+
+    @classmethod
+    def leave_status_changed(cls, leave, old_status):
+        """Count an approved leave (or stop counting it) on every materialized day it covers"""
+        was_approved = old_status == LeaveStatus.APPROVED
+        is_approved = leave.status == LeaveStatus.APPROVED
+        if was_approved == is_approved:
+            return
+        db.session.execute(
+            update(HRDashboardCounter)
+            .where(
+                HRDashboardCounter.metric == ON_LEAVE,
+                HRDashboardCounter.scope.between(leave.start_date.isoformat(), leave.end_date.isoformat())
+            )
+            .values(value=HRDashboardCounter.value + (1 if is_approved else -1))
+            .execution_options(synchronize_session=False)
+        )
+        cls.invalidate()
+
+    @classmethod
+    def job_status_changed(cls, old_status, new_status):
+        """A job posting was created (old_status None), deleted (new_status None) or changed status"""
+        delta = (new_status == JobStatus.OPEN) - (old_status == JobStatus.OPEN)
+        if delta:
+            cls._adjust(OPEN_POSITIONS, '', delta)
+
+    @classmethod
+    def mark_stale(cls):
+        """Drop the snapshot so the next read rebuilds it (for rare bulk changes)"""
+        db.session.execute(delete(HRDashboardCounter).execution_options(synchronize_session=False))
+        cls.invalidate()
+
+    @classmethod
+    def _adjust(cls, metric, scope, delta):
+        """Add delta to a materialized counter; returns False if the counter doesn't exist"""
+        result = db.session.execute(
+            update(HRDashboardCounter)
+            .where(HRDashboardCounter.metric == metric, HRDashboardCounter.scope == scope)
+            .values(value=HRDashboardCounter.value + delta)
+            .execution_options(synchronize_session=False)
+        )
+        cls.invalidate()
+        return result.rowcount > 0
+
+    @classmethod
+    def _create_department_counter(cls, department):
+        """First employee in a department: build its counter from employees, which already include them"""
+        db.session.flush()
+        count = Employee.query.filter(Employee.department == department).count()
+        try:
+            with db.session.begin_nested():
+                db.session.execute(
+                    HRDashboardCounter.__table__.insert().values(
+                        metric=DEPARTMENT, scope=department, value=count, updated_at=datetime.utcnow()
+                    )
+                )
+        except IntegrityError:
+            # Created concurrently by another writer; apply our change on top
+            cls._adjust(DEPARTMENT, department, 1)
+
+    @staticmethod
+    def _read_counters(day):
+        rows = db.session.query(HRDashboardCounter.metric, HRDashboardCounter.scope, HRDashboardCounter.value).filter(
+            or_(
+                HRDashboardCounter.scope.in_(['', day.isoformat()]),
+                HRDashboardCounter.metric == DEPARTMENT
+            )
+        ).all()
+        return {(metric, scope): value for metric, scope, value in rows}
+
+    @staticmethod
+    def _compute_day(day):
+        """Dated counters for one day, straight from the source tables"""
+        scope = day.isoformat()
+        attendance = conditional_counts(
+            Attendance.query.filter(Attendance.date == day),
+            {
+                PRESENT: Attendance.status == AttendanceStatus.PRESENT,
+                ABSENT: Attendance.status == AttendanceStatus.ABSENT
+            }
+        )
+        on_leave = Leave.query.filter(
+            Leave.start_date <= day,
+            Leave.end_date >= day,
+            Leave.status == LeaveStatus.APPROVED
+        ).count()
+        return {
+            (PRESENT, scope): attendance[PRESENT],
+            (ABSENT, scope): attendance[ABSENT],
+            (ON_LEAVE, scope): on_leave
+        }
+
+    @classmethod
+    def _compute(cls, day):
+        """Every counter, straight from the source tables"""
+        departments = db.session.query(
+            Employee.department,
+            db.func.count(Employee.id)
+        ).group_by(Employee.department).all()
+
+        counters = {
+            (BUILT, ''): 1,
+            (EMPLOYEES, ''): sum(count for _, count in departments),
+            (OPEN_POSITIONS, ''): JobPosting.query.filter_by(status=JobStatus.OPEN).count()
+        }
+        counters.update({(DEPARTMENT, department): count for department, count in departments})
+        counters.update(cls._compute_day(day))
+        return counters
+
+    @classmethod
+    def _materialize_day(cls, day):
+        """Create a new day's dated counters and drop earlier days"""
+        try:
+            db.session.execute(
+                delete(HRDashboardCounter)
+                .where(HRDashboardCounter.metric.in_(DATED_METRICS), HRDashboardCounter.scope < day.isoformat())
+                .execution_options(synchronize_session=False)
+            )
+            db.session.execute(
+                HRDashboardCounter.__table__.insert(),
+                [{'metric': metric, 'scope': scope, 'value': value, 'updated_at': datetime.utcnow()}
+                 for (metric, scope), value in cls._compute_day(day).items()]
+            )
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # Another worker materialized the day first
+
+    @staticmethod
+    def _format(counters, day):
+        scope = day.isoformat()
+        return {
+            'totalEmployees': counters.get((EMPLOYEES, ''), 0),
+            'presentToday': counters.get((PRESENT, scope), 0),
+            'absentToday': counters.get((ABSENT, scope), 0),
+            'onLeave': counters.get((ON_LEAVE, scope), 0),
+            'openPositions': counters.get((OPEN_POSITIONS, ''), 0),
+            'departmentOverview': {
+                department: value
+                for (metric, department), value in counters.items()
+                if metric == DEPARTMENT and value
+            }
+        }
+
+    @staticmethod
+    def _recent_activities(day):
+        """Latest joins and leave approvals (indexed top-N queries)"""
+        recent_activities = []
+
+        recent_joins = Employee.query.filter(
+            Employee.joining_date >= day - timedelta(days=30)
+        ).order_by(Employee.joining_date.desc()).limit(3).all()
+
+        for emp in recent_joins:
+            recent_activities.append({
+                'type': 'join',
+                'message': f'New Employee Joined: {emp.first_name} {emp.last_name} - {emp.department}',
+                'date': emp.joining_date.isoformat()
+            })
+
+        recent_leaves = Leave.query.options(joinedload(Leave.employee)).filter(
+            Leave.status == LeaveStatus.APPROVED,
+            Leave.approved_at >= datetime.utcnow() - timedelta(days=7)
+        ).order_by(Leave.approved_at.desc()).limit(2).all()
+
+        for leave in recent_leaves:
+            recent_activities.append({
+                'type': 'leave',
+                'message': f'Leave Approved: {leave.employee.first_name} {leave.employee.last_name} - {leave.days_requested} days',
+                'date': leave.approved_at.isoformat()
+            })
+
+        recent_activities.sort(key=lambda x: x['date'], reverse=True)
+        return recent_activities[:5]
@@ -3,8 +3,14 @@ HR Service Module
 Handles business logic for HR operations
 """
 from datetime import datetime, date, timedelta
-from models import db, Employee, Attendance, Leave, Payroll, JobPosting, LeaveType, LeaveStatus, AttendanceStatus, JobStatus, SalaryType, JobApplication, Interview, Candidate, ApplicationStatus, InterviewStatus
+from models import db, Employee, Attendance, Leave, Payroll, JobPosting, LeaveType, LeaveStatus, AttendanceStatus, JobStatus, SalaryType, JobApplication, Interview, Candidate, ApplicationStatus, InterviewStatus, AttendanceMonthlyRollup
 from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+from services.hr_dashboard_service import HRDashboardService
+from services.attendance_rollup_service import AttendanceRollupService
+from services.payroll_run_service import PayrollRunService, calculate_employee_pay
+from services.payroll_export_service import PayrollExportService, EXPORT_FORMATS
+from services.payslip_service import PayslipService
 import traceback
 
 
@@ -61,80 +67,12 @@ class HRService:
 
     @staticmethod
     def get_dashboard_data():
-        """Get HR dashboard summary data"""
+        """Get HR dashboard summary data (materialized, see HRDashboardService)"""
         try:
-            # Get total employees
-            total_employees = Employee.query.count()
-
-            # Get today's attendance
-            today = date.today()
-            today_attendance = Attendance.query.filter_by(date=today).all()
-            present_today = len([a for a in today_attendance if a.status == AttendanceStatus.PRESENT])
-            absent_today = len([a for a in today_attendance if a.status == AttendanceStatus.ABSENT])
-
-            # Get employees on leave
-            current_leaves = Leave.query.filter(
-                Leave.start_date <= today,
-                Leave.end_date >= today,
-                Leave.status == LeaveStatus.APPROVED
-            ).count()
-
-            # Get open job positions
-            open_positions = JobPosting.query.filter_by(status=JobStatus.OPEN).count()
-
-            # Get recent activities (last 5)
-            recent_activities = []
-
-            # Recent employee joins
-            recent_joins = Employee.query.filter(
-                Employee.joining_date >= today - timedelta(days=30)
-            ).order_by(Employee.joining_date.desc()).limit(3).all()
-
-            for emp in recent_joins:
-                recent_activities.append({
-                    'type': 'join',
-                    'message': f'New Employee Joined: {emp.first_name} {emp.last_name} - {emp.department}',
-                    'date': emp.joining_date.isoformat()
-                })
-
-            # Recent leave approvals
-            recent_leaves = Leave.query.filter(
-                Leave.status == LeaveStatus.APPROVED,
-                Leave.approved_at >= datetime.utcnow() - timedelta(days=7)
-            ).order_by(Leave.approved_at.desc()).limit(2).all()
-
-            for leave in recent_leaves:
-                recent_activities.append({
-                    'type': 'leave',
-                    'message': f'Leave Approved: {leave.employee.first_name} {leave.employee.last_name} - {leave.days_requested} days',
-                    'date': leave.approved_at.isoformat()
-                })
-
-            # Sort activities by date
-            recent_activities.sort(key=lambda x: x['date'], reverse=True)
-            recent_activities = recent_activities[:5]
-
-            # Department overview
-            departments = db.session.query(
-                Employee.department,
-                db.func.count(Employee.id).label('count')
-            ).group_by(Employee.department).all()
-
-            department_overview = {dept: count for dept, count in departments}
-
-            result = {
-                'totalEmployees': total_employees,
-                'presentToday': present_today,
-                'absentToday': absent_today,
-                'onLeave': current_leaves,
-                'openPositions': open_positions,
-                'recentActivities': recent_activities,
-                'departmentOverview': department_overview
-            }
-
-            return result
+            return HRDashboardService.get_dashboard()
 
         except Exception as e:
+            db.session.rollback()
             return {
                 'totalEmployees': 0,
                 'presentToday': 0,
@@ -146,6 +84,11 @@ class HRService:
                 'error': str(e)
             }
 
+    @staticmethod
+    def check_dashboard_consistency(repair=True):
+        """Verify the dashboard counters against the source tables, rebuilding on drift"""
+        return HRDashboardService.check_consistency(repair)
+
     # Employee Management
     @staticmethod
     def get_employees(department=None, status=None, limit=50):
@@ -204,6 +147,7 @@ class HRService:
         )
 
         db.session.add(employee)
+        HRDashboardService.employee_added(employee.department)
         db.session.commit()
         return employee.to_dict()
 
@@ -220,6 +164,8 @@ class HRService:
             if existing:
                 raise ValueError('Employee with this email already exists')
 
+        old_department = employee.department
+
         # Update fields
         updatable_fields = {
             'firstName': 'first_name',
@@ -249,6 +195,7 @@ class HRService:
                     value = value.lower()
                 setattr(employee, db_field, value)
 
+        HRDashboardService.employee_moved(old_department, employee.department)
         db.session.commit()
         return employee.to_dict()
 
@@ -260,8 +207,9 @@ class HRService:
             raise ValueError('Employee not found')
 
         # Delete related records first to avoid foreign key constraints
-        # Delete attendances
+        # Delete attendances and their monthly rollups
         Attendance.query.filter_by(employee_id=employee_id).delete()
+        AttendanceMonthlyRollup.query.filter_by(employee_id=employee_id).delete()
         # Delete leaves
         Leave.query.filter_by(employee_id=employee_id).delete()
         # Delete payrolls
@@ -271,6 +219,8 @@ class HRService:
 
         # Finally delete the employee
         db.session.delete(employee)
+        # Attendance and leave rows went with it; rebuild the dashboard on next read
+        HRDashboardService.mark_stale()
         db.session.commit()
         return {'message': 'Employee deleted successfully'}
 
@@ -302,11 +252,14 @@ class HRService:
 
         if existing:
             # Update existing
+            before = (existing.status, existing.hours_worked)
             existing.check_in_time = attendance_data.get('checkInTime')
             existing.check_out_time = attendance_data.get('checkOutTime')
             existing.status = status
             existing.hours_worked = attendance_data.get('hoursWorked')
             existing.notes = attendance_data.get('notes')
+            HRDashboardService.attendance_changed(attendance_date, before[0], status)
+            AttendanceRollupService.attendance_changed(employee_id, attendance_date, before, (status, existing.hours_worked))
         else:
             # Create new
             attendance = Attendance(
@@ -319,6 +272,8 @@ class HRService:
                 notes=attendance_data.get('notes')
             )
             db.session.add(attendance)
+            HRDashboardService.attendance_changed(attendance_date, None, status)
+            AttendanceRollupService.attendance_changed(employee_id, attendance_date, after=(status, attendance.hours_worked))
 
         db.session.commit()
         return {'message': 'Attendance recorded successfully'}
@@ -365,7 +320,7 @@ class HRService:
 
     @staticmethod
     def get_attendance_summary(start_date=None, end_date=None):
-        """Get attendance summary for all employees"""
+        """Get attendance summary for all employees (aggregated in SQL, see AttendanceRollupService)"""
         if not start_date:
             start_date = date.today() - timedelta(days=30)
         else:
@@ -376,35 +331,7 @@ class HRService:
         else:
             end_date = datetime.fromisoformat(end_date).date()
 
-        attendance_records = Attendance.query.filter(
-            Attendance.date >= start_date,
-            Attendance.date <= end_date
-        ).all()
-
-        summary = {}
-        for record in attendance_records:
-            emp_id = record.employee_id
-            if emp_id not in summary:
-                summary[emp_id] = {
-                    'employeeName': record.employee.full_name,
-                    'totalDays': 0,
-                    'presentDays': 0,
-                    'absentDays': 0,
-                    'lateDays': 0,
-                    'halfDays': 0
-                }
-
-            summary[emp_id]['totalDays'] += 1
-            if record.status == AttendanceStatus.PRESENT:
-                summary[emp_id]['presentDays'] += 1
-            elif record.status == AttendanceStatus.ABSENT:
-                summary[emp_id]['absentDays'] += 1
-            elif record.status == AttendanceStatus.LATE:
-                summary[emp_id]['lateDays'] += 1
-            elif record.status == AttendanceStatus.HALF_DAY:
-                summary[emp_id]['halfDays'] += 1
-
-        return list(summary.values())
+        return AttendanceRollupService.get_summary(start_date, end_date)
 
     # Leave Management
     @staticmethod
@@ -475,6 +402,7 @@ class HRService:
         if not leave:
             raise ValueError('Leave request not found')
 
+        old_status = leave.status
         if approved:
             leave.status = LeaveStatus.APPROVED
         else:
@@ -484,6 +412,7 @@ class HRService:
             leave.approved_by = approver_id
             leave.approved_at = datetime.utcnow()
 
+        HRDashboardService.leave_status_changed(leave, old_status)
         db.session.commit()
         return leave.to_dict()
 
@@ -524,79 +453,57 @@ class HRService:
         start_date = datetime.fromisoformat(pay_period_data['startDate']).date()
         end_date = datetime.fromisoformat(pay_period_data['endDate']).date()
 
-        salary_value = float(employee.salary)
         total_working_days = pay_period_data.get('totalWorkingDays', 0)
         attended_days = pay_period_data.get('attendedDays', total_working_days)  # Default to full if not provided
 
-        # Calculate base salary based on salary type
-        if employee.salary_type == 'hourly':
-            # Use total_hours from the request data (frontend sends this)
-            total_hours = pay_period_data.get('totalHours', 0)
-            base_salary = salary_value * total_hours
-            full_monthly_salary = salary_value  # Store the hourly rate itself
-        elif employee.salary_type == 'monthly':
-            monthly_salary = salary_value
-            base_salary = (monthly_salary / total_working_days) * attended_days if total_working_days > 0 and attended_days is not None else monthly_salary
-            full_monthly_salary = salary_value
-        elif employee.salary_type == 'daily':
-            daily_rate = salary_value
-            base_salary = daily_rate * attended_days if attended_days is not None else 0
-            full_monthly_salary = daily_rate * 30  # Assume 30 days per month
-        else:
-            # Default to monthly
-            monthly_salary = salary_value
-            base_salary = (monthly_salary / total_working_days) * attended_days if total_working_days > 0 and attended_days is not None else monthly_salary
-            full_monthly_salary = salary_value
-
         # Get allowances from input (required field)
         allowances = float(pay_period_data.get('allowances', 0))
 
-        # Calculate gross salary and deductions based on salary type
-        if employee.salary_type == 'hourly':
-            # For hourly employees: gross = hourly_rate * total_hours (no allowances added)
-            gross_salary = base_salary
-            # Deduction: 5% of gross salary
-            deductions = gross_salary * 0.05
-        else:
-            # For monthly and daily employees: gross = base + allowances
-            gross_salary = base_salary + allowances
-            
-            # Detailed deductions for monthly and daily employees
-            # PF: 12% of basic salary (capped at ₹15,000)
-            pf_base = min(base_salary, 15000)
-            pf_deduction = pf_base * 0.12
-
-            # ESI: 0.75% of gross if gross < ₹21,000
-            esi_deduction = gross_salary * 0.0075 if gross_salary < 21000 else 0
-
-            # Professional Tax: ₹200/month (fixed)
-            pt_deduction = 200
-
-            # Income Tax: simplified 5% if gross > ₹50,000
-            it_deduction = gross_salary * 0.05 if gross_salary > 50000 else 0
-
-            # Total deductions
-            deductions = pf_deduction + esi_deduction + pt_deduction + it_deduction
+        # Salary type rules and PF/ESI/PT/IT deductions are shared with batch payroll runs
+        pay = calculate_employee_pay(
+            employee.salary_type, employee.salary, total_working_days, attended_days,
+            pay_period_data.get('totalHours', 0), allowances
+        )
 
-        # Calculate net salary
-        net_salary = gross_salary - deductions
+        if Payroll.query.filter_by(employee_id=employee_id, pay_period_start=start_date, pay_period_end=end_date).first():
+            raise ValueError('Payroll already exists for this employee and pay period')
 
         payroll = Payroll(
             employee_id=employee_id,
             name=employee.full_name,
             pay_period_start=start_date,
             pay_period_end=end_date,
-            monthly_salary=full_monthly_salary,  # Save full monthly equivalent for display
+            monthly_salary=pay['monthly_salary'],  # Save full monthly equivalent for display
             salary_type=employee.salary_type,  # Store salary type
             allowances=allowances,
-            deductions=deductions,
-            gross_salary=gross_salary,
-            net_salary=net_salary
+            deductions=pay['deductions'],
+            gross_salary=pay['gross_salary'],
+            net_salary=pay['net_salary']
         )
         db.session.add(payroll)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Created concurrently (e.g. by a payroll run)
+            db.session.rollback()
+            raise ValueError('Payroll already exists for this employee and pay period')
         return payroll.to_dict()
 
+    @staticmethod
+    def start_payroll_run(run_data, background=True):
+        """Generate payroll for every active employee in a pay period (see PayrollRunService)"""
+        return PayrollRunService.start_run(run_data, background)
+
+    @staticmethod
+    def get_payroll_run(run_id):
+        """Get a payroll run with its progress"""
+        return PayrollRunService.get_run(run_id)
+
+    @staticmethod
+    def get_payroll_runs():
+        """Get recent payroll runs"""
+        return PayrollRunService.get_runs()
+
     @staticmethod
     def get_employee_payrolls(employee_id):
         """Get payroll records for an employee"""
@@ -643,7 +550,6 @@ class HRService:
         if not employee:
             raise ValueError('Employee not found for this payroll')
 
-        salary_value = float(employee.salary)
         total_working_days = pay_period_data.get('totalWorkingDays', 0)
         attended_days = pay_period_data.get('attendedDays', total_working_days)
 
@@ -659,311 +565,50 @@ class HRService:
         if 'allowances' in pay_period_data:
             payroll.allowances = float(pay_period_data['allowances'])
 
-        # Recalculate base salary based on salary type
-        if employee.salary_type == 'hourly':
-            # Use total_hours from the request data (frontend sends this)
-            total_hours = pay_period_data.get('totalHours', 0)
-            base_salary = salary_value * total_hours
-            full_monthly_salary = salary_value  # Store the hourly rate itself
-        elif employee.salary_type == 'monthly':
-            monthly_salary = salary_value
-            base_salary = (monthly_salary / total_working_days) * attended_days if total_working_days > 0 and attended_days is not None else monthly_salary
-            full_monthly_salary = monthly_salary
-        elif employee.salary_type == 'daily':
-            daily_rate = salary_value
-            base_salary = daily_rate * attended_days if attended_days is not None else 0
-            full_monthly_salary = daily_rate * 30  # Assume 30 days per month
-        else:
-            # Default to monthly
-            monthly_salary = salary_value
-            base_salary = (monthly_salary / total_working_days) * attended_days if total_working_days > 0 and attended_days is not None else monthly_salary
-            full_monthly_salary = monthly_salary
-
-        # Calculate gross salary and deductions based on salary type
-        if employee.salary_type == 'hourly':
-            # For hourly employees: gross = hourly_rate * total_hours (no allowances added)
-            gross_salary = base_salary
-            # Deduction: 5% of gross salary
-            deductions = gross_salary * 0.05
-        else:
-            # For monthly and daily employees: gross = base + allowances
-            gross_salary = base_salary + payroll.allowances
-            
-            # Detailed deductions for monthly and daily employees
-            # PF: 12% of basic salary (capped at ₹15,000)
-            pf_base = min(base_salary, 15000)
-            pf_deduction = pf_base * 0.12
-
-            # ESI: 0.75% of gross if gross < ₹21,000
-            esi_deduction = gross_salary * 0.0075 if gross_salary < 21000 else 0
-
-            # Professional Tax: ₹200/month (fixed)
-            pt_deduction = 200
-
-            # Income Tax: simplified 5% if gross > ₹50,000
-            it_deduction = gross_salary * 0.05 if gross_salary > 50000 else 0
-
-            # Total deductions
-            deductions = pf_deduction + esi_deduction + pt_deduction + it_deduction
-
-        # Calculate net salary
-        net_salary = gross_salary - deductions
+        # Recalculate with the shared salary rules
+        pay = calculate_employee_pay(
+            employee.salary_type, employee.salary, total_working_days, attended_days,
+            pay_period_data.get('totalHours', 0), payroll.allowances
+        )
 
         payroll.name = employee.full_name
-        payroll.monthly_salary = full_monthly_salary  # Save full monthly equivalent for display
+        payroll.monthly_salary = pay['monthly_salary']  # Save full monthly equivalent for display
         payroll.salary_type = employee.salary_type  # Update salary type
-        payroll.deductions = deductions
-        payroll.gross_salary = gross_salary
-        payroll.net_salary = net_salary
+        payroll.deductions = pay['deductions']
+        payroll.gross_salary = pay['gross_salary']
+        payroll.net_salary = pay['net_salary']
 
         db.session.commit()
         return payroll.to_dict()
 
     @staticmethod
     def generate_payslip(payroll_id):
-        """Generate payslip HTML for a payroll record"""
-        payroll = Payroll.query.get(payroll_id)
-        if not payroll:
-            raise ValueError('Payroll not found')
+        """Generate payslip HTML for a payroll record (cached, see PayslipService)"""
+        return PayslipService.render_html(payroll_id)
 
-        employee = payroll.employee
-        if not employee:
-            raise ValueError('Employee not found for this payroll')
+    @staticmethod
+    def get_payslip_pdf(payroll_id):
+        """PDF payslip status, queuing the conversion when needed"""
+        if not PayslipService.pdf_available():
+            raise RuntimeError('PDF generation is not available on this server')
+        return PayslipService.get_pdf(payroll_id)
 
-        # Format dates
-        pay_period_start = payroll.pay_period_start.strftime('%d/%m/%Y') if payroll.pay_period_start else 'N/A'
-        pay_period_end = payroll.pay_period_end.strftime('%d/%m/%Y') if payroll.pay_period_end else 'N/A'
-        payment_date = payroll.payment_date.strftime('%d/%m/%Y') if payroll.payment_date else 'Pending'
-
-        # Compute actual base salary for the period
-        base_salary = payroll.gross_salary - payroll.allowances
-
-        # Compute individual deductions based on salary type
-        if payroll.salary_type == 'hourly':
-            # For hourly employees: 5% deduction on gross salary
-            pf_deduction = 0
-            esi_deduction = 0
-            pt_deduction = 0
-            it_deduction = payroll.gross_salary * 0.05
-        else:
-            # For monthly and daily employees: detailed deductions
-            pf_deduction = min(base_salary, 15000) * 0.12
-            esi_deduction = payroll.gross_salary * 0.0075 if payroll.gross_salary < 21000 else 0
-            pt_deduction = 200.00
-            it_deduction = payroll.gross_salary * 0.05 if payroll.gross_salary > 50000 else 0
-
-        # Determine label for basic earnings row
-        if payroll.salary_type == 'hourly':
-            basic_label = f'Hourly Rate: ₹{payroll.monthly_salary:.0f}/hr × Hours'
-            basic_amount = f"{base_salary:,.2f}"
-        else:
-            basic_label = 'Monthly Salary'
-            basic_amount = f"{payroll.monthly_salary:,.2f}"
-
-        # Generate HTML payslip
-        payslip_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Payslip - {employee.full_name}</title>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    margin: 20px;
-                    color: #333;
-                }}
-                .header {{
-                    text-align: center;
-                    border-bottom: 2px solid #007bff;
-                    padding-bottom: 20px;
-                    margin-bottom: 30px;
-                }}
-                .company-name {{
-                    font-size: 24px;
-                    font-weight: bold;
-                    color: #007bff;
-                    margin-bottom: 10px;
-                }}
-                .payslip-title {{
-                    font-size: 18px;
-                    color: #666;
-                }}
-                .employee-info {{
-                    display: grid;
-                    grid-template-columns: 1fr 1fr;
-                    gap: 20px;
-                    margin-bottom: 30px;
-                }}
-                .info-section {{
-                    background: #f8f9fa;
-                    padding: 15px;
-                    border-radius: 5px;
-                }}
-                .info-section h3 {{
-                    margin: 0 0 10px 0;
-                    color: #007bff;
-                    font-size: 16px;
-                }}
-                .info-row {{
-                    display: flex;
-                    justify-content: space-between;
-                    margin-bottom: 5px;
-                }}
-                .salary-breakdown {{
-                    margin: 30px 0;
-                }}
-                .salary-table {{
-                    width: 100%;
-                    border-collapse: collapse;
-                    margin: 20px 0;
-                }}
-                .salary-table th, .salary-table td {{
-                    padding: 12px;
-                    text-align: left;
-                    border-bottom: 1px solid #ddd;
-                }}
-                .salary-table th {{
-                    background: #f8f9fa;
-                    font-weight: bold;
-                }}
-                .total-row {{
-                    background: #e9ecef;
-                    font-weight: bold;
-                }}
-                .net-salary {{
-                    font-size: 18px;
-                    color: #28a745;
-                    text-align: center;
-                    margin: 20px 0;
-                    padding: 15px;
-                    background: #d4edda;
-                    border-radius: 5px;
-                }}
-                .footer {{
-                    margin-top: 40px;
-                    text-align: center;
-                    color: #666;
-                    font-size: 12px;
-                }}
-                @media print {{
-                    body {{ margin: 0; }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <div class="company-name">ERP System</div>
-                <div class="payslip-title">Employee Payslip</div>
-            </div>
-
-            <div class="employee-info">
-                <div class="info-section">
-                    <h3>Employee Details</h3>
-                    <div class="info-row">
-                        <span>Name:</span>
-                        <span>{employee.full_name}</span>
-                    </div>
-                    <div class="info-row">
-                        <span>Employee ID:</span>
-                        <span>{employee.employee_id}</span>
-                    </div>
-                    <div class="info-row">
-                        <span>Department:</span>
-                        <span>{employee.department}</span>
-                    </div>
-                    <div class="info-row">
-                        <span>Designation:</span>
-                        <span>{employee.designation}</span>
-                    </div>
-                </div>
-
-                <div class="info-section">
-                    <h3>Pay Period</h3>
-                    <div class="info-row">
-                        <span>From:</span>
-                        <span>{pay_period_start}</span>
-                    </div>
-                    <div class="info-row">
-                        <span>To:</span>
-                        <span>{pay_period_end}</span>
-                    </div>
-                    <div class="info-row">
-                        <span>Payment Date:</span>
-                        <span>{payment_date}</span>
-                    </div>
-                    <div class="info-row">
-                        <span>Status:</span>
-                        <span>{payroll.status.title() if payroll.status else 'Pending'}</span>
-                    </div>
-                </div>
-            </div>
-
-            <div class="salary-breakdown">
-                <h3 style="color: #007bff; margin-bottom: 20px;">Salary Breakdown</h3>
-                <table class="salary-table">
-                    <thead>
-                        <tr>
-                            <th>Description</th>
-                            <th>Amount (₹)</th>
-                        </tr>
-                    </thead>
-                    <tbody>
-                        <tr>
-                            <td>{basic_label}</td>
-                            <td>{basic_amount}</td>
-                        </tr>
-                        <tr>
-                            <td>Allowances</td>
-                            <td>{payroll.allowances:,.2f}</td>
-                        </tr>
-                        <tr class="total-row">
-                            <td>Gross Salary</td>
-                            <td>{payroll.gross_salary:,.2f}</td>
-                        </tr>
-                        <tr>
-                            <td colspan="2" style="font-weight: bold; background: #f8f9fa;">Deductions</td>
-                        </tr>
-                        <tr>
-                            <td>&nbsp;&nbsp;Provident Fund (12%)</td>
-                            <td>({pf_deduction:,.2f})</td>
-                        </tr>
-                        <tr>
-                            <td>&nbsp;&nbsp;ESI (0.75%)</td>
-                            <td>({esi_deduction:,.2f})</td>
-                        </tr>
-                        <tr>
-                            <td>&nbsp;&nbsp;Professional Tax</td>
-                            <td>({pt_deduction:,.2f})</td>
-                        </tr>
-                        <tr>
-                            <td>&nbsp;&nbsp;Income Tax (5%)</td>
-                            <td>({it_deduction:,.2f})</td>
-                        </tr>
-                        <tr class="total-row">
-                            <td>Total Deductions</td>
-                            <td>({payroll.deductions:,.2f})</td>
-                        </tr>
-                        <tr class="total-row">
-                            <td>Net Salary</td>
-                            <td>{payroll.net_salary:,.2f}</td>
-                        </tr>
-                    </tbody>
-                </table>
-            </div>
-
-            <div class="net-salary">
-                <strong>Net Salary Payable: ₹{payroll.net_salary:,.2f}</strong>
-            </div>
-
-            <div class="footer">
-                <p>This is a computer-generated payslip and does not require a signature.</p>
-                <p>Generated on {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</p>
-            </div>
-        </body>
-        </html>
-        """
+    @staticmethod
+    def generate_payslips_for_period(period_data):
+        """Render all payslips for a pay period and convert them to PDF in the background"""
+        for field in ('startDate', 'endDate'):
+            if field not in period_data:
+                raise ValueError(f'Missing required field: {field}')
+        if not PayslipService.pdf_available():
+            raise RuntimeError('PDF generation is not available on this server')
+        start_date = datetime.fromisoformat(period_data['startDate']).date()
+        end_date = datetime.fromisoformat(period_data['endDate']).date()
+        return PayslipService.generate_for_period(start_date, end_date)
 
-        return payslip_html
+    @staticmethod
+    def get_payslip_job(job_id):
+        """Progress of a bulk payslip job"""
+        return PayslipService.job_status(job_id)
 
     # Recruitment Management
     @staticmethod
@@ -993,6 +638,7 @@ class HRService:
             job.application_deadline = datetime.fromisoformat(job.application_deadline).date()
 
         db.session.add(job)
+        HRDashboardService.job_status_changed(None, job.status or JobStatus.OPEN)
         db.session.commit()
         return job.to_dict()
 
@@ -1014,7 +660,9 @@ class HRService:
         if not job:
             raise ValueError('Job posting not found')
 
+        old_status = job.status
         job.status = JobStatus(status.upper())
+        HRDashboardService.job_status_changed(old_status, job.status)
         db.session.commit()
         return job.to_dict()
 
@@ -1048,7 +696,9 @@ class HRService:
         
         # Update status if provided
         if 'status' in job_data:
+            old_status = job.status
             job.status = JobStatus(job_data['status'].upper())
+            HRDashboardService.job_status_changed(old_status, job.status)
 
         db.session.commit()
         return job.to_dict()
@@ -1060,6 +710,7 @@ class HRService:
         if not job:
             raise ValueError('Job posting not found')
 
+        HRDashboardService.job_status_changed(job.status, None)
         db.session.delete(job)
         db.session.commit()
         return {'message': 'Job posting deleted successfully'}
@@ -1386,93 +1037,13 @@ class HRService:
         return {'message': 'Candidate deleted successfully'}
 
     @staticmethod
-    def export_payroll_report():
-        """Export payroll report as Excel file"""
-        try:
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-            from io import BytesIO
-
-            # Get all payroll records with employee data
-            payrolls = Payroll.query.join(Employee).order_by(Payroll.pay_period_end.desc()).all()
-
-            # Create workbook and worksheet
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "Payroll Report"
-
-            # Define styles
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="007BFF", end_color="007BFF", fill_type="solid")
-            border = Border(
-                left=Side(style='thin'),
-                right=Side(style='thin'),
-                top=Side(style='thin'),
-                bottom=Side(style='thin')
-            )
-            center_alignment = Alignment(horizontal='center')
-            right_alignment = Alignment(horizontal='right')
-
-            # Headers
-            headers = [
-                'Employee ID', 'Employee Name', 'Department', 'Designation',
-                'Pay Period Start', 'Pay Period End', 'Monthly Salary', 'Allowances',
-                'Gross Salary', 'Deductions', 'Net Salary', 'Status', 'Payment Date'
-            ]
-
-            # Write headers
-            for col_num, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col_num, value=header)
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = center_alignment
-                cell.border = border
-
-            # Write data
-            for row_num, payroll in enumerate(payrolls, 2):
-                employee = payroll.employee
-
-                data = [
-                    employee.employee_id if employee else '',
-                    employee.full_name if employee else '',
-                    employee.department if employee else '',
-                    employee.designation if employee else '',
-                    payroll.pay_period_start.strftime('%d/%m/%Y') if payroll.pay_period_start else '',
-                    payroll.pay_period_end.strftime('%d/%m/%Y') if payroll.pay_period_end else '',
-                    f"{payroll.monthly_salary:,.2f}" if payroll.monthly_salary else '0.00',
-                    f"{payroll.allowances:,.2f}" if payroll.allowances else '0.00',
-                    f"{payroll.gross_salary:,.2f}" if payroll.gross_salary else '0.00',
-                    f"{payroll.deductions:,.2f}" if payroll.deductions else '0.00',
-                    f"{payroll.net_salary:,.2f}" if payroll.net_salary else '0.00',
-                    payroll.status.title() if payroll.status else 'Pending',
-                    payroll.payment_date.strftime('%d/%m/%Y') if payroll.payment_date else ''
-                ]
-
-                for col_num, value in enumerate(data, 1):
-                    cell = ws.cell(row=row_num, column=col_num, value=value)
-                    cell.border = border
-                    if col_num >= 7 and col_num <= 11:  # Salary columns
-                        cell.alignment = right_alignment
-
-            # Auto-adjust column widths
-            for col_num, header in enumerate(headers, 1):
-                column_letter = ws.cell(row=1, column=col_num).column_letter
-                max_length = len(header)
-                for row in range(1, len(payrolls) + 2):
-                    cell_value = str(ws.cell(row=row, column=col_num).value or '')
-                    max_length = max(max_length, len(cell_value))
-                ws.column_dimensions[column_letter].width = min(max_length + 2, 30)
-
-
-            # (Summary rows removed as per request; only table data will be exported)
-
-            # Save to BytesIO
-            excel_buffer = BytesIO()
-            wb.save(excel_buffer)
-            excel_buffer.seek(0)
-
-            return excel_buffer
+    def export_payroll_report(start_date=None, end_date=None, department=None, export_format='xlsx'):
+        """
+        Export payroll report as a stream of XLSX or CSV bytes
 
-        except Exception as e:
-            print(f"Error generating payroll report: {e}")
-            raise ValueError(f"Failed to generate payroll report: {str(e)}")
+        Returns:
+            tuple: (byte chunk iterator, content type, filename)
+        """
+        export_format, filters = PayrollExportService.parse_filters(start_date, end_date, department, export_format)
+        content_type, filename = EXPORT_FORMATS[export_format]
+        return PayrollExportService.stream(export_format, filters), content_type, filename
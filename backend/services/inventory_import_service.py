@@ -0,0 +1,208 @@
+"""
+Inventory Import Service Module
+Validated bulk upserts of inventory items from JSON lists and CSV/XLSX uploads
+"""
+import csv
+import io
+from sqlalchemy import bindparam, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from models import db, StoreInventory
+
+# Names per IN query and rows per executemany batch
+IMPORT_BATCH_SIZE = 1000
+DEFAULT_CATEGORY = 'Raw Material'
+NAME_MAX_LENGTH = 200
+CATEGORY_MAX_LENGTH = 50
+
+
+def inventory_name_key():
+    """Key function matching inventory names the way the database compares them"""
+    # MySQL's default collation compares names case-insensitively
+    return str.lower if db.engine.dialect.name == 'mysql' else str
+
+
+def _batches(values, size=IMPORT_BATCH_SIZE):
+    for offset in range(0, len(values), size):
+        yield values[offset:offset + size]
+
+
+class InventoryImportService:
+    """
+    Service class for bulk inventory imports
+
+    Every row is validated before anything is written, so an import applies
+    completely or not at all. Quantities for the same name are summed, existing
+    names are looked up with one IN query per batch and rows are written with
+    batched upserts: INSERT ... ON DUPLICATE KEY UPDATE on MySQL, executemany
+    UPDATE/INSERT batches elsewhere. Existing items keep their category.
+    """
+
+    @staticmethod
+    def iter_upload_rows(file):
+        """
+        Items from an uploaded sheet, read row by row
+
+        Columns are positional like the Store import screen: name, quantity and
+        an optional category. The first row is a header; blank rows are skipped.
+        """
+        filename = (file.filename or '').lower()
+        if filename.endswith('.csv'):
+            rows = csv.reader(io.TextIOWrapper(file.stream, encoding='utf-8-sig', newline=''))
+        elif filename.endswith('.xlsx'):
+            from openpyxl import load_workbook
+            workbook = load_workbook(file.stream, read_only=True, data_only=True)
+            rows = workbook.worksheets[0].iter_rows(values_only=True)
+        else:
+            raise ValueError('Unsupported file type. Upload a .csv or .xlsx file')
+
+        for row_number, row in enumerate(rows, 1):
+            values = (list(row) + [None, None, None])[:3]
+            if row_number == 1 or all(value is None or str(value).strip() == '' for value in values):
+                continue
+            yield {'row': row_number, 'name': values[0], 'quantity': values[1], 'category': values[2]}
+
+    @staticmethod
+    def validate_item(item):
+        """
+        Normalize one import row
+
+        Returns:
+            tuple: (name, quantity, category)
+
+        Raises:
+            ValueError: If the row is invalid
+        """
+        if not isinstance(item, dict):
+            raise ValueError('Expected an object with name and quantity')
+
+        name = str(item.get('name') if item.get('name') is not None else '').strip()
+        if not name:
+            raise ValueError('Missing required field: name')
+        if len(name) > NAME_MAX_LENGTH:
+            raise ValueError(f'Name is longer than {NAME_MAX_LENGTH} characters')
+
+        quantity = item.get('quantity')
+        if quantity is None or str(quantity).strip() == '':
+            raise ValueError('Missing required field: quantity')
+        try:
+            number = float(quantity)
+        except (TypeError, ValueError):
+            raise ValueError(f'Quantity must be a whole number, got {quantity!r}')
+        if not number.is_integer():
+            raise ValueError(f'Quantity must be a whole number, got {quantity!r}')
+        if number < 0:
+            raise ValueError('Quantity cannot be negative')
+
+        category = str(item.get('category') or '').strip() or DEFAULT_CATEGORY
+        return name, int(number), category[:CATEGORY_MAX_LENGTH]
+
+    @classmethod
+    def import_items(cls, items):
+        """
+        Upsert inventory items
+
+        Args:
+            items: Iterable of dicts with name, quantity, optional category and
+                optional row (defaults to the position in the iterable)
+
+        Returns:
+            dict: message, added/updated/invalid counts and per-row results;
+            nothing is written when any row is invalid
+        """
+        rows, invalid = [], []
+        for position, item in enumerate(items, 1):
+            row_number = item.get('row', position) if isinstance(item, dict) else position
+            try:
+                rows.append((row_number, *cls.validate_item(item)))
+            except ValueError as e:
+                invalid.append({
+                    'row': row_number,
+                    'name': item.get('name') if isinstance(item, dict) else None,
+                    'action': 'invalid',
+                    'error': str(e)
+                })
+
+        if invalid:
+            return {
+                'message': f'{len(invalid)} invalid rows. Nothing was imported',
+                'added': 0,
+                'updated': 0,
+                'invalid': len(invalid),
+                'results': invalid
+            }
+
+        totals = {}  # name -> [quantity, category], in order of first appearance
+        for _, name, quantity, category in rows:
+            totals.setdefault(name, [0, category])[0] += quantity
+
+        fold = inventory_name_key()
+        names = list(totals)
+        existing = set()
+        for batch in _batches(names):
+            existing.update(fold(name) for (name,) in db.session.query(StoreInventory.name).filter(StoreInventory.name.in_(batch)))
+
+        if db.engine.dialect.name == 'mysql':
+            cls._upsert_mysql(totals)
+        else:
+            cls._upsert_generic(totals, {name for name in names if fold(name) in existing})
+        db.session.commit()
+
+        items_by_name = {}
+        for batch in _batches(names):
+            for item in StoreInventory.query.filter(StoreInventory.name.in_(batch)):
+                items_by_name.setdefault(fold(item.name), item.to_dict())
+
+        results = []
+        seen = set(existing)
+        for row_number, name, _, _ in rows:
+            key = fold(name)
+            results.append({
+                'row': row_number,
+                'name': name,
+                'action': 'updated' if key in seen else 'added',
+                'item': items_by_name.get(key)
+            })
+            seen.add(key)
+
+        added = sum(1 for result in results if result['action'] == 'added')
+        return {
+            'message': f'Successfully processed {len(results)} items',
+            'added': added,
+            'updated': len(results) - added,
+            'invalid': 0,
+            'results': results
+        }
+
+    @staticmethod
+    def _upsert_mysql(totals):
+        table = StoreInventory.__table__
+        statement = mysql_insert(table)
+        statement = statement.on_duplicate_key_update(
+            quantity=table.c.quantity + statement.inserted.quantity,
+            updated_at=statement.inserted.updated_at
+        )
+        values = [
+            {'name': name, 'quantity': quantity, 'category': category}
+            for name, (quantity, category) in totals.items()
+        ]
+        for batch in _batches(values):
+            db.session.execute(statement, batch)
+
+    @staticmethod
+    def _upsert_generic(totals, existing_names):
+        table = StoreInventory.__table__
+        updates = [
+            {'item_name': name, 'added_quantity': quantity}
+            for name, (quantity, _) in totals.items() if name in existing_names
+        ]
+        inserts = [
+            {'name': name, 'quantity': quantity, 'category': category}
+            for name, (quantity, category) in totals.items() if name not in existing_names
+        ]
+        statement = update(table).where(table.c.name == bindparam('item_name')).values(
+            quantity=table.c.quantity + bindparam('added_quantity')
+        )
+        for batch in _batches(updates):
+            db.session.execute(statement, batch)
+        for batch in _batches(inserts):
+            db.session.execute(table.insert(), batch)
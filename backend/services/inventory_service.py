@@ -2,7 +2,9 @@
 Inventory management business logic service
 """
 from datetime import datetime
-from models import db, StoreInventory, PurchaseOrder, ProductionOrder
+from models import db, StoreInventory, PurchaseOrder, PurchaseOrderMaterial, ProductionOrder
+from models.purchase import PURCHASED_MATERIAL
+from services.inventory_import_service import InventoryImportService, inventory_name_key
 from utils.validators import validate_required_fields
 import json
 
@@ -96,54 +98,83 @@ class InventoryService:
             db.session.rollback()
             raise Exception(f"Error deleting inventory item: {str(e)}")
     
+    @staticmethod
+    def _required_quantities(purchase_order_id):
+        """Total quantity per material name of an order's purchase lines (one GROUP BY), in line order"""
+        rows = db.session.query(
+            PurchaseOrderMaterial.name,
+            db.func.sum(PurchaseOrderMaterial.quantity)
+        ).filter(
+            PurchaseOrderMaterial.purchase_order_id == purchase_order_id,
+            PurchaseOrderMaterial.kind == PURCHASED_MATERIAL
+        ).group_by(PurchaseOrderMaterial.name).order_by(db.func.min(PurchaseOrderMaterial.id)).all()
+        return {name: int(total or 0) for name, total in rows}
+
+    @staticmethod
+    def _lock_inventory(names):
+        """
+        Inventory rows for the given names in one SELECT ... FOR UPDATE
+
+        Rows are locked in id order so concurrent allocations can't deadlock.
+        Returns a dict keyed by the requested names, matched the way the
+        database compares names.
+        """
+        names = list(names)
+        if not names:
+            return {}
+        items = StoreInventory.query.filter(
+            StoreInventory.name.in_(names)
+        ).order_by(StoreInventory.id).with_for_update().all()
+
+        fold = inventory_name_key()
+        items_by_key = {}
+        for item in items:
+            items_by_key.setdefault(fold(item.name), item)
+        return {name: items_by_key[fold(name)] for name in names if fold(name) in items_by_key}
+
     @staticmethod
     def check_stock_availability(purchase_order_id):
-        """Check stock availability for a purchase order and allocate if possible"""
+        """
+        Check stock availability for a purchase order and allocate if possible
+
+        The order and all required inventory rows are locked up front, the
+        check and allocation run in memory and everything is written back in
+        a single commit, so concurrent checks can't allocate the same stock twice.
+        """
         try:
-            order = PurchaseOrder.query.get_or_404(purchase_order_id)
+            order = PurchaseOrder.query.filter_by(id=purchase_order_id).with_for_update().first_or_404()
             
-            if not order.materials:
+            if not order.has_materials():
                 raise Exception('No materials specified in order')
 
             materials = order.get_materials_list()
+            required = InventoryService._required_quantities(order.id)
+            inventory = InventoryService._lock_inventory(required)
 
-            # Check stock availability
-            stock_check_results = []
-            all_available = True
             shortages = []
+            partial_allocated = False
 
-            for material in materials:
-                if not isinstance(material, dict) or 'name' not in material:
-                    continue
-
-                inventory_item = StoreInventory.query.filter_by(name=material['name']).first()
-                required_qty = material.get('quantity', 0)
+            for name, required_qty in required.items():
+                inventory_item = inventory.get(name)
                 available_qty = inventory_item.quantity if inventory_item else 0
 
-                is_sufficient = available_qty >= required_qty
-                if not is_sufficient:
-                    all_available = False
+                if available_qty < required_qty:
                     shortages.append({
-                        "name": material['name'], 
+                        "name": name, 
                         "quantity": required_qty - available_qty
                     })
 
-                stock_check_results.append({
-                    'material': material['name'],
-                    'required': required_qty,
-                    'available': available_qty,
-                    'sufficient': is_sufficient
-                })
+                # Allocate what is available; a shortfall makes this a partial allocation
+                allocated = min(required_qty, available_qty)
+                if allocated > 0:
+                    inventory_item.allocate(allocated)
+                    if allocated < required_qty:
+                        partial_allocated = True
 
-            if all_available:
-                # Allocate all materials
-                for material in materials:
-                    inventory_item = StoreInventory.query.filter_by(name=material['name']).first()
-                    if inventory_item:
-                        inventory_item.allocate(material.get('quantity', 0))
+            production_order = ProductionOrder.query.get(order.production_order_id)
 
+            if not shortages:
                 order.status = 'store_allocated'
-                production_order = ProductionOrder.query.get(order.production_order_id)
                 if production_order:
                     production_order.status = 'materials_allocated'
 
@@ -155,49 +186,26 @@ class InventoryService:
                     "newStatus": order.status,
                     "purchaseOrder": order.to_dict()
                 }
-            else:
-                # Handle partial allocation
-                partial_allocated = False
-
-                for material in materials:
-                    inventory_item = StoreInventory.query.filter_by(name=material['name']).first()
-                    required_qty = material.get('quantity', 0)
-                    available_qty = inventory_item.quantity if inventory_item else 0
 
-                    if available_qty > 0:
-                        allocated = min(required_qty, available_qty)
-                        inventory_item.allocate(allocated)
-                        if allocated < required_qty:
-                            partial_allocated = True
+            order.status = 'partially_allocated' if partial_allocated else 'insufficient_stock'
+            order.set_materials_list(shortages)
+            # Save original requirements if not already saved
+            if not order.has_original_requirements():
+                order.set_original_requirements(materials)
+            if partial_allocated and production_order:
+                production_order.status = 'partially_allocated'
 
-                if shortages and partial_allocated:
-                    order.status = 'partially_allocated'
-                    order.set_materials_list(shortages)
-                    # Save original requirements if not already saved
-                    if not order.original_requirements:
-                        order.set_original_requirements(materials)
-                    
-                    production_order = ProductionOrder.query.get(order.production_order_id)
-                    if production_order:
-                        production_order.status = 'partially_allocated'
-                else:
-                    order.status = 'insufficient_stock'
-                    order.set_materials_list(shortages)
-                    # Save original requirements if not already saved
-                    if not order.original_requirements:
-                        order.set_original_requirements(materials)
-
-                db.session.commit()
-                
-                message = "Partial allocation done. Shortage sent to Purchase." if partial_allocated else "Stock insufficient . Sent back to Purchase"
-                
-                return {
-                    "message": message,
-                    "allAvailable": False,
-                    "shortages": shortages,
-                    "newStatus": order.status,
-                    "purchaseOrder": order.to_dict()
-                }
+            db.session.commit()
+            
+            message = "Partial allocation done. Shortage sent to Purchase." if partial_allocated else "Stock insufficient . Sent back to Purchase"
+            
+            return {
+                "message": message,
+                "allAvailable": False,
+                "shortages": shortages,
+                "newStatus": order.status,
+                "purchaseOrder": order.to_dict()
+            }
 
         except Exception as e:
             db.session.rollback()
@@ -207,12 +215,12 @@ class InventoryService:
     def process_purchase_verification(purchase_order_id):
         """Verify purchase and add materials to inventory, then allocate only original requirements"""
         try:
-            order = PurchaseOrder.query.get_or_404(purchase_order_id)
+            order = PurchaseOrder.query.filter_by(id=purchase_order_id).with_for_update().first_or_404()
             
             if order.status != 'finance_approved':
                 raise Exception('Order must be finance approved first')
             
-            if not order.materials:
+            if not order.has_materials():
                 raise Exception('No materials specified in order')
             
             # Get purchased materials (full quantities)
@@ -220,6 +228,8 @@ class InventoryService:
             
             # Get original requirements (only what was actually needed)
             original_requirements = order.get_original_requirements()
+
+            inventory = InventoryService._lock_inventory({line.name for line in order.material_lines})
             
             # Step 1: Add ALL purchased materials to inventory
             for material in purchased_materials:
@@ -229,7 +239,7 @@ class InventoryService:
                 material_name = material['name']
                 material_qty = material.get('quantity', 0)
                 
-                inventory_item = StoreInventory.query.filter_by(name=material_name).first()
+                inventory_item = inventory.get(material_name)
                 if inventory_item:
                     inventory_item.add_stock(material_qty)
                 else:
@@ -239,19 +249,17 @@ class InventoryService:
                         category=material.get('category', 'Raw Material')
                     )
                     db.session.add(inventory_item)
+                    inventory[material_name] = inventory_item
             
             # Step 2: Allocate only the original requirements for production
-            if original_requirements:
-                for requirement in original_requirements:
-                    if not isinstance(requirement, dict) or 'name' not in requirement:
-                        continue
-                    
-                    material_name = requirement['name']
-                    required_qty = requirement.get('quantity', 0)
-                    
-                    inventory_item = StoreInventory.query.filter_by(name=material_name).first()
-                    if inventory_item and inventory_item.quantity >= required_qty:
-                        inventory_item.allocate(required_qty)
+            for requirement in original_requirements:
+                if not isinstance(requirement, dict) or 'name' not in requirement:
+                    continue
+                
+                required_qty = requirement.get('quantity', 0)
+                inventory_item = inventory.get(requirement['name'])
+                if inventory_item and inventory_item.quantity >= required_qty:
+                    inventory_item.allocate(required_qty)
             
             # Mark order verified and materials allocated
             order.status = 'store_allocated'
@@ -274,47 +282,25 @@ class InventoryService:
     
     @staticmethod
     def bulk_add_inventory_items(items_data):
-        """Add multiple inventory items or update existing quantities"""
+        """Add multiple inventory items or update existing quantities (see InventoryImportService)"""
         try:
-            results = []
-            for data in items_data:
-                required_fields = ['name', 'quantity']
-                validate_required_fields(data, required_fields)
-
-                # Check if item already exists
-                existing_item = StoreInventory.query.filter_by(name=data['name']).first()
-
-                if existing_item:
-                    existing_item.add_stock(int(data['quantity']))
-                    results.append({
-                        'action': 'updated',
-                        'item': existing_item.to_dict()
-                    })
-                else:
-                    # Create new item
-                    new_item = StoreInventory(
-                        name=data['name'],
-                        quantity=int(data['quantity']),
-                        category=data.get('category', 'Raw Material')
-                    )
-
-                    db.session.add(new_item)
-                    results.append({
-                        'action': 'added',
-                        'item': new_item.to_dict()
-                    })
-
-            db.session.commit()
-
-            return {
-                'message': f'Successfully processed {len(results)} items',
-                'results': results
-            }
-
+            return InventoryImportService.import_items(items_data)
         except Exception as e:
             db.session.rollback()
             raise Exception(f"Error bulk adding inventory items: {str(e)}")
 
+    @staticmethod
+    def import_inventory_file(file):
+        """Add or update inventory items from an uploaded CSV or XLSX sheet"""
+        try:
+            return InventoryImportService.import_items(InventoryImportService.iter_upload_rows(file))
+        except ValueError:
+            db.session.rollback()
+            raise
+        except Exception as e:
+            db.session.rollback()
+            raise Exception(f"Error importing inventory file: {str(e)}")
+
     @staticmethod
     def initialize_sample_data():
         """Initialize sample inventory data"""
@@ -0,0 +1,94 @@
+"""
+Notification Broker Module
+Fans notification events out to subscribers in this process and across workers
+"""
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_CHANNEL = 'erp:notifications'
+
+
+class InProcessBroker:
+    """
+    Delivers published events to callbacks registered in this process
+
+    Suitable for tests and single-process deployments. Subclasses that talk to
+    an external broker call _deliver() for every event they receive.
+    """
+
+    # True when every worker sees every event (so per-worker caches stay current)
+    shared = False
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event: dict):
+        self._deliver(event)
+
+    def subscribe(self, callback):
+        """Register callback(event); it runs on the publishing (or listener) thread"""
+        with self._lock:
+            self._subscribers.add(callback)
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers.discard(callback)
+
+    def _deliver(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"Notification subscriber failed: {e}")
+
+
+class RedisBroker(InProcessBroker):
+    """Publishes through a Redis channel so every worker's subscribers see every event"""
+
+    shared = True
+
+    def __init__(self, url: str, channel: str = NOTIFICATION_CHANNEL):
+        super().__init__()
+        import redis
+
+        self.channel = channel
+        self._redis = redis.Redis.from_url(url)
+        self._listener = threading.Thread(target=self._listen, name='notification-broker', daemon=True)
+        self._listener.start()
+
+    def publish(self, event: dict):
+        try:
+            self._redis.publish(self.channel, json.dumps(event))
+        except Exception as e:
+            # Keep local subscribers working even if Redis is unavailable
+            logger.warning(f"Redis publish failed, delivering locally only: {e}")
+            self._deliver(event)
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self._deliver(json.loads(message['data']))
+            except Exception as e:
+                logger.warning(f"Redis notification listener reconnecting: {e}")
+                threading.Event().wait(1.0)
+
+
+def create_broker():
+    """Redis broker when NOTIFICATION_BROKER_URL (or REDIS_URL) is set, else in-process"""
+    url = os.getenv('NOTIFICATION_BROKER_URL') or os.getenv('REDIS_URL')
+    if url:
+        try:
+            return RedisBroker(url)
+        except Exception as e:
+            logger.warning(f"Could not start Redis notification broker, using in-process broker: {e}")
+    return InProcessBroker()
@@ -2,16 +2,150 @@
 Notification Service Module
 Handles real-time notifications for various system events
 """
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 import json
+import queue
+import threading
+import time
+from sqlalchemy import case, event, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import db
+from models.notification import Notification, NotificationCounter
+from services.notification_broker import create_broker
+
+ALL_DEPARTMENTS = '*'          # Cache key covering every department; counter key for notifications without one
+RING_BUFFER_SIZE = 100         # Recent notifications cached per department in each worker (shared broker only)
+STREAM_KEEPALIVE_SECONDS = 15  # Comment line sent to idle SSE clients
+STREAM_POLL_SECONDS = 2        # Database poll interval for SSE clients without a shared broker
+STREAM_MAX_SECONDS = 300       # Clients reconnect (with Last-Event-ID) after this long
+STREAM_QUEUE_SIZE = 100        # Events buffered per SSE client before dropping
+PENDING_EVENTS_KEY = 'pending_notification_events'  # Session.info key for events awaiting commit
+PENDING_COUNTS_KEY = 'pending_notification_counts'  # Session.info key for unread deltas awaiting commit
+
+
+class NotificationCache:
+    """Per-worker ring buffer of the newest notifications for each department ('*' = all)"""
+
+    def __init__(self, size: int = RING_BUFFER_SIZE):
+        self.size = size
+        self._rings = {}
+        self._complete = {}  # key -> ring holds every notification for that key
+        self._lock = threading.Lock()
+
+    def get(self, key: str, unread_only: bool, limit: int) -> Optional[List[Dict]]:
+        """Serve from the ring, or None if it can't answer exactly"""
+        with self._lock:
+            ring = self._rings.get(key)
+            if ring is None or limit > self.size:
+                return None
+            items = [n for n in ring if not (unread_only and n['read'])]
+            if len(items) < limit and not self._complete[key]:
+                return None
+            return [dict(n, data=dict(n['data'])) for n in items[:limit]]
+
+    def fill(self, key: str, notifications: List[Dict]):
+        """Seed a ring with notifications loaded newest first"""
+        with self._lock:
+            self._rings[key] = deque((dict(n) for n in notifications[:self.size]), maxlen=self.size)
+            self._complete[key] = len(notifications) < self.size
+
+    def apply(self, event: Dict):
+        """Broker subscriber keeping the rings in step with every worker's writes"""
+        with self._lock:
+            if event['event'] == 'created':
+                notification = event['notification']
+                for key in (notification['department'], ALL_DEPARTMENTS):
+                    ring = self._rings.get(key)
+                    if key is None or ring is None:
+                        continue
+                    if len(ring) == ring.maxlen:
+                        self._complete[key] = False
+                    ring.appendleft(dict(notification))
+            elif event['event'] == 'read':
+                for ring in self._rings.values():
+                    for notification in ring:
+                        if notification['id'] == event['id']:
+                            notification['read'] = True
+            elif event['event'] == 'read_all':
+                department = event['department']
+                for ring in self._rings.values():
+                    for notification in ring:
+                        if notification['id'] <= event['readThroughId'] and \
+                                (department is None or notification['department'] == department):
+                            notification['read'] = True
+
+    def clear(self):
+        with self._lock:
+            self._rings = {}
+            self._complete = {}
+
+
+@event.listens_for(Session, 'before_commit')
+def _apply_pending_counts(session):
+    """Add the transaction's new notifications to the unread counters, locking them only until commit"""
+    if session.in_nested_transaction():
+        return
+    deltas = session.info.pop(PENDING_COUNTS_KEY, None)
+    if deltas:
+        NotificationService._adjust_unread(session, deltas)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending(session):
+    """Publish notifications created in a transaction that just committed"""
+    if session.in_nested_transaction():
+        return  # A savepoint was released; the outer transaction can still roll back
+    for pending in session.info.pop(PENDING_EVENTS_KEY, []):
+        NotificationService.get_broker().publish(pending)
+
+
+@event.listens_for(Session, 'after_transaction_end')
+def _discard_pending(session, transaction):
+    """Drop notifications of a rolled back (or abandoned) transaction"""
+    if transaction.parent is None:
+        session.info.pop(PENDING_EVENTS_KEY, None)
+        session.info.pop(PENDING_COUNTS_KEY, None)
+
 
 class NotificationService:
-    """Service class for managing notifications"""
+    """
+    Service class for managing notifications
+
+    Notifications are stored in the notification table. Unread counts and
+    mark-all-as-read use one NotificationCounter row per department ('*' for
+    notifications without one, which also holds the all-departments read
+    watermark); the overall unread count is the sum of the rows. A
+    notification touches only its own counter row, and any statement locking
+    several rows locks them in key order. New notifications are written in the
+    caller's transaction, counted just before it commits and published once it
+    has; read marks commit on their own connection. Every change goes through
+    a broker so every worker's cache and SSE clients see it.
+    """
+    
+    _broker = None
+    _cache = NotificationCache()
+    _broker_lock = threading.Lock()
+    
+    @classmethod
+    def get_broker(cls):
+        with cls._broker_lock:
+            if cls._broker is None:
+                cls._broker = create_broker()
+                cls._broker.subscribe(cls._cache.apply)
+            return cls._broker
     
-    # In-memory storage for notifications (in production, use Redis or database)
-    _notifications = []
-    _max_notifications = 100  # Keep only last 100 notifications
+    @classmethod
+    def set_broker(cls, broker):
+        """Swap the broker (e.g. an InProcessBroker in tests); clears the cache"""
+        with cls._broker_lock:
+            if cls._broker is not None:
+                cls._broker.unsubscribe(cls._cache.apply)
+            cls._cache.clear()
+            cls._broker = broker
+            broker.subscribe(cls._cache.apply)
     
     @classmethod
     def create_notification(cls, 
@@ -21,27 +155,39 @@ class NotificationService:
                           data: Optional[Dict] = None,
                           department: Optional[str] = None,
                           priority: str = 'normal') -> Dict:
-        """Create a new notification"""
+        """Create a new notification in the caller's transaction (the caller commits)"""
+        
+        created_at = datetime.utcnow()
+        table = Notification.__table__
+        result = db.session.execute(table.insert().values(
+            type=notification_type,
+            title=title,
+            message=message,
+            data=json.dumps(data or {}),
+            department=department,
+            priority=priority,  # low, normal, high, urgent
+            is_read=False,
+            created_at=created_at
+        ))
+        notification_id = result.inserted_primary_key[0]
+        # Applied by _apply_pending_counts, so the counter row is locked only while the caller commits
+        deltas = db.session.info.setdefault(PENDING_COUNTS_KEY, {})
+        key = department or ALL_DEPARTMENTS
+        deltas[key] = deltas.get(key, 0) + 1
         
         notification = {
-            'id': len(cls._notifications) + 1,
+            'id': notification_id,
             'type': notification_type,
             'title': title,
             'message': message,
             'data': data or {},
             'department': department,
-            'priority': priority,  # low, normal, high, urgent
-            'timestamp': datetime.utcnow().isoformat(),
+            'priority': priority,
+            'timestamp': created_at.isoformat(),
             'read': False
         }
-        
-        # Add to notifications list
-        cls._notifications.append(notification)
-        
-        # Keep only the most recent notifications
-        if len(cls._notifications) > cls._max_notifications:
-            cls._notifications = cls._notifications[-cls._max_notifications:]
-        
+        # Published by _publish_pending once the caller commits
+        db.session.info.setdefault(PENDING_EVENTS_KEY, []).append({'event': 'created', 'notification': notification})
         return notification
     
     @classmethod
@@ -49,56 +195,228 @@ class NotificationService:
                          department: Optional[str] = None,
                          unread_only: bool = False,
                          limit: int = 50) -> List[Dict]:
-        """Get notifications with optional filtering"""
+        """Get notifications with optional filtering (newest first)"""
         
-        notifications = cls._notifications.copy()
+        # The rings only see this worker's writes unless the broker spans workers
+        if not cls.get_broker().shared:
+            return cls._query_notifications(department, unread_only, limit)
         
-        # Filter by department
-        if department:
-            notifications = [n for n in notifications if n.get('department') == department]
-        
-        # Filter by read status
-        if unread_only:
-            notifications = [n for n in notifications if not n.get('read', False)]
-        
-        # Sort by timestamp (newest first)
-        notifications.sort(key=lambda x: x['timestamp'], reverse=True)
+        key = department or ALL_DEPARTMENTS
+        cached = cls._cache.get(key, unread_only, limit)
+        if cached is not None:
+            return cached
         
-        # Apply limit
+        # Load enough to seed the ring buffer as well
+        fetch = limit if unread_only else max(limit, RING_BUFFER_SIZE)
+        notifications = cls._query_notifications(department, unread_only, fetch)
+        if not unread_only:
+            cls._cache.fill(key, notifications)
         return notifications[:limit]
     
+    @classmethod
+    def get_notifications_since(cls, last_id: int, department: Optional[str] = None,
+                                limit: int = RING_BUFFER_SIZE) -> List[Dict]:
+        """Notifications newer than last_id, oldest first (SSE catch-up)"""
+        query = Notification.query.filter(Notification.id > last_id)
+        if department:
+            query = query.filter(Notification.department == department)
+        rows = query.order_by(Notification.id).limit(limit).all()
+        watermarks = cls._watermarks()
+        return [n.to_dict(cls._read_through(watermarks, n.department)) for n in rows]
+    
     @classmethod
     def mark_as_read(cls, notification_id: int) -> bool:
         """Mark a notification as read"""
         
-        for notification in cls._notifications:
-            if notification['id'] == notification_id:
-                notification['read'] = True
+        table = Notification.__table__
+        with db.engine.begin() as conn:
+            row = conn.execute(
+                select(table.c.id, table.c.department, table.c.is_read).where(table.c.id == notification_id)
+            ).first()
+            if row is None:
+                return False
+            watermarks = cls._watermarks(conn)
+            if row.is_read or row.id <= cls._read_through(watermarks, row.department):
                 return True
-        return False
+            updated = conn.execute(
+                table.update().where(table.c.id == notification_id, table.c.is_read.is_(False)).values(is_read=True)
+            ).rowcount
+            if updated:
+                cls._adjust_unread(conn, {row.department or ALL_DEPARTMENTS: -1})
+        
+        if updated:
+            cls.get_broker().publish({'event': 'read', 'id': notification_id, 'department': row.department})
+        return True
     
     @classmethod
     def mark_all_as_read(cls, department: Optional[str] = None) -> int:
         """Mark all notifications as read, optionally filtered by department"""
         
-        count = 0
-        for notification in cls._notifications:
-            if not notification.get('read', False):
-                if department is None or notification.get('department') == department:
-                    notification['read'] = True
-                    count += 1
+        counters = NotificationCounter.__table__
+        key = department or ALL_DEPARTMENTS
+        with db.engine.begin() as conn:
+            read_through_id = conn.execute(select(func.max(Notification.__table__.c.id))).scalar() or 0
+            locked = select(counters.c.unread).with_for_update()
+            if department:
+                locked = locked.where(counters.c.key == key)
+            # Every row for '*', taken in key order like _adjust_unread
+            count = sum(conn.execute(locked.order_by(counters.c.key)).scalars())
+            cls._adjust_unread(conn, {key: 0})
+            
+            if department:
+                conn.execute(counters.update().where(counters.c.key == key).values(unread=0))
+            else:
+                conn.execute(counters.update().values(unread=0))
+            conn.execute(counters.update().where(counters.c.key == key).values(read_through_id=read_through_id))
+        
+        cls.get_broker().publish({'event': 'read_all', 'department': department, 'readThroughId': read_through_id})
         return count
     
     @classmethod
     def get_unread_count(cls, department: Optional[str] = None) -> int:
         """Get count of unread notifications"""
         
-        notifications = cls._notifications
-        
         if department:
-            notifications = [n for n in notifications if n.get('department') == department]
+            counter = db.session.get(NotificationCounter, department)
+            return counter.unread if counter else 0
+        # Every department's counter already excludes what the '*' watermark marked read
+        return db.session.query(func.coalesce(func.sum(NotificationCounter.unread), 0)).scalar()
+    
+    @classmethod
+    def stream(cls, department: Optional[str] = None, last_event_id: Optional[int] = None,
+               max_seconds: float = STREAM_MAX_SECONDS) -> Iterator[str]:
+        """
+        Server-sent events for new notifications and read changes
+
+        Replays notifications after last_event_id first, then forwards live
+        events until max_seconds elapse; the client's EventSource reconnects.
+        """
+        events = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
         
-        return len([n for n in notifications if not n.get('read', False)])
+        def on_event(event):
+            if department and cls._event_department(event) not in (department, None):
+                return
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                pass  # Slow client; it catches up via Last-Event-ID on reconnect
+        
+        broker = cls.get_broker()
+        broker.subscribe(on_event)
+        try:
+            yield f"retry: 3000\n\n"
+            last_sent = last_event_id or 0
+            if last_event_id is not None:
+                for notification in cls._poll_since(last_event_id, department):
+                    last_sent = notification['id']
+                    yield cls._format_event({'event': 'created', 'notification': notification})
+            
+            # An in-process broker misses other workers' writes; poll the table for those
+            wait = STREAM_KEEPALIVE_SECONDS if broker.shared else STREAM_POLL_SECONDS
+            deadline = time.monotonic() + max_seconds
+            last_yield = time.monotonic()
+            while time.monotonic() < deadline:
+                try:
+                    event = events.get(timeout=min(wait, max(deadline - time.monotonic(), 0.01)))
+                except queue.Empty:
+                    if not broker.shared:
+                        for notification in cls._poll_since(last_sent, department):
+                            last_sent = notification['id']
+                            last_yield = time.monotonic()
+                            yield cls._format_event({'event': 'created', 'notification': notification})
+                    if time.monotonic() - last_yield >= STREAM_KEEPALIVE_SECONDS:
+                        last_yield = time.monotonic()
+                        yield ": keepalive\n\n"
+                    continue
+                if event['event'] == 'created':
+                    if event['notification']['id'] <= last_sent:
+                        continue  # already replayed
+                    last_sent = event['notification']['id']
+                last_yield = time.monotonic()
+                yield cls._format_event(event)
+        finally:
+            broker.unsubscribe(on_event)
+    
+    @classmethod
+    def _poll_since(cls, last_id: int, department: Optional[str]) -> List[Dict]:
+        """get_notifications_since() without keeping the stream's transaction (and connection) open"""
+        try:
+            return cls.get_notifications_since(last_id, department)
+        finally:
+            db.session.rollback()
+    
+    @staticmethod
+    def _format_event(event: Dict) -> str:
+        if event['event'] == 'created':
+            notification = event['notification']
+            return f"id: {notification['id']}\nevent: notification\ndata: {json.dumps(notification)}\n\n"
+        payload = {k: v for k, v in event.items() if k != 'event'}
+        return f"event: {event['event']}\ndata: {json.dumps(payload)}\n\n"
+    
+    @staticmethod
+    def _event_department(event: Dict) -> Optional[str]:
+        if event['event'] == 'created':
+            return event['notification']['department']
+        return event.get('department')
+    
+    @staticmethod
+    def _adjust_unread(conn, deltas: Dict[str, int]):
+        """Add each delta (floored at zero) to its unread counter, creating missing rows"""
+        counters = NotificationCounter.__table__
+        # Lock in key order so transactions touching several counters can't deadlock
+        existing = set(conn.execute(
+            select(counters.c.key).where(counters.c.key.in_(list(deltas))).order_by(counters.c.key).with_for_update()
+        ).scalars())
+        for key in sorted(deltas, key=lambda key: key not in existing):
+            delta = deltas[key]
+            new_value = case((counters.c.unread + delta > 0, counters.c.unread + delta), else_=0)
+            updated = conn.execute(
+                counters.update().where(counters.c.key == key).values(unread=new_value)
+            ).rowcount
+            if updated:
+                continue
+            try:
+                # Savepoint, so a lost race doesn't abort the surrounding transaction
+                with conn.begin_nested():
+                    conn.execute(counters.insert().values(key=key, unread=max(delta, 0), read_through_id=0))
+            except IntegrityError:
+                # Another worker created the row first
+                conn.execute(counters.update().where(counters.c.key == key).values(unread=new_value))
+    
+    @staticmethod
+    def _watermarks(conn=None) -> Dict[str, int]:
+        """{counter key: read_through_id}"""
+        counters = NotificationCounter.__table__
+        statement = select(counters.c.key, counters.c.read_through_id)
+        rows = conn.execute(statement) if conn is not None else db.session.execute(statement)
+        return {row.key: row.read_through_id for row in rows}
+    
+    @staticmethod
+    def _read_through(watermarks: Dict[str, int], department: Optional[str]) -> int:
+        """Highest id bulk-marked read for a notification in this department"""
+        return max(watermarks.get(department, 0) if department else 0, watermarks.get(ALL_DEPARTMENTS, 0))
+    
+    @classmethod
+    def _query_notifications(cls, department: Optional[str], unread_only: bool, limit: int) -> List[Dict]:
+        watermarks = cls._watermarks()
+        query = Notification.query
+        if department:
+            query = query.filter(Notification.department == department)
+            if unread_only:
+                query = query.filter(
+                    Notification.is_read.is_(False),
+                    Notification.id > cls._read_through(watermarks, department)
+                )
+        elif unread_only:
+            query = query.outerjoin(
+                NotificationCounter, NotificationCounter.key == Notification.department
+            ).filter(
+                Notification.is_read.is_(False),
+                Notification.id > watermarks.get(ALL_DEPARTMENTS, 0),
+                Notification.id > func.coalesce(NotificationCounter.read_through_id, 0)
+            )
+        rows = query.order_by(Notification.created_at.desc(), Notification.id.desc()).limit(limit).all()
+        return [n.to_dict(cls._read_through(watermarks, n.department)) for n in rows]
     
     # Specific notification types for transport/fleet management
     
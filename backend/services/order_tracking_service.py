@@ -2,8 +2,31 @@
 Order tracking and status management service
 """
 import json
-from datetime import datetime, timedelta
+import base64
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import String, and_, cast, false, not_, or_, select, true
 from models import db, ProductionOrder, PurchaseOrder, AssemblyOrder, ShowroomProduct
+from utils.batch_loading import chunked, first_by, first_by_production_order
+from utils.search import like_pattern
+
+# Status bar shows orders created within this many days
+STATUS_TRACKING_WINDOW_DAYS = 30
+
+# Keyset position marking an exhausted list in a tracking cursor
+CURSOR_END = 'end'
+
+# The feed cursor trails the read time by this much: updated_at is stamped at flush,
+# before commit, and MySQL DATETIME drops fractional seconds, so rows committed just
+# after a poll can carry an earlier timestamp. Re-sent rows are deduplicated by the client.
+TRACKING_CURSOR_MARGIN_SECONDS = 30
+
+# Department names and status labels computed in Python; a search term contained
+# in any of these cannot be narrowed by SQL on stored columns
+DERIVED_TRACKING_LABELS = (
+    'production', 'purchase', 'finance', 'store', 'assembly', 'showroom',
+    'sales', 'dispatch', 'transport', 'completed', 'pending', 'delivered',
+    'materials_ready', 'available_for_sale', 'order_confirmed', 'in_progress'
+)
 
 class OrderTrackingService:
     """Service class for comprehensive order tracking and status management"""
@@ -17,13 +40,19 @@ class OrderTrackingService:
                 ProductionOrder.created_at.desc()
             ).all()
             
+            # Resolve related department rows with one query per table
+            related = OrderTrackingService._load_related_orders()
+            purchase_by_order = related['purchase']
+            assembly_by_order = related['assembly']
+            showroom_by_order = related['showroom']
+            
             order_log = []
             
             for order in orders:
                 # Get related data
-                purchase_order = PurchaseOrder.query.filter_by(production_order_id=order.id).first()
-                assembly_order = AssemblyOrder.query.filter_by(production_order_id=order.id).first()
-                showroom_product = ShowroomProduct.query.filter_by(production_order_id=order.id).first()
+                purchase_order = purchase_by_order.get(order.id)
+                assembly_order = assembly_by_order.get(order.id)
+                showroom_product = showroom_by_order.get(order.id)
                 
                 # Determine current status and department
                 status_info = OrderTrackingService._determine_order_status(
@@ -36,12 +65,7 @@ class OrderTrackingService:
                 )
                 
                 # Get materials list
-                materials_list = []
-                if purchase_order and purchase_order.materials:
-                    try:
-                        materials_list = json.loads(purchase_order.materials) if isinstance(purchase_order.materials, str) else purchase_order.materials
-                    except:
-                        materials_list = []
+                materials_list = purchase_order.get_materials_list() if purchase_order else []
                 
                 order_log.append({
                     'id': order.id,
@@ -78,14 +102,33 @@ class OrderTrackingService:
         except Exception as e:
             raise Exception(f"Error generating order log: {str(e)}")
     
+    @staticmethod
+    def _load_related_orders(production_order_ids=None):
+        """Batch-load purchase, assembly and showroom rows keyed by production order id.
+        
+        Replaces the per-order ``filter_by(production_order_id=...).first()`` lookups.
+        When ``production_order_ids`` is None every linked row is loaded with a single
+        query per table; otherwise the ids are resolved in chunked ``IN (...)`` queries.
+        The lowest id wins when several rows share a production order, like ``first()``.
+        """
+        lookups = {}
+        for key, model in (
+            ('purchase', PurchaseOrder),
+            ('assembly', AssemblyOrder),
+            ('showroom', ShowroomProduct),
+        ):
+            lookups[key] = first_by_production_order(model, production_order_ids)
+        return lookups
+    
     @staticmethod
     def get_order_detailed_status(order_id):
         """Get detailed status information for a specific order"""
         try:
             order = ProductionOrder.query.get_or_404(order_id)
-            purchase_order = PurchaseOrder.query.filter_by(production_order_id=order.id).first()
-            assembly_order = AssemblyOrder.query.filter_by(production_order_id=order.id).first()
-            showroom_product = ShowroomProduct.query.filter_by(production_order_id=order.id).first()
+            related = OrderTrackingService._load_related_orders([order.id])
+            purchase_order = related['purchase'].get(order.id)
+            assembly_order = related['assembly'].get(order.id)
+            showroom_product = related['showroom'].get(order.id)
             
             # Build timeline
             timeline = OrderTrackingService._build_order_timeline(
@@ -311,25 +354,32 @@ class OrderTrackingService:
     @staticmethod
     def _calculate_summary_stats(order_log):
         """Calculate summary statistics for orders"""
-        if not order_log:
-            return {
-                'inPurchase': 0,
-                'inFinance': 0,
-                'inStore': 0,
-                'inAssembly': 0,
-                'inShowroom': 0,
-                'totalValue': 0,
-                'avgProgress': 0
-            }
+        counts = {
+            'Purchase': 0,
+            'Finance': 0,
+            'Store': 0,
+            'Assembly': 0,
+            'Showroom': 0
+        }
+        total_value = 0
+        total_progress = 0
+        
+        # Single pass over the log instead of one list comprehension per metric
+        for o in order_log:
+            department = o['currentDepartment']
+            if department in counts:
+                counts[department] += 1
+            total_value += o['orderValue']
+            total_progress += o['progressPercentage']
         
         return {
-            'inPurchase': len([o for o in order_log if o['currentDepartment'] == 'Purchase']),
-            'inFinance': len([o for o in order_log if o['currentDepartment'] == 'Finance']),
-            'inStore': len([o for o in order_log if o['currentDepartment'] == 'Store']),
-            'inAssembly': len([o for o in order_log if o['currentDepartment'] == 'Assembly']),
-            'inShowroom': len([o for o in order_log if o['currentDepartment'] == 'Showroom']),
-            'totalValue': sum(o['orderValue'] for o in order_log),
-            'avgProgress': sum(o['progressPercentage'] for o in order_log) / len(order_log)
+            'inPurchase': counts['Purchase'],
+            'inFinance': counts['Finance'],
+            'inStore': counts['Store'],
+            'inAssembly': counts['Assembly'],
+            'inShowroom': counts['Showroom'],
+            'totalValue': total_value,
+            'avgProgress': total_progress / len(order_log) if order_log else 0
         }
     
     @staticmethod
@@ -374,172 +424,422 @@ class OrderTrackingService:
         return timeline
     
     @staticmethod
-    def get_order_status_tracking(query: str | None = None):
+    def get_order_status_tracking(query: str | None = None, updated_since=None, cursor: str | None = None, limit: int | None = None):
         """Get real-time order status tracking for the status bar component.
         If query provided, filter to related production and sales orders.
+        
+        Feed mode: when ``updated_since`` is given only orders whose own or linked
+        department rows changed at or after it are returned, together with
+        ``removedIds`` for changed orders that dropped out of the tracker and (on
+        the first page) orders that aged out of the window since then. Clients
+        pass the returned ``serverTime`` (the read time less
+        TRACKING_CURSOR_MARGIN_SECONDS) as the next ``updated_since``.
+        
+        Pagination: when ``limit`` is given each list is keyset-paginated on
+        (created_at, id) and ``nextCursor`` resumes from the last scanned rows.
         """
         try:
-            from models import SalesOrder, DispatchRequest
+            from models import SalesOrder
             
-            # Get production orders (last 30 days)
-            production_orders = db.session.query(ProductionOrder).filter(
-                ProductionOrder.created_at >= datetime.utcnow() - timedelta(days=30)
-            ).order_by(ProductionOrder.created_at.desc()).all()
+            server_time = datetime.utcnow()
+            window_start = server_time - timedelta(days=STATUS_TRACKING_WINDOW_DAYS)
+            since = OrderTrackingService._parse_tracking_timestamp(updated_since)
+            positions = OrderTrackingService._decode_tracking_cursor(cursor)
+            q = str(query).strip().lower() if query and str(query).strip() else None
             
-            # Get sales orders (last 30 days)
-            sales_orders = db.session.query(SalesOrder).filter(
-                SalesOrder.created_at >= datetime.utcnow() - timedelta(days=30)
-            ).order_by(SalesOrder.created_at.desc()).all()
+            # Candidate rows: 30 day window, optional change cursor and SQL-side search
+            production_query = ProductionOrder.query.filter(ProductionOrder.created_at >= window_start)
+            sales_query = SalesOrder.query.filter(SalesOrder.created_at >= window_start)
+            if since:
+                production_query = production_query.filter(OrderTrackingService._production_changed_filter(since))
+                sales_query = sales_query.filter(OrderTrackingService._sales_changed_filter(since))
+            if q and not OrderTrackingService._matches_derived_label(q):
+                production_query = production_query.filter(OrderTrackingService._production_search_filter(q))
+                sales_query = sales_query.filter(OrderTrackingService._sales_search_filter(q))
             
-            production_tracking = []
-            sales_tracking = []
+            production_orders, production_next = OrderTrackingService._fetch_keyset_page(
+                production_query, ProductionOrder, positions.get('p'), limit
+            )
+            sales_orders, sales_next = OrderTrackingService._fetch_keyset_page(
+                sales_query, SalesOrder, positions.get('s'), limit
+            )
             
             # Process Production Orders (Production → Purchase → Store → Assembly → Showroom)
-            for order in production_orders:
-                purchase_order = PurchaseOrder.query.filter_by(production_order_id=order.id).first()
-                assembly_order = AssemblyOrder.query.filter_by(production_order_id=order.id).first()
-                showroom_product = ShowroomProduct.query.filter_by(production_order_id=order.id).first()
-                
-                # Determine production order status (up to showroom)
-                current_info = OrderTrackingService._determine_current_department_and_status(
-                    order, purchase_order, assembly_order, showroom_product
-                )
+            production_tracking = OrderTrackingService._build_production_tracking(production_orders)
+            # Process Sales Orders (Customer Order → Payment → Dispatch → Delivery)
+            sales_tracking = OrderTrackingService._build_sales_tracking(sales_orders)
+            
+            if q:
+                production_tracking = [o for o in production_tracking if OrderTrackingService._matches_tracking_entry(o, q)]
+                sales_tracking = [o for o in sales_tracking if OrderTrackingService._matches_tracking_entry(o, q)]
                 
-                # Do not skip showroom stage; it must appear under Production Orders
+                # Collect related items: link via production id
+                related_production_ids = {so['productionOrderId'] for so in sales_tracking if so.get('productionOrderId')}
+                related_production_ids.update(int(po['id'].replace('PO-', '')) for po in production_tracking)
                 
-                # Skip production orders that have been fully delivered (edge case if encoded)
-                if current_info.get('status') == 'delivered':
-                    continue
-
-                production_tracking.append({
-                    'id': f"PO-{order.id}",
-                    'orderNumber': f"PO-{order.id:04d}",
-                    'productName': order.product_name,
-                    'quantity': order.quantity,
-                    'currentDepartment': current_info['current_department'],
-                    'status': current_info['status'],
-                    'progress': current_info.get('progress'),
-                    'updatedAt': current_info.get('updated_at', order.created_at.isoformat()),
-                    'createdAt': order.created_at.isoformat(),
-                    'type': 'production'
-                })
+                production_tracking += OrderTrackingService._load_related_production_tracking(
+                    related_production_ids, {po['id'] for po in production_tracking}, window_start, since
+                )
+                sales_tracking += OrderTrackingService._load_related_sales_tracking(
+                    related_production_ids, {so['id'] for so in sales_tracking}, window_start, since
+                )
             
-            # Process Sales Orders (Customer Order → Payment → Dispatch → Delivery)
-            for sales_order in sales_orders:
-                try:
-                    showroom_product = ShowroomProduct.query.get(sales_order.showroom_product_id)
-                    dispatch_request = DispatchRequest.query.filter_by(sales_order_id=sales_order.id).first()
-                    
-                    # Enforce business rule: Sales tracking starts only after product reaches showroom
-                    # Skip sales orders whose product hasn't reached showroom availability
-                    if not showroom_product:
-                        continue
-                    showroom_status = getattr(showroom_product, 'showroom_status', None)
-                    if showroom_status not in ['available', 'sold']:
-                        # Until showroom availability, treat order as production-only
-                        continue
-
-                    # Determine sales order status
-                    current_info = OrderTrackingService._determine_current_department_and_status(
-                        order=None,
-                        purchase_order=None,
-                        assembly_order=None,
-                        showroom_product=showroom_product,
-                        sales_order=sales_order,
-                        dispatch_order=dispatch_request
-                    )
-                    
-                    # Skip delivered orders from status tracker as requested
-                    if current_info['status'] == 'delivered':
-                        continue
-                    
-                    sales_tracking.append({
-                        'id': f"SO-{sales_order.id}",
-                        'orderNumber': sales_order.order_number,
-                        'productName': showroom_product.name if showroom_product else 'Unknown Product',
-                        'quantity': sales_order.quantity,
-                        'currentDepartment': current_info['current_department'],
-                        'status': current_info['status'],
-                        'customerName': sales_order.customer_name,
-                        'finalAmount': sales_order.final_amount,
-                        'productionOrderId': getattr(showroom_product, 'production_order_id', None),
-                        'updatedAt': current_info.get('updated_at', sales_order.updated_at.isoformat()),
-                        'createdAt': sales_order.created_at.isoformat(),
-                        'type': 'sales'
-                    })
-                    
-                except Exception as e:
-                    print(f"Error processing sales order {sales_order.id}: {e}")
-                    continue
+            removed_ids = []
+            if since:
+                returned_ids = {o['id'] for o in production_tracking + sales_tracking}
+                changed_production = OrderTrackingService._changed_ids_in_page(
+                    ProductionOrder, OrderTrackingService._production_changed_filter(since),
+                    window_start, positions.get('p'), production_next
+                )
+                changed_sales = OrderTrackingService._changed_ids_in_page(
+                    SalesOrder, OrderTrackingService._sales_changed_filter(since),
+                    window_start, positions.get('s'), sales_next
+                )
+                removed_ids = [f"PO-{order_id}" for order_id in changed_production if f"PO-{order_id}" not in returned_ids]
+                removed_ids += [f"SO-{order_id}" for order_id in changed_sales if f"SO-{order_id}" not in returned_ids]
+                if not positions:
+                    # Orders that aged out of the window since the previous poll, changed or not
+                    removed_ids += [f"PO-{order_id}" for order_id in OrderTrackingService._aged_out_ids(ProductionOrder, since, window_start)]
+                    removed_ids += [f"SO-{order_id}" for order_id in OrderTrackingService._aged_out_ids(SalesOrder, since, window_start)]
+            
+            next_cursor = None
+            if production_next != CURSOR_END or sales_next != CURSOR_END:
+                next_cursor = OrderTrackingService._encode_tracking_cursor({'p': production_next, 's': sales_next})
             
-            # If no query, return all recent
-            if not query or not str(query).strip():
-                return {
-                    'productionOrders': production_tracking,
-                    'salesOrders': sales_tracking,
-                    'summary': {
-                        'totalProductionOrders': len(production_tracking),
-                        'totalSalesOrders': len(sales_tracking)
-                    }
-                }
-
-            # Normalize query
-            q = str(query).strip().lower()
-
-            def matches_order(o: dict) -> bool:
-                try:
-                    return (
-                        (o.get('orderNumber') or '').lower().find(q) != -1 or
-                        (o.get('productName') or '').lower().find(q) != -1 or
-                        (o.get('customerName') or '').lower().find(q) != -1 or
-                        (o.get('currentDepartment') or '').lower().find(q) != -1 or
-                        (o.get('status') or '').lower().find(q) != -1 or
-                        (str(o.get('id') or '')).lower().find(q) != -1
-                    )
-                except Exception:
-                    return False
-
-            # First pass: find directly matching items
-            matching_production = [o for o in production_tracking if matches_order(o)]
-            matching_sales = [o for o in sales_tracking if matches_order(o)]
-
-            # Collect related items: link via production id
-            related_production_ids = set()
-            for so in matching_sales:
-                if so.get('productionOrderId'):
-                    related_production_ids.add(so['productionOrderId'])
-
-            # From matching production, find linked sales by production id
-            for po in matching_production:
-                try:
-                    po_id_num = int(str(po['orderNumber']).replace('PO-', '')) if str(po['orderNumber']).startswith('PO-') else None
-                except Exception:
-                    po_id_num = None
-                if po_id_num:
-                    related_production_ids.add(po_id_num)
-
-            related_sales = [so for so in sales_tracking if so.get('productionOrderId') in related_production_ids]
-            related_production = [po for po in production_tracking if (
-                po.get('orderNumber') and po['orderNumber'].startswith('PO-') and
-                int(po['orderNumber'].split('PO-')[-1]) in related_production_ids
-            )]
-
-            # Union: direct matches + related
-            final_production = {id(po): po for po in matching_production + related_production}
-            final_sales = {id(so): so for so in matching_sales + related_sales}
-
             return {
-                'productionOrders': list(final_production.values()),
-                'salesOrders': list(final_sales.values()),
+                'productionOrders': production_tracking,
+                'salesOrders': sales_tracking,
                 'summary': {
-                    'totalProductionOrders': len(final_production),
-                    'totalSalesOrders': len(final_sales)
-                }
+                    'totalProductionOrders': len(production_tracking),
+                    'totalSalesOrders': len(sales_tracking)
+                },
+                'removedIds': removed_ids,
+                'serverTime': (server_time - timedelta(seconds=TRACKING_CURSOR_MARGIN_SECONDS)).isoformat(),
+                'nextCursor': next_cursor
             }
             
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error getting order status tracking: {str(e)}")
     
+    @staticmethod
+    def _build_production_tracking(production_orders):
+        """Build status bar entries for production orders, skipping delivered ones"""
+        related = OrderTrackingService._load_related_orders([order.id for order in production_orders])
+        
+        production_tracking = []
+        for order in production_orders:
+            purchase_order = related['purchase'].get(order.id)
+            assembly_order = related['assembly'].get(order.id)
+            showroom_product = related['showroom'].get(order.id)
+            
+            # Determine production order status (up to showroom)
+            current_info = OrderTrackingService._determine_current_department_and_status(
+                order, purchase_order, assembly_order, showroom_product
+            )
+            
+            # Do not skip showroom stage; it must appear under Production Orders
+            
+            # Skip production orders that have been fully delivered (edge case if encoded)
+            if current_info.get('status') == 'delivered':
+                continue
+            
+            production_tracking.append({
+                'id': f"PO-{order.id}",
+                'orderNumber': f"PO-{order.id:04d}",
+                'productName': order.product_name,
+                'quantity': order.quantity,
+                'currentDepartment': current_info['current_department'],
+                'status': current_info['status'],
+                'progress': current_info.get('progress'),
+                'updatedAt': current_info.get('updated_at', order.created_at.isoformat()),
+                'createdAt': order.created_at.isoformat(),
+                'type': 'production'
+            })
+        return production_tracking
+    
+    @staticmethod
+    def _build_sales_tracking(sales_orders):
+        """Build status bar entries for sales orders whose product reached the showroom"""
+        from models import DispatchRequest
+        
+        showroom_ids = [so.showroom_product_id for so in sales_orders]
+        showroom_by_id = first_by(ShowroomProduct, ShowroomProduct.id, showroom_ids)
+        dispatch_by_sales_order = first_by(
+            DispatchRequest, DispatchRequest.sales_order_id, [so.id for so in sales_orders]
+        )
+        
+        sales_tracking = []
+        for sales_order in sales_orders:
+            try:
+                showroom_product = showroom_by_id.get(sales_order.showroom_product_id)
+                dispatch_request = dispatch_by_sales_order.get(sales_order.id)
+                
+                # Enforce business rule: Sales tracking starts only after product reaches showroom
+                # Skip sales orders whose product hasn't reached showroom availability
+                if not showroom_product:
+                    continue
+                showroom_status = getattr(showroom_product, 'showroom_status', None)
+                if showroom_status not in ['available', 'sold']:
+                    # Until showroom availability, treat order as production-only
+                    continue
+                
+                # Determine sales order status
+                current_info = OrderTrackingService._determine_current_department_and_status(
+                    order=None,
+                    purchase_order=None,
+                    assembly_order=None,
+                    showroom_product=showroom_product,
+                    sales_order=sales_order,
+                    dispatch_order=dispatch_request
+                )
+                
+                # Skip delivered orders from status tracker as requested
+                if current_info['status'] == 'delivered':
+                    continue
+                
+                sales_tracking.append({
+                    'id': f"SO-{sales_order.id}",
+                    'orderNumber': sales_order.order_number,
+                    'productName': showroom_product.name if showroom_product else 'Unknown Product',
+                    'quantity': sales_order.quantity,
+                    'currentDepartment': current_info['current_department'],
+                    'status': current_info['status'],
+                    'customerName': sales_order.customer_name,
+                    'finalAmount': sales_order.final_amount,
+                    'productionOrderId': getattr(showroom_product, 'production_order_id', None),
+                    'updatedAt': current_info.get('updated_at', sales_order.updated_at.isoformat()),
+                    'createdAt': sales_order.created_at.isoformat(),
+                    'type': 'sales'
+                })
+                
+            except Exception as e:
+                print(f"Error processing sales order {sales_order.id}: {e}")
+                continue
+        return sales_tracking
+    
+    @staticmethod
+    def _load_related_production_tracking(production_ids, seen_ids, window_start, since=None):
+        """Tracking entries for production orders linked to matched orders"""
+        ids = sorted(pid for pid in production_ids if f"PO-{pid}" not in seen_ids)
+        orders = []
+        for chunk in chunked(ids):
+            query = ProductionOrder.query.filter(
+                ProductionOrder.id.in_(chunk),
+                ProductionOrder.created_at >= window_start
+            )
+            if since:
+                query = query.filter(OrderTrackingService._production_changed_filter(since))
+            orders.extend(query.all())
+        orders.sort(key=lambda o: (o.created_at, o.id), reverse=True)
+        return OrderTrackingService._build_production_tracking(orders)
+    
+    @staticmethod
+    def _load_related_sales_tracking(production_ids, seen_ids, window_start, since=None):
+        """Tracking entries for sales orders whose product came from the given production orders"""
+        from models import SalesOrder
+        
+        sales_orders = []
+        for chunk in chunked(sorted(production_ids)):
+            query = SalesOrder.query.join(
+                ShowroomProduct, SalesOrder.showroom_product_id == ShowroomProduct.id
+            ).filter(
+                ShowroomProduct.production_order_id.in_(chunk),
+                SalesOrder.created_at >= window_start
+            )
+            if since:
+                query = query.filter(OrderTrackingService._sales_changed_filter(since))
+            sales_orders.extend(so for so in query.all() if f"SO-{so.id}" not in seen_ids)
+        sales_orders.sort(key=lambda o: (o.created_at, o.id), reverse=True)
+        return OrderTrackingService._build_sales_tracking(sales_orders)
+    
+    @staticmethod
+    def _matches_tracking_entry(o: dict, q: str) -> bool:
+        """Case-insensitive substring match of a tracking entry against the search term"""
+        try:
+            return (
+                (o.get('orderNumber') or '').lower().find(q) != -1 or
+                (o.get('productName') or '').lower().find(q) != -1 or
+                (o.get('customerName') or '').lower().find(q) != -1 or
+                (o.get('currentDepartment') or '').lower().find(q) != -1 or
+                (o.get('status') or '').lower().find(q) != -1 or
+                (str(o.get('id') or '')).lower().find(q) != -1
+            )
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _matches_derived_label(q):
+        """True when q may match a department or status computed in Python rather than stored"""
+        return any(q in label for label in DERIVED_TRACKING_LABELS)
+    
+    @staticmethod
+    def _order_reference_filter(id_column, q, prefix):
+        """SQL superset of ids whose '<PREFIX>-<id>' reference (optionally zero padded) contains q"""
+        if q in prefix:
+            return true()
+        remainder = q
+        for start in range(len(prefix)):
+            if q.startswith(prefix[start:]):
+                remainder = q[len(prefix) - start:]
+                break
+        if not remainder.isdigit():
+            return true() if remainder == '' else false()
+        digits = remainder.lstrip('0')
+        if not digits:
+            return true()
+        return cast(id_column, String).like(f"%{digits}%")
+    
+    @staticmethod
+    def _production_search_filter(q):
+        """Push the status bar search into SQL for production orders"""
+        pattern = like_pattern(q)
+        return or_(
+            ProductionOrder.product_name.ilike(pattern, escape='\\'),
+            OrderTrackingService._order_reference_filter(ProductionOrder.id, q, 'po-'),
+            ProductionOrder.id.in_(
+                select(PurchaseOrder.production_order_id).where(PurchaseOrder.status.ilike(pattern, escape='\\'))
+            ),
+            ProductionOrder.id.in_(
+                select(AssemblyOrder.production_order_id).where(AssemblyOrder.status.ilike(pattern, escape='\\'))
+            ),
+            ProductionOrder.id.in_(
+                select(ShowroomProduct.production_order_id).where(ShowroomProduct.showroom_status.ilike(pattern, escape='\\'))
+            )
+        )
+    
+    @staticmethod
+    def _sales_search_filter(q):
+        """Push the status bar search into SQL for sales orders"""
+        from models import SalesOrder, DispatchRequest
+        
+        pattern = like_pattern(q)
+        return or_(
+            SalesOrder.order_number.ilike(pattern, escape='\\'),
+            SalesOrder.customer_name.ilike(pattern, escape='\\'),
+            SalesOrder.order_status.ilike(pattern, escape='\\'),
+            SalesOrder.payment_status.ilike(pattern, escape='\\'),
+            OrderTrackingService._order_reference_filter(SalesOrder.id, q, 'so-'),
+            SalesOrder.showroom_product_id.in_(
+                select(ShowroomProduct.id).where(ShowroomProduct.name.ilike(pattern, escape='\\'))
+            ),
+            SalesOrder.id.in_(
+                select(DispatchRequest.sales_order_id).where(DispatchRequest.status.ilike(pattern, escape='\\'))
+            )
+        )
+    
+    @staticmethod
+    def _production_changed_filter(since):
+        """Production orders whose own or linked purchase/assembly/showroom rows changed since the cursor"""
+        return or_(
+            ProductionOrder.updated_at >= since,
+            ProductionOrder.id.in_(select(PurchaseOrder.production_order_id).where(PurchaseOrder.updated_at >= since)),
+            ProductionOrder.id.in_(select(AssemblyOrder.production_order_id).where(AssemblyOrder.updated_at >= since)),
+            ProductionOrder.id.in_(select(ShowroomProduct.production_order_id).where(ShowroomProduct.updated_at >= since))
+        )
+    
+    @staticmethod
+    def _sales_changed_filter(since):
+        """Sales orders whose own, dispatch or showroom rows changed since the cursor"""
+        from models import SalesOrder, DispatchRequest
+        
+        return or_(
+            SalesOrder.updated_at >= since,
+            SalesOrder.id.in_(select(DispatchRequest.sales_order_id).where(DispatchRequest.updated_at >= since)),
+            SalesOrder.showroom_product_id.in_(select(ShowroomProduct.id).where(ShowroomProduct.updated_at >= since))
+        )
+    
+    @staticmethod
+    def _keyset_after(model, position):
+        """Rows strictly after a (created_at, id) position in newest-first order"""
+        created_at, row_id = position
+        return or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id)
+        )
+    
+    @staticmethod
+    def _fetch_keyset_page(query, model, position, limit):
+        """Return (rows, next_position) for a newest-first keyset page"""
+        if position == CURSOR_END:
+            return [], CURSOR_END
+        if position:
+            query = query.filter(OrderTrackingService._keyset_after(model, position))
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+        if not limit:
+            return query.all(), CURSOR_END
+        
+        rows = query.limit(limit + 1).all()
+        if len(rows) <= limit:
+            return rows, CURSOR_END
+        rows = rows[:limit]
+        return rows, (rows[-1].created_at, rows[-1].id)
+    
+    @staticmethod
+    def _changed_ids_in_page(model, changed_filter, window_start, start_position, end_position):
+        """Ids of changed rows between two keyset positions, ignoring the search term"""
+        if start_position == CURSOR_END:
+            return []
+        query = db.session.query(model.id).filter(model.created_at >= window_start, changed_filter)
+        if start_position:
+            query = query.filter(OrderTrackingService._keyset_after(model, start_position))
+        if end_position != CURSOR_END:
+            query = query.filter(not_(OrderTrackingService._keyset_after(model, end_position)))
+        return [row_id for (row_id,) in query.all()]
+    
+    @staticmethod
+    def _aged_out_ids(model, since, window_start):
+        """Ids created between the previous poll's window start (since minus the window) and the current one"""
+        previous_window_start = since - timedelta(days=STATUS_TRACKING_WINDOW_DAYS)
+        query = db.session.query(model.id).filter(
+            model.created_at >= previous_window_start,
+            model.created_at < window_start
+        )
+        return [row_id for (row_id,) in query.all()]
+    
+    @staticmethod
+    def _parse_tracking_timestamp(value):
+        """Parse an ISO-8601 cursor into a naive UTC datetime"""
+        if not value:
+            return None
+        if isinstance(value, datetime):
+            parsed = value
+        else:
+            try:
+                parsed = datetime.fromisoformat(str(value).strip().replace('Z', '+00:00'))
+            except ValueError:
+                raise ValueError(f"Invalid updated_since timestamp: {value}")
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    
+    @staticmethod
+    def _encode_tracking_cursor(positions):
+        """Encode per-list keyset positions into an opaque cursor string"""
+        payload = {}
+        for key, position in positions.items():
+            payload[key] = position if position == CURSOR_END else [position[0].isoformat(), position[1]]
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    
+    @staticmethod
+    def _decode_tracking_cursor(cursor):
+        """Decode a cursor produced by _encode_tracking_cursor"""
+        if not cursor:
+            return {}
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+            positions = {}
+            for key in ('p', 's'):
+                position = payload.get(key)
+                if position == CURSOR_END:
+                    positions[key] = CURSOR_END
+                elif position:
+                    positions[key] = (datetime.fromisoformat(position[0]), int(position[1]))
+            return positions
+        except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+            raise ValueError("Invalid cursor")
+    
     @staticmethod
     def _determine_current_department_and_status(order, purchase_order, assembly_order, showroom_product, sales_order=None, dispatch_order=None):
         """Determine current department and status for status tracking"""
@@ -631,13 +931,13 @@ class OrderTrackingService:
                 return {
                     'current_department': 'showroom',
                     'status': 'available_for_sale',
-                    'updated_at': getattr(showroom_product, 'updated_at', showroom_product.created_at).isoformat()
+                    'updated_at': (showroom_product.updated_at or showroom_product.created_at).isoformat()
                 }
             elif showroom_product.showroom_status in ['pending_review', 'testing']:
                 return {
                     'current_department': 'showroom',
                     'status': showroom_product.showroom_status,
-                    'updated_at': getattr(showroom_product, 'updated_at', showroom_product.created_at).isoformat()
+                    'updated_at': (showroom_product.updated_at or showroom_product.created_at).isoformat()
                 }
         
         # Check assembly status
@@ -647,21 +947,21 @@ class OrderTrackingService:
                     'current_department': 'assembly',
                     'status': 'completed',
                     'progress': 100,
-                    'updated_at': getattr(assembly_order, 'updated_at', assembly_order.created_at).isoformat()
+                    'updated_at': (assembly_order.updated_at or assembly_order.created_at).isoformat()
                 }
             elif assembly_order.status == 'in_progress':
                 return {
                     'current_department': 'assembly',
                     'status': 'in_progress',
                     'progress': assembly_order.progress or 0,
-                    'updated_at': getattr(assembly_order, 'updated_at', assembly_order.created_at).isoformat()
+                    'updated_at': (assembly_order.updated_at or assembly_order.created_at).isoformat()
                 }
             elif assembly_order.status in ['paused', 'rework']:
                 return {
                     'current_department': 'assembly',
                     'status': assembly_order.status,
                     'progress': assembly_order.progress or 0,
-                    'updated_at': getattr(assembly_order, 'updated_at', assembly_order.created_at).isoformat()
+                    'updated_at': (assembly_order.updated_at or assembly_order.created_at).isoformat()
                 }
             elif assembly_order.status == 'pending':
                 # Assembly is still queued, fall back to the latest purchase/store department
@@ -670,26 +970,26 @@ class OrderTrackingService:
                         return {
                             'current_department': 'store',
                             'status': purchase_order.status,
-                            'updated_at': getattr(purchase_order, 'updated_at', purchase_order.created_at).isoformat()
+                            'updated_at': (purchase_order.updated_at or purchase_order.created_at).isoformat()
                         }
                     if purchase_order.status in ['finance_approved', 'pending_finance_approval', 'finance_rejected']:
                         return {
                             'current_department': 'finance',
                             'status': purchase_order.status,
-                            'updated_at': getattr(purchase_order, 'updated_at', purchase_order.created_at).isoformat()
+                            'updated_at': (purchase_order.updated_at or purchase_order.created_at).isoformat()
                         }
                     if purchase_order.status in ['pending_request', 'insufficient_stock']:
                         return {
                             'current_department': 'purchase',
                             'status': purchase_order.status,
-                            'updated_at': getattr(purchase_order, 'updated_at', purchase_order.created_at).isoformat()
+                            'updated_at': (purchase_order.updated_at or purchase_order.created_at).isoformat()
                         }
                 # No purchase/store context, treat as queued in assembly
                 return {
                     'current_department': 'assembly',
                     'status': 'pending',
                     'progress': assembly_order.progress or 0,
-                    'updated_at': getattr(assembly_order, 'updated_at', assembly_order.created_at).isoformat()
+                    'updated_at': (assembly_order.updated_at or assembly_order.created_at).isoformat()
                 }
         
         # Check purchase/store status
@@ -698,25 +998,25 @@ class OrderTrackingService:
                 return {
                     'current_department': 'store',
                     'status': 'materials_ready',
-                    'updated_at': getattr(purchase_order, 'updated_at', purchase_order.created_at).isoformat()
+                    'updated_at': (purchase_order.updated_at or purchase_order.created_at).isoformat()
                 }
             elif purchase_order.status in ['store_allocated', 'pending_store_check']:
                 return {
                     'current_department': 'store',
                     'status': purchase_order.status,
-                    'updated_at': getattr(purchase_order, 'updated_at', purchase_order.created_at).isoformat()
+                    'updated_at': (purchase_order.updated_at or purchase_order.created_at).isoformat()
                 }
             elif purchase_order.status in ['finance_approved', 'pending_finance_approval', 'finance_rejected']:
                 return {
                     'current_department': 'finance',
                     'status': purchase_order.status,
-                    'updated_at': getattr(purchase_order, 'updated_at', purchase_order.created_at).isoformat()
+                    'updated_at': (purchase_order.updated_at or purchase_order.created_at).isoformat()
                 }
             elif purchase_order.status in ['pending_request', 'insufficient_stock']:
                 return {
                     'current_department': 'purchase',
                     'status': purchase_order.status,
-                    'updated_at': getattr(purchase_order, 'updated_at', purchase_order.created_at).isoformat()
+                    'updated_at': (purchase_order.updated_at or purchase_order.created_at).isoformat()
                 }
         
         # Default - newly created order
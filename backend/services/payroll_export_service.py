@@ -0,0 +1,197 @@
+"""
+Payroll Export Service Module
+Streams payroll reports as CSV or write-only XLSX without materializing every row
+"""
+import csv
+import io
+import tempfile
+from datetime import datetime
+from models import db, Employee, Payroll
+
+# Payrolls fetched from the database per round trip
+EXPORT_BATCH_SIZE = 1000
+# Bytes per chunk handed to the HTTP response
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_FORMATS = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'payroll_report.xlsx'),
+    'csv': ('text/csv', 'payroll_report.csv')
+}
+
+# (header, column width, named style) per column
+EXPORT_COLUMNS = [
+    ('Employee ID', 14, 'payroll_text'),
+    ('Employee Name', 28, 'payroll_text'),
+    ('Department', 18, 'payroll_text'),
+    ('Designation', 20, 'payroll_text'),
+    ('Pay Period Start', 17, 'payroll_date'),
+    ('Pay Period End', 17, 'payroll_date'),
+    ('Monthly Salary', 16, 'payroll_amount'),
+    ('Allowances', 14, 'payroll_amount'),
+    ('Gross Salary', 16, 'payroll_amount'),
+    ('Deductions', 14, 'payroll_amount'),
+    ('Net Salary', 16, 'payroll_amount'),
+    ('Status', 12, 'payroll_text'),
+    ('Payment Date', 15, 'payroll_date')
+]
+
+
+def _named_styles():
+    """Shared cell styles registered once per workbook instead of per-cell style objects"""
+    from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+
+    thin = Side(style='thin')
+    border = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header = NamedStyle(name='payroll_header')
+    header.font = Font(bold=True, color="FFFFFF")
+    header.fill = PatternFill(start_color="007BFF", end_color="007BFF", fill_type="solid")
+    header.alignment = Alignment(horizontal='center')
+    header.border = border
+
+    text = NamedStyle(name='payroll_text')
+    text.border = border
+
+    amount = NamedStyle(name='payroll_amount')
+    amount.border = border
+    amount.alignment = Alignment(horizontal='right')
+    amount.number_format = '#,##0.00'
+
+    date_style = NamedStyle(name='payroll_date')
+    date_style.border = border
+    date_style.number_format = 'DD/MM/YYYY'
+    return [header, text, amount, date_style]
+
+
+class PayrollExportService:
+    """Service class for streaming payroll reports"""
+
+    @staticmethod
+    def parse_filters(start_date=None, end_date=None, department=None, export_format='xlsx'):
+        """Validate export options up front (errors can't be reported once streaming starts)"""
+        export_format = (export_format or 'xlsx').lower()
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        filters = {
+            'start_date': datetime.fromisoformat(start_date).date() if start_date else None,
+            'end_date': datetime.fromisoformat(end_date).date() if end_date else None,
+            'department': department or None
+        }
+        if filters['start_date'] and filters['end_date'] and filters['end_date'] < filters['start_date']:
+            raise ValueError('endDate must not be before startDate')
+        return export_format, filters
+
+    @staticmethod
+    def iter_rows(start_date=None, end_date=None, department=None):
+        """
+        Payroll report rows, newest pay period first, fetched in batches
+
+        Pay periods overlapping [start_date, end_date] are included.
+        """
+        query = db.session.query(
+            Employee.employee_id,
+            Employee.first_name,
+            Employee.last_name,
+            Employee.department,
+            Employee.designation,
+            Payroll.pay_period_start,
+            Payroll.pay_period_end,
+            Payroll.monthly_salary,
+            Payroll.allowances,
+            Payroll.gross_salary,
+            Payroll.deductions,
+            Payroll.net_salary,
+            Payroll.status,
+            Payroll.payment_date
+        ).join(Employee, Employee.id == Payroll.employee_id)
+
+        if start_date:
+            query = query.filter(Payroll.pay_period_end >= start_date)
+        if end_date:
+            query = query.filter(Payroll.pay_period_start <= end_date)
+        if department:
+            query = query.filter(Employee.department == department)
+
+        query = query.order_by(Payroll.pay_period_end.desc(), Payroll.id.desc())
+        for (employee_code, first_name, last_name, dept, designation, period_start, period_end,
+             monthly_salary, allowances, gross_salary, deductions, net_salary, status,
+             payment_date) in query.yield_per(EXPORT_BATCH_SIZE):
+            yield [
+                employee_code or '',
+                f"{first_name} {last_name}",
+                dept or '',
+                designation or '',
+                period_start,
+                period_end,
+                monthly_salary or 0.0,
+                allowances or 0.0,
+                gross_salary or 0.0,
+                deductions or 0.0,
+                net_salary or 0.0,
+                status.title() if status else 'Pending',
+                payment_date
+            ]
+
+    @classmethod
+    def iter_csv(cls, **filters):
+        """CSV report, streamed as rows are fetched"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([header for header, _, _ in EXPORT_COLUMNS])
+        for row in cls.iter_rows(**filters):
+            writer.writerow([
+                value.strftime('%d/%m/%Y') if hasattr(value, 'strftime')
+                else f"{value:.2f}" if isinstance(value, float)
+                else value
+                for value in row
+            ])
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    @classmethod
+    def iter_xlsx(cls, **filters):
+        """
+        XLSX report from a write-only workbook
+
+        Rows go straight to openpyxl's temporary worksheet files, and the
+        finished zip is spooled to a temp file and streamed in chunks, so
+        memory stays flat however many payrolls are exported.
+        """
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.utils import get_column_letter
+
+        wb = Workbook(write_only=True)
+        for style in _named_styles():
+            wb.add_named_style(style)
+        ws = wb.create_sheet("Payroll Report")
+        for col_num, (_, width, _) in enumerate(EXPORT_COLUMNS, 1):
+            ws.column_dimensions[get_column_letter(col_num)].width = width
+
+        def styled(value, style):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style
+            return cell
+
+        ws.append([styled(header, 'payroll_header') for header, _, _ in EXPORT_COLUMNS])
+        for row in cls.iter_rows(**filters):
+            ws.append([styled(value, style) for value, (_, _, style) in zip(row, EXPORT_COLUMNS)])
+
+        with tempfile.TemporaryFile() as spool:
+            wb.save(spool)
+            spool.seek(0)
+            while True:
+                chunk = spool.read(EXPORT_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+
+    @classmethod
+    def stream(cls, export_format, filters):
+        """Byte chunks of the report in the requested format"""
+        if export_format == 'csv':
+            return cls.iter_csv(**filters)
+        return cls.iter_xlsx(**filters)
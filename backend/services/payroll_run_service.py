@@ -0,0 +1,304 @@
+"""
+Payroll Run Service Module
+Salary rules and the batch payroll run for every active employee in a pay period
+"""
+import threading
+import uuid
+from datetime import datetime, timedelta
+import numpy as np
+from flask import current_app
+from sqlalchemy import and_, func, or_, update
+from sqlalchemy.exc import IntegrityError
+from models import db, Employee, Payroll, PayrollRun
+from services.attendance_rollup_service import AttendanceRollupService
+
+# Payroll rows inserted (and progress committed) per batch
+PAYROLL_RUN_CHUNK_SIZE = 500
+
+# A running run whose progress (updated_at) hasn't moved for this long is taken to
+# have died with its worker and can be claimed again
+PAYROLL_RUN_STALE_MINUTES = 15
+
+# Statutory deduction rules for monthly and daily employees
+PF_RATE = 0.12
+PF_WAGE_CEILING = 15000
+ESI_RATE = 0.0075
+ESI_GROSS_LIMIT = 21000
+PROFESSIONAL_TAX = 200
+INCOME_TAX_RATE = 0.05
+INCOME_TAX_THRESHOLD = 50000
+HOURLY_DEDUCTION_RATE = 0.05
+DAYS_PER_MONTH = 30  # Daily rate -> monthly equivalent for display
+
+
+def calculate_payroll(salary_types, salaries, total_working_days, attended_days, total_hours, allowances):
+    """
+    Apply the salary rules to arrays of employees at once
+
+    Hourly: gross = rate * hours, 5% deduction, allowances ignored.
+    Monthly (and unknown types): salary prorated by attended / working days
+    (full salary when working days is 0 or attended days is unknown).
+    Daily: rate * attended days. Monthly and daily pay PF on basic (capped),
+    ESI below the gross limit, professional tax and income tax above the threshold.
+
+    Args:
+        attended_days: Use NaN where attendance is unknown
+
+    Returns:
+        dict: numpy arrays monthly_salary, gross_salary, deductions, net_salary
+    """
+    salary_types = np.asarray(salary_types, dtype=object)
+    salaries = np.asarray(salaries, dtype=float)
+    working = np.broadcast_to(np.asarray(total_working_days, dtype=float), salaries.shape)
+    attended = np.broadcast_to(np.asarray(attended_days, dtype=float), salaries.shape)
+    hours = np.broadcast_to(np.asarray(total_hours, dtype=float), salaries.shape)
+    allowances = np.broadcast_to(np.asarray(allowances, dtype=float), salaries.shape)
+
+    hourly = salary_types == 'hourly'
+    daily = salary_types == 'daily'
+    known_attendance = ~np.isnan(attended)
+    attended_or_zero = np.where(known_attendance, attended, 0.0)
+
+    prorate = (working > 0) & known_attendance
+    monthly_base = np.where(prorate, salaries / np.where(working > 0, working, 1.0) * attended_or_zero, salaries)
+    base_salary = np.select([hourly, daily], [salaries * hours, salaries * attended_or_zero], monthly_base)
+    monthly_salary = np.where(daily, salaries * DAYS_PER_MONTH, salaries)
+
+    gross_salary = np.where(hourly, base_salary, base_salary + allowances)
+    statutory = (
+        np.minimum(base_salary, PF_WAGE_CEILING) * PF_RATE
+        + np.where(gross_salary < ESI_GROSS_LIMIT, gross_salary * ESI_RATE, 0.0)
+        + PROFESSIONAL_TAX
+        + np.where(gross_salary > INCOME_TAX_THRESHOLD, gross_salary * INCOME_TAX_RATE, 0.0)
+    )
+    deductions = np.where(hourly, gross_salary * HOURLY_DEDUCTION_RATE, statutory)
+
+    return {
+        'monthly_salary': monthly_salary,
+        'gross_salary': gross_salary,
+        'deductions': deductions,
+        'net_salary': gross_salary - deductions
+    }
+
+
+def calculate_employee_pay(salary_type, salary, total_working_days, attended_days, total_hours, allowances):
+    """calculate_payroll() for a single employee; returns plain floats"""
+    pay = calculate_payroll(
+        [salary_type], [float(salary)], float(total_working_days or 0),
+        np.nan if attended_days is None else float(attended_days),
+        float(total_hours or 0), float(allowances or 0)
+    )
+    return {key: float(values[0]) for key, values in pay.items()}
+
+
+def working_days_between(start_date, end_date):
+    """Days in the period excluding Sundays"""
+    days = (end_date - start_date).days + 1
+    return sum(1 for offset in range(days) if (start_date + timedelta(days=offset)).weekday() != 6)
+
+
+class PayrollRunService:
+    """
+    Service class for batch payroll runs
+
+    A run covers every active employee for one pay period. Attendance comes
+    from the monthly rollups, pay is computed with calculate_payroll() for all
+    employees at once and Payroll rows are bulk inserted in chunks, committing
+    progress on the PayrollRun after each chunk. Runs are idempotent: there is
+    one run per period, and employees that already have a payroll for the
+    period are skipped (the unique key on employee and period backs this up),
+    so a failed run can simply be started again. The same goes for a run left
+    'running' by a worker that was restarted: once its progress is
+    PAYROLL_RUN_STALE_MINUTES old, starting the period reclaims it. Every claim
+    gets a new claim_token and each chunk commits only while the run still
+    carries it, so an executor whose run was reclaimed stops at its next chunk.
+    """
+
+    @classmethod
+    def start_run(cls, run_data, background=True):
+        """
+        Start (or return) the payroll run for a pay period
+
+        Returns:
+            tuple: (run dict, started) where started is False if the period
+            already has a completed run or one still making progress
+        """
+        for field in ('startDate', 'endDate'):
+            if field not in run_data:
+                raise ValueError(f'Missing required field: {field}')
+        start_date = datetime.fromisoformat(run_data['startDate']).date()
+        end_date = datetime.fromisoformat(run_data['endDate']).date()
+        if end_date < start_date:
+            raise ValueError('endDate must not be before startDate')
+
+        total_working_days = run_data.get('totalWorkingDays')
+        if total_working_days is None:
+            total_working_days = working_days_between(start_date, end_date)
+        allowances = float(run_data.get('allowances', 0) or 0)
+        employee_allowances = {
+            int(employee_id): float(amount or 0)
+            for employee_id, amount in (run_data.get('employeeAllowances') or {}).items()
+        }
+
+        run = PayrollRun.query.filter_by(pay_period_start=start_date, pay_period_end=end_date).first()
+        if run is None:
+            run = PayrollRun(
+                pay_period_start=start_date,
+                pay_period_end=end_date,
+                total_working_days=float(total_working_days)
+            )
+            db.session.add(run)
+            try:
+                db.session.commit()
+            except IntegrityError:
+                # Another request created the run for this period first
+                db.session.rollback()
+                run = PayrollRun.query.filter_by(pay_period_start=start_date, pay_period_end=end_date).first()
+
+        # Claim the run atomically so concurrent requests can't both execute it
+        stale_before = datetime.utcnow() - timedelta(minutes=PAYROLL_RUN_STALE_MINUTES)
+        token = uuid.uuid4().hex
+        claimed = db.session.execute(
+            update(PayrollRun)
+            .where(
+                PayrollRun.id == run.id,
+                or_(
+                    PayrollRun.status.in_(['pending', 'failed']),
+                    and_(PayrollRun.status == 'running', PayrollRun.updated_at < stale_before)
+                )
+            )
+            .values(
+                status='running',
+                claim_token=token,
+                total_working_days=float(total_working_days),
+                error=None,
+                started_at=datetime.utcnow(),
+                finished_at=None
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        db.session.refresh(run)
+        if not claimed:
+            return run.to_dict(), False
+
+        if background:
+            app = current_app._get_current_object()
+
+            def execute():
+                with app.app_context():
+                    cls._execute(run.id, token, allowances, employee_allowances)
+
+            threading.Thread(target=execute, name=f'payroll-run-{run.id}', daemon=True).start()
+        else:
+            cls._execute(run.id, token, allowances, employee_allowances)
+            db.session.refresh(run)
+        return run.to_dict(), True
+
+    @staticmethod
+    def get_run(run_id):
+        run = PayrollRun.query.get(run_id)
+        if not run:
+            raise ValueError('Payroll run not found')
+        return run.to_dict()
+
+    @staticmethod
+    def get_runs(limit=24):
+        runs = PayrollRun.query.order_by(PayrollRun.pay_period_start.desc()).limit(limit).all()
+        return [run.to_dict() for run in runs]
+
+    @classmethod
+    def _execute(cls, run_id, token, allowances, employee_allowances):
+        run = PayrollRun.query.get(run_id)
+        try:
+            start_date, end_date = run.pay_period_start, run.pay_period_end
+            employees = db.session.query(
+                Employee.id, Employee.first_name, Employee.last_name, Employee.salary, Employee.salary_type
+            ).filter(
+                func.lower(Employee.status) == 'active'
+            ).order_by(Employee.id).all()
+
+            already_paid = {
+                employee_id for (employee_id,) in db.session.query(Payroll.employee_id).filter(
+                    Payroll.pay_period_start == start_date,
+                    Payroll.pay_period_end == end_date
+                )
+            }
+            pending = [employee for employee in employees if employee.id not in already_paid]
+            skipped = len(employees) - len(pending)
+
+            if not cls._advance(run_id, token, total_employees=len(employees), skipped_employees=skipped,
+                                processed_employees=skipped, created_payrolls=0):
+                return
+
+            if pending:
+                attendance = {
+                    row['employeeId']: row
+                    for row in AttendanceRollupService.get_summary(start_date, end_date)
+                }
+                no_attendance = {'presentDays': 0, 'lateDays': 0, 'halfDays': 0, 'hoursWorked': 0}
+                summaries = [attendance.get(employee.id, no_attendance) for employee in pending]
+
+                salary_types = [employee.salary_type or 'monthly' for employee in pending]
+                employee_allowance = [employee_allowances.get(employee.id, allowances) for employee in pending]
+                pay = calculate_payroll(
+                    salary_types,
+                    [float(employee.salary) for employee in pending],
+                    run.total_working_days,
+                    # Late counts as a full day, half day as half
+                    [row['presentDays'] + row['lateDays'] + 0.5 * row['halfDays'] for row in summaries],
+                    [row['hoursWorked'] for row in summaries],
+                    employee_allowance
+                )
+
+                # Payrolls created since already_paid was read (e.g. by hand) are skipped, not duplicated
+                insert = Payroll.__table__.insert().prefix_with('IGNORE', dialect='mysql').prefix_with('OR IGNORE', dialect='sqlite')
+                for offset in range(0, len(pending), PAYROLL_RUN_CHUNK_SIZE):
+                    chunk = range(offset, min(offset + PAYROLL_RUN_CHUNK_SIZE, len(pending)))
+                    created = db.session.execute(insert, [
+                        {
+                            'employee_id': pending[i].id,
+                            'name': f"{pending[i].first_name} {pending[i].last_name}",
+                            'pay_period_start': start_date,
+                            'pay_period_end': end_date,
+                            'monthly_salary': float(pay['monthly_salary'][i]),
+                            'salary_type': salary_types[i],
+                            'allowances': employee_allowance[i],
+                            'deductions': float(pay['deductions'][i]),
+                            'gross_salary': float(pay['gross_salary'][i]),
+                            'net_salary': float(pay['net_salary'][i])
+                        }
+                        for i in chunk
+                    ]).rowcount
+                    if not cls._advance(
+                        run_id, token,
+                        processed_employees=PayrollRun.processed_employees + len(chunk),
+                        created_payrolls=PayrollRun.created_payrolls + created,
+                        skipped_employees=PayrollRun.skipped_employees + len(chunk) - created
+                    ):
+                        return
+
+            cls._advance(run_id, token, status='completed', finished_at=datetime.utcnow())
+        except Exception as e:
+            db.session.rollback()
+            cls._advance(run_id, token, status='failed', error=str(e), finished_at=datetime.utcnow())
+
+    @staticmethod
+    def _advance(run_id, token, **values):
+        """
+        Record progress and commit, provided this executor still owns the run
+
+        Returns:
+            bool: False (with the work since the last commit rolled back) if the run was reclaimed
+        """
+        owned = db.session.execute(
+            update(PayrollRun)
+            .where(PayrollRun.id == run_id, PayrollRun.claim_token == token, PayrollRun.status == 'running')
+            .values(updated_at=datetime.utcnow(), **values)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not owned:
+            db.session.rollback()
+            return False
+        db.session.commit()
+        return True
@@ -0,0 +1,333 @@
+"""
+Payslip Service Module
+Renders payslips from a compiled template, caches them by content and converts them to PDF off the request thread
+"""
+import contextlib
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app, render_template
+from sqlalchemy.orm import joinedload
+from models import db, Payroll
+from services.payroll_run_service import (
+    ESI_GROSS_LIMIT, ESI_RATE, HOURLY_DEDUCTION_RATE, INCOME_TAX_RATE, INCOME_TAX_THRESHOLD,
+    PF_RATE, PF_WAGE_CEILING, PROFESSIONAL_TAX
+)
+
+PAYSLIP_TEMPLATE = 'payslip.html'
+# Rendered HTML and converted PDFs, shared by every worker
+PAYSLIP_DIR = os.getenv(
+    'PAYSLIP_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'payslips')
+)
+# Rendered payslips kept in memory per worker
+HTML_CACHE_SIZE = 256
+# Concurrent wkhtmltopdf processes per worker
+PDF_WORKERS = int(os.getenv('PAYSLIP_PDF_WORKERS', min(4, os.cpu_count() or 1)))
+# A pending marker older than this belongs to a worker that died mid-conversion
+PDF_PENDING_TIMEOUT_SECONDS = 600
+
+
+def _money(value):
+    return f"{value or 0:,.2f}"
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    mode = 'wb' if isinstance(data, bytes) else 'w'
+    with open(tmp_path, mode, **({} if isinstance(data, bytes) else {'encoding': 'utf-8'})) as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _convert_to_pdf(html_path, pdf_path, error_path, pending_path):
+    """Run wkhtmltopdf (via pdfkit) for one payslip; failures are recorded next to the artifact"""
+    tmp_path = f"{pdf_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        import pdfkit
+        pdfkit.from_file(html_path, tmp_path, options={'quiet': '', 'encoding': 'UTF-8'})
+        os.replace(tmp_path, pdf_path)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        _write_atomic(error_path, str(e))
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(pending_path)
+
+
+class PayslipService:
+    """
+    Service class for payslip rendering
+
+    Payslips are rendered from templates/payslip.html and cached under a
+    content address derived from the payroll id, both updated_at stamps and the
+    template itself, so a changed payroll, employee or template never serves a
+    stale payslip. HTML and PDF artifacts are written to PAYSLIP_DIR. PDF
+    conversion runs on a small thread pool; each conversion is its own
+    wkhtmltopdf process, so bulk runs convert in parallel across processes.
+    A ``.pending`` marker created with O_EXCL next to the artifact claims a
+    conversion, so every worker sees it and only one worker runs it.
+    """
+
+    _html_cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    _executor = None
+    _template_digest = None
+    _pdf_available = None
+
+    # Rendering
+    @classmethod
+    def render_html(cls, payroll_id):
+        """Payslip HTML for a payroll record, from cache when unchanged"""
+        payroll = cls._load_payroll(payroll_id)
+        return cls._render(payroll)[0]
+
+    @classmethod
+    def _render(cls, payroll):
+        """(html, artifact key) for a loaded payroll, rendering and caching on a miss"""
+        key = cls.cache_key(payroll)
+        with cls._cache_lock:
+            html = cls._html_cache.get(key)
+            if html is not None:
+                cls._html_cache.move_to_end(key)
+                return html, key
+
+        html_path = cls._artifact_path(key, 'html')
+        if os.path.exists(html_path):
+            with open(html_path, encoding='utf-8') as f:
+                html = f.read()
+        else:
+            html = render_template(PAYSLIP_TEMPLATE, **cls._context(payroll))
+            os.makedirs(PAYSLIP_DIR, exist_ok=True)
+            cls._remove_superseded(payroll.id, key)
+            _write_atomic(html_path, html)
+
+        with cls._cache_lock:
+            cls._html_cache[key] = html
+            while len(cls._html_cache) > HTML_CACHE_SIZE:
+                cls._html_cache.popitem(last=False)
+        return html, key
+
+    @classmethod
+    def cache_key(cls, payroll):
+        """Content address: payroll id plus every input that changes the rendered payslip"""
+        employee = payroll.employee
+        parts = [
+            str(payroll.id),
+            payroll.updated_at.isoformat() if payroll.updated_at else '',
+            employee.updated_at.isoformat() if employee and employee.updated_at else '',
+            cls._template_version()
+        ]
+        return f"{payroll.id}-{hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()[:32]}"
+
+    # PDF
+    @classmethod
+    def pdf_available(cls):
+        """True if pdfkit and the wkhtmltopdf binary are installed"""
+        if cls._pdf_available is None:
+            try:
+                import pdfkit
+                pdfkit.configuration()
+                cls._pdf_available = True
+            except (ImportError, OSError):
+                cls._pdf_available = False
+        return cls._pdf_available
+
+    @classmethod
+    def get_pdf(cls, payroll_id):
+        """
+        PDF payslip status; queues the conversion if it hasn't been done
+
+        Returns:
+            dict: status ('ready', 'pending' or 'failed') with the file path or error
+        """
+        payroll = cls._load_payroll(payroll_id)
+        _, key = cls._render(payroll)
+        status = cls._pdf_status(key)
+        if status['status'] == 'missing':
+            cls._submit(key)
+            status = {'status': 'pending'}
+        return status
+
+    @classmethod
+    def generate_for_period(cls, start_date, end_date):
+        """Render every payslip whose pay period lies in [start_date, end_date] and queue their PDFs"""
+        payrolls = Payroll.query.options(joinedload(Payroll.employee)).filter(
+            Payroll.pay_period_start >= start_date,
+            Payroll.pay_period_end <= end_date
+        ).order_by(Payroll.id).all()
+
+        keys = [cls._render(payroll)[1] for payroll in payrolls]
+        job = {
+            'id': uuid.uuid4().hex,
+            'payPeriodStart': start_date.isoformat(),
+            'payPeriodEnd': end_date.isoformat(),
+            'keys': keys,
+            'createdAt': datetime.utcnow().isoformat()
+        }
+        os.makedirs(os.path.dirname(cls._job_path(job['id'])), exist_ok=True)
+        _write_atomic(cls._job_path(job['id']), json.dumps(job))
+
+        for key in keys:
+            status = cls._pdf_status(key)['status']
+            if status == 'failed':
+                with contextlib.suppress(FileNotFoundError):  # Retry earlier failures
+                    os.remove(cls._artifact_path(key, 'error'))
+            if status != 'ready':
+                cls._submit(key)
+        return cls.job_status(job['id'])
+
+    @classmethod
+    def job_status(cls, job_id):
+        """Progress of a bulk payslip job, read from disk so any worker can answer"""
+        job_path = cls._job_path(job_id)
+        if not job_id.isalnum() or not os.path.exists(job_path):
+            raise ValueError('Payslip job not found')
+        with open(job_path, encoding='utf-8') as f:
+            job = json.load(f)
+
+        counts = {'ready': 0, 'pending': 0, 'failed': 0}
+        for key in job['keys']:
+            status = cls._pdf_status(key)['status']
+            counts['pending' if status == 'missing' else status] += 1
+        total = len(job['keys'])
+        return {
+            'id': job['id'],
+            'payPeriodStart': job['payPeriodStart'],
+            'payPeriodEnd': job['payPeriodEnd'],
+            'total': total,
+            'completed': counts['ready'],
+            'failed': counts['failed'],
+            'pending': counts['pending'],
+            'progress': round(100 * (counts['ready'] + counts['failed']) / total, 1) if total else 100.0,
+            'status': 'running' if counts['pending'] else ('completed' if not counts['failed'] else 'completed_with_errors'),
+            'createdAt': job['createdAt']
+        }
+
+    # Internals
+    @staticmethod
+    def _load_payroll(payroll_id):
+        payroll = db.session.get(Payroll, payroll_id, options=[joinedload(Payroll.employee)])
+        if not payroll:
+            raise ValueError('Payroll not found')
+        if not payroll.employee:
+            raise ValueError('Employee not found for this payroll')
+        return payroll
+
+    @staticmethod
+    def _context(payroll):
+        """Template variables, with the deduction breakdown derived from the stored totals"""
+        employee = payroll.employee
+        gross_salary = payroll.gross_salary or 0
+        base_salary = gross_salary - (payroll.allowances or 0)
+
+        if payroll.salary_type == 'hourly':
+            pf_deduction = esi_deduction = pt_deduction = 0
+            it_deduction = gross_salary * HOURLY_DEDUCTION_RATE
+            basic_label = f'Hourly Rate: ₹{payroll.monthly_salary:.0f}/hr × Hours'
+            basic_amount = _money(base_salary)
+        else:
+            pf_deduction = min(base_salary, PF_WAGE_CEILING) * PF_RATE
+            esi_deduction = gross_salary * ESI_RATE if gross_salary < ESI_GROSS_LIMIT else 0
+            pt_deduction = PROFESSIONAL_TAX
+            it_deduction = gross_salary * INCOME_TAX_RATE if gross_salary > INCOME_TAX_THRESHOLD else 0
+            basic_label = 'Monthly Salary'
+            basic_amount = _money(payroll.monthly_salary)
+
+        return {
+            'employee_name': employee.full_name,
+            'employee_code': employee.employee_id,
+            'department': employee.department,
+            'designation': employee.designation,
+            'pay_period_start': payroll.pay_period_start.strftime('%d/%m/%Y') if payroll.pay_period_start else 'N/A',
+            'pay_period_end': payroll.pay_period_end.strftime('%d/%m/%Y') if payroll.pay_period_end else 'N/A',
+            'payment_date': payroll.payment_date.strftime('%d/%m/%Y') if payroll.payment_date else 'Pending',
+            'status': payroll.status.title() if payroll.status else 'Pending',
+            'basic_label': basic_label,
+            'basic_amount': basic_amount,
+            'allowances': _money(payroll.allowances),
+            'gross_salary': _money(gross_salary),
+            'pf_deduction': _money(pf_deduction),
+            'esi_deduction': _money(esi_deduction),
+            'pt_deduction': _money(pt_deduction),
+            'it_deduction': _money(it_deduction),
+            'deductions': _money(payroll.deductions),
+            'net_salary': _money(payroll.net_salary),
+            # Cached renderings are reused until an input changes, so this is the render time
+            'rendered_at': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+        }
+
+    @classmethod
+    def _template_version(cls):
+        if cls._template_digest is None:
+            source = current_app.jinja_loader.get_source(current_app.jinja_env, PAYSLIP_TEMPLATE)[0]
+            cls._template_digest = hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+        return cls._template_digest
+
+    @staticmethod
+    def _artifact_path(key, extension):
+        return os.path.join(PAYSLIP_DIR, f"{key}.{extension}")
+
+    @staticmethod
+    def _job_path(job_id):
+        return os.path.join(PAYSLIP_DIR, 'jobs', f"{job_id}.json")
+
+    @classmethod
+    def _pdf_status(cls, key):
+        pdf_path = cls._artifact_path(key, 'pdf')
+        if os.path.exists(pdf_path):
+            return {'status': 'ready', 'path': pdf_path}
+        error_path = cls._artifact_path(key, 'error')
+        if os.path.exists(error_path):
+            with open(error_path, encoding='utf-8') as f:
+                return {'status': 'failed', 'error': f.read()}
+        if cls._pending_marker_live(cls._artifact_path(key, 'pending')):
+            return {'status': 'pending'}
+        return {'status': 'missing'}
+
+    @staticmethod
+    def _pending_marker_live(pending_path):
+        try:
+            return time.time() - os.path.getmtime(pending_path) < PDF_PENDING_TIMEOUT_SECONDS
+        except FileNotFoundError:
+            return False
+
+    @classmethod
+    def _submit(cls, key):
+        """Queue a PDF conversion unless a worker has already claimed this artifact"""
+        pending_path = cls._artifact_path(key, 'pending')
+        if os.path.exists(pending_path) and not cls._pending_marker_live(pending_path):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(pending_path)  # Left behind by a worker that died
+        try:
+            os.close(os.open(pending_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return
+        with cls._cache_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=PDF_WORKERS, thread_name_prefix='payslip-pdf')
+        cls._executor.submit(
+            _convert_to_pdf,
+            cls._artifact_path(key, 'html'),
+            cls._artifact_path(key, 'pdf'),
+            cls._artifact_path(key, 'error'),
+            pending_path
+        )
+
+    @classmethod
+    def _remove_superseded(cls, payroll_id, key):
+        """Delete artifacts rendered from older versions of this payroll"""
+        for path in glob.glob(os.path.join(PAYSLIP_DIR, f"{payroll_id}-*")):
+            if not os.path.basename(path).startswith(f"{key}."):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -1,8 +1,7 @@
 """
 Production order business logic service
 """
-import json
-from models import db, ProductionOrder, PurchaseOrder, AssemblyOrder
+from models import db, ProductionOrder, PurchaseOrder, PurchaseOrderMaterial, AssemblyOrder
 from utils.validators import validate_required_fields
 
 class ProductionService:
@@ -40,10 +39,10 @@ class ProductionService:
             purchase_order = PurchaseOrder(
                 production_order_id=production_order.id,
                 product_name=data['productName'],
-                quantity=data['quantity'],
-                materials=json.dumps(data['materials']),
-                original_requirements=json.dumps(data['materials'])  # Save original requirements
+                quantity=data['quantity']
             )
+            purchase_order.set_materials_list(data['materials'])
+            purchase_order.set_original_requirements(data['materials'])  # Save original requirements
             
             # Create assembly order
             assembly_order = AssemblyOrder(
@@ -92,6 +91,10 @@ class ProductionService:
             order = ProductionOrder.query.get_or_404(order_id)
             
             # Delete related orders
+            purchase_order_ids = db.session.query(PurchaseOrder.id).filter_by(production_order_id=order_id)
+            PurchaseOrderMaterial.query.filter(
+                PurchaseOrderMaterial.purchase_order_id.in_(purchase_order_ids.scalar_subquery())
+            ).delete(synchronize_session=False)
             PurchaseOrder.query.filter_by(production_order_id=order_id).delete()
             AssemblyOrder.query.filter_by(production_order_id=order_id).delete()
             
@@ -4,10 +4,12 @@ Handles business logic for sales operations
 """
 from datetime import datetime
 import uuid
-from models import db, SalesOrder, Customer, SalesTransaction, ShowroomProduct, FinanceTransaction, DispatchRequest, AssemblyOrder, TransportJob , GatePass
+from models import db, SalesOrder, Customer, SalesTransaction, ShowroomProduct, FinanceTransaction, DispatchRequest, TransportJob , GatePass, loading_profile
 from models.sales import TransportApprovalRequest
 from services.showroom_service import ShowroomService
 from services.approval_service import ApprovalService
+from services.finance_ledger_service import FinanceLedgerService
+from services.showroom_stock_service import ShowroomStockService
 
 
 class SalesService:
@@ -15,54 +17,31 @@ class SalesService:
     
     @staticmethod
     def get_available_showroom_products():
-        """Get products with showroom_status == 'available'"""
-        available_products = ShowroomProduct.query.filter_by(
-            showroom_status='available'
+        """Get products with showroom_status == 'available' and units left to sell"""
+        available_products = ShowroomProduct.query.filter(
+            ShowroomProduct.showroom_status == 'available',
+            ShowroomProduct.remaining_quantity > 0
         ).order_by(ShowroomProduct.created_at.desc()).all()
         
-        products = []
-        for product in available_products:
-            # Determine original quantity from assembly order by production_order_id
-            original_qty = 1
-            if product.production_order_id:
-                assembly_order = AssemblyOrder.query.filter_by(
-                    production_order_id=product.production_order_id
-                ).first()
-                if assembly_order:
-                    original_qty = assembly_order.quantity or 1
-
-            # Calculate already sold quantity for this showroom product
-            sold_qty = db.session.query(db.func.coalesce(db.func.sum(SalesOrder.quantity), 0)).\
-                filter(SalesOrder.showroom_product_id == product.id).scalar() or 0
-
-            remaining_qty = max(int(original_qty) - int(sold_qty), 0)
-
-            # If none remaining, update status and skip
-            if remaining_qty <= 0:
-                product.showroom_status = 'sold'
-                if not product.sold_date:
-                    product.sold_date = datetime.utcnow()
-                db.session.commit()
-                continue
-
-            products.append({
+        return [
+            {
                 'id': product.id,
                 'name': product.name,
                 'category': product.category,
-                'quantity': remaining_qty,  # Current remaining quantity
-                'original_qty': original_qty,  # Total original quantity
+                'quantity': product.remaining_quantity,  # Current remaining quantity
+                'original_qty': product.total_quantity,  # Total original quantity
                 'salePrice': product.sale_price,
                 'costPrice': product.cost_price,
                 'displayedAt': product.created_at.isoformat(),
                 'productionOrderId': product.production_order_id
-            })
-        
-        return products
+            }
+            for product in available_products
+        ]
     
     @staticmethod
     def get_sales_orders(status=None, sales_person=None):
         """Get sales orders with optional filtering"""
-        query = SalesOrder.query
+        query = SalesOrder.query.options(*loading_profile(SalesOrder))
         
         if status:
             query = query.filter_by(order_status=status)
@@ -78,8 +57,7 @@ class SalesService:
             order_dict = order.to_dict()
             
             # Check if order has been sent to dispatch
-            dispatch_request = DispatchRequest.query.filter_by(sales_order_id=order.id).first()
-            if dispatch_request:
+            if order.dispatch_requests:
                 order_dict['afterSalesStatus'] = 'sent_to_dispatch'
             else:
                 order_dict['afterSalesStatus'] = None
@@ -99,39 +77,16 @@ class SalesService:
     @staticmethod
     def create_sales_order(data):
         """Create a new sales order"""
-        # Validate showroom product
-        showroom_product = ShowroomProduct.query.get(data['showroomProductId'])
-        if not showroom_product:
-            raise ValueError('Showroom product not found')
-        
-        if showroom_product.showroom_status != 'available':
-            raise ValueError('Product is not available for sale')
-        
-        # Compute remaining quantity available for sale
-        original_qty = 1
-        if showroom_product.production_order_id:
-            assembly_order = AssemblyOrder.query.filter_by(
-                production_order_id=showroom_product.production_order_id
-            ).first()
-            if assembly_order:
-                original_qty = assembly_order.quantity or 1
-        sold_qty = db.session.query(db.func.coalesce(db.func.sum(SalesOrder.quantity), 0)).\
-            filter(SalesOrder.showroom_product_id == showroom_product.id).scalar() or 0
-        remaining_qty = max(int(original_qty) - int(sold_qty), 0)
-        
-        # Requested quantity must be within remaining
+        # Lock the showroom product and take the units from its stock up front,
+        # so concurrent sales can't oversell it (marks it sold when none remain)
         quantity = int(data.get('quantity', 1))
-        if quantity <= 0:
-            raise ValueError('Quantity must be at least 1')
-        if quantity > remaining_qty:
-            raise ValueError('Requested quantity exceeds available quantity')
+        showroom_product = ShowroomStockService.lock_product(data['showroomProductId'])
+        ShowroomStockService.reserve(showroom_product, quantity)
         
         # Generate readable order number: SO-<CustInit>-<ProdInit>-<YYYYMMDD>-<4HEX>
         cust_name = (data.get('customerName') or '').strip()
         cust_init = ''.join([part[0] for part in cust_name.split()[:2]]).upper() or 'CU'
-        # Fetch product name for initials
-        prod = ShowroomProduct.query.get(data['showroomProductId'])
-        prod_name = (prod.name if prod else 'PROD').strip()
+        prod_name = (showroom_product.name or 'PROD').strip()
         prod_init = ''.join([part[0] for part in prod_name.split()[:2]]).upper() or 'PR'
         order_number = f"SO-{cust_init}-{prod_init}-{datetime.now().strftime('%Y%m%d')}-{str(uuid.uuid4())[:4].upper()}"
         
@@ -189,12 +144,6 @@ class SalesService:
             )
             db.session.add(transport_approval)
         
-        # Mark sold only if fully exhausted
-        remaining_after = remaining_qty - quantity
-        if remaining_after <= 0:
-            showroom_product.showroom_status = 'sold'
-            showroom_product.sold_date = datetime.utcnow()
-        
         # Create finance transaction for revenue
         revenue_transaction = FinanceTransaction(
             transaction_type='revenue',
@@ -204,6 +153,7 @@ class SalesService:
             reference_type='sales_order'
         )
         db.session.add(revenue_transaction)
+        FinanceLedgerService.record(revenue_transaction)
         
         db.session.commit()
         
@@ -222,6 +172,8 @@ class SalesService:
         
         # Store old delivery type for comparison
         old_delivery_type = sales_order.Delivery_type
+        # Showroom units held before the update (none once cancelled)
+        held_before = ShowroomStockService.held_quantity(sales_order.order_status, sales_order.quantity)
         
         # Update allowed fields
         if 'customerName' in data:
@@ -293,6 +245,8 @@ class SalesService:
         if 'unitPrice' in data or 'quantity' in data or 'transportCost' in data or 'discountAmount' in data:
             unit_price = float(data.get('unitPrice', sales_order.unit_price))
             quantity = int(data.get('quantity', sales_order.quantity))
+            if quantity <= 0:
+                raise ValueError('Quantity must be at least 1')
             transport_cost = float(data.get('transportCost', sales_order.transport_cost or 0))
             discount_amount = float(data.get('discountAmount', sales_order.discount_amount or 0))
             
@@ -308,6 +262,13 @@ class SalesService:
             sales_order.discount_amount = discount_amount
             sales_order.final_amount = final_amount
         
+        # Cancelling returns the units to the showroom; quantity changes take or return the difference
+        ShowroomStockService.adjust(
+            sales_order.showroom_product_id,
+            held_before,
+            ShowroomStockService.held_quantity(sales_order.order_status, sales_order.quantity)
+        )
+        
         sales_order.updated_at = datetime.utcnow()
         db.session.commit()
         
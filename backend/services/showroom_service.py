@@ -5,6 +5,7 @@ Handles business logic for showroom operations
 from datetime import datetime
 from models import db, ShowroomProduct, AssemblyOrder, FinanceTransaction, SalesOrder
 import json
+from utils.batch_loading import without_related
 
 
 class ShowroomService:
@@ -13,27 +14,25 @@ class ShowroomService:
     @staticmethod
     def get_completed_assembly_products():
         """Get completed assembly orders ready for showroom"""
-        completed_orders = AssemblyOrder.query.filter_by(status='completed').all()
+        # Anti-join: only orders whose production order isn't in the showroom yet
+        completed_orders = without_related(
+            AssemblyOrder.query.filter_by(status='completed'),
+            AssemblyOrder.production_order_id,
+            ShowroomProduct.production_order_id
+        ).order_by(AssemblyOrder.id).all()
         
         # Convert to format expected by showroom
-        products = []
-        for order in completed_orders:
-            # Check if already in showroom
-            existing_showroom = ShowroomProduct.query.filter_by(
-                production_order_id=order.production_order_id
-            ).first()
-            
-            if not existing_showroom:  # Only show if not already in showroom
-                products.append({
-                    'id': order.id,
-                    'productName': order.product_name,
-                    'quantity': order.quantity,
-                    'completedAt': order.completed_at.isoformat() if order.completed_at else order.created_at.isoformat(),
-                    'qualityRating': 5,  # Default quality rating
-                    'productionOrderId': order.production_order_id
-                })
-        
-        return products
+        return [
+            {
+                'id': order.id,
+                'productName': order.product_name,
+                'quantity': order.quantity,
+                'completedAt': order.completed_at.isoformat() if order.completed_at else order.created_at.isoformat(),
+                'qualityRating': 5,  # Default quality rating
+                'productionOrderId': order.production_order_id
+            }
+            for order in completed_orders
+        ]
     
     @staticmethod
     def get_displayed_products():
@@ -44,32 +43,21 @@ class ShowroomService:
         ).order_by(ShowroomProduct.created_at.desc()).all()
         
         # Convert to format expected by frontend
-        products = []
-        for product in displayed_products:
-            # Get the original assembly order for additional details
-            assembly_order = None
-            if product.production_order_id:
-                assembly_order = AssemblyOrder.query.filter_by(
-                    production_order_id=product.production_order_id
-                ).first()
-            
-            # Get original quantity from assembly order
-            original_quantity = assembly_order.quantity if assembly_order else 1
-            
-            products.append({
+        return [
+            {
                 'id': product.id,
                 'productName': product.name,
-                'quantity': product.quantity,  # Current remaining quantity
-                'original_qty': original_quantity,  # Original quantity from assembly
+                'quantity': product.remaining_quantity,  # Current remaining quantity
+                'original_qty': product.total_quantity,  # Original quantity from assembly
                 'showroomStatus': product.showroom_status,
                 'displayedAt': product.created_at.isoformat(),
                 'salePrice': product.sale_price,
                 'customerInterest': 8,  # Demo value - you could add this as a field
                 'qualityRating': 5,  # Demo value - you could add this as a field
                 'productionOrderId': product.production_order_id
-            })
-        
-        return products
+            }
+            for product in displayed_products
+        ]
     
     @staticmethod
     def add_product_to_showroom(product_id, test_results=None):
@@ -140,7 +128,9 @@ class ShowroomService:
             cost_price=estimated_cost,
             sale_price=sale_price,
             showroom_status='available',
-            production_order_id=assembly_order.production_order_id
+            production_order_id=assembly_order.production_order_id,
+            total_quantity=assembly_order.quantity or 1,
+            remaining_quantity=assembly_order.quantity or 1
         )
 
         db.session.add(showroom_product)
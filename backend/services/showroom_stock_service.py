@@ -0,0 +1,88 @@
+"""
+Showroom Stock Service Module
+Remaining showroom quantity, maintained transactionally with sales orders
+"""
+from datetime import datetime
+from sqlalchemy import update
+from models import db, ShowroomProduct
+
+# Sales orders in this status hold no showroom stock
+CANCELLED_ORDER_STATUS = 'cancelled'
+
+
+class ShowroomStockService:
+    """
+    Service class for the showroom stock ledger
+
+    ShowroomProduct.remaining_quantity is taken when a sales order is created
+    (or grows) and given back when it is cancelled (or shrinks). Every change
+    locks the product row first and decrements with a guarded UPDATE, so two
+    concurrent sales can't take the same unit. Callers commit.
+    """
+
+    @staticmethod
+    def lock_product(product_id):
+        """Load a showroom product with its row locked until commit"""
+        product = ShowroomProduct.query.filter_by(id=product_id).with_for_update().first()
+        if not product:
+            raise ValueError('Showroom product not found')
+        return product
+
+    @staticmethod
+    def held_quantity(order_status, quantity):
+        """Units a sales order holds: none once it is cancelled"""
+        return 0 if order_status == CANCELLED_ORDER_STATUS else int(quantity or 0)
+
+    @classmethod
+    def reserve(cls, product, quantity):
+        """
+        Take units of a locked product, marking it sold when none remain
+
+        Raises:
+            ValueError: If the product isn't for sale or has fewer units left
+        """
+        if quantity <= 0:
+            raise ValueError('Quantity must be at least 1')
+        if product.showroom_status != 'available':
+            raise ValueError('Product is not available for sale')
+
+        taken = db.session.execute(
+            update(ShowroomProduct)
+            .where(ShowroomProduct.id == product.id, ShowroomProduct.remaining_quantity >= quantity)
+            .values(remaining_quantity=ShowroomProduct.remaining_quantity - quantity)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not taken:
+            raise ValueError('Requested quantity exceeds available quantity')
+
+        db.session.refresh(product, attribute_names=['remaining_quantity'])
+        if product.remaining_quantity <= 0:
+            product.showroom_status = 'sold'
+            product.sold_date = product.sold_date or datetime.utcnow()
+
+    @classmethod
+    def release(cls, product, quantity):
+        """Give units back to a locked product, putting it back on sale if it had sold out"""
+        if quantity <= 0:
+            return
+        db.session.execute(
+            update(ShowroomProduct)
+            .where(ShowroomProduct.id == product.id)
+            .values(remaining_quantity=ShowroomProduct.remaining_quantity + quantity)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.refresh(product, attribute_names=['remaining_quantity'])
+        if product.showroom_status == 'sold' and product.remaining_quantity > 0:
+            product.showroom_status = 'available'
+            product.sold_date = None
+
+    @classmethod
+    def adjust(cls, product_id, held_before, held_after):
+        """Move a sales order's hold on a product from held_before to held_after units"""
+        if held_before == held_after:
+            return
+        product = cls.lock_product(product_id)
+        if held_after > held_before:
+            cls.reserve(product, held_after - held_before)
+        else:
+            cls.release(product, held_before - held_after)
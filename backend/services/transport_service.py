@@ -3,11 +3,14 @@ Transport Service Module
 Handles business logic for transport operations (company delivery orders)
 """
 from datetime import datetime, timedelta
-from models import db, TransportJob, DispatchRequest, SalesOrder, ShowroomProduct, Vehicle
+from sqlalchemy import and_
+from models import db, TransportJob, DispatchRequest, SalesOrder, ShowroomProduct, Vehicle, DETAIL_VIEW, loading_profile
 from models.sales import TransportApprovalRequest, SalesTransaction
 from models.showroom import GatePass
 from models.transport import PartLoadDetail
 from services.notification_service import NotificationService
+from utils.aggregates import conditional_counts
+from utils.search import paginate, search_filter, search_rank
 
 
 class TransportService:
@@ -53,7 +56,7 @@ class TransportService:
         # If we still don't have what we need, try a different approach
         if not sales_order:
             # Try to find completed part load orders directly
-            completed_dispatches = DispatchRequest.query.filter(
+            completed_dispatches = DispatchRequest.query.options(*loading_profile(DispatchRequest)).filter(
                 DispatchRequest.original_delivery_type == 'part load',
                 DispatchRequest.status == 'completed'
             ).all()
@@ -65,7 +68,7 @@ class TransportService:
                 .filter(GatePass.status == 'verified')
                 .distinct()
             )
-            verified_dispatches = DispatchRequest.query.filter(
+            verified_dispatches = DispatchRequest.query.options(*loading_profile(DispatchRequest)).filter(
                 DispatchRequest.original_delivery_type == 'part load',
                 DispatchRequest.id.in_(verified_dispatch_ids)
             ).all()
@@ -78,12 +81,10 @@ class TransportService:
             # Try to match by ID or order number
             for dispatch in all_dispatches.values():
                 if (str(dispatch.id) == str(order_identifier) or 
-                    (dispatch.sales_order_id and 
-                     SalesOrder.query.get(dispatch.sales_order_id) and
-                     SalesOrder.query.get(dispatch.sales_order_id).order_number == str(order_identifier))):
+                    (dispatch.sales_order and
+                     dispatch.sales_order.order_number == str(order_identifier))):
                     dispatch_request = dispatch
-                    if dispatch_request.sales_order_id:
-                        sales_order = SalesOrder.query.get(dispatch_request.sales_order_id)
+                    sales_order = dispatch_request.sales_order
                     break
         
         # Final validation
@@ -151,7 +152,7 @@ class TransportService:
         """Get all completed part load orders: (1) completed in dispatch, or (2) with a verified gate pass."""
         try:
             # 1. Completed in dispatch
-            completed_dispatches = DispatchRequest.query.filter(
+            completed_dispatches = DispatchRequest.query.options(*loading_profile(DispatchRequest, DETAIL_VIEW)).filter(
                 DispatchRequest.original_delivery_type == 'part load',
                 DispatchRequest.status == 'completed'
             ).all()
@@ -162,7 +163,7 @@ class TransportService:
                 .filter(GatePass.status == 'verified')
                 .distinct()
             )
-            verified_dispatches = DispatchRequest.query.filter(
+            verified_dispatches = DispatchRequest.query.options(*loading_profile(DispatchRequest, DETAIL_VIEW)).filter(
                 DispatchRequest.original_delivery_type == 'part load',
                 DispatchRequest.id.in_(verified_dispatch_ids)
             ).all()
@@ -174,26 +175,16 @@ class TransportService:
 
             orders = []
             for request in all_dispatches.values():
-                # Get sales order if available
-                sales_order = None
-                if request.sales_order_id:
-                    sales_order = SalesOrder.query.get(request.sales_order_id)
-
-                # Get showroom product if available
-                showroom_product = None
-                if hasattr(request, 'showroom_product_id') and request.showroom_product_id:
-                    showroom_product = ShowroomProduct.query.get(request.showroom_product_id)
-
-                # Get part load details if exists
-                part_load_detail = None
-                if sales_order:
-                    part_load_detail = PartLoadDetail.query.filter_by(sales_order_id=sales_order.id).first()
+                # Related rows are loaded with the dispatch requests
+                sales_order = request.sales_order
+                showroom_product = request.showroom_product
+                part_load_detail = sales_order.part_load_detail if sales_order else None
 
                 # Find the transport job for this dispatch request
-                transport_job = TransportJob.query.filter_by(dispatch_request_id=request.id).first()
+                transport_job = request.transport_job
 
                 # Get gate pass for driver details
-                gate_pass = GatePass.query.filter_by(dispatch_request_id=request.id).first()
+                gate_pass = request.gate_pass
                 
                 order_data = {
                     'id': request.id,  # Add this for compatibility
@@ -299,12 +290,14 @@ class TransportService:
     def get_pending_transport_approvals():
         """Get all pending transport approval requests"""
         try:
-            approval_requests = TransportApprovalRequest.query.filter_by(status='pending').order_by(TransportApprovalRequest.created_at.desc()).all()
+            approval_requests = TransportApprovalRequest.query.options(
+                *loading_profile(TransportApprovalRequest)
+            ).filter_by(status='pending').order_by(TransportApprovalRequest.created_at.desc()).all()
             
             approvals = []
             for request in approval_requests:
-                sales_order = SalesOrder.query.get(request.sales_order_id)
-                showroom_product = ShowroomProduct.query.get(sales_order.showroom_product_id) if sales_order else None
+                sales_order = request.sales_order
+                showroom_product = sales_order.showroom_product if sales_order else None
                 
                 approval_data = request.to_dict()
                 if sales_order:
@@ -403,12 +396,14 @@ class TransportService:
     def get_rejected_transport_approvals():
         """Get all rejected transport approval requests for sales review"""
         try:
-            approval_requests = TransportApprovalRequest.query.filter_by(status='rejected').order_by(TransportApprovalRequest.updated_at.desc()).all()
+            approval_requests = TransportApprovalRequest.query.options(
+                *loading_profile(TransportApprovalRequest)
+            ).filter_by(status='rejected').order_by(TransportApprovalRequest.updated_at.desc()).all()
             
             approvals = []
             for request in approval_requests:
-                sales_order = SalesOrder.query.get(request.sales_order_id)
-                showroom_product = ShowroomProduct.query.get(sales_order.showroom_product_id) if sales_order else None
+                sales_order = request.sales_order
+                showroom_product = sales_order.showroom_product if sales_order else None
                 
                 approval_data = request.to_dict()
                 if sales_order:
@@ -434,11 +429,11 @@ class TransportService:
         """Get part load orders from dispatch that need driver details to be filled by transport"""
         try:
             # Get transport jobs for part load orders that are pending and need driver details
-            transport_jobs = TransportJob.query.filter_by(status='pending').all()
+            transport_jobs = TransportJob.query.options(*loading_profile(TransportJob)).filter_by(status='pending').all()
             
             part_load_orders = []
             for job in transport_jobs:
-                dispatch_request = DispatchRequest.query.get(job.dispatch_request_id)
+                dispatch_request = job.dispatch_request
                 if not dispatch_request:
                     continue
                     
@@ -447,8 +442,8 @@ class TransportService:
                     continue
                     
                 # Get related sales order and product info
-                sales_order = SalesOrder.query.get(dispatch_request.sales_order_id) if dispatch_request.sales_order_id else None
-                showroom_product = ShowroomProduct.query.get(dispatch_request.showroom_product_id) if dispatch_request.showroom_product_id else None
+                sales_order = dispatch_request.sales_order
+                showroom_product = dispatch_request.showroom_product
                 
                 part_load_orders.append({
                     'transportJobId': job.id,
@@ -628,12 +623,14 @@ class TransportService:
     def get_pending_transport_jobs():
         """Get all transport jobs pending assignment (excluding part load orders)"""
         try:
-            transport_jobs = TransportJob.query.filter_by(status='pending').order_by(TransportJob.created_at.desc()).all()
+            transport_jobs = TransportJob.query.options(
+                *loading_profile(TransportJob)
+            ).filter_by(status='pending').order_by(TransportJob.created_at.desc()).all()
             
             jobs = []
             for job in transport_jobs:
                 # Get related dispatch request
-                dispatch_request = DispatchRequest.query.get(job.dispatch_request_id)
+                dispatch_request = job.dispatch_request
                 if not dispatch_request:
                     continue
                 
@@ -641,15 +638,9 @@ class TransportService:
                 if dispatch_request.original_delivery_type == 'part load':
                     continue
                 
-                # Get sales order if available
-                sales_order = None
-                if dispatch_request.sales_order_id:
-                    sales_order = SalesOrder.query.get(dispatch_request.sales_order_id)
-                
-                # Get showroom product if available
-                showroom_product = None
-                if dispatch_request.showroom_product_id:
-                    showroom_product = ShowroomProduct.query.get(dispatch_request.showroom_product_id)
+                # Sales order and showroom product are loaded with the job
+                sales_order = dispatch_request.sales_order
+                showroom_product = dispatch_request.showroom_product
                 
                 jobs.append({
                     'transportJobId': job.id,
@@ -679,12 +670,14 @@ class TransportService:
     def get_all_transport_jobs():
         """Get all transport jobs with all statuses (excluding part load orders)"""
         try:
-            transport_jobs = TransportJob.query.order_by(TransportJob.created_at.desc()).all()
+            transport_jobs = TransportJob.query.options(
+                *loading_profile(TransportJob)
+            ).order_by(TransportJob.created_at.desc()).all()
             
             jobs = []
             for job in transport_jobs:
                 # Get related dispatch request
-                dispatch_request = DispatchRequest.query.get(job.dispatch_request_id)
+                dispatch_request = job.dispatch_request
                 if not dispatch_request:
                     continue
                 
@@ -692,15 +685,9 @@ class TransportService:
                 if dispatch_request.original_delivery_type == 'part load':
                     continue
                 
-                # Get sales order if available
-                sales_order = None
-                if dispatch_request.sales_order_id:
-                    sales_order = SalesOrder.query.get(dispatch_request.sales_order_id)
-                
-                # Get showroom product if available
-                showroom_product = None
-                if dispatch_request.showroom_product_id:
-                    showroom_product = ShowroomProduct.query.get(dispatch_request.showroom_product_id)
+                # Sales order and showroom product are loaded with the job
+                sales_order = dispatch_request.sales_order
+                showroom_product = dispatch_request.showroom_product
                 
                 jobs.append({
                     'transportJobId': job.id,
@@ -797,9 +784,7 @@ class TransportService:
                     dispatch_request.dispatch_notes += f" (Vehicle: {transport_job.vehicle_no})"
                 dispatch_request.updated_at = datetime.utcnow()
             
-            db.session.commit()
-            
-            # Create notification for driver assignment
+            # Create notification for driver assignment (published on commit)
             if fleet_vehicle and dispatch_request:
                 # Get order number for notification
                 sales_order = None
@@ -815,6 +800,8 @@ class TransportService:
                     customer_name=dispatch_request.party_name
                 )
             
+            db.session.commit()
+            
             return {
                 'status': 'success',
                 'message': f'Transport job assigned to {transport_job.transporter_name}',
@@ -930,9 +917,7 @@ class TransportService:
                 
                 dispatch_request.updated_at = datetime.utcnow()
             
-            db.session.commit()
-            
-            # Create notifications after successful database commit
+            # Create notifications in the same transaction; they are published on commit
             if dispatch_request:
                 # Get order number for notifications
                 sales_order = None
@@ -960,6 +945,8 @@ class TransportService:
                         delivery_status=new_status
                     )
             
+            db.session.commit()
+            
             return {
                 'status': 'success',
                 'message': f'Delivery status updated to {new_status}',
@@ -975,11 +962,13 @@ class TransportService:
     def get_in_transit_deliveries():
         """Get all deliveries currently in transit (excluding part load orders)"""
         try:
-            transport_jobs = TransportJob.query.filter_by(status='in_transit').order_by(TransportJob.updated_at.desc()).all()
+            transport_jobs = TransportJob.query.options(
+                *loading_profile(TransportJob)
+            ).filter_by(status='in_transit').order_by(TransportJob.updated_at.desc()).all()
             
             deliveries = []
             for job in transport_jobs:
-                dispatch_request = DispatchRequest.query.get(job.dispatch_request_id)
+                dispatch_request = job.dispatch_request
                 if not dispatch_request:
                     continue
                 
@@ -987,15 +976,9 @@ class TransportService:
                 if dispatch_request.original_delivery_type == 'part load':
                     continue
                 
-                # Get sales order if available
-                sales_order = None
-                if dispatch_request.sales_order_id:
-                    sales_order = SalesOrder.query.get(dispatch_request.sales_order_id)
-                
-                # Get showroom product if available
-                showroom_product = None
-                if dispatch_request.showroom_product_id:
-                    showroom_product = ShowroomProduct.query.get(dispatch_request.showroom_product_id)
+                # Sales order and showroom product are loaded with the job
+                sales_order = dispatch_request.sales_order
+                showroom_product = dispatch_request.showroom_product
                 
                 # Calculate days in transit
                 days_in_transit = (datetime.utcnow() - job.updated_at).days
@@ -1023,80 +1006,44 @@ class TransportService:
     def get_transport_summary():
         """Get transport department summary statistics (excluding part load orders)"""
         try:
-            # Get all transport jobs and filter out part load orders
-            # We need to join with DispatchRequest to check original_delivery_type
-            from sqlalchemy import and_
-            
-            # Subquery to get dispatch request IDs that are NOT part load
-            non_part_load_dispatch_ids = db.session.query(DispatchRequest.id).filter(
-                (DispatchRequest.original_delivery_type != 'part load') | 
-                (DispatchRequest.original_delivery_type.is_(None))
-            ).subquery()
-            
-            # Count jobs by status (excluding part load orders)
-            pending_jobs = TransportJob.query.filter(
-                TransportJob.status == 'pending',
-                TransportJob.dispatch_request_id.in_(non_part_load_dispatch_ids)
-            ).count()
-            
-            assigned_jobs = TransportJob.query.filter(
-                TransportJob.status == 'assigned',
-                TransportJob.dispatch_request_id.in_(non_part_load_dispatch_ids)
-            ).count()
-            
-            in_transit_jobs = TransportJob.query.filter(
-                TransportJob.status == 'in_transit',
-                TransportJob.dispatch_request_id.in_(non_part_load_dispatch_ids)
-            ).count()
-            
-            delivered_jobs = TransportJob.query.filter(
-                TransportJob.status == 'delivered',
-                TransportJob.dispatch_request_id.in_(non_part_load_dispatch_ids)
-            ).count()
-            
-            cancelled_jobs = TransportJob.query.filter(
-                TransportJob.status == 'cancelled',
-                TransportJob.dispatch_request_id.in_(non_part_load_dispatch_ids)
-            ).count()
-            
-            failed_jobs = TransportJob.query.filter(
-                TransportJob.status == 'failed',
-                TransportJob.dispatch_request_id.in_(non_part_load_dispatch_ids)
-            ).count()
-            
-            # Today's activity
+            # All buckets come from one grouped query over non part load jobs
+            # (jobs whose dispatch request's original delivery type isn't part load)
             today = datetime.now().date()
-            today_assigned = TransportJob.query.filter(
-                db.func.date(TransportJob.updated_at) == today,
-                TransportJob.status == 'assigned',
-                TransportJob.dispatch_request_id.in_(non_part_load_dispatch_ids)
-            ).count()
-            
-            today_delivered = TransportJob.query.filter(
-                db.func.date(TransportJob.updated_at) == today,
-                TransportJob.status == 'delivered',
-                TransportJob.dispatch_request_id.in_(non_part_load_dispatch_ids)
-            ).count()
-            
-            # Overdue deliveries (in transit for more than 3 days)
             three_days_ago = datetime.utcnow() - timedelta(days=3)
-            overdue_deliveries = TransportJob.query.filter(
-                TransportJob.status == 'in_transit',
-                TransportJob.updated_at < three_days_ago,
-                TransportJob.dispatch_request_id.in_(non_part_load_dispatch_ids)
-            ).count()
-            
+            updated_today = db.func.date(TransportJob.updated_at) == today
+
+            non_part_load_jobs = TransportJob.query.join(
+                DispatchRequest, TransportJob.dispatch_request_id == DispatchRequest.id
+            ).filter(
+                (DispatchRequest.original_delivery_type != 'part load') |
+                (DispatchRequest.original_delivery_type.is_(None))
+            )
+
+            counts = conditional_counts(non_part_load_jobs, {
+                'pending': TransportJob.status == 'pending',
+                'assigned': TransportJob.status == 'assigned',
+                'in_transit': TransportJob.status == 'in_transit',
+                'delivered': TransportJob.status == 'delivered',
+                'cancelled': TransportJob.status == 'cancelled',
+                'failed': TransportJob.status == 'failed',
+                # Today's activity
+                'today_assigned': and_(updated_today, TransportJob.status == 'assigned'),
+                'today_delivered': and_(updated_today, TransportJob.status == 'delivered'),
+                # Overdue deliveries (in transit for more than 3 days)
+                'overdue': and_(TransportJob.status == 'in_transit', TransportJob.updated_at < three_days_ago)
+            })
+
             return {
-                'pendingJobs': pending_jobs,
-                'assignedJobs': assigned_jobs,
-                'inTransitJobs': in_transit_jobs,
-                'deliveredJobs': delivered_jobs,
-                'cancelledJobs': cancelled_jobs,
-                'failedJobs': failed_jobs,
-                'todayAssigned': today_assigned,
-                'todayDelivered': today_delivered,
-                'overdueDeliveries': overdue_deliveries,
-                'totalActive': pending_jobs + assigned_jobs + in_transit_jobs
+                'pendingJobs': counts['pending'],
+                'assignedJobs': counts['assigned'],
+                'inTransitJobs': counts['in_transit'],
+                'deliveredJobs': counts['delivered'],
+                'cancelledJobs': counts['cancelled'],
+                'failedJobs': counts['failed'],
+                'todayAssigned': counts['today_assigned'],
+                'todayDelivered': counts['today_delivered'],
+                'overdueDeliveries': counts['overdue'],
+                'totalActive': counts['pending'] + counts['assigned'] + counts['in_transit']
             }
         except Exception as e:
             raise Exception(f"Error getting transport summary: {str(e)}")
@@ -1143,58 +1090,62 @@ class TransportService:
             raise Exception(f"Error getting transporter performance: {str(e)}")
     
     @staticmethod
-    def search_transport_jobs(search_term):
-        """Search transport jobs by order number, customer name, or transporter"""
+    def search_transport_jobs(search_term, page=1, per_page=None):
+        """
+        Search transport jobs by order number, customer name, transporter or vehicle
+
+        Jobs, dispatch requests, sales orders and products are fetched in one joined
+        query; results are ranked (exact/prefix order or vehicle number first) and paginated.
+        """
         try:
             if not search_term or not search_term.strip():
                 raise ValueError('Search term is required')
             
             search_term = search_term.strip()
+            rank = search_rank(
+                search_term,
+                key_columns=[SalesOrder.order_number, TransportJob.vehicle_no],
+                text_columns=[DispatchRequest.party_name, TransportJob.transporter_name]
+            )
             
-            # Search transport jobs by transporter or vehicle
-            transport_jobs = TransportJob.query.filter(
-                db.or_(
-                    TransportJob.transporter_name.ilike(f'%{search_term}%'),
-                    TransportJob.vehicle_no.ilike(f'%{search_term}%')
-                )
-            ).order_by(TransportJob.created_at.desc()).all()
+            query = db.session.query(TransportJob, DispatchRequest, SalesOrder, ShowroomProduct).join(
+                DispatchRequest, TransportJob.dispatch_request_id == DispatchRequest.id
+            ).outerjoin(
+                SalesOrder, DispatchRequest.sales_order_id == SalesOrder.id
+            ).outerjoin(
+                ShowroomProduct, DispatchRequest.showroom_product_id == ShowroomProduct.id
+            ).filter(
+                search_filter(search_term, [
+                    SalesOrder.order_number, TransportJob.vehicle_no,
+                    DispatchRequest.party_name, TransportJob.transporter_name
+                ])
+            ).order_by(rank.desc(), TransportJob.created_at.desc(), TransportJob.id.desc())
+            
+            rows, total, page, per_page = paginate(query, page, per_page)
             
             results = []
-            for job in transport_jobs:
-                dispatch_request = DispatchRequest.query.get(job.dispatch_request_id)
-                if not dispatch_request:
-                    continue
-                
-                # Get sales order if available
-                sales_order = None
-                if dispatch_request.sales_order_id:
-                    sales_order = SalesOrder.query.get(dispatch_request.sales_order_id)
-                
-                # Get showroom product if available
-                showroom_product = None
-                if dispatch_request.showroom_product_id:
-                    showroom_product = ShowroomProduct.query.get(dispatch_request.showroom_product_id)
-                
-                # Check if search term matches any relevant field
-                if (search_term.lower() in dispatch_request.party_name.lower()) or \
-                   (sales_order and search_term.upper() in sales_order.order_number.upper()) or \
-                   (job.transporter_name and search_term.lower() in job.transporter_name.lower()) or \
-                   (job.vehicle_no and search_term.upper() in job.vehicle_no.upper()):
-                    
-                    results.append({
-                        'transportJobId': job.id,
-                        'orderNumber': sales_order.order_number if sales_order else f'DR-{dispatch_request.id}',
-                        'productName': showroom_product.name if showroom_product else 'Unknown Product',
-                        'customerName': dispatch_request.party_name,
-                        'customerAddress': dispatch_request.party_address,
-                        'transporterName': job.transporter_name,
-                        'vehicleNo': job.vehicle_no,
-                        'status': job.status,
-                        'createdAt': job.created_at.isoformat(),
-                        'updatedAt': job.updated_at.isoformat()
-                    })
+            for job, dispatch_request, sales_order, showroom_product in rows:
+                results.append({
+                    'transportJobId': job.id,
+                    'orderNumber': sales_order.order_number if sales_order else f'DR-{dispatch_request.id}',
+                    'productName': showroom_product.name if showroom_product else 'Unknown Product',
+                    'customerName': dispatch_request.party_name,
+                    'customerAddress': dispatch_request.party_address,
+                    'transporterName': job.transporter_name,
+                    'vehicleNo': job.vehicle_no,
+                    'status': job.status,
+                    'createdAt': job.created_at.isoformat(),
+                    'updatedAt': job.updated_at.isoformat()
+                })
             
-            return results
+            return {
+                'results': results,
+                'total': total,
+                'page': page,
+                'perPage': per_page
+            }
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error searching transport jobs: {str(e)}")
     
@@ -1447,7 +1398,6 @@ class TransportService:
             old_status = vehicle.status
             vehicle.status = 'available'
             vehicle.updated_at = datetime.utcnow()
-            db.session.commit()
 
             NotificationService.notify_vehicle_status_change(
                 vehicle_number=vehicle.vehicle_number,
@@ -1463,6 +1413,7 @@ class TransportService:
                 order_number='-',
                 delivery_status='reached'
             )
+            db.session.commit()
 
             return {
                 'status': 'success',
@@ -3,7 +3,8 @@ Watchman Service Module
 Handles business logic for watchman operations (gate security for self-pickup orders)
 """
 from datetime import datetime
-from models import db, GatePass, DispatchRequest, SalesOrder, ShowroomProduct, TransportJob
+from models import db, GatePass, DispatchRequest, SalesOrder, ShowroomProduct, loading_profile
+from utils.search import paginate, search_filter, search_rank
 
 
 class WatchmanService:
@@ -14,15 +15,17 @@ class WatchmanService:
         """Get all pending customer pickups waiting for verification"""
         try:
             # Include both 'pending' and 'entered_for_pickup' statuses
-            gate_passes = GatePass.query.filter(GatePass.status.in_(['pending', 'entered_for_pickup'])).order_by(GatePass.issued_at.desc()).all()
+            gate_passes = GatePass.query.options(*loading_profile(GatePass)).filter(
+                GatePass.status.in_(['pending', 'entered_for_pickup'])
+            ).order_by(GatePass.issued_at.desc()).all()
 
             pickups = []
             for gate_pass in gate_passes:
-                # Get related dispatch request and order details
-                dispatch_request = DispatchRequest.query.get(gate_pass.dispatch_request_id)
+                # Related dispatch request and order details are loaded with the gate passes
+                dispatch_request = gate_pass.dispatch_request
                 if dispatch_request:
-                    sales_order = SalesOrder.query.get(dispatch_request.sales_order_id)
-                    showroom_product = ShowroomProduct.query.get(dispatch_request.showroom_product_id)
+                    sales_order = dispatch_request.sales_order
+                    showroom_product = dispatch_request.showroom_product
 
                     # Get company name from sales order or transport job
                     company_name = '-'
@@ -30,7 +33,7 @@ class WatchmanService:
                         company_name = sales_order.transporter_name
                     elif dispatch_request.delivery_type == 'transport':
                         # Try to get from transport job
-                        transport_job = TransportJob.query.filter_by(dispatch_request_id=dispatch_request.id).first()
+                        transport_job = dispatch_request.transport_job
                         if transport_job and transport_job.transporter_name:
                             company_name = transport_job.transporter_name
 
@@ -63,15 +66,15 @@ class WatchmanService:
     def get_all_gate_passes():
         """Get all gate passes (completed and pending)"""
         try:
-            gate_passes = GatePass.query.order_by(GatePass.issued_at.desc()).all()
+            gate_passes = GatePass.query.options(*loading_profile(GatePass)).order_by(GatePass.issued_at.desc()).all()
             
             passes = []
             for gate_pass in gate_passes:
-                # Get related dispatch request and order details
-                dispatch_request = DispatchRequest.query.get(gate_pass.dispatch_request_id)
+                # Related dispatch request and order details are loaded with the gate passes
+                dispatch_request = gate_pass.dispatch_request
                 if dispatch_request:
-                    sales_order = SalesOrder.query.get(dispatch_request.sales_order_id)
-                    showroom_product = ShowroomProduct.query.get(dispatch_request.showroom_product_id)
+                    sales_order = dispatch_request.sales_order
+                    showroom_product = dispatch_request.showroom_product
                     
                     passes.append({
                         'gatePassId': gate_pass.id,
@@ -263,48 +266,53 @@ class WatchmanService:
             raise Exception(f"Error getting daily summary: {str(e)}")
     
     @staticmethod
-    def search_gate_pass(search_term):
-        """Search gate passes by customer name, order number, or vehicle number"""
+    def search_gate_pass(search_term, page=1, per_page=None):
+        """
+        Search gate passes by customer name, order number, or vehicle number
+
+        Gate passes, dispatch requests, sales orders and products are fetched in one
+        joined query; results are ranked (exact/prefix order or vehicle number first)
+        and paginated.
+        """
         try:
-            gate_passes = GatePass.query.filter(
-                db.or_(
-                    GatePass.party_name.ilike(f'%{search_term}%'),
-                    GatePass.vehicle_no.ilike(f'%{search_term}%')
-                )
-            ).order_by(GatePass.issued_at.desc()).all()
+            rank = search_rank(
+                search_term,
+                key_columns=[SalesOrder.order_number, GatePass.vehicle_no],
+                text_columns=[GatePass.party_name]
+            )
+            
+            query = db.session.query(GatePass, DispatchRequest, SalesOrder, ShowroomProduct).join(
+                DispatchRequest, GatePass.dispatch_request_id == DispatchRequest.id
+            ).outerjoin(
+                SalesOrder, DispatchRequest.sales_order_id == SalesOrder.id
+            ).outerjoin(
+                ShowroomProduct, DispatchRequest.showroom_product_id == ShowroomProduct.id
+            ).filter(
+                search_filter(search_term, [SalesOrder.order_number, GatePass.vehicle_no, GatePass.party_name])
+            ).order_by(rank.desc(), GatePass.issued_at.desc(), GatePass.id.desc())
+            
+            rows, total, page, per_page = paginate(query, page, per_page)
             
             results = []
-            for gate_pass in gate_passes:
-                dispatch_request = DispatchRequest.query.get(gate_pass.dispatch_request_id)
-                if dispatch_request:
-                    sales_order = SalesOrder.query.get(dispatch_request.sales_order_id)
-                    showroom_product = ShowroomProduct.query.get(dispatch_request.showroom_product_id)
-                    
-                    # Also search by order number
-                    if sales_order and search_term.upper() in sales_order.order_number.upper():
-                        results.append({
-                            'gatePassId': gate_pass.id,
-                            'orderNumber': sales_order.order_number,
-                            'productName': showroom_product.name if showroom_product else 'Unknown Product',
-                            'customerName': gate_pass.party_name,
-                            'customerVehicle': gate_pass.vehicle_no,
-                            'status': gate_pass.status,
-                            'issuedAt': gate_pass.issued_at.isoformat(),
-                            'verifiedAt': gate_pass.verified_at.isoformat() if gate_pass.verified_at else None
-                        })
-                    elif search_term.lower() in gate_pass.party_name.lower() or \
-                         (gate_pass.vehicle_no and search_term.upper() in gate_pass.vehicle_no.upper()):
-                        results.append({
-                            'gatePassId': gate_pass.id,
-                            'orderNumber': sales_order.order_number if sales_order else f'SO-{dispatch_request.sales_order_id}',
-                            'productName': showroom_product.name if showroom_product else 'Unknown Product',
-                            'customerName': gate_pass.party_name,
-                            'customerVehicle': gate_pass.vehicle_no,
-                            'status': gate_pass.status,
-                            'issuedAt': gate_pass.issued_at.isoformat(),
-                            'verifiedAt': gate_pass.verified_at.isoformat() if gate_pass.verified_at else None
-                        })
+            for gate_pass, dispatch_request, sales_order, showroom_product in rows:
+                results.append({
+                    'gatePassId': gate_pass.id,
+                    'orderNumber': sales_order.order_number if sales_order else f'SO-{dispatch_request.sales_order_id}',
+                    'productName': showroom_product.name if showroom_product else 'Unknown Product',
+                    'customerName': gate_pass.party_name,
+                    'customerVehicle': gate_pass.vehicle_no,
+                    'status': gate_pass.status,
+                    'issuedAt': gate_pass.issued_at.isoformat(),
+                    'verifiedAt': gate_pass.verified_at.isoformat() if gate_pass.verified_at else None
+                })
             
-            return results
+            return {
+                'results': results,
+                'total': total,
+                'page': page,
+                'perPage': per_page
+            }
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Error searching gate passes: {str(e)}")
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Concurrency test for stock allocation
+
+Many threads run InventoryService.check_stock_availability() against the same
+inventory at once; every unit of stock must be allocated at most once.
+
+The concurrency test only runs when TEST_DATABASE_URL points at MySQL, since
+SQLite has no row locks and would serialize the threads regardless. On the
+SQLite fallback the remaining tests check that the order and inventory rows
+are selected FOR UPDATE by compiling each statement for MySQL.
+"""
+import os
+import sys
+import threading
+import pytest
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from config import TestConfig
+from models import db, StoreInventory, PurchaseOrder, ProductionOrder
+from services.inventory_service import InventoryService
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+THREADS = 8
+ORDERS = 40
+STOCK = {'Steel Frame': 100, 'Screws': 1000}
+REQUIRED = {'Steel Frame': 7, 'Screws': 30}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    database_url = TEST_DATABASE_URL or f"sqlite:///{tmp_path / 'inventory.db'}"
+    monkeypatch.setattr(TestConfig, 'SQLALCHEMY_DATABASE_URI', database_url)
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _create_orders():
+    production_order = ProductionOrder(product_name='Office Chair', category='Chairs', quantity=1)
+    db.session.add(production_order)
+    db.session.flush()
+
+    db.session.add_all([StoreInventory(name=name, quantity=quantity) for name, quantity in STOCK.items()])
+    orders = []
+    for _ in range(ORDERS):
+        order = PurchaseOrder(production_order_id=production_order.id, product_name='Office Chair', quantity=1)
+        order.set_materials_list([{'name': name, 'quantity': quantity} for name, quantity in REQUIRED.items()])
+        orders.append(order)
+    db.session.add_all(orders)
+    db.session.flush()
+    order_ids = [order.id for order in orders]
+    db.session.commit()
+    return order_ids
+
+
+@pytest.mark.skipif(
+    not (TEST_DATABASE_URL or '').startswith('mysql'),
+    reason='needs row locks: set TEST_DATABASE_URL to a MySQL database'
+)
+def test_concurrent_allocation_never_oversells(app):
+    order_ids = _create_orders()
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def worker(ids):
+        with app.app_context():
+            for order_id in ids:
+                try:
+                    result = InventoryService.check_stock_availability(order_id)
+                    with lock:
+                        results.append(result)
+                except Exception as e:
+                    with lock:
+                        errors.append(str(e))
+            db.session.remove()
+
+    threads = [threading.Thread(target=worker, args=(order_ids[i::THREADS],)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(results) == ORDERS
+
+    # Stock allocated according to the results must equal the stock that left the store
+    allocated = {name: 0 for name in REQUIRED}
+    for result in results:
+        shortages = {item['name']: item['quantity'] for item in result.get('shortages', [])}
+        for name, quantity in REQUIRED.items():
+            allocated[name] += quantity - shortages.get(name, 0)
+
+    db.session.expire_all()
+    remaining = {item.name: item.quantity for item in StoreInventory.query.all()}
+    for name, quantity in STOCK.items():
+        assert remaining[name] >= 0
+        assert allocated[name] == quantity - remaining[name]
+
+    fully_allocated = [result for result in results if result['allAvailable']]
+    assert len(fully_allocated) == STOCK['Steel Frame'] // REQUIRED['Steel Frame']
+
+
+def test_check_uses_one_inventory_query(app):
+    order_id = _create_orders()[0]
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'store_inventory' in statement.lower() and statement.lstrip().upper().startswith('SELECT'):
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        result = InventoryService.check_stock_availability(order_id)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    assert result['allAvailable'] is True
+    assert result['newStatus'] == 'store_allocated'
+    assert len(statements) == 1
+
+
+def test_check_locks_order_and_inventory_rows(app):
+    order_id = _create_orders()[0]
+    locked_tables = []
+
+    def record(orm_execute_state):
+        statement = orm_execute_state.statement
+        if orm_execute_state.is_select and 'FOR UPDATE' in str(statement.compile(dialect=mysql.dialect())):
+            locked_tables.extend(table.name for table in statement.get_final_froms())
+
+    event.listen(db.session, 'do_orm_execute', record)
+    try:
+        InventoryService.check_stock_availability(order_id)
+    finally:
+        event.remove(db.session, 'do_orm_execute', record)
+
+    assert locked_tables == ['purchase_order', 'store_inventory']
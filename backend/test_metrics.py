@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus metrics endpoint, pool checkout timing and the health check
+"""
+import os
+import sys
+import pytest
+from sqlalchemy import create_engine
+from prometheus_client import REGISTRY
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from models import db
+from utils.metrics import TimedQueuePool, pool_status
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_counted_per_endpoint(app):
+    labels = {'blueprint': 'sales', 'endpoint': 'sales.get_available_showroom_products', 'method': 'GET'}
+    before = _sample('http_requests_total', status='200', **labels)
+    observed = _sample('http_request_duration_seconds_count', **labels)
+
+    client = app.test_client()
+    for _ in range(3):
+        assert client.get('/api/sales/showroom/available').status_code == 200
+
+    assert _sample('http_requests_total', status='200', **labels) == before + 3
+    assert _sample('http_request_duration_seconds_count', **labels) == observed + 3
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    body = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_bucket{blueprint="sales",endpoint="sales.get_available_showroom_products",le="0.005",method="GET"}' in body
+    assert 'db_pool_checkout_wait_seconds_bucket' in body
+
+
+def test_pool_checkout_wait_and_timeouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    waits = _sample('db_pool_checkout_wait_seconds_count')
+    timeouts = _sample('db_pool_checkout_timeouts_total')
+
+    connection = engine.connect()
+    assert pool_status(engine)['saturation'] == 1.0
+    with pytest.raises(Exception):
+        engine.connect()
+    connection.close()
+    engine.dispose()
+
+    assert _sample('db_pool_checkout_wait_seconds_count') == waits + 2
+    assert _sample('db_pool_checkout_timeouts_total') == timeouts + 1
+
+
+def test_health_reports_database_and_pool(app):
+    response = app.test_client().get('/api/health')
+
+    assert response.status_code == 200
+    health = response.get_json()
+    assert health['status'] == 'healthy'
+    assert health['database']['connected'] is True
+    assert health['database']['dialect'] == 'sqlite'
+    assert 'saturation' in health['pool']
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for per-request SQL instrumentation, the admin query report and the
+query budget pytest plugin
+"""
+import os
+import sys
+import textwrap
+import pytest
+
+# Add current directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from models import db, ShowroomProduct
+from utils.query_instrumentation import fingerprint
+
+PRODUCTS = 8
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            ShowroomProduct(name=f'Chair {i}', category='Chairs', total_quantity=2, remaining_quantity=2)
+            for i in range(PRODUCTS)
+        ])
+        db.session.commit()
+
+    @app.route('/test/products/one-by-one')
+    def products_one_by_one():
+        ids = [product_id for (product_id,) in db.session.query(ShowroomProduct.id)]
+        return {'names': [db.session.get(ShowroomProduct, product_id).name for product_id in ids]}
+
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+def test_fingerprint_ignores_parameters():
+    assert fingerprint("SELECT * FROM t WHERE id = 5 AND name = 'x'") == fingerprint("SELECT * FROM t WHERE id = 7 AND name = 'y'")
+    assert fingerprint('SELECT * FROM t WHERE id IN (?, ?, ?)') == fingerprint('SELECT * FROM t WHERE id IN (?)')
+    assert fingerprint('SELECT anon_1 FROM table1') == 'SELECT anon_1 FROM table1'
+
+
+def test_debug_headers_report_queries(app):
+    app.debug = True
+    response = app.test_client().get('/test/products/one-by-one')
+
+    assert response.status_code == 200
+    assert int(response.headers['X-DB-Query-Count']) == PRODUCTS + 1
+    assert float(response.headers['X-DB-Time-Ms']) >= 0
+    assert response.headers['X-DB-Repeated-Queries'] == '1'
+
+
+def test_headers_hidden_outside_debug(app):
+    app.debug = False
+    response = app.test_client().get('/test/products/one-by-one')
+
+    assert response.status_code == 200
+    assert 'X-DB-Query-Count' not in response.headers
+
+
+def test_admin_report_requires_token(app):
+    client = app.test_client()
+    assert client.get('/api/admin/query-report').status_code == 403
+
+    app.config['ADMIN_API_TOKEN'] = 'secret'
+    assert client.get('/api/admin/query-report').status_code == 401
+    assert client.delete('/api/admin/query-report', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/api/admin/query-report', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+
+def test_admin_report_aggregates_routes(app):
+    app.config['ADMIN_API_TOKEN'] = 'secret'
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = 'Bearer secret'
+    for _ in range(3):
+        client.get('/test/products/one-by-one')
+    client.get('/api/sales/showroom/available')
+
+    report = client.get('/api/admin/query-report').get_json()
+    routes = {route['route']: route for route in report['routes']}
+
+    one_by_one = routes['GET /test/products/one-by-one']
+    assert one_by_one['requests'] == 3
+    assert one_by_one['queries']['total'] == 3 * (PRODUCTS + 1)
+    assert one_by_one['queries']['max'] == PRODUCTS + 1
+    [suspect] = one_by_one['nPlusOneSuspects']
+    assert suspect['maxRepeats'] == PRODUCTS
+    assert suspect['requests'] == 3
+    assert 'showroom_product' in suspect['fingerprint']
+
+    assert routes['GET /api/sales/showroom/available']['nPlusOneSuspects'] == []
+
+    assert client.delete('/api/admin/query-report').status_code == 200
+    # Only the reset request itself has been recorded since
+    routes = client.get('/api/admin/query-report').get_json()['routes']
+    assert [route['route'] for route in routes] == ['DELETE /api/admin/query-report']
+
+
+def test_query_budget_plugin_fails_over_budget_routes(pytester):
+    pytester.syspathinsert(os.path.dirname(os.path.abspath(__file__)))
+    pytester.makeconftest("pytest_plugins = ['utils.pytest_query_budget']")
+    pytester.makepyfile(textwrap.dedent(f"""
+        import pytest
+        from app import create_app
+        from models import db, ShowroomProduct
+
+        @pytest.fixture
+        def client():
+            app = create_app('testing')
+            with app.app_context():
+                db.create_all()
+                db.session.add_all([ShowroomProduct(name=f'P{{i}}', category='C') for i in range({PRODUCTS})])
+                db.session.commit()
+
+            @app.route('/one-by-one')
+            def one_by_one():
+                ids = [product_id for (product_id,) in db.session.query(ShowroomProduct.id)]
+                return {{'names': [db.session.get(ShowroomProduct, product_id).name for product_id in ids]}}
+
+            return app.test_client()
+
+        @pytest.mark.query_budget(3)
+        def test_over_budget(client):
+            client.get('/one-by-one')
+
+        @pytest.mark.query_budget({PRODUCTS + 1})
+        def test_within_budget(client):
+            client.get('/one-by-one')
+
+        @pytest.mark.query_budget(3, route='GET /api/sales/showroom/available')
+        def test_other_route_budget(client):
+            client.get('/one-by-one')
+    """))
+
+    result = pytester.runpytest_inprocess('-p', 'no:cacheprovider')
+
+    result.assert_outcomes(passed=2, failed=1)
+    result.stdout.fnmatch_lines([
+        '*Query budget exceeded:*',
+        f'*GET /one-by-one ran {PRODUCTS + 1} SQL statements (budget 3*',
+        f'*{PRODUCTS}x SELECT*showroom_product*'
+    ])
@@ -0,0 +1,22 @@
+"""
+Aggregate query helpers
+Compute several counters for a dashboard in a single round trip
+"""
+from sqlalchemy import case, func
+
+
+def conditional_counts(query, buckets: dict) -> dict:
+    """
+    Count rows matching each condition with one ``COUNT(CASE WHEN ...)`` query
+
+    Args:
+        query: Query whose FROM/JOIN/WHERE define the rows to count; its selected
+            columns are replaced
+        buckets: Dict of {name: SQL condition}
+
+    Returns:
+        dict: {name: int count} in the same order as buckets
+    """
+    columns = [func.count(case((condition, 1))).label(name) for name, condition in buckets.items()]
+    row = query.with_entities(*columns).one()
+    return {name: int(value or 0) for name, value in zip(buckets, row)}
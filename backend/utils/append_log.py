@@ -0,0 +1,230 @@
+"""
+Append-only JSON-lines tables with cross-process file locking
+Used by file-backed services so a write costs one appended line instead of a full file rewrite
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from itertools import islice
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+# Compact once superseded records outnumber live rows and exceed this many lines
+COMPACT_MIN_STALE_RECORDS = 1000
+
+
+class FileLock:
+    """Exclusive advisory lock on a sidecar ``.lock`` file, shared by threads and processes"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            self._handle = open(self.path, 'a+b')
+            if os.name == 'nt':
+                self._handle.seek(0)
+                msvcrt.locking(self._handle.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                if os.name == 'nt':
+                    self._handle.seek(0)
+                    msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._handle.close()
+                self._handle = None
+        self._thread_lock.release()
+
+
+class AppendLogTable:
+    """
+    Keyed rows stored as an append-only log of ``put`` / ``set`` / ``del`` records
+
+    Each process keeps the replayed rows in memory (in insertion order) and only
+    reads lines appended since its last refresh. Writers hold the file lock while
+    they refresh and append, so read-check-write sequences inside ``transaction()``
+    are atomic across gunicorn workers. Compaction rewrites the log as one ``put``
+    per live row once superseded records pile up. Reads return copies of rows.
+    """
+
+    def __init__(self, path: str, key_column: str, index_column: str = None):
+        self.path = path
+        self.key_column = key_column
+        self.index_column = index_column
+        self.lock = FileLock(path + '.lock')
+        self._rows = {}
+        self._latest_keys = {}  # index_column value -> key of the newest row with it
+        self._offset = 0
+        self._file_id = None
+        self._stale = 0
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    @contextmanager
+    def transaction(self):
+        """Hold the lock with an up-to-date view; checks and writes inside are atomic"""
+        with self.lock:
+            self._refresh()
+            yield self
+
+    def rows(self) -> list:
+        """All live rows in insertion order"""
+        with self.lock:
+            self._refresh()
+            return [dict(row) for row in self._rows.values()]
+
+    def latest(self, limit: int) -> list:
+        """Up to `limit` most recently inserted rows, newest first"""
+        with self.lock:
+            self._refresh()
+            return [dict(row) for row in islice(reversed(self._rows.values()), limit)]
+
+    def get(self, key):
+        with self.lock:
+            self._refresh()
+            row = self._rows.get(key)
+            return dict(row) if row is not None else None
+
+    def latest_for(self, value):
+        """Newest row whose index_column equals `value`, or None"""
+        with self.lock:
+            self._refresh()
+            row = self._rows.get(self._latest_keys.get(value))
+            return dict(row) if row is not None else None
+
+    def newest_while(self, predicate) -> list:
+        """Rows from the newest backwards, stopping at the first that fails `predicate`"""
+        with self.lock:
+            self._refresh()
+            matched = []
+            for row in reversed(self._rows.values()):
+                if not predicate(row):
+                    break
+                matched.append(dict(row))
+            return matched
+
+    def put(self, row: dict):
+        """Insert or replace a row (keyed on key_column)"""
+        self._append([{'op': 'put', 'row': row}])
+
+    def update(self, key, values: dict):
+        """Change some columns of an existing row"""
+        self._append([{'op': 'set', 'key': key, 'values': values}])
+
+    def delete(self, key):
+        self._append([{'op': 'del', 'key': key}])
+
+    def bulk_put(self, rows: list):
+        self._append([{'op': 'put', 'row': row} for row in rows])
+
+    def compact(self):
+        """Rewrite the log with a single put per live row"""
+        with self.lock:
+            self._refresh()
+            tmp_path = self.path + '.compact'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for row in self._rows.values():
+                    f.write(json.dumps({'op': 'put', 'row': row}, default=str) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._offset = os.path.getsize(self.path)
+            self._file_id = self._identity()
+            self._stale = 0
+
+    def _append(self, records: list):
+        with self.lock:
+            self._refresh()
+            data = ''.join(json.dumps(record, default=str) + '\n' for record in records).encode('utf-8')
+            if os.path.exists(self.path) and os.path.getsize(self.path) > self._offset:
+                # A writer died mid-line; drop its fragment so our records start on a fresh line
+                with open(self.path, 'r+b') as f:
+                    f.truncate(self._offset)
+            with open(self.path, 'ab') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            for record in records:
+                self._apply(json.loads(json.dumps(record, default=str)))
+            self._offset += len(data)
+            self._file_id = self._identity()
+            if self._stale >= COMPACT_MIN_STALE_RECORDS and self._stale > len(self._rows):
+                self.compact()
+
+    def _identity(self):
+        stat = os.stat(self.path)
+        return (stat.st_dev, stat.st_ino)
+
+    def _refresh(self):
+        """Replay records appended (by any process) since the last refresh"""
+        if not os.path.exists(self.path):
+            self._reset()
+            return
+        identity = self._identity()
+        if identity != self._file_id or os.path.getsize(self.path) < self._offset:
+            # Compacted or replaced by another process: replay from scratch
+            self._reset()
+            self._file_id = identity
+
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1  # ignore a partially written trailing line
+        for line in data[:end].splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+        self._offset += end
+
+    def _reset(self):
+        self._rows, self._latest_keys = {}, {}
+        self._offset, self._file_id, self._stale = 0, None, 0
+
+    def _apply(self, record: dict):
+        op = record['op']
+        if op == 'put':
+            row = record['row']
+            key = row[self.key_column]
+            if key in self._rows:
+                self._stale += 1
+            self._rows[key] = row
+            if self.index_column:
+                self._latest_keys[row.get(self.index_column)] = key
+        elif op == 'set':
+            row = self._rows.get(record['key'])
+            if row is not None:
+                row.update(record['values'])
+            self._stale += 1
+        elif op == 'del':
+            row = self._rows.pop(record['key'], None)
+            if row is not None:
+                self._stale += 2  # the row's put and this delete
+                if self.index_column:
+                    self._reindex(row.get(self.index_column), record['key'])
+
+    def _reindex(self, value, deleted_key):
+        """Point `value` back at the newest remaining row with it after `deleted_key` went away"""
+        if self._latest_keys.get(value) != deleted_key:
+            return
+        for key, row in reversed(self._rows.items()):
+            if row.get(self.index_column) == value:
+                self._latest_keys[value] = key
+                return
+        del self._latest_keys[value]
@@ -0,0 +1,46 @@
+"""
+Batch loading helpers
+Resolve related rows for a whole list with IN (...) queries instead of one lookup per row
+"""
+from sqlalchemy import exists
+
+# Maximum number of values bound into a single IN (...) clause
+IN_CLAUSE_CHUNK_SIZE = 500
+
+
+def chunked(values, size=IN_CLAUSE_CHUNK_SIZE):
+    """Split values into lists small enough for one IN (...) clause"""
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def first_by(model, column, values=None):
+    """
+    Map column value -> lowest-id row of ``model``
+
+    Replaces per-row ``filter_by(column=value).first()`` lookups. When ``values``
+    is None every row with a non-null ``column`` is loaded in one query; otherwise
+    the distinct values are resolved in chunked IN queries.
+    """
+    if values is None:
+        queries = [model.query.filter(column.isnot(None))]
+    else:
+        keys = sorted({value for value in values if value is not None})
+        queries = [model.query.filter(column.in_(chunk)) for chunk in chunked(keys)]
+
+    lookup = {}
+    for query in queries:
+        for row in query.order_by(model.id).all():
+            lookup.setdefault(getattr(row, column.key), row)
+    return lookup
+
+
+def first_by_production_order(model, production_order_ids=None):
+    """Map production_order_id -> first row of ``model`` linked to that production order"""
+    return first_by(model, model.production_order_id, production_order_ids)
+
+
+def without_related(query, column, related_column):
+    """Narrow ``query`` to rows with no related row where related_column == column (anti-join)"""
+    return query.filter(~exists().where(related_column == column))
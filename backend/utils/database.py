@@ -16,6 +16,7 @@ def init_sample_data():
                     'cost_price': 150.0,
                     'sale_price': 250.0,
                     'showroom_status': 'sold',
+                    'remaining_quantity': 0,
                     'sold_date': datetime.utcnow()
                 },
                 {
@@ -24,6 +25,7 @@ def init_sample_data():
                     'cost_price': 45.0,
                     'sale_price': 75.0,
                     'showroom_status': 'sold',
+                    'remaining_quantity': 0,
                     'sold_date': datetime.utcnow()
                 },
                 {
@@ -0,0 +1,246 @@
+"""
+Process-wide cache of the trained LBPH face recognizer
+Keeps the model in sync with GateUser face encodings without retraining per request
+"""
+import logging
+import os
+import threading
+
+import numpy as np
+
+from utils.face_recognition_utils import FACE_RECOGNITION_AVAILABLE, decode_face_encodings
+
+if FACE_RECOGNITION_AVAILABLE:
+    import cv2
+
+logger = logging.getLogger(__name__)
+
+# Where the trained model is persisted for warm starts
+DEFAULT_MODEL_DIR = os.getenv(
+    'FACE_MODEL_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'face_model')
+)
+MODEL_FILENAME = 'lbph_model.yml'
+# LBPH label whose label info holds the "user_id:version ..." map, so model and versions
+# are written (and replaced) as one file
+VERSIONS_LABEL = -1
+
+
+class FaceModelCache:
+    """
+    Trained LBPH recognizer keyed on the set of (user_id, face_encoding_version)
+
+    Labels are GateUser ids. New users are added with LBPH ``update()``; changed or
+    deleted users trigger a background retrain, during which they are masked out
+    of predictions (LBPH can't drop a user's old samples). The model is written to
+    disk, with the versions it was trained on, after every retrain.
+    """
+
+    def __init__(self, model_dir: str = DEFAULT_MODEL_DIR):
+        self.model_dir = model_dir
+        self._lock = threading.RLock()
+        self._recognizer = None
+        self._versions = {}  # user_id -> face_encoding_version the model was trained with
+        self._masked_user_ids = {}  # changed/deleted user_id -> mask generation, until a retrain drops them
+        self._mask_generation = 0
+        self._retrain_thread = None
+        self._loaded_from_disk = False
+
+    @property
+    def model_path(self) -> str:
+        return os.path.join(self.model_dir, MODEL_FILENAME)
+
+    def sync(self, current_versions: dict, load_encodings, app=None):
+        """
+        Bring the model in line with the current face encoding versions
+
+        Args:
+            current_versions: Dict of {user_id: face_encoding_version}
+            load_encodings: Callable(user_ids or None) -> {user_id: (version, encoding)}
+            app: Flask app used to run a background retrain inside an app context
+        """
+        if not FACE_RECOGNITION_AVAILABLE:
+            return
+        with self._lock:
+            if self._recognizer is None and not self._loaded_from_disk:
+                self._loaded_from_disk = True
+                self._load_from_disk()
+
+            if self._recognizer is None:
+                self._retrain(load_encodings)
+                return
+
+            added = [uid for uid in current_versions if uid not in self._versions]
+            removed = [uid for uid in self._versions if uid not in current_versions]
+            changed = [uid for uid in current_versions
+                       if uid in self._versions and self._versions[uid] != current_versions[uid]]
+
+            if added:
+                self._update(load_encodings(added))
+            if removed or changed:
+                self._mask(removed + changed)
+                self._schedule_retrain(load_encodings, app)
+
+    def add_user(self, user_id: int, version: int, encoding):
+        """Add a newly registered user's faces to the model via LBPH update()"""
+        if not FACE_RECOGNITION_AVAILABLE or encoding is None:
+            return
+        with self._lock:
+            if self._recognizer is None or user_id in self._versions:
+                # Untrained or already known; the next sync() reconciles it
+                return
+            self._update({user_id: (version, encoding)})
+
+    def invalidate_user(self, user_id: int, load_encodings, app=None):
+        """Mask a user whose faces changed or were deleted and schedule a background retrain"""
+        if not FACE_RECOGNITION_AVAILABLE:
+            return
+        with self._lock:
+            if self._recognizer is None:
+                return
+            # Old samples stay in the model until the retrain, so mask changed users too
+            self._mask([user_id])
+            self._schedule_retrain(load_encodings, app)
+
+    def predict(self, face_img):
+        """Return (user_id, confidence) for a 100x100 grayscale face, or (None, None)"""
+        with self._lock:
+            if self._recognizer is None:
+                return None, None
+            label, confidence = self._recognizer.predict(face_img)
+            if label in self._masked_user_ids:
+                return None, confidence
+            return int(label), confidence
+
+    def stats(self) -> dict:
+        """Summary of the cached model"""
+        with self._lock:
+            return {
+                'trained': self._recognizer is not None,
+                'users': len(self._versions),
+                'masked_users': len(self._masked_user_ids),
+                'retrain_pending': bool(self._retrain_thread and self._retrain_thread.is_alive())
+            }
+
+    def clear(self):
+        """Drop the in-memory model (the on-disk copy is kept)"""
+        with self._lock:
+            self._recognizer = None
+            self._versions = {}
+            self._masked_user_ids = {}
+            self._loaded_from_disk = False
+
+    def _mask(self, user_ids):
+        """Hide users from predictions until a retrain started after now lands"""
+        self._mask_generation += 1
+        for user_id in user_ids:
+            self._masked_user_ids[user_id] = self._mask_generation
+
+    def _update(self, encodings: dict):
+        """Add samples for the given users to the trained model"""
+        images, labels = self._training_data(encodings)
+        if not images:
+            return
+        if self._recognizer is None:
+            self._recognizer = cv2.face.LBPHFaceRecognizer_create()
+            self._recognizer.train(images, np.array(labels, dtype=np.int32))
+        else:
+            self._recognizer.update(images, np.array(labels, dtype=np.int32))
+        for user_id, (version, _) in encodings.items():
+            self._versions[user_id] = version
+            self._masked_user_ids.pop(user_id, None)
+        logger.info(f"Face model updated with {len(images)} images for {len(encodings)} users")
+
+    def _retrain(self, load_encodings):
+        """Train a fresh recognizer from every stored encoding and persist it"""
+        with self._lock:
+            generation = self._mask_generation
+        encodings = load_encodings(None)
+        images, labels = self._training_data(encodings)
+        recognizer = None
+        if images:
+            recognizer = cv2.face.LBPHFaceRecognizer_create()
+            recognizer.train(images, np.array(labels, dtype=np.int32))
+        versions = {user_id: version for user_id, (version, _) in encodings.items()}
+        if recognizer is not None:
+            recognizer.setLabelInfo(VERSIONS_LABEL, ' '.join(f'{uid}:{version}' for uid, version in versions.items()))
+
+        with self._lock:
+            self._recognizer = recognizer
+            self._versions = versions
+            # Users changed after the encodings were read stay masked until the next retrain
+            self._masked_user_ids = {
+                user_id: masked_at for user_id, masked_at in self._masked_user_ids.items() if masked_at > generation
+            }
+        logger.info(f"Face model retrained with {len(images)} images for {len(versions)} users")
+        self._save_to_disk(recognizer)
+
+    def _schedule_retrain(self, load_encodings, app=None):
+        """Retrain on a background thread unless one is already running"""
+        if self._retrain_thread and self._retrain_thread.is_alive():
+            return
+
+        def run():
+            try:
+                if app is not None:
+                    with app.app_context():
+                        self._retrain(load_encodings)
+                else:
+                    self._retrain(load_encodings)
+            except Exception as e:
+                logger.error(f"Background face model retrain failed: {e}")
+
+        self._retrain_thread = threading.Thread(target=run, name='face-model-retrain', daemon=True)
+        self._retrain_thread.start()
+
+    def wait_for_retrain(self, timeout: float = None):
+        """Block until a pending background retrain finishes"""
+        thread = self._retrain_thread
+        if thread:
+            thread.join(timeout)
+
+    @staticmethod
+    def _training_data(encodings: dict):
+        """Flatten {user_id: (version, encoding)} into LBPH images and labels"""
+        images = []
+        labels = []
+        for user_id, (_, encoding) in encodings.items():
+            for face_img in decode_face_encodings(encoding, user_id):
+                images.append(face_img)
+                labels.append(user_id)
+        return images, labels
+
+    def _save_to_disk(self, recognizer):
+        """Persist the model, which carries its versions as VERSIONS_LABEL info, in one atomic replace"""
+        try:
+            os.makedirs(self.model_dir, exist_ok=True)
+            if recognizer is None:
+                if os.path.exists(self.model_path):
+                    os.remove(self.model_path)
+                return
+            tmp_model = f'{self.model_path}.{os.getpid()}.{threading.get_ident()}.tmp.yml'
+            recognizer.write(tmp_model)
+            os.replace(tmp_model, self.model_path)
+        except Exception as e:
+            logger.warning(f"Could not save face model to {self.model_dir}: {e}")
+
+    def _load_from_disk(self):
+        """Warm start from a previously saved model, if any"""
+        if not os.path.exists(self.model_path):
+            return
+        try:
+            recognizer = cv2.face.LBPHFaceRecognizer_create()
+            recognizer.read(self.model_path)
+            versions = {
+                int(uid): int(version)
+                for uid, version in (entry.split(':') for entry in recognizer.getLabelInfo(VERSIONS_LABEL).split())
+            }
+            self._recognizer = recognizer
+            self._versions = versions
+            logger.info(f"Loaded face model for {len(versions)} users from {self.model_path}")
+        except Exception as e:
+            logger.warning(f"Could not load face model from {self.model_dir}: {e}")
+
+
+# Global instance shared by all requests in this process
+face_model_cache = FaceModelCache()
@@ -6,6 +6,7 @@ import base64
 import io
 import json
 import logging
+import struct
 import numpy as np
 from PIL import Image
 
@@ -22,6 +23,13 @@ except ImportError as e:
     logger.warning(f"OpenCV (cv2) library not available. Face recognition features will be disabled. Error: {e}")
 
 
+# Binary face encoding format: header followed by `count` raw uint8 grayscale faces
+FACE_ENCODING_MAGIC = b'FENC'
+FACE_ENCODING_FORMAT_VERSION = 1
+FACE_ENCODING_HEADER = struct.Struct('<4sBHHH')  # magic, format version, count, height, width
+FACE_SIZE = (100, 100)
+
+
 def is_face_recognition_available():
     """Check if face recognition is available"""
     return FACE_RECOGNITION_AVAILABLE
@@ -69,7 +77,7 @@ def generate_face_encoding(photo_base64):
     Returns:
         dict: {
             'success': bool,
-            'encoding': str (JSON serialized numpy array) or None,
+            'encoding': bytes (binary face encoding, see pack_face_encodings) or None,
             'message': str,
             'face_count': int
         }
@@ -131,11 +139,11 @@ def generate_face_encoding(photo_base64):
         # Resize to a standard size for encoding
         face_img = cv2.resize(face_img, (100, 100))
         # Serialize the face image as encoding
-        encoding_json = json.dumps(face_img.tolist())
+        encoding = pack_face_encodings([face_img])
         logger.info(f"Successfully generated face encoding (OpenCV LBPH)")
         return {
             'success': True,
-            'encoding': encoding_json,
+            'encoding': encoding,
             'message': 'Face encoding generated successfully',
             'face_count': 1
         }
@@ -154,7 +162,7 @@ def compare_faces(known_encoding_json, unknown_photo_base64, tolerance=0.6):
     Compare a known face encoding with an unknown photo
     
     Args:
-        known_encoding_json: JSON string of known face encoding
+        known_encoding_json: Stored face encoding (binary or legacy JSON)
         unknown_photo_base64: Base64 encoded photo to compare
         tolerance: Distance tolerance for matching (lower = more strict, default 0.6)
         
@@ -176,7 +184,14 @@ def compare_faces(known_encoding_json, unknown_photo_base64, tolerance=0.6):
     
     try:
         # Load known encoding (face image)
-        known_face_img = np.array(json.loads(known_encoding_json), dtype=np.uint8)
+        known_faces = decode_face_encodings(known_encoding_json)
+        if not known_faces:
+            return {
+                'success': False,
+                'match': False,
+                'distance': None,
+                'message': 'Invalid known face encoding'
+            }
         # Generate encoding for unknown photo
         result = generate_face_encoding(unknown_photo_base64)
         if not result['success']:
@@ -186,10 +201,10 @@ def compare_faces(known_encoding_json, unknown_photo_base64, tolerance=0.6):
                 'distance': None,
                 'message': result['message']
             }
-        unknown_face_img = np.array(json.loads(result['encoding']), dtype=np.uint8)
+        unknown_face_img = decode_face_encodings(result['encoding'])[0]
         # Use LBPHFaceRecognizer for comparison
         recognizer = cv2.face.LBPHFaceRecognizer_create()
-        recognizer.train([known_face_img], np.array([0]))
+        recognizer.train(known_faces, np.zeros(len(known_faces), dtype=np.int32))
         label, confidence = recognizer.predict(unknown_face_img)
         match = confidence < (tolerance * 100)  # Lower confidence means better match
         logger.info(f"Face comparison: match={match}, confidence={confidence:.2f}, tolerance={tolerance}")
@@ -215,7 +230,7 @@ def recognize_face_from_database(unknown_photo_base64, known_faces_dict, toleran
     
     Args:
         unknown_photo_base64: Base64 encoded photo to recognize
-        known_faces_dict: Dict of {user_id: face_encoding_json}
+        known_faces_dict: Dict of {user_id: face_encoding} (binary or legacy JSON)
         tolerance: Distance tolerance for matching (lower = more strict, default 0.6)
         
     Returns:
@@ -255,24 +270,16 @@ def recognize_face_from_database(unknown_photo_base64, known_faces_dict, toleran
                 'distance': None,
                 'message': result['message']
             }
-        unknown_face_img = np.array(json.loads(result['encoding']), dtype=np.uint8)
+        unknown_face_img = decode_face_encodings(result['encoding'])[0]
         # Prepare training data for LBPH recognizer
         train_imgs = []
         train_labels = []
         user_ids = []
         for idx, (user_id, encoding_json) in enumerate(known_faces_dict.items()):
-            if encoding_json:
-                try:
-                    known_face_img = np.array(json.loads(encoding_json), dtype=np.uint8)
-                    # Validate shape
-                    if known_face_img.shape != (100, 100):
-                        logger.warning(f"Encoding for user {user_id} has invalid shape: {known_face_img.shape}")
-                        continue
-                    train_imgs.append(known_face_img)
-                    train_labels.append(idx)
-                    user_ids.append(user_id)
-                except Exception as e:
-                    logger.warning(f"Failed to load encoding for user {user_id}: {e}")
+            for known_face_img in decode_face_encodings(encoding_json, user_id):
+                train_imgs.append(known_face_img)
+                train_labels.append(idx)
+            user_ids.append(user_id)
         logger.info(f"Loaded {len(train_imgs)} valid face encodings for recognition.")
         if not train_imgs:
             return {
@@ -306,6 +313,170 @@ def recognize_face_from_database(unknown_photo_base64, known_faces_dict, toleran
         }
 
 
+def pack_face_encodings(faces):
+    """
+    Serialize grayscale faces into the binary face encoding format
+    
+    Args:
+        faces: Sequence of uint8 arrays with identical (height, width)
+        
+    Returns:
+        bytes: Header followed by the raw face bytes
+    """
+    stacked = np.ascontiguousarray(np.stack([np.asarray(face, dtype=np.uint8) for face in faces]))
+    count, height, width = stacked.shape
+    header = FACE_ENCODING_HEADER.pack(FACE_ENCODING_MAGIC, FACE_ENCODING_FORMAT_VERSION, count, height, width)
+    return header + stacked.tobytes()
+
+
+def unpack_face_encodings(blob):
+    """
+    Zero-copy view of a binary face encoding as a (count, height, width) uint8 array
+    
+    Raises:
+        ValueError: If the blob is not in the binary face encoding format
+    """
+    buffer = memoryview(blob)
+    if len(buffer) < FACE_ENCODING_HEADER.size:
+        raise ValueError('Face encoding is too short')
+    magic, version, count, height, width = FACE_ENCODING_HEADER.unpack_from(buffer)
+    if magic != FACE_ENCODING_MAGIC:
+        raise ValueError('Not a binary face encoding')
+    if version != FACE_ENCODING_FORMAT_VERSION:
+        raise ValueError(f'Unsupported face encoding format version: {version}')
+    faces = np.frombuffer(buffer, dtype=np.uint8, count=count * height * width, offset=FACE_ENCODING_HEADER.size)
+    return faces.reshape(count, height, width)
+
+
+def is_binary_face_encoding(encoding):
+    """Check whether a stored encoding uses the binary format"""
+    return isinstance(encoding, (bytes, bytearray, memoryview)) and bytes(encoding[:4]) == FACE_ENCODING_MAGIC
+
+
+def decode_face_encodings(encoding, user_id=None):
+    """
+    Decode a stored face encoding into a list of 100x100 grayscale face images
+    
+    Accepts the binary format (decoded without copying), a single legacy JSON face
+    (list of rows) or the legacy multi-photo JSON format (list of serialized faces).
+    
+    Args:
+        encoding: Stored face_encoding value
+        user_id: Optional user id used in log messages
+        
+    Returns:
+        list: numpy uint8 arrays of shape (100, 100); invalid entries are skipped
+    """
+    if encoding is None or len(encoding) == 0:
+        return []
+    
+    if is_binary_face_encoding(encoding):
+        try:
+            faces = unpack_face_encodings(encoding)
+        except ValueError as e:
+            logger.warning(f"Failed to load encoding for user {user_id}: {e}")
+            return []
+        if faces.shape[1:] != FACE_SIZE:
+            logger.warning(f"Encoding for user {user_id} has invalid shape: {faces.shape[1:]}")
+            return []
+        return list(faces)
+    
+    try:
+        if isinstance(encoding, (bytes, bytearray, memoryview)):
+            encoding = bytes(encoding).decode('utf-8')
+        parsed = json.loads(encoding) if isinstance(encoding, str) else encoding
+    except Exception as e:
+        logger.warning(f"Failed to load encoding for user {user_id}: {e}")
+        return []
+    
+    # Legacy multi-photo format: list of serialized faces
+    if isinstance(parsed, list) and parsed and isinstance(parsed[0], str):
+        faces = []
+        for item in parsed:
+            faces.extend(decode_face_encodings(item, user_id))
+        return faces
+    
+    try:
+        face_img = np.array(parsed, dtype=np.uint8)
+    except Exception as e:
+        logger.warning(f"Failed to load encoding for user {user_id}: {e}")
+        return []
+    if face_img.shape != FACE_SIZE:
+        logger.warning(f"Encoding for user {user_id} has invalid shape: {face_img.shape}")
+        return []
+    return [face_img]
+
+
+def to_binary_face_encoding(encoding, user_id=None):
+    """Convert a stored encoding (binary or legacy JSON) to the binary format, or None if it holds no valid face"""
+    if is_binary_face_encoding(encoding):
+        return bytes(encoding)
+    faces = decode_face_encodings(encoding, user_id)
+    return pack_face_encodings(faces) if faces else None
+
+
+def recognize_face_with_model(unknown_photo_base64, model_cache, tolerance=0.6):
+    """
+    Recognize a face using an already trained FaceModelCache
+    
+    Args:
+        unknown_photo_base64: Base64 encoded photo to recognize
+        model_cache: utils.face_model_cache.FaceModelCache synced with the database
+        tolerance: Distance tolerance for matching (lower = more strict, default 0.6)
+        
+    Returns:
+        dict: Same shape as recognize_face_from_database()
+    """
+    if not FACE_RECOGNITION_AVAILABLE:
+        return {
+            'success': False,
+            'recognized': False,
+            'user_id': None,
+            'distance': None,
+            'message': 'Face recognition library not available'
+        }
+    
+    try:
+        result = generate_face_encoding(unknown_photo_base64)
+        if not result['success']:
+            return {
+                'success': False,
+                'recognized': False,
+                'user_id': None,
+                'distance': None,
+                'message': result['message']
+            }
+        unknown_face_img = decode_face_encodings(result['encoding'])[0]
+        user_id, confidence = model_cache.predict(unknown_face_img)
+        if confidence is None:
+            return {
+                'success': False,
+                'recognized': False,
+                'user_id': None,
+                'distance': None,
+                'message': 'No valid face encodings in database'
+            }
+        match = user_id is not None and confidence < (tolerance * 100)
+        best_match_user_id = user_id if match else None
+        logger.info(f"Face recognized: user_id={best_match_user_id}, confidence={confidence:.2f}")
+        return {
+            'success': True,
+            'recognized': match,
+            'user_id': best_match_user_id,
+            'distance': confidence,
+            'message': f'Face recognized (confidence: {100-confidence:.1f}%)' if match else 'Face not recognized. Please register first.'
+        }
+    except Exception as e:
+        logger.error(f"Error recognizing face: {e}")
+        return {
+            'success': False,
+            'recognized': False,
+            'user_id': None,
+            'distance': None,
+            'message': f'Error recognizing face: {str(e)}'
+        }
+
+
 # Backward compatibility functions
 def load_known_faces():
     """
@@ -0,0 +1,195 @@
+"""
+Prometheus metrics
+Per-endpoint request counts and latency histograms, error counts and database pool usage,
+aggregated across gunicorn workers in multiprocess mode
+"""
+import logging
+import os
+import time
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Try to import the Prometheus client
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY,
+        generate_latest, multiprocess
+    )
+    METRICS_AVAILABLE = True
+except ImportError as e:
+    METRICS_AVAILABLE = False
+    logger.warning(f"prometheus_client library not available. /metrics will be disabled. Error: {e}")
+
+# Fixed latency buckets in seconds, shared by every endpoint so they can be aggregated
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+# Set (e.g. by gunicorn.conf.py) before prometheus_client is imported to share metrics across workers
+MULTIPROCESS_DIR_ENV = 'PROMETHEUS_MULTIPROC_DIR'
+
+if METRICS_AVAILABLE:
+    REQUESTS = Counter(
+        'http_requests_total', 'HTTP requests handled',
+        ['blueprint', 'endpoint', 'method', 'status']
+    )
+    REQUEST_LATENCY = Histogram(
+        'http_request_duration_seconds', 'Time spent handling HTTP requests',
+        ['blueprint', 'endpoint', 'method'], buckets=REQUEST_LATENCY_BUCKETS
+    )
+    REQUEST_ERRORS = Counter(
+        'http_request_errors_total', 'HTTP requests answered with a 5xx status',
+        ['blueprint', 'endpoint', 'method']
+    )
+    REQUEST_EXCEPTIONS = Counter(
+        'http_request_exceptions_total', 'Exceptions that escaped request handlers',
+        ['blueprint', 'endpoint', 'exception']
+    )
+    POOL_CHECKOUT_WAIT = Histogram(
+        'db_pool_checkout_wait_seconds', 'Time spent waiting for a database connection from the pool',
+        buckets=POOL_WAIT_BUCKETS
+    )
+    POOL_CHECKOUT_TIMEOUTS = Counter(
+        'db_pool_checkout_timeouts_total', 'Database connection checkouts that timed out'
+    )
+    POOL_CHECKED_OUT = Gauge(
+        'db_pool_checked_out_connections', 'Database connections currently checked out',
+        multiprocess_mode='livesum'
+    )
+    POOL_CAPACITY = Gauge(
+        'db_pool_capacity_connections', 'Pool size plus allowed overflow',
+        multiprocess_mode='livesum'
+    )
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception as e:
+            if METRICS_AVAILABLE and type(e).__name__ == 'TimeoutError':
+                POOL_CHECKOUT_TIMEOUTS.inc()
+            raise
+        finally:
+            if METRICS_AVAILABLE:
+                POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+
+def pool_status(engine):
+    """
+    Connection usage of an engine's pool in this process
+
+    Returns:
+        dict: size, checkedOut, overflow, capacity (None when unbounded) and
+        saturation (checked out / capacity, None when unbounded)
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {'pool': type(pool).__name__, 'size': None, 'checkedOut': None,
+                'overflow': None, 'capacity': None, 'saturation': None}
+
+    capacity = pool.size() + pool._max_overflow if pool._max_overflow >= 0 else None
+    checked_out = pool.checkedout()
+    return {
+        'pool': type(pool).__name__,
+        'size': pool.size(),
+        'checkedOut': checked_out,
+        'overflow': pool.overflow(),
+        'capacity': capacity,
+        'saturation': round(checked_out / capacity, 3) if capacity else None
+    }
+
+
+def _labels():
+    blueprint = request.blueprint or 'app'
+    endpoint = request.endpoint or '<unmatched>'
+    return blueprint, endpoint
+
+
+class Metrics:
+    """
+    Flask extension exporting request and database pool metrics
+
+    init_app() must run before db.init_app() so MySQL engines are built with
+    TimedQueuePool. Under gunicorn, set PROMETHEUS_MULTIPROC_DIR (see
+    gunicorn.conf.py) and every worker writes its samples to files there;
+    /metrics merges them, so any worker can answer a scrape.
+    """
+
+    def init_app(self, app):
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.extensions['metrics'] = self
+        if not (METRICS_AVAILABLE and app.config['METRICS_ENABLED']):
+            return
+
+        # In-memory SQLite needs its StaticPool; every other database gets a timed QueuePool
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+        options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+        if not uri.startswith('sqlite') and 'poolclass' not in options:
+            options['poolclass'] = TimedQueuePool
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+        app.before_request(self._start_timer)
+        app.after_request(self._record_request)
+        app.teardown_request(self._record_exception)
+
+    @staticmethod
+    def watch_pool(app):
+        """Track checked-out connections of the app's engine (call after db.init_app)"""
+        if not (METRICS_AVAILABLE and app.config.get('METRICS_ENABLED', True)):
+            return
+        from models import db
+        with app.app_context():
+            engine = db.engine
+        status = pool_status(engine)
+        if status['capacity']:
+            POOL_CAPACITY.inc(status['capacity'])
+        event.listen(engine, 'checkout', lambda *args: POOL_CHECKED_OUT.inc())
+        event.listen(engine, 'checkin', lambda *args: POOL_CHECKED_OUT.dec())
+
+    @staticmethod
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @staticmethod
+    def _record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        blueprint, endpoint = _labels()
+        REQUEST_LATENCY.labels(blueprint, endpoint, request.method).observe(time.perf_counter() - started)
+        REQUESTS.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+        if response.status_code >= 500:
+            REQUEST_ERRORS.labels(blueprint, endpoint, request.method).inc()
+        return response
+
+    @staticmethod
+    def _record_exception(exc=None):
+        if exc is not None:
+            blueprint, endpoint = _labels()
+            REQUEST_EXCEPTIONS.labels(blueprint, endpoint, type(exc).__name__).inc()
+
+
+def render_metrics():
+    """
+    Current metrics in Prometheus text format
+
+    Returns:
+        tuple: (body bytes, content type)
+
+    Raises:
+        RuntimeError: If prometheus_client isn't installed
+    """
+    if not METRICS_AVAILABLE:
+        raise RuntimeError('Metrics are unavailable: prometheus_client is not installed')
+    if os.getenv(MULTIPROCESS_DIR_ENV):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
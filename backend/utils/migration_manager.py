@@ -2,6 +2,7 @@
 Centralized Migration Manager
 Automatically runs all database migrations when the application starts
 """
+import json
 import os
 import sys
 from sqlalchemy import create_engine, text
@@ -66,6 +67,20 @@ class MigrationManager:
         res = connection.execute(query, {"table": table_name}).scalar()
         return int(res or 0) > 0
     
+    def index_exists(self, connection, table_name: str, index_name: str) -> bool:
+        """Check if an index exists on a table"""
+        query = text(
+            """
+            SELECT COUNT(*) AS cnt
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = :table
+              AND INDEX_NAME = :idx
+            """
+        )
+        res = connection.execute(query, {"table": table_name, "idx": index_name}).scalar()
+        return int(res or 0) > 0
+    
     def run_sales_migration(self, connection):
         """Create sales tables"""
         print("🔄 Running sales migration...")
@@ -383,6 +398,414 @@ class MigrationManager:
             print(f"⚠️ HR migration error: {e}")
             return False
     
+    def run_hr_dashboard_migration(self, connection):
+        """Create the materialized HR dashboard counters and the indexes its queries use"""
+        print("🔄 Running HR dashboard migration...")
+        
+        create_counters_table = """
+        CREATE TABLE IF NOT EXISTS hr_dashboard_counters (
+            metric VARCHAR(30) NOT NULL,
+            scope VARCHAR(100) NOT NULL DEFAULT '',
+            value INT NOT NULL DEFAULT 0,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (metric, scope)
+        );
+        """
+        indexes = [
+            ('employees', 'ix_employees_joining_date', 'joining_date'),
+            ('attendance', 'ix_attendance_date_status', 'date, status'),
+            ('leaves', 'ix_leaves_status_approved_at', 'status, approved_at'),
+        ]
+        
+        try:
+            connection.execute(text(create_counters_table))
+            connection.commit()
+            
+            for table, index_name, columns in indexes:
+                if self.table_exists(connection, table) and not self.index_exists(connection, table, index_name):
+                    connection.execute(text(f"CREATE INDEX {index_name} ON {table} ({columns})"))
+                    connection.commit()
+            
+            print("✅ HR dashboard counters ready!")
+            return True
+        except Exception as e:
+            print(f"⚠️ HR dashboard migration error: {e}")
+            return False
+    
+    def run_attendance_rollup_migration(self, connection):
+        """Create monthly attendance rollups and backfill them from existing attendance"""
+        print("🔄 Running attendance rollup migration...")
+        
+        create_rollups_table = """
+        CREATE TABLE IF NOT EXISTS attendance_monthly_rollups (
+            employee_id INT NOT NULL,
+            month DATE NOT NULL,
+            total_days INT NOT NULL DEFAULT 0,
+            present_days INT NOT NULL DEFAULT 0,
+            absent_days INT NOT NULL DEFAULT 0,
+            late_days INT NOT NULL DEFAULT 0,
+            half_days INT NOT NULL DEFAULT 0,
+            hours_worked FLOAT NOT NULL DEFAULT 0,
+            PRIMARY KEY (employee_id, month),
+            INDEX ix_attendance_monthly_rollups_month (month),
+            FOREIGN KEY (employee_id) REFERENCES employees(id)
+        );
+        """
+        backfill_rollups = """
+        INSERT INTO attendance_monthly_rollups
+            (employee_id, month, total_days, present_days, absent_days, late_days, half_days, hours_worked)
+        SELECT employee_id,
+               DATE_SUB(date, INTERVAL DAYOFMONTH(date) - 1 DAY) AS month,
+               COUNT(*),
+               SUM(status = 'PRESENT'),
+               SUM(status = 'ABSENT'),
+               SUM(status = 'LATE'),
+               SUM(status = 'HALF_DAY'),
+               COALESCE(SUM(hours_worked), 0)
+        FROM attendance
+        GROUP BY employee_id, DATE_SUB(date, INTERVAL DAYOFMONTH(date) - 1 DAY);
+        """
+        
+        try:
+            if self.table_exists(connection, 'attendance_monthly_rollups'):
+                print("ℹ️ attendance_monthly_rollups already exists")
+                return True
+            if not self.table_exists(connection, 'employees'):
+                print("ℹ️ employees table doesn't exist yet, skipping attendance rollup migration")
+                return True
+            
+            connection.execute(text(create_rollups_table))
+            if self.table_exists(connection, 'attendance'):
+                connection.execute(text(backfill_rollups))
+            connection.commit()
+            
+            print("✅ Attendance rollups created and backfilled!")
+            return True
+        except Exception as e:
+            print(f"⚠️ Attendance rollup migration error: {e}")
+            return False
+    
+    def run_payroll_run_migration(self, connection):
+        """Create the payroll_runs table used by batch payroll runs and make payrolls unique per employee and period"""
+        print("🔄 Running payroll run migration...")
+        
+        create_payroll_runs_table = """
+        CREATE TABLE IF NOT EXISTS payroll_runs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            pay_period_start DATE NOT NULL,
+            pay_period_end DATE NOT NULL,
+            total_working_days FLOAT NOT NULL,
+            status VARCHAR(20) DEFAULT 'pending',
+            total_employees INT DEFAULT 0,
+            processed_employees INT DEFAULT 0,
+            created_payrolls INT DEFAULT 0,
+            skipped_employees INT DEFAULT 0,
+            claim_token VARCHAR(32),
+            error TEXT,
+            started_at DATETIME,
+            finished_at DATETIME,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE KEY uq_payroll_runs_period (pay_period_start, pay_period_end)
+        );
+        """
+        
+        try:
+            connection.execute(text(create_payroll_runs_table))
+            connection.commit()
+            
+            if not self.column_exists(connection, 'payroll_runs', 'claim_token'):
+                connection.execute(text("ALTER TABLE payroll_runs ADD COLUMN claim_token VARCHAR(32) NULL"))
+                connection.commit()
+            
+            # Runs look up existing payrolls by period
+            if self.table_exists(connection, 'payrolls') and not self.index_exists(connection, 'payrolls', 'ix_payrolls_period'):
+                connection.execute(text("CREATE INDEX ix_payrolls_period ON payrolls (pay_period_start, pay_period_end)"))
+                connection.commit()
+            
+            if self.table_exists(connection, 'payrolls') and not self.index_exists(connection, 'payrolls', 'uq_payrolls_employee_period'):
+                # Keep the oldest payroll per employee and period before the unique key can be created
+                connection.execute(text(
+                    """
+                    DELETE duplicate FROM payrolls duplicate
+                    JOIN payrolls keep ON keep.employee_id = duplicate.employee_id
+                        AND keep.pay_period_start = duplicate.pay_period_start
+                        AND keep.pay_period_end = duplicate.pay_period_end
+                        AND keep.id < duplicate.id
+                    """
+                ))
+                connection.execute(text(
+                    "CREATE UNIQUE INDEX uq_payrolls_employee_period ON payrolls (employee_id, pay_period_start, pay_period_end)"
+                ))
+                connection.commit()
+            
+            print("✅ Payroll runs table ready!")
+            return True
+        except Exception as e:
+            print(f"⚠️ Payroll run migration error: {e}")
+            return False
+    
+    def run_inventory_name_migration(self, connection):
+        """Merge duplicate store inventory names and add the unique index bulk imports upsert on"""
+        print("🔄 Running inventory name migration...")
+        
+        try:
+            if not self.table_exists(connection, 'store_inventory'):
+                print("ℹ️ store_inventory table doesn't exist yet, skipping inventory name migration")
+                return True
+            
+            if not self.index_exists(connection, 'store_inventory', 'ux_store_inventory_name'):
+                # Fold duplicate rows into the oldest one before the index can be created
+                connection.execute(text(
+                    """
+                    UPDATE store_inventory keep
+                    JOIN (
+                        SELECT MIN(id) AS keep_id, SUM(quantity) AS total
+                        FROM store_inventory
+                        GROUP BY name
+                        HAVING COUNT(*) > 1
+                    ) duplicates ON keep.id = duplicates.keep_id
+                    SET keep.quantity = duplicates.total
+                    """
+                ))
+                connection.execute(text(
+                    """
+                    DELETE duplicate FROM store_inventory duplicate
+                    JOIN store_inventory keep ON keep.name = duplicate.name AND keep.id < duplicate.id
+                    """
+                ))
+                connection.execute(text("CREATE UNIQUE INDEX ux_store_inventory_name ON store_inventory (name)"))
+                connection.commit()
+            
+            print("✅ Store inventory names are unique!")
+            return True
+        except Exception as e:
+            print(f"⚠️ Inventory name migration error: {e}")
+            return False
+    
+    def run_purchase_order_material_migration(self, connection):
+        """Move purchase_order.materials / original_requirements JSON into purchase_order_material rows"""
+        print("🔄 Running purchase order material migration...")
+        
+        create_materials_table = """
+        CREATE TABLE IF NOT EXISTS purchase_order_material (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            purchase_order_id INT NOT NULL,
+            kind VARCHAR(20) NOT NULL DEFAULT 'purchase',
+            name VARCHAR(200) NOT NULL,
+            quantity INT NOT NULL DEFAULT 0,
+            unit_cost FLOAT NOT NULL DEFAULT 0,
+            INDEX ix_purchase_order_material_order (purchase_order_id, kind),
+            FOREIGN KEY (purchase_order_id) REFERENCES purchase_order(id) ON DELETE CASCADE
+        );
+        """
+        # JSON column -> material kind
+        json_columns = {'materials': 'purchase', 'original_requirements': 'requirement'}
+        # Orders whose JSON didn't convert exactly; their originals stay in the *_legacy columns
+        lossy_orders = set()
+        
+        def material_rows(order_id, raw, kind):
+            try:
+                materials = json.loads(raw) if raw else []
+            except (TypeError, ValueError):
+                lossy_orders.add(order_id)
+                return []
+            if not isinstance(materials, list):
+                lossy_orders.add(order_id)
+                return []
+            rows = []
+            for material in materials:
+                if not isinstance(material, dict) or not material.get('name'):
+                    lossy_orders.add(order_id)
+                    continue
+                try:
+                    raw_quantity = float(material.get('quantity') or 0)
+                    quantity = int(raw_quantity)
+                    if quantity != raw_quantity:
+                        lossy_orders.add(order_id)
+                except (TypeError, ValueError):
+                    lossy_orders.add(order_id)
+                    quantity = 0
+                try:
+                    unit_cost = float(material.get('unit_cost') or 0)
+                except (TypeError, ValueError):
+                    lossy_orders.add(order_id)
+                    unit_cost = 0.0
+                rows.append({
+                    "order_id": order_id, "kind": kind, "name": str(material['name'])[:200],
+                    "quantity": quantity, "unit_cost": unit_cost
+                })
+            return rows
+        
+        try:
+            if not self.table_exists(connection, 'purchase_order'):
+                print("ℹ️ purchase_order table doesn't exist yet, skipping purchase order material migration")
+                return True
+            
+            connection.execute(text(create_materials_table))
+            connection.commit()
+            
+            columns = [column for column in json_columns if self.column_exists(connection, 'purchase_order', column)]
+            if not columns:
+                print("ℹ️ Purchase order materials are already normalized")
+                return True
+            
+            migrated = 0
+            last_id = 0
+            while True:
+                orders = connection.execute(text(
+                    f"""
+                    SELECT id, {', '.join(columns)} FROM purchase_order
+                    WHERE id > :last_id
+                    ORDER BY id LIMIT 200
+                    """
+                ), {"last_id": last_id}).fetchall()
+                if not orders:
+                    break
+                order_ids = [order[0] for order in orders]
+                rows = [
+                    row
+                    for order in orders
+                    for column, raw in zip(columns, order[1:])
+                    for row in material_rows(order[0], raw, json_columns[column])
+                ]
+                # Clear lines left by an interrupted run before re-inserting
+                connection.execute(
+                    text(f"DELETE FROM purchase_order_material WHERE purchase_order_id IN ({', '.join(str(order_id) for order_id in order_ids)})")
+                )
+                if rows:
+                    connection.execute(text(
+                        """
+                        INSERT INTO purchase_order_material (purchase_order_id, kind, name, quantity, unit_cost)
+                        VALUES (:order_id, :kind, :name, :quantity, :unit_cost)
+                        """
+                    ), rows)
+                migrated += len(rows)
+                last_id = order_ids[-1]
+                connection.commit()
+            
+            # Keep the JSON under *_legacy (unused by the app) so the backfill can be verified;
+            # a later migration drops them
+            connection.execute(text(
+                "ALTER TABLE purchase_order " +
+                ", ".join(f"CHANGE COLUMN {column} {column}_legacy TEXT NULL" for column in columns)
+            ))
+            connection.commit()
+            
+            print(f"✅ Purchase order materials normalized ({migrated} material lines)")
+            if lossy_orders:
+                print(f"⚠️ {len(lossy_orders)} purchase orders had materials that didn't convert exactly; "
+                      f"check them against the *_legacy columns: {sorted(lossy_orders)[:50]}")
+            return True
+        except Exception as e:
+            print(f"⚠️ Purchase order material migration error: {e}")
+            return False
+    
+    def run_finance_ledger_migration(self, connection):
+        """Create daily and monthly finance ledger rollups and backfill them from finance transactions"""
+        print("🔄 Running finance ledger migration...")
+        
+        create_rollups_table = """
+        CREATE TABLE IF NOT EXISTS finance_ledger_rollups (
+            period VARCHAR(10) NOT NULL,
+            period_start DATE NOT NULL,
+            transaction_type VARCHAR(20) NOT NULL,
+            amount FLOAT NOT NULL DEFAULT 0,
+            transaction_count INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (period, period_start, transaction_type)
+        );
+        """
+        backfill_rollups = """
+        INSERT INTO finance_ledger_rollups (period, period_start, transaction_type, amount, transaction_count)
+        SELECT 'day', DATE(created_at), transaction_type, COALESCE(SUM(amount), 0), COUNT(*)
+        FROM finance_transaction
+        WHERE created_at IS NOT NULL
+        GROUP BY DATE(created_at), transaction_type
+        UNION ALL
+        SELECT 'month', DATE_SUB(DATE(created_at), INTERVAL DAYOFMONTH(created_at) - 1 DAY), transaction_type,
+               COALESCE(SUM(amount), 0), COUNT(*)
+        FROM finance_transaction
+        WHERE created_at IS NOT NULL
+        GROUP BY DATE_SUB(DATE(created_at), INTERVAL DAYOFMONTH(created_at) - 1 DAY), transaction_type;
+        """
+        
+        try:
+            if self.table_exists(connection, 'finance_ledger_rollups'):
+                print("ℹ️ finance_ledger_rollups already exists")
+                return True
+            
+            connection.execute(text(create_rollups_table))
+            if self.table_exists(connection, 'finance_transaction'):
+                connection.execute(text(backfill_rollups))
+            connection.commit()
+            
+            print("✅ Finance ledger rollups created and backfilled!")
+            return True
+        except Exception as e:
+            print(f"⚠️ Finance ledger migration error: {e}")
+            return False
+    
+    def run_showroom_stock_migration(self, connection):
+        """Add showroom_product total/remaining quantities and backfill them from assembly orders and sales"""
+        print("🔄 Running showroom stock migration...")
+        
+        backfill_total = """
+        UPDATE showroom_product sp
+        LEFT JOIN (
+            SELECT ao.production_order_id, ao.quantity
+            FROM assembly_order ao
+            JOIN (
+                SELECT production_order_id, MIN(id) AS id
+                FROM assembly_order
+                GROUP BY production_order_id
+            ) first_order ON first_order.id = ao.id
+        ) assembly ON assembly.production_order_id = sp.production_order_id
+        SET sp.total_quantity = COALESCE(NULLIF(assembly.quantity, 0), 1);
+        """
+        backfill_remaining = """
+        UPDATE showroom_product sp
+        LEFT JOIN (
+            SELECT showroom_product_id, SUM(quantity) AS quantity
+            FROM sales_order
+            WHERE order_status IS NULL OR order_status <> 'cancelled'
+            GROUP BY showroom_product_id
+        ) sold ON sold.showroom_product_id = sp.id
+        SET sp.remaining_quantity = GREATEST(sp.total_quantity - COALESCE(sold.quantity, 0), 0);
+        """
+        mark_sold_out = """
+        UPDATE showroom_product
+        SET showroom_status = 'sold', sold_date = COALESCE(sold_date, NOW())
+        WHERE showroom_status = 'available' AND remaining_quantity = 0;
+        """
+        
+        try:
+            if not self.table_exists(connection, 'showroom_product'):
+                print("ℹ️ showroom_product table doesn't exist yet, skipping showroom stock migration")
+                return True
+            
+            if not self.column_exists(connection, 'showroom_product', 'remaining_quantity'):
+                if not self.column_exists(connection, 'showroom_product', 'total_quantity'):
+                    connection.execute(text("ALTER TABLE showroom_product ADD COLUMN total_quantity INT NOT NULL DEFAULT 1"))
+                connection.execute(text("ALTER TABLE showroom_product ADD COLUMN remaining_quantity INT NOT NULL DEFAULT 1"))
+                if self.table_exists(connection, 'assembly_order'):
+                    connection.execute(text(backfill_total))
+                if self.table_exists(connection, 'sales_order'):
+                    connection.execute(text(backfill_remaining))
+                connection.execute(text(mark_sold_out))
+                connection.commit()
+                print("✅ Showroom stock quantities backfilled")
+            
+            if not self.index_exists(connection, 'showroom_product', 'ix_showroom_product_status_created'):
+                connection.execute(text(
+                    "CREATE INDEX ix_showroom_product_status_created ON showroom_product (showroom_status, created_at)"
+                ))
+                connection.commit()
+            
+            return True
+        except Exception as e:
+            print(f"⚠️ Showroom stock migration error: {e}")
+            return False
+    
     def run_dispatch_migration(self, connection):
         """Update dispatch tables"""
         print("🔄 Running dispatch migration...")
@@ -515,6 +938,163 @@ class MigrationManager:
             print(f"⚠️ Guest list migration error: {e}")
             return False
     
+    def run_order_tracking_migration(self, connection):
+        """Add indexed updated_at change stamps used by the order status tracking feed"""
+        print("🔄 Running order tracking migration...")
+        
+        # Tables whose updated_at column is added here (backfilled from created_at)
+        stamped_tables = ['production_order', 'purchase_order', 'assembly_order', 'showroom_product']
+        # Tables that already carry updated_at and only need the index
+        indexed_tables = ['sales_order', 'dispatch_request']
+        
+        try:
+            for table in stamped_tables:
+                if not self.table_exists(connection, table):
+                    continue
+                if not self.column_exists(connection, table, 'updated_at'):
+                    connection.execute(text(
+                        f"ALTER TABLE {table} ADD COLUMN updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP"
+                    ))
+                    connection.execute(text(f"UPDATE {table} SET updated_at = created_at WHERE created_at IS NOT NULL"))
+                    connection.commit()
+            
+            for table in stamped_tables + indexed_tables:
+                if not self.table_exists(connection, table) or not self.column_exists(connection, table, 'updated_at'):
+                    continue
+                index_name = f"ix_{table}_updated_at"
+                if not self.index_exists(connection, table, index_name):
+                    connection.execute(text(f"CREATE INDEX {index_name} ON {table} (updated_at)"))
+                    connection.commit()
+            
+            print("✅ Order tracking columns updated successfully!")
+            return True
+        except Exception as e:
+            print(f"⚠️ Order tracking migration error: {e}")
+            return False
+    
+    def run_face_encoding_migration(self, connection):
+        """Add the face encoding version used by the cached face recognizer"""
+        print("🔄 Running face encoding migration...")
+        
+        try:
+            if self.table_exists(connection, 'gate_users'):
+                if not self.column_exists(connection, 'gate_users', 'face_encoding_version'):
+                    connection.execute(text("ALTER TABLE gate_users ADD COLUMN face_encoding_version INT NOT NULL DEFAULT 0"))
+                    connection.commit()
+                print("✅ Gate users table updated successfully!")
+            else:
+                print("ℹ️ gate_users table doesn't exist yet, skipping face encoding migration")
+            
+            return True
+        except Exception as e:
+            print(f"⚠️ Face encoding migration error: {e}")
+            return False
+    
+    def run_notification_counter_migration(self, connection):
+        """Re-base the '*' unread counter, which now counts only notifications without a department"""
+        print("🔄 Running notification counter migration...")
+        
+        try:
+            if self.table_exists(connection, 'notification_counter') and self.table_exists(connection, 'notification'):
+                # Exact count, so re-running it on every start is harmless
+                connection.execute(text(
+                    """
+                    UPDATE notification_counter
+                    SET unread = (
+                        SELECT COUNT(*) FROM notification n
+                        WHERE n.department IS NULL AND n.is_read = 0 AND n.id > notification_counter.read_through_id
+                    )
+                    WHERE `key` = '*'
+                    """
+                ))
+                connection.commit()
+                print("✅ Notification counters updated successfully!")
+            else:
+                print("ℹ️ notification tables don't exist yet, skipping notification counter migration")
+            
+            return True
+        except Exception as e:
+            print(f"⚠️ Notification counter migration error: {e}")
+            return False
+    
+    def column_type(self, connection, table_name: str, column_name: str):
+        """Get the data type of a column, or None if it doesn't exist"""
+        query = text(
+            """
+            SELECT DATA_TYPE
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND TABLE_NAME = :table
+              AND COLUMN_NAME = :col
+            """
+        )
+        res = connection.execute(query, {"table": table_name, "col": column_name}).scalar()
+        return res.lower() if res else None
+    
+    def run_face_encoding_binary_migration(self, connection):
+        """Convert gate_users.face_encoding from JSON text to the binary face encoding format"""
+        print("🔄 Running face encoding binary migration...")
+        
+        try:
+            if not self.table_exists(connection, 'gate_users'):
+                print("ℹ️ gate_users table doesn't exist yet, skipping face encoding binary migration")
+                return True
+            
+            if self.column_type(connection, 'gate_users', 'face_encoding') in ('blob', 'mediumblob', 'longblob'):
+                print("ℹ️ face_encoding is already binary")
+                return True
+            
+            from utils.face_recognition_utils import to_binary_face_encoding
+            
+            if not self.column_exists(connection, 'gate_users', 'face_encoding_bin'):
+                connection.execute(text("ALTER TABLE gate_users ADD COLUMN face_encoding_bin MEDIUMBLOB NULL"))
+                connection.commit()
+            
+            converted = 0
+            unconverted = []
+            last_id = 0
+            while True:
+                rows = connection.execute(text(
+                    """
+                    SELECT id, face_encoding FROM gate_users
+                    WHERE id > :last_id AND face_encoding IS NOT NULL
+                    ORDER BY id LIMIT 200
+                    """
+                ), {"last_id": last_id}).fetchall()
+                if not rows:
+                    break
+                for user_id, encoding in rows:
+                    blob = to_binary_face_encoding(encoding, user_id)
+                    if blob is None:
+                        unconverted.append(user_id)
+                        continue
+                    connection.execute(
+                        text("UPDATE gate_users SET face_encoding_bin = :blob WHERE id = :id"),
+                        {"blob": blob, "id": user_id}
+                    )
+                    converted += 1
+                last_id = rows[-1][0]
+                connection.commit()
+            
+            # Keep the JSON encodings as face_encoding_legacy (unused by the app) so users that
+            # didn't convert can be recovered; a later migration drops it
+            connection.execute(text(
+                """
+                ALTER TABLE gate_users
+                    CHANGE COLUMN face_encoding face_encoding_legacy TEXT NULL,
+                    CHANGE COLUMN face_encoding_bin face_encoding MEDIUMBLOB NULL
+                """
+            ))
+            connection.commit()
+            
+            print(f"✅ Face encodings converted to binary ({converted} converted, {len(unconverted)} without a valid face)")
+            if unconverted:
+                print(f"⚠️ Gate users whose encodings didn't convert (kept in face_encoding_legacy): {unconverted[:50]}")
+            return True
+        except Exception as e:
+            print(f"⚠️ Face encoding binary migration error: {e}")
+            return False
+    
     def run_all_migrations(self):
         """Run all migrations in the correct order"""
         print("\n" + "=" * 60)
@@ -530,9 +1110,20 @@ class MigrationManager:
                 # Run migrations in order (respecting dependencies)
                 self.run_sales_migration(connection)
                 self.run_hr_migration(connection)
+                self.run_hr_dashboard_migration(connection)
+                self.run_attendance_rollup_migration(connection)
+                self.run_payroll_run_migration(connection)
+                self.run_inventory_name_migration(connection)
+                self.run_purchase_order_material_migration(connection)
+                self.run_finance_ledger_migration(connection)
+                self.run_showroom_stock_migration(connection)
                 self.run_dispatch_migration(connection)
                 self.run_fleet_migration(connection)
                 self.run_guest_list_migration(connection)
+                self.run_order_tracking_migration(connection)
+                self.run_face_encoding_migration(connection)
+                self.run_face_encoding_binary_migration(connection)
+                self.run_notification_counter_migration(connection)
                 
                 print("\n" + "=" * 60)
                 print("✅ All migrations completed successfully!")
@@ -0,0 +1,82 @@
+"""
+Pytest plugin enforcing per-request SQL query budgets
+
+Enable it with ``pytest_plugins = ['utils.pytest_query_budget']`` in a
+conftest, then mark tests with ``@pytest.mark.query_budget(limit)`` to cap
+every request the test makes, or with
+``@pytest.mark.query_budget(limit, route='GET /api/sales/orders')`` to cap one
+route. The ``query_budget`` ini option sets a default cap for unmarked tests.
+A test fails when a request runs more statements than its budget; the
+failure lists the statements repeated within that request (N+1 suspects).
+"""
+import pytest
+from utils.query_instrumentation import subscribe
+
+# Repeated statements listed per over-budget request
+REPORTED_REPEATS = 3
+
+_violations_key = pytest.StashKey[list]()
+
+
+def pytest_addoption(parser):
+    parser.addini('query_budget', 'Default SQL statement budget per request (empty for none)', default='')
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(limit, route=None): fail when a request (or only requests to route, '
+        'e.g. "GET /api/sales/orders") runs more than limit SQL statements'
+    )
+
+
+def _budgets(item):
+    """(limit, route) pairs that apply to a test"""
+    budgets = [
+        (int(marker.args[0] if marker.args else marker.kwargs['limit']), marker.kwargs.get('route'))
+        for marker in item.iter_markers('query_budget')
+    ]
+    default = item.config.getini('query_budget')
+    if not budgets and default:
+        budgets.append((int(default), None))
+    return budgets
+
+
+def _describe(route, stats, limit):
+    lines = [f'{route} ran {stats.count} SQL statements (budget {limit}, {stats.duration_ms} ms)']
+    for statement, count in stats.fingerprints.most_common(REPORTED_REPEATS):
+        if count > 1:
+            lines.append(f'    {count}x {statement}')
+    return '\n'.join(lines)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    budgets = _budgets(item)
+    if not budgets:
+        yield
+        return
+
+    violations = item.stash.setdefault(_violations_key, [])
+
+    def check(route, stats):
+        for limit, budget_route in budgets:
+            if (budget_route is None or budget_route == route) and stats.count > limit:
+                violations.append(_describe(route, stats, limit))
+                break
+
+    unsubscribe = subscribe(check)
+    try:
+        yield
+    finally:
+        unsubscribe()
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    violations = item.stash.get(_violations_key, None)
+    if call.when == 'call' and report.passed and violations:
+        report.outcome = 'failed'
+        report.longrepr = 'Query budget exceeded:\n' + '\n'.join(violations)
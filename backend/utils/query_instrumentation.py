@@ -0,0 +1,199 @@
+"""
+SQL query instrumentation
+Per-request statement counts, database time and repeated-statement (N+1) detection
+"""
+import re
+import threading
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+# Statements repeated at least this many times in one request are N+1 suspects
+DEFAULT_REPEAT_THRESHOLD = 5
+# Distinct suspect fingerprints kept per route in the aggregated report
+MAX_SUSPECTS_PER_ROUTE = 10
+FINGERPRINT_MAX_LENGTH = 500
+
+_WHITESPACE = re.compile(r'\s+')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)")
+
+# Callbacks run with (route, stats) after every instrumented request
+_listeners = []
+
+
+def fingerprint(statement):
+    """Normalize a SQL statement so repeats with different parameters compare equal"""
+    text = _WHITESPACE.sub(' ', statement).strip()
+    text = _LITERAL.sub('?', text)
+    text = _PLACEHOLDER_LIST.sub('(?)', text)
+    return text[:FINGERPRINT_MAX_LENGTH]
+
+
+def subscribe(callback):
+    """
+    Call ``callback(route, stats)`` after every instrumented request
+
+    Returns:
+        callable: Removes the callback again
+    """
+    _listeners.append(callback)
+    return lambda: _listeners.remove(callback) if callback in _listeners else None
+
+
+def route_key():
+    """Route a request is reported under, e.g. 'GET /api/sales/orders'"""
+    rule = request.url_rule.rule if request.url_rule else '<unmatched>'
+    return f'{request.method} {rule}'
+
+
+class RequestQueryStats:
+    """Statements executed while handling one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    @property
+    def duration_ms(self):
+        return round(self.duration * 1000, 2)
+
+    def repeated(self, threshold=DEFAULT_REPEAT_THRESHOLD):
+        """(fingerprint, count) pairs executed at least ``threshold`` times, most repeated first"""
+        return [(statement, count) for statement, count in self.fingerprints.most_common() if count >= threshold]
+
+
+class RouteQueryReport:
+    """Per-route totals of request query stats, kept in memory for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def add(self, route, stats, repeat_threshold):
+        with self._lock:
+            entry = self._routes.setdefault(route, {
+                'requests': 0, 'queries': 0, 'max_queries': 0,
+                'db_time': 0.0, 'max_db_time': 0.0, 'suspects': {}
+            })
+            entry['requests'] += 1
+            entry['queries'] += stats.count
+            entry['max_queries'] = max(entry['max_queries'], stats.count)
+            entry['db_time'] += stats.duration
+            entry['max_db_time'] = max(entry['max_db_time'], stats.duration)
+
+            suspects = entry['suspects']
+            for statement, count in stats.repeated(repeat_threshold):
+                suspect = suspects.setdefault(statement, {'maxRepeats': 0, 'requests': 0})
+                suspect['maxRepeats'] = max(suspect['maxRepeats'], count)
+                suspect['requests'] += 1
+            if len(suspects) > MAX_SUSPECTS_PER_ROUTE:
+                keep = sorted(suspects.items(), key=lambda item: item[1]['maxRepeats'], reverse=True)
+                entry['suspects'] = dict(keep[:MAX_SUSPECTS_PER_ROUTE])
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+    def to_list(self):
+        """Routes ordered by total database time, slowest first"""
+        with self._lock:
+            routes = [
+                {
+                    'route': route,
+                    'requests': entry['requests'],
+                    'queries': {
+                        'total': entry['queries'],
+                        'avg': round(entry['queries'] / entry['requests'], 2),
+                        'max': entry['max_queries']
+                    },
+                    'dbTimeMs': {
+                        'total': round(entry['db_time'] * 1000, 2),
+                        'avg': round(entry['db_time'] * 1000 / entry['requests'], 2),
+                        'max': round(entry['max_db_time'] * 1000, 2)
+                    },
+                    'nPlusOneSuspects': [
+                        {'fingerprint': statement, **suspect}
+                        for statement, suspect in sorted(
+                            entry['suspects'].items(), key=lambda item: item[1]['maxRepeats'], reverse=True
+                        )
+                    ]
+                }
+                for route, entry in self._routes.items()
+            ]
+        return sorted(routes, key=lambda route: route['dbTimeMs']['total'], reverse=True)
+
+
+class QueryInstrumentation:
+    """
+    Flask extension recording the SQL each request runs
+
+    Engine cursor events count statements and time them into ``g``; request
+    hooks add X-DB-* response headers in debug mode and fold each request into
+    the app's RouteQueryReport (``app.extensions['query_report']``) served by
+    the admin API. Statements run outside a request (background threads, CLI
+    scripts) are not recorded. Each worker process keeps its own report.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('QUERY_INSTRUMENTATION', True)
+        app.config.setdefault('QUERY_REPEAT_THRESHOLD', DEFAULT_REPEAT_THRESHOLD)
+        app.extensions['query_report'] = RouteQueryReport()
+        if not app.config['QUERY_INSTRUMENTATION']:
+            return
+
+        from models import db
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        app.before_request(self._start_request)
+        app.after_request(self._add_headers)
+        app.teardown_request(self._finish_request)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and has_request_context() and 'query_stats' in g:
+            context._query_started = time.perf_counter()
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, '_query_started', None)
+        if started is None or not has_request_context() or 'query_stats' not in g:
+            return
+        stats = g.query_stats
+        stats.count += 1
+        stats.duration += time.perf_counter() - started
+        stats.fingerprints[fingerprint(statement)] += 1
+
+    @staticmethod
+    def _start_request():
+        g.query_stats = RequestQueryStats()
+
+    @staticmethod
+    def _add_headers(response):
+        stats = g.get('query_stats')
+        if stats is not None and current_app.debug:
+            threshold = current_app.config['QUERY_REPEAT_THRESHOLD']
+            response.headers['X-DB-Query-Count'] = str(stats.count)
+            response.headers['X-DB-Time-Ms'] = str(stats.duration_ms)
+            response.headers['X-DB-Repeated-Queries'] = str(len(stats.repeated(threshold)))
+        return response
+
+    @staticmethod
+    def _finish_request(exc=None):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return
+        route = route_key()
+        current_app.extensions['query_report'].add(route, stats, current_app.config['QUERY_REPEAT_THRESHOLD'])
+        for callback in list(_listeners):
+            callback(route, stats)
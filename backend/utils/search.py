@@ -0,0 +1,58 @@
+"""
+SQL search helpers
+Escaped LIKE patterns, relevance ranking and pagination for search endpoints
+"""
+from sqlalchemy import case, func, or_
+
+DEFAULT_SEARCH_PAGE_SIZE = 50
+MAX_SEARCH_PAGE_SIZE = 200
+
+
+def escape_like(term: str) -> str:
+    """Escape LIKE wildcards so the term matches literally (use with escape='\\')"""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def like_pattern(term: str) -> str:
+    """Escaped substring pattern for a search term"""
+    return f"%{escape_like(term)}%"
+
+
+def search_filter(term: str, columns: list):
+    """Rows where any column contains the term (case-insensitive)"""
+    pattern = like_pattern(term)
+    return or_(*[column.ilike(pattern, escape='\\') for column in columns])
+
+
+def search_rank(term: str, key_columns: list, text_columns: list):
+    """
+    Relevance score for a search term
+
+    Key columns (order or vehicle numbers) score 4 for an exact match, 3 for a
+    prefix match and 2 for a substring match; text columns (names) score 1 for a
+    substring match. Rows matching nothing score 0.
+    """
+    lowered = term.lower()
+    prefix = f"{escape_like(term)}%"
+    pattern = like_pattern(term)
+    whens = [(func.lower(column) == lowered, 4) for column in key_columns]
+    whens += [(column.ilike(prefix, escape='\\'), 3) for column in key_columns]
+    whens += [(column.ilike(pattern, escape='\\'), 2) for column in key_columns]
+    whens += [(column.ilike(pattern, escape='\\'), 1) for column in text_columns]
+    return case(*whens, else_=0)
+
+
+def paginate(query, page: int = 1, per_page: int = None):
+    """
+    Return (rows, total, page, per_page) for a 1-based page of an ordered query
+
+    Raises:
+        ValueError: If page or per_page is not positive
+    """
+    per_page = DEFAULT_SEARCH_PAGE_SIZE if per_page is None else per_page
+    if page < 1 or per_page < 1:
+        raise ValueError('page and per_page must be positive integers')
+    per_page = min(per_page, MAX_SEARCH_PAGE_SIZE)
+    total = query.order_by(None).count()
+    rows = query.offset((page - 1) * per_page).limit(per_page).all()
+    return rows, total, page, per_page
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Card, CardContent } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
 import { Button } from '@/components/ui/button';
@@ -56,7 +56,12 @@ const OrderStatusBar = ({ className = "" }) => {
   const [searchTerm, setSearchTerm] = useState('');
   const [refreshing, setRefreshing] = useState(false);
 
+  // serverTime of the last response; later polls only fetch orders changed since then
+  const syncTokenRef = useRef(null);
+
   useEffect(() => {
+    syncTokenRef.current = null;
+
     if (!searchTerm.trim()) {
       setProductionOrders([]);
       setSalesOrders([]);
@@ -66,11 +71,21 @@ const OrderStatusBar = ({ className = "" }) => {
 
     fetchOrderStatus();
 
-    const interval = setInterval(fetchOrderStatus, 30000);
+    const interval = setInterval(() => fetchOrderStatus({ incremental: true }), 30000);
     return () => clearInterval(interval);
   }, [searchTerm]);
 
-  const fetchOrderStatus = async () => {
+  // Apply a feed response: replace changed orders by id and drop removed ones
+  const mergeOrders = (current, changed, removedIds) => {
+    const removed = new Set(removedIds);
+    const changedById = new Map(changed.map(order => [order.id, order]));
+    const merged = current
+      .filter(order => !removed.has(order.id) && !changedById.has(order.id))
+      .concat(changed);
+    return merged.sort((a, b) => (b.createdAt || '').localeCompare(a.createdAt || ''));
+  };
+
+  const fetchOrderStatus = async ({ incremental = false } = {}) => {
     if (!searchTerm.trim()) {
       setProductionOrders([]);
       setSalesOrders([]);
@@ -80,13 +95,25 @@ const OrderStatusBar = ({ className = "" }) => {
 
     try {
       setRefreshing(true);
-      const q = encodeURIComponent(searchTerm || '');
-      const url = `${API_BASE}/orders/status-tracking${q ? `?q=${q}` : ''}`;
+      const params = new URLSearchParams();
+      if (searchTerm) params.set('q', searchTerm);
+      const since = incremental ? syncTokenRef.current : null;
+      if (since) params.set('updated_since', since);
+      const url = `${API_BASE}/orders/status-tracking?${params.toString()}`;
       const response = await fetch(url);
       if (response.ok) {
         const data = await response.json();
-        setProductionOrders(Array.isArray(data?.productionOrders) ? data.productionOrders : []);
-        setSalesOrders(Array.isArray(data?.salesOrders) ? data.salesOrders : []);
+        const production = Array.isArray(data?.productionOrders) ? data.productionOrders : [];
+        const sales = Array.isArray(data?.salesOrders) ? data.salesOrders : [];
+        if (since) {
+          const removedIds = Array.isArray(data?.removedIds) ? data.removedIds : [];
+          setProductionOrders(prev => mergeOrders(prev, production, removedIds));
+          setSalesOrders(prev => mergeOrders(prev, sales, removedIds));
+        } else {
+          setProductionOrders(production);
+          setSalesOrders(sales);
+        }
+        syncTokenRef.current = data?.serverTime || null;
       } else {
         console.error('Failed to fetch order status');
       }
@@ -10,6 +10,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from PIL import Image, ImageTk
 import queue
+import collections
+import sqlite3
 
 # Sound imports with fallback
 try:
@@ -118,263 +120,445 @@ def play_sound(sound_type: str):
     threading.Thread(target=play_async, daemon=True).start()
 
 # ---------------------------
-# Excel Setup Functions
+# Gate Event Store
 # ---------------------------
-def setup_excel_file():
-    """Initialize Excel file with both sheets"""
-    if not os.path.exists(EXCEL_FILE):
-        wb = Workbook()
-        
-        # Gate entries sheet (rename default sheet)
-        ws_gate = wb.active
-        ws_gate.title = GATE_SHEET
-        ws_gate.append(["Name", "Phone_Number", "Entry_Time", "Exit_Time", "Status", "WhatsApp"])
-        
-        # Going out sheet
+EVENTS_DB_FILE = "gatepass_events.db"
+EXPORT_INTERVAL_SECONDS = 60    # Minimum gap between background Excel exports
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+GATE_HEADERS = ["Name", "Phone_Number", "Entry_Time", "Exit_Time", "Status", "WhatsApp"]
+GOING_OUT_HEADERS = ["Name", "Phone_Number", "Going_Out_Time", "Coming_Back_Time", "Reason_Type", "Reason_Details", "Status", "Duration_Minutes"]
+
+def _format_time(value):
+    """Normalise a timestamp cell (datetime or string) to TIME_FORMAT text"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.strftime(TIME_FORMAT)
+    return str(value)
+
+def _parse_time(value):
+    try:
+        return datetime.strptime(str(value), TIME_FORMAT)
+    except (ValueError, TypeError):
+        return None
+
+def _date_of(value):
+    """YYYY-MM-DD part of a stored timestamp, or None if it isn't one"""
+    parsed = _parse_time(value)
+    return parsed.strftime("%Y-%m-%d") if parsed else None
+
+def _whatsapp_formula(row_num: int, has_entry: bool) -> str:
+    """HYPERLINK formula for the WhatsApp column of gate sheet row `row_num`"""
+    if not has_entry:
+        return '=HYPERLINK("https://web.whatsapp.com/send?phone=" & B' + str(row_num) + ' & "&text=" & ENCODEURL("Hi " & A' + str(row_num) + ' & ", your Exit time is " & TEXT(D' + str(row_num) + ',"yyyy-mm-dd hh:mm:ss") & " (Status: " & E' + str(row_num) + ')"), "Send WhatsApp")'
+    return f'=HYPERLINK("https://web.whatsapp.com/send?phone=" & B{row_num} & "&text=" & ENCODEURL("Hi " & A{row_num} & ", your Entry time is " & TEXT(C{row_num},"yyyy-mm-dd hh:mm:ss") & IF(D{row_num}<>"", " and Exit time is " & TEXT(D{row_num},"yyyy-mm-dd hh:mm:ss"), "") & " (Status: " & E{row_num} & ")"), "Send WhatsApp")'
+
+
+class GateEventStore:
+    """
+    SQLite (WAL) store for gate and going-out events with an in-memory status index
+
+    The index keeps, per name, the latest gate row, today's gate rows and any open
+    going-out rows, so status checks never touch the database or the workbook.
+    The Excel workbook is produced by export_excel() on a background thread.
+    """
+
+    def __init__(self, db_path: str = EVENTS_DB_FILE, excel_path: str = EXCEL_FILE):
+        self.db_path = db_path
+        self.excel_path = excel_path
+        self.lock = threading.RLock()
+        self.export_lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        self._import_workbook()
+
+        self.last_gate = {}        # name -> most recent gate row
+        self.today = None
+        self.today_gate = {}       # name -> today's gate rows, oldest first
+        self.open_going_out = {}   # name -> going-out rows without a coming back time, oldest first
+        self._build_index()
+
+        self.export_requested = threading.Event()
+        self.closed = False
+        self.last_export = 0.0
+        self.export_thread = threading.Thread(target=self._export_loop, daemon=True)
+        self.export_thread.start()
+        if not os.path.exists(self.excel_path):
+            self.request_export()
+
+    def _create_schema(self):
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS gate_entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    phone TEXT,
+                    entry_time TEXT,
+                    exit_time TEXT,
+                    status TEXT,
+                    entry_date TEXT,
+                    override INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS ix_gate_entries_name_id ON gate_entries (name, id);
+                CREATE INDEX IF NOT EXISTS ix_gate_entries_entry_date ON gate_entries (entry_date);
+                CREATE TABLE IF NOT EXISTS going_out_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    phone TEXT,
+                    going_out_time TEXT,
+                    coming_back_time TEXT,
+                    reason_type TEXT,
+                    reason_details TEXT,
+                    status TEXT,
+                    duration_minutes REAL,
+                    out_date TEXT
+                );
+                CREATE INDEX IF NOT EXISTS ix_going_out_logs_open ON going_out_logs (coming_back_time, name);
+                CREATE INDEX IF NOT EXISTS ix_going_out_logs_out_date ON going_out_logs (out_date);
+                CREATE TABLE IF NOT EXISTS store_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+
+    def _import_workbook(self):
+        """One-time import of an existing gatepass_logs.xlsx into an empty store"""
+        imported = self.conn.execute("SELECT value FROM store_meta WHERE key = 'excel_imported'").fetchone()
+        if imported:
+            return
+        if os.path.exists(self.excel_path):
+            wb = load_workbook(self.excel_path, read_only=True)
+            try:
+                ws = wb[GATE_SHEET] if GATE_SHEET in wb.sheetnames else wb.active
+                gate_rows = []
+                for row in ws.iter_rows(min_row=2, values_only=True):
+                    row = tuple(row) + (None,) * (5 - len(row))
+                    if not row[0]:
+                        continue
+                    entry_time = _format_time(row[2])
+                    gate_rows.append((row[0], row[1], entry_time, _format_time(row[3]), row[4], _date_of(entry_time)))
+
+                going_out_rows = []
+                if GOING_OUT_SHEET in wb.sheetnames:
+                    for row in wb[GOING_OUT_SHEET].iter_rows(min_row=2, values_only=True):
+                        row = tuple(row) + (None,) * (8 - len(row))
+                        if not row[0]:
+                            continue
+                        going_out_time = _format_time(row[2])
+                        going_out_rows.append((row[0], row[1], going_out_time, _format_time(row[3]), row[4],
+                                               row[5], row[6], row[7], _date_of(going_out_time)))
+            finally:
+                wb.close()
+
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO gate_entries (name, phone, entry_time, exit_time, status, entry_date) VALUES (?, ?, ?, ?, ?, ?)",
+                    gate_rows
+                )
+                self.conn.executemany(
+                    "INSERT INTO going_out_logs (name, phone, going_out_time, coming_back_time, reason_type, "
+                    "reason_details, status, duration_minutes, out_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    going_out_rows
+                )
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO store_meta (key, value) VALUES ('excel_imported', ?)",
+                              (datetime.now().strftime(TIME_FORMAT),))
+
+    def _build_index(self):
+        """Load the latest row per name, today's rows and open going-out rows"""
+        self.last_gate = {
+            row['name']: dict(row) for row in self.conn.execute(
+                "SELECT g.* FROM gate_entries g "
+                "JOIN (SELECT MAX(id) AS id FROM gate_entries GROUP BY name) latest ON latest.id = g.id"
+            )
+        }
+        self.open_going_out = {}
+        for row in self.conn.execute("SELECT * FROM going_out_logs WHERE coming_back_time IS NULL ORDER BY id"):
+            self.open_going_out.setdefault(row['name'], []).append(dict(row))
+        self._roll_day(date.today().strftime("%Y-%m-%d"))
+
+    def _roll_day(self, today: str):
+        """Reload today's gate rows when the date changes"""
+        if today == self.today:
+            return
+        self.today = today
+        self.today_gate = {}
+        for row in self.conn.execute("SELECT * FROM gate_entries WHERE entry_date = ? ORDER BY id", (today,)):
+            name = row['name']
+            # Share row dicts with last_gate so updates are seen by both
+            row = self.last_gate.get(name) if self.last_gate.get(name, {}).get('id') == row['id'] else dict(row)
+            self.today_gate.setdefault(name, []).append(row)
+
+    def _today_rows(self, name: str) -> list:
+        self._roll_day(date.today().strftime("%Y-%m-%d"))
+        return self.today_gate.get(name, [])
+
+    def user_status(self, name: str) -> tuple:
+        """Return (status, has_exited_today, last_action_time) for the gate"""
+        with self.lock:
+            today_rows = self._today_rows(name)
+            last_row = self.last_gate.get(name)
+
+        last_action_time = None
+        if today_rows:
+            latest = today_rows[-1]
+            entry_time = _parse_time(latest['entry_time'])
+            exit_time = _parse_time(latest['exit_time'])
+            last_action_time = max(entry_time, exit_time) if exit_time else entry_time
+
+        has_exited_today = any(row['exit_time'] is not None for row in today_rows)
+        currently_inside = any(row['exit_time'] is None for row in today_rows)
+
+        if currently_inside:
+            return "INSIDE", has_exited_today, last_action_time
+        elif has_exited_today:
+            return "EXITED_TODAY", has_exited_today, last_action_time
+        elif last_row and last_row['exit_time'] is None:
+            return "INSIDE", has_exited_today, last_action_time
+        else:
+            return "OUTSIDE", has_exited_today, last_action_time
+
+    def going_out_status(self, name: str) -> tuple:
+        """Return ("OUT", reason_type, going_out_time) or ("IN_OFFICE", None, None)"""
+        today = date.today().strftime("%Y-%m-%d")
+        with self.lock:
+            for row in self.open_going_out.get(name, []):
+                if row['out_date'] == today:
+                    return "OUT", row['reason_type'] or "Unknown", _parse_time(row['going_out_time'])
+        return "IN_OFFICE", None, None
+
+    def _insert_gate_row(self, name, phone, entry_time, exit_time, status, override):
+        cursor = self.conn.execute(
+            "INSERT INTO gate_entries (name, phone, entry_time, exit_time, status, entry_date, override) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (name, phone, entry_time, exit_time, status, _date_of(entry_time), int(override))
+        )
+        row = {'id': cursor.lastrowid, 'name': name, 'phone': phone, 'entry_time': entry_time,
+               'exit_time': exit_time, 'status': status, 'entry_date': _date_of(entry_time),
+               'override': int(override)}
+        self.last_gate[name] = row
+        if row['entry_date'] == self.today:
+            self.today_gate.setdefault(name, []).append(row)
+
+    def _update_gate_row(self, row, **values):
+        values['override'] = int(values.get('override', row['override']))
+        if 'entry_time' in values:
+            values['entry_date'] = _date_of(values['entry_time'])
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        self.conn.execute(f"UPDATE gate_entries SET {assignments} WHERE id = ?", (*values.values(), row['id']))
+        row.update(values)
+        if self.last_gate.get(row['name'], {}).get('id') == row['id']:
+            self.last_gate[row['name']] = row
+
+    def record_gate_event(self, name: str, phone: str, override_cooling: bool, now: datetime,
+                          cooling_seconds: int) -> str:
+        """Apply a gate recognition for `name` and return the resulting status code"""
+        now_str = now.strftime(TIME_FORMAT)
+        with self.lock:
+            user_status, _, last_action_time = self.user_status(name)
+
+            if not override_cooling and last_action_time:
+                time_since_last_action = (now - last_action_time).total_seconds()
+                if time_since_last_action < cooling_seconds:
+                    remaining_time = int(cooling_seconds - time_since_last_action)
+                    return f"COOLING_{remaining_time // 60}m{remaining_time % 60}s"
+
+            if user_status == "EXITED_TODAY":
+                return "BLOCKED"
+
+            # First entry of the day for this person, if any
+            today_rows = self._today_rows(name)
+            existing_row = today_rows[0] if today_rows else None
+
+            with self.conn:
+                if user_status == "OUTSIDE":
+                    if existing_row and not existing_row['exit_time']:
+                        self._update_gate_row(existing_row, entry_time=now_str, status="Inside", override=override_cooling)
+                    else:
+                        self._insert_gate_row(name, phone, now_str, None, "Inside", override_cooling)
+                    status = "ENTRY_OVERRIDE" if override_cooling else "ENTRY"
+                else:
+                    if existing_row:
+                        self._update_gate_row(existing_row, exit_time=now_str, status="Exited",
+                                              override=existing_row['override'] or override_cooling)
+                    else:
+                        # No entry today (inside since an earlier day); record the exit only
+                        self._insert_gate_row(name, phone, None, now_str, "Exited", override_cooling)
+                    status = "EXIT_OVERRIDE" if override_cooling else "EXIT"
+
+        self.request_export()
+        return status
+
+    def record_going_out_event(self, name: str, phone: str, reason_type: str, reason_details: str,
+                               now: datetime) -> str:
+        """Open or close a going-out entry for `name` and return the resulting status code"""
+        now_str = now.strftime(TIME_FORMAT)
+        with self.lock:
+            going_out_status, _, _ = self.going_out_status(name)
+            open_rows = self.open_going_out.get(name, [])
+
+            with self.conn:
+                if going_out_status == "IN_OFFICE":
+                    cursor = self.conn.execute(
+                        "INSERT INTO going_out_logs (name, phone, going_out_time, coming_back_time, reason_type, "
+                        "reason_details, status, duration_minutes, out_date) VALUES (?, ?, ?, NULL, ?, ?, 'Out', NULL, ?)",
+                        (name, phone, now_str, reason_type, reason_details, now.strftime("%Y-%m-%d"))
+                    )
+                    self.open_going_out.setdefault(name, []).append({
+                        'id': cursor.lastrowid, 'name': name, 'phone': phone, 'going_out_time': now_str,
+                        'coming_back_time': None, 'reason_type': reason_type, 'reason_details': reason_details,
+                        'status': 'Out', 'duration_minutes': None, 'out_date': now.strftime("%Y-%m-%d")
+                    })
+                    status = "GOING_OUT"
+                elif open_rows:
+                    # Close the most recent open entry
+                    found_open = open_rows.pop()
+                    duration = None
+                    if found_open['going_out_time']:
+                        going_out_dt = _parse_time(found_open['going_out_time'])
+                        duration = round((now - going_out_dt).total_seconds() / 60, 1) if going_out_dt else 0
+                    self.conn.execute(
+                        "UPDATE going_out_logs SET coming_back_time = ?, status = 'Returned', duration_minutes = ? WHERE id = ?",
+                        (now_str, duration, found_open['id'])
+                    )
+                    status = "COMING_BACK"
+                else:
+                    # Shouldn't happen, but handle it
+                    self.conn.execute(
+                        "INSERT INTO going_out_logs (name, phone, going_out_time, coming_back_time, reason_type, "
+                        "reason_details, status, duration_minutes, out_date) VALUES (?, ?, NULL, ?, ?, ?, 'Returned', NULL, NULL)",
+                        (name, phone, now_str, reason_type, reason_details)
+                    )
+                    status = "COMING_BACK"
+
+        self.request_export()
+        return status
+
+    def gate_rows(self, day: str = None) -> list:
+        """Gate rows in log order, optionally only those entered on `day` (YYYY-MM-DD)"""
+        with self.lock:
+            if day:
+                return self.conn.execute("SELECT * FROM gate_entries WHERE entry_date = ? ORDER BY id", (day,)).fetchall()
+            return self.conn.execute("SELECT * FROM gate_entries ORDER BY id").fetchall()
+
+    def going_out_rows(self, day: str = None) -> list:
+        """Going-out rows in log order, optionally only those that went out on `day`"""
+        with self.lock:
+            if day:
+                return self.conn.execute("SELECT * FROM going_out_logs WHERE out_date = ? ORDER BY id", (day,)).fetchall()
+            return self.conn.execute("SELECT * FROM going_out_logs ORDER BY id").fetchall()
+
+    def export_excel(self, path: str = None) -> str:
+        """Write both sheets in the gatepass_logs.xlsx layout and return the path"""
+        path = path or self.excel_path
+        with self.export_lock:
+            return self._write_workbook(path)
+
+    def _write_workbook(self, path: str) -> str:
+        gate_rows = self.gate_rows()
+        going_out_rows = self.going_out_rows()
+
+        wb = Workbook(write_only=True)
+        ws_gate = wb.create_sheet(GATE_SHEET)
+        ws_gate.append(GATE_HEADERS)
+        for row_num, row in enumerate(gate_rows, start=2):
+            ws_gate.append([row['name'], row['phone'], row['entry_time'], row['exit_time'], row['status'],
+                            _whatsapp_formula(row_num, bool(row['entry_time']))])
+
         ws_going_out = wb.create_sheet(GOING_OUT_SHEET)
-        ws_going_out.append(["Name", "Phone_Number", "Going_Out_Time", "Coming_Back_Time", "Reason_Type", "Reason_Details", "Status", "Duration_Minutes"])
-        
-        wb.save(EXCEL_FILE)
-    else:
-        # Check if going out sheet exists, create if not
-        wb = load_workbook(EXCEL_FILE)
-        if GOING_OUT_SHEET not in wb.sheetnames:
-            ws_going_out = wb.create_sheet(GOING_OUT_SHEET)
-            ws_going_out.append(["Name", "Phone_Number", "Going_Out_Time", "Coming_Back_Time", "Reason_Type", "Reason_Details", "Status", "Duration_Minutes"])
-            wb.save(EXCEL_FILE)
-        wb.close()
+        ws_going_out.append(GOING_OUT_HEADERS)
+        for row in going_out_rows:
+            ws_going_out.append([row['name'], row['phone'], row['going_out_time'], row['coming_back_time'],
+                                 row['reason_type'], row['reason_details'], row['status'], row['duration_minutes']])
+
+        # Write beside the target and swap in, so readers never see a partial workbook
+        tmp_path = path + ".tmp.xlsx"
+        wb.save(tmp_path)
+        os.replace(tmp_path, path)
+        self.last_export = time.time()
+        return path
+
+    def request_export(self):
+        """Ask the background exporter to refresh the workbook"""
+        self.export_requested.set()
+
+    def _export_loop(self):
+        while True:
+            self.export_requested.wait()
+            wait = EXPORT_INTERVAL_SECONDS - (time.time() - self.last_export)
+            if wait > 0:
+                time.sleep(wait)
+            self.export_requested.clear()
+            if self.closed:
+                return
+            try:
+                self.export_excel()
+            except Exception as e:
+                # Typically the workbook is open in Excel; retry on the next event
+                print(f"Excel export failed: {e}")
+
+    def close(self):
+        """Flush pending changes to the workbook and close the database"""
+        if self.export_requested.is_set():
+            self.export_requested.clear()
+            try:
+                self.export_excel()
+            except Exception as e:
+                print(f"Excel export failed: {e}")
+        with self.export_lock, self.lock:
+            self.closed = True
+            self.conn.close()
+
+
+_event_store = None
+_event_store_lock = threading.Lock()
+
+def get_event_store() -> GateEventStore:
+    global _event_store
+    with _event_store_lock:
+        if _event_store is None:
+            _event_store = GateEventStore()
+        return _event_store
+
+def setup_excel_file():
+    """Initialise the event store, importing the existing workbook on first run"""
+    get_event_store()
 
 # ---------------------------
-# Excel Logging Functions
+# Gate Logging Functions
 # ---------------------------
+COOLING_PERIOD_SECONDS = 120  # 2 minutes between actions; can be overridden
+
 def get_user_status_and_history(name: str) -> tuple:
     """Check user status and return (status, has_exited_today, last_action_time)"""
-    setup_excel_file()
-    
-    wb = load_workbook(EXCEL_FILE)
-    ws = wb[GATE_SHEET] if GATE_SHEET in wb.sheetnames else wb.active
-    
-    today = date.today().strftime("%Y-%m-%d")
-    
-    today_entries = []
-    last_entry = None
-    last_action_time = None
-    
-    for row in ws.iter_rows(min_row=2):
-        if row[0].value == name:
-            last_entry = row
-            
-            if row[2].value:  # Entry_Time is now column 2 (index 2)
-                try:
-                    entry_date = datetime.strptime(str(row[2].value), "%Y-%m-%d %H:%M:%S").date()
-                    if entry_date.strftime("%Y-%m-%d") == today:
-                        today_entries.append(row)
-                        # Get the most recent action time (entry or exit)
-                        entry_time = datetime.strptime(str(row[2].value), "%Y-%m-%d %H:%M:%S")
-                        if row[3].value:  # Exit_Time is now column 3 (index 3)
-                            exit_time = datetime.strptime(str(row[3].value), "%Y-%m-%d %H:%M:%S")
-                            last_action_time = max(entry_time, exit_time)
-                        else:
-                            last_action_time = entry_time
-                except (ValueError, TypeError):
-                    continue
-    
-    has_exited_today = False
-    currently_inside = False
-    
-    for entry in today_entries:
-        if entry[3].value is not None:  # Exit_Time is now column 3
-            has_exited_today = True
-        else:
-            currently_inside = True
-    
-    wb.close()
-    
-    if currently_inside:
-        return "INSIDE", has_exited_today, last_action_time
-    elif has_exited_today:
-        return "EXITED_TODAY", has_exited_today, last_action_time
-    elif last_entry and last_entry[3].value is None:  # Exit_Time is now column 3
-        return "INSIDE", has_exited_today, last_action_time
-    else:
-        return "OUTSIDE", has_exited_today, last_action_time
+    return get_event_store().user_status(name)
 
 def get_going_out_status(name: str) -> tuple:
     """Check if user is currently out for work/personal reasons"""
-    setup_excel_file()
-    
-    wb = load_workbook(EXCEL_FILE)
-    ws_going_out = wb[GOING_OUT_SHEET]
-    
-    today = date.today().strftime("%Y-%m-%d")
-    
-    # Check for open going out entries today
-    for row in ws_going_out.iter_rows(min_row=2):
-        if row[0].value == name and row[2].value:  # Going_Out_Time is now column 2
-            try:
-                going_out_date = datetime.strptime(str(row[2].value), "%Y-%m-%d %H:%M:%S").date()
-                if going_out_date.strftime("%Y-%m-%d") == today and not row[3].value:  # Coming_Back_Time is now column 3
-                    # User is currently out
-                    reason_type = row[4].value or "Unknown"  # Reason_Type is now column 4
-                    going_out_time = datetime.strptime(str(row[2].value), "%Y-%m-%d %H:%M:%S")
-                    wb.close()
-                    return "OUT", reason_type, going_out_time
-            except (ValueError, TypeError):
-                continue
-    
-    wb.close()
-    return "IN_OFFICE", None, None
+    return get_event_store().going_out_status(name)
 
 def log_event_excel(name: str, override_cooling=False):
     """Log gate entry/exit events"""
-    setup_excel_file()
-    now = datetime.now()
-    now_str = now.strftime("%Y-%m-%d %H:%M:%S")
-    
-    wb = load_workbook(EXCEL_FILE)
-    ws = wb[GATE_SHEET] if GATE_SHEET in wb.sheetnames else wb.active
-    
-    # Remove old override column handling - no longer needed
-    
-    user_status, has_exited_today, last_action_time = get_user_status_and_history(name)
-    
-    # Check cooling period (2 minutes = 120 seconds) - can be overridden
-    COOLING_PERIOD_SECONDS = 120
-    
-    if not override_cooling and last_action_time:
-        time_since_last_action = (now - last_action_time).total_seconds()
-        if time_since_last_action < COOLING_PERIOD_SECONDS:
-            remaining_time = int(COOLING_PERIOD_SECONDS - time_since_last_action)
-            minutes = remaining_time // 60
-            seconds = remaining_time % 60
-            status = f"COOLING_{minutes}m{seconds}s"
-            play_sound("blocked")
-            wb.close()
-            return status
-    
-    phone = get_user_phone(name)
-    today = now.strftime("%Y-%m-%d")
-    
-    # Find existing entry for today
-    existing_row = None
-    for row in ws.iter_rows(min_row=2, values_only=False):
-        if row[0].value == name and row[2].value:
-            # Handle both datetime objects and string formats
-            entry_date = row[2].value
-            if isinstance(entry_date, str):
-                try:
-                    entry_date = datetime.strptime(entry_date, "%Y-%m-%d %H:%M:%S")
-                except ValueError:
-                    continue
-            
-            if entry_date.strftime("%Y-%m-%d") == today:
-                existing_row = row
-                break
-    
-    if user_status == "OUTSIDE":
-        # User is entering
-        if existing_row and existing_row[3].value:
-            # Already has exit time today, create new entry
-            whatsapp_formula = '=HYPERLINK("https://web.whatsapp.com/send?phone=" & B' + str(ws.max_row + 1) + ' & "&text=" & ENCODEURL("Hi " & A' + str(ws.max_row + 1) + ' & ", your Entry time is " & TEXT(C' + str(ws.max_row + 1) + ',"yyyy-mm-dd hh:mm:ss") & IF(D' + str(ws.max_row + 1) + '<>"", " and Exit time is " & TEXT(D' + str(ws.max_row + 1) + ',"yyyy-mm-dd hh:mm:ss"), "") & " (Status: " & E' + str(ws.max_row + 1) + ')"), "Send WhatsApp")'
-            ws.append([name, phone, now_str, None, "Inside", whatsapp_formula])
-        elif existing_row:
-            # Update existing row's entry time
-            existing_row[2].value = now_str
-            existing_row[4].value = "Inside"
-            row_num = existing_row[0].row
-            whatsapp_formula = f'=HYPERLINK("https://web.whatsapp.com/send?phone=" & B{row_num} & "&text=" & ENCODEURL("Hi " & A{row_num} & ", your Entry time is " & TEXT(C{row_num},"yyyy-mm-dd hh:mm:ss") & IF(D{row_num}<>"", " and Exit time is " & TEXT(D{row_num},"yyyy-mm-dd hh:mm:ss"), "") & " (Status: " & E{row_num} & ")"), "Send WhatsApp")'
-            # Handle backward compatibility - add WhatsApp column if it doesn't exist
-            if len(existing_row) > 5:
-                existing_row[5].value = whatsapp_formula
-            else:
-                # Extend row to include WhatsApp column
-                ws.cell(row=existing_row[0].row, column=6, value=whatsapp_formula)
-        else:
-            # Create new entry
-            whatsapp_formula = '=HYPERLINK("https://web.whatsapp.com/send?phone=" & B' + str(ws.max_row + 1) + ' & "&text=" & ENCODEURL("Hi " & A' + str(ws.max_row + 1) + ' & ", your Entry time is " & TEXT(C' + str(ws.max_row + 1) + ',"yyyy-mm-dd hh:mm:ss") & IF(D' + str(ws.max_row + 1) + '<>"", " and Exit time is " & TEXT(D' + str(ws.max_row + 1) + ',"yyyy-mm-dd hh:mm:ss"), "") & " (Status: " & E' + str(ws.max_row + 1) + ')"), "Send WhatsApp")'
-            ws.append([name, phone, now_str, None, "Inside", whatsapp_formula])
-        status = "ENTRY_OVERRIDE" if override_cooling else "ENTRY"
-        play_sound("entry")
-    elif user_status == "EXITED_TODAY":
-        status = "BLOCKED"
+    status = get_event_store().record_gate_event(
+        name, get_user_phone(name), override_cooling, datetime.now(), COOLING_PERIOD_SECONDS
+    )
+    if status.startswith("COOLING_") or status == "BLOCKED":
         play_sound("blocked")
-        wb.close()
-        return status
+    elif status.startswith("ENTRY"):
+        play_sound("entry")
     else:
-        # User is exiting - update existing entry with exit time
-        if existing_row:
-            existing_row[3].value = now_str
-            existing_row[4].value = "Exited"
-            row_num = existing_row[0].row
-            whatsapp_formula = f'=HYPERLINK("https://web.whatsapp.com/send?phone=" & B{row_num} & "&text=" & ENCODEURL("Hi " & A{row_num} & ", your Entry time is " & TEXT(C{row_num},"yyyy-mm-dd hh:mm:ss") & IF(D{row_num}<>"", " and Exit time is " & TEXT(D{row_num},"yyyy-mm-dd hh:mm:ss"), "") & " (Status: " & E{row_num} & ")"), "Send WhatsApp")'
-            # Handle backward compatibility - add WhatsApp column if it doesn't exist
-            if len(existing_row) > 5:
-                existing_row[5].value = whatsapp_formula
-            else:
-                # Extend row to include WhatsApp column
-                ws.cell(row=existing_row[0].row, column=6, value=whatsapp_formula)
-        else:
-            # No entry found, create one with exit time only
-            whatsapp_formula = '=HYPERLINK("https://web.whatsapp.com/send?phone=" & B' + str(ws.max_row + 1) + ' & "&text=" & ENCODEURL("Hi " & A' + str(ws.max_row + 1) + ' & ", your Exit time is " & TEXT(D' + str(ws.max_row + 1) + ',"yyyy-mm-dd hh:mm:ss") & " (Status: " & E' + str(ws.max_row + 1) + ')"), "Send WhatsApp")'
-            ws.append([name, phone, None, now_str, "Exited", whatsapp_formula])
-        status = "EXIT_OVERRIDE" if override_cooling else "EXIT"
         play_sound("exit")
-    
-    wb.save(EXCEL_FILE)
-    wb.close()
     return status
 
 def log_going_out_event(name: str, reason_type: str, reason_details: str = ""):
     """Log going out for work/personal reasons"""
-    setup_excel_file()
-    now = datetime.now()
-    now_str = now.strftime("%Y-%m-%d %H:%M:%S")
-    
-    wb = load_workbook(EXCEL_FILE)
-    ws_going_out = wb[GOING_OUT_SHEET]
-    
-    # Check current going out status
-    going_out_status, current_reason, going_out_time = get_going_out_status(name)
-    
-    if going_out_status == "IN_OFFICE":
-        # User is going out
-        phone = get_user_phone(name)
-        ws_going_out.append([name, phone, now_str, None, reason_type, reason_details, "Out", None])
-        status = "GOING_OUT"
-        play_sound("going_out")
-    else:
-        # User is coming back
-        # Find the open going out entry
-        found_open = None
-        for row in reversed(list(ws_going_out.iter_rows(min_row=2))):
-            if row[0].value == name and row[3].value is None:  # Coming_Back_Time is now column 3
-                found_open = row
-                break
-        
-        if found_open:
-            found_open[3].value = now_str  # Coming back time (column 3)
-            found_open[6].value = "Returned"  # Status (column 6)
-            
-            # Calculate duration in minutes
-            if found_open[2].value:  # Going_Out_Time is column 2
-                try:
-                    going_out_dt = datetime.strptime(str(found_open[2].value), "%Y-%m-%d %H:%M:%S")
-                    duration = (now - going_out_dt).total_seconds() / 60
-                    found_open[7].value = round(duration, 1)  # Duration_Minutes is column 7
-                except:
-                    found_open[7].value = 0
-            
-            status = "COMING_BACK"
-            play_sound("coming_back")
-        else:
-            # Shouldn't happen, but handle it
-            phone = get_user_phone(name)
-            ws_going_out.append([name, phone, None, now_str, reason_type, reason_details, "Returned", None])
-            status = "COMING_BACK"
-            play_sound("coming_back")
-    
-    wb.save(EXCEL_FILE)
-    wb.close()
+    status = get_event_store().record_going_out_event(
+        name, get_user_phone(name), reason_type, reason_details, datetime.now()
+    )
+    play_sound("going_out" if status == "GOING_OUT" else "coming_back")
     return status
 
 # ---------------------------
@@ -439,6 +623,221 @@ def get_user_phone(name: str) -> str:
     phones = load_user_phones()
     return phones.get(name, "")
 
+# ---------------------------
+# Face Matching Engine
+# ---------------------------
+MOTION_THRESHOLD = 6.0          # Mean abs difference (0-255) between downscaled grey frames
+MOTION_SAMPLE_SIZE = (80, 60)   # Frame size used for motion checks
+IDLE_DETECT_SECONDS = 1.0       # Run detection at least this often even without motion
+TRACK_IOU_THRESHOLD = 0.3       # Minimum box overlap to continue a track
+TRACK_MAX_MISSES = 5            # Detection passes a track survives without a matching face
+UNKNOWN_RETRY_DETECTIONS = 3    # Re-encode unrecognised faces every N detection passes
+NAMED_REVERIFY_DETECTIONS = 10  # Re-encode recognised faces every N detection passes (tracks can swap people)
+
+class FaceMatcher:
+    """Matches a frame's face encodings against all known encodings in one NumPy call"""
+
+    def __init__(self, known_faces: dict, tolerance: float = MATCH_TOLERANCE):
+        self.names = list(known_faces.keys())
+        self.encodings = np.stack(list(known_faces.values())) if self.names else np.empty((0, 128))
+        self.known_sq_norms = np.einsum('ij,ij->i', self.encodings, self.encodings)
+        self.tolerance = tolerance
+
+    def distances(self, face_encodings) -> np.ndarray:
+        """Euclidean (faces x known) distance matrix, same metric as face_recognition.face_distance"""
+        faces = np.asarray(face_encodings, dtype=np.float64).reshape(-1, 128)
+        sq = (np.einsum('ij,ij->i', faces, faces)[:, None]
+              + self.known_sq_norms[None, :]
+              - 2.0 * faces @ self.encodings.T)
+        return np.sqrt(np.maximum(sq, 0.0))
+
+    def match(self, face_encodings) -> list:
+        """Return (name or None, distance) for each encoding"""
+        if len(face_encodings) == 0:
+            return []
+        if len(self.names) == 0:
+            return [(None, None)] * len(face_encodings)
+        dist = self.distances(face_encodings)
+        best = np.argmin(dist, axis=1)
+        best_dist = dist[np.arange(len(best)), best]
+        return [
+            (self.names[idx] if d <= self.tolerance else None, float(d))
+            for idx, d in zip(best, best_dist)
+        ]
+
+
+class MotionDetector:
+    """Frame differencing used to skip face detection while the gate is empty"""
+
+    def __init__(self, threshold: float = MOTION_THRESHOLD):
+        self.threshold = threshold
+        self.previous = None
+
+    def has_motion(self, frame) -> bool:
+        small = cv2.resize(frame, MOTION_SAMPLE_SIZE, interpolation=cv2.INTER_AREA)
+        grey = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        previous, self.previous = self.previous, grey
+        if previous is None:
+            return True
+        return float(cv2.absdiff(grey, previous).mean()) > self.threshold
+
+
+def _box_iou(a, b) -> float:
+    """Intersection over union of two (top, right, bottom, left) boxes"""
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    inter = max(0, bottom - top) * max(0, right - left)
+    if inter == 0:
+        return 0.0
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    return inter / float(area_a + area_b - inter)
+
+
+class FaceTracker:
+    """Follows face boxes across detections so a recognised person is encoded only once"""
+
+    def __init__(self, iou_threshold: float = TRACK_IOU_THRESHOLD, max_misses: int = TRACK_MAX_MISSES,
+                 unknown_retry: int = UNKNOWN_RETRY_DETECTIONS, reverify: int = NAMED_REVERIFY_DETECTIONS):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.unknown_retry = unknown_retry
+        self.reverify = reverify
+        self.tracks = []  # dicts: box, name, misses, since_encode, stale
+
+    def update(self, locations) -> list:
+        """Associate detections with tracks; return the tracks seen this pass, in location order"""
+        unmatched = list(self.tracks)
+        current = []
+        for loc in locations:
+            best, best_iou = None, self.iou_threshold
+            for track in unmatched:
+                iou = _box_iou(loc, track['box'])
+                if iou >= best_iou:
+                    best, best_iou = track, iou
+            if best is None:
+                best = {'box': loc, 'name': None, 'misses': 0, 'since_encode': None, 'stale': False}
+                self.tracks.append(best)
+            else:
+                unmatched.remove(best)
+                best['box'] = loc
+                if best['misses']:
+                    best['stale'] = True  # Face was lost for a pass; the box may now be someone else
+                best['misses'] = 0
+            current.append(best)
+
+        for track in unmatched:
+            track['misses'] += 1
+        self.tracks = [t for t in self.tracks if t['misses'] <= self.max_misses]
+        return current
+
+    def needs_encoding(self, track) -> bool:
+        """New and stale tracks are encoded; others periodically, recognised ones less often"""
+        if track['since_encode'] is None or track['stale']:
+            return True
+        track['since_encode'] += 1
+        retry = self.unknown_retry if track['name'] is None else self.reverify
+        return track['since_encode'] >= retry
+
+    def assign(self, track, name):
+        """Record a fresh match; a recognised track that no longer matches loses (or changes) its name"""
+        track['name'] = name
+        track['since_encode'] = 0
+        track['stale'] = False
+
+    def has_tracks(self) -> bool:
+        return bool(self.tracks)
+
+# ---------------------------
+# Frame Pipeline
+# ---------------------------
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 480
+INFERENCE_BUFFER_SIZE = 1       # Inference always works on the newest frame
+DISPLAY_BUFFER_SIZE = 2         # Frames waiting for the Tk display stage
+FRAME_POOL_SIZE = 8             # Preallocated capture frames cycled by the capture stage
+STATS_WINDOW_SECONDS = 2.0      # Rolling window for FPS / latency counters
+PERF_REFRESH_MS = 500           # Status bar refresh interval for pipeline counters
+
+class DropOldestBuffer:
+    """Bounded hand-off between pipeline stages; putting into a full buffer discards its oldest item"""
+
+    def __init__(self, maxsize: int):
+        self.items = collections.deque(maxlen=maxsize)
+        self.cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout: float = None):
+        """Oldest item, waiting up to timeout; None if the buffer stayed empty"""
+        with self.cond:
+            if not self.items:
+                self.cond.wait(timeout)
+            return self.items.popleft() if self.items else None
+
+    def get_latest(self):
+        """Newest item without waiting, discarding anything older; None if empty"""
+        with self.cond:
+            if not self.items:
+                return None
+            item = self.items.pop()
+            self.dropped += len(self.items)
+            self.items.clear()
+            return item
+
+    def clear(self):
+        with self.cond:
+            self.items.clear()
+            self.cond.notify_all()
+
+
+class FramePool:
+    """Ring of preallocated frame arrays the capture stage reads into"""
+
+    def __init__(self, size: int = FRAME_POOL_SIZE, shape=(FRAME_HEIGHT, FRAME_WIDTH, 3)):
+        self.frames = [np.empty(shape, dtype=np.uint8) for _ in range(size)]
+        self.index = 0
+
+    def next(self):
+        frame = self.frames[self.index]
+        self.index = (self.index + 1) % len(self.frames)
+        return frame
+
+
+class StageStats:
+    """Rolling FPS and capture-to-completion latency of one pipeline stage"""
+
+    def __init__(self, window: float = STATS_WINDOW_SECONDS):
+        self.window = window
+        self.samples = collections.deque()  # (finished_at, latency) in perf_counter seconds
+        self.lock = threading.Lock()
+
+    def record(self, captured_at: float):
+        now = time.perf_counter()
+        with self.lock:
+            self.samples.append((now, now - captured_at))
+            while self.samples and now - self.samples[0][0] > self.window:
+                self.samples.popleft()
+
+    def snapshot(self):
+        """Return (fps, mean latency in ms) over the window"""
+        with self.lock:
+            now = time.perf_counter()
+            while self.samples and now - self.samples[0][0] > self.window:
+                self.samples.popleft()
+            if not self.samples:
+                return 0.0, 0.0
+            latency = sum(lat for _, lat in self.samples) / len(self.samples) * 1000
+            span = now - self.samples[0][0]
+            fps = len(self.samples) / span if span > 0 else 0.0
+            return fps, latency
+
 # ---------------------------
 # GUI Application Class
 # ---------------------------
@@ -457,7 +856,15 @@ class GatePassGUI:
         self.camera = None
         self.known_faces = {}
         self.last_scan = {}
-        self.frame_queue = queue.Queue()
+        self.recognition_queue = queue.Queue()  # Rare events; never dropped
+        self.inference_buffer = DropOldestBuffer(INFERENCE_BUFFER_SIZE)
+        self.display_buffer = DropOldestBuffer(DISPLAY_BUFFER_SIZE)
+        self.frame_pool = FramePool()
+        self.display_rgb = np.empty((FRAME_HEIGHT, FRAME_WIDTH, 3), dtype=np.uint8)
+        self.stage_stats = {}
+        self.capture_thread = None
+        self.inference_thread = None
+        self.last_perf_update = 0.0
         
         # Colors
         self.colors = {
@@ -515,6 +922,15 @@ class GatePassGUI:
         )
         self.datetime_label.pack(side='right', padx=20, pady=15)
         
+        self.perf_label = tk.Label(
+            self.status_frame,
+            text="",
+            font=("Arial", 10),
+            bg=self.colors['card'],
+            fg=self.colors['text']
+        )
+        self.perf_label.pack(side='right', padx=10, pady=15)
+        
         # Main Content
         main_frame = tk.Frame(self.root, bg=self.colors['bg'])
         main_frame.pack(fill='both', expand=True, padx=10, pady=5)
@@ -704,6 +1120,15 @@ class GatePassGUI:
         )
         self.going_out_logs_btn.pack(pady=3)
         
+        self.export_btn = tk.Button(
+            right_panel,
+            text="📤 Export Logs to Excel",
+            bg=self.colors['purple'],
+            command=self.export_logs,
+            **btn_style
+        )
+        self.export_btn.pack(pady=3)
+        
         # Exit Button
         exit_btn = tk.Button(
             right_panel,
@@ -752,8 +1177,8 @@ class GatePassGUI:
                 return
 
             # Set resolution for faster performance
-            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
+            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
 
             # Warm-up frames to reduce initial lag
             for _ in range(5):
@@ -769,9 +1194,16 @@ class GatePassGUI:
                 fg=self.colors['success']
             )
 
-            # Start camera thread
-            self.camera_thread = threading.Thread(target=self.camera_loop, daemon=True)
-            self.camera_thread.start()
+            # Fresh buffers and counters for this session
+            self.inference_buffer = DropOldestBuffer(INFERENCE_BUFFER_SIZE)
+            self.display_buffer = DropOldestBuffer(DISPLAY_BUFFER_SIZE)
+            self.stage_stats = {stage: StageStats() for stage in ('capture', 'inference', 'display')}
+
+            # Start capture and inference stages; display runs on the Tk thread
+            self.capture_thread = threading.Thread(target=self.capture_loop, daemon=True)
+            self.inference_thread = threading.Thread(target=self.inference_loop, daemon=True)
+            self.capture_thread.start()
+            self.inference_thread.start()
 
             # Start frame processing
             self.process_frames()
@@ -783,6 +1215,14 @@ class GatePassGUI:
     def stop_recognition(self):
         """Stop face recognition process"""
         self.is_scanning = False
+        self.inference_buffer.clear()
+        self.display_buffer.clear()
+        
+        # Let the capture stage finish its current read before releasing the camera
+        if self.capture_thread and self.capture_thread is not threading.current_thread():
+            self.capture_thread.join(timeout=1.0)
+        self.capture_thread = None
+        self.inference_thread = None
         
         if self.camera:
             self.camera.release()
@@ -796,6 +1236,7 @@ class GatePassGUI:
             text="🟢 System Ready",
             fg=self.colors['text']
         )
+        self.perf_label.config(text="")
         
         # Clear video frame
         self.video_frame.config(
@@ -803,81 +1244,129 @@ class GatePassGUI:
             text="Camera Off\n\nClick 'Start Recognition' to begin"
         )
         
-    def camera_loop(self):
-        """Camera capture loop running in separate thread"""
-        known_names = list(self.known_faces.keys())
-        known_encodings = np.stack(list(self.known_faces.values())) if known_names else np.empty((0, 128))
+    def capture_loop(self):
+        """Capture stage: read camera frames into pooled buffers and fan out to the other stages"""
+        stats = self.stage_stats['capture']
         
         while self.is_scanning and self.camera and self.camera.isOpened():
-            ret, frame = self.camera.read()
+            ret, frame = self.camera.read(self.frame_pool.next())
             if not ret:
                 break
-                
-            # Resize for faster processing
-            small_frame = cv2.resize(frame, (0, 0), fx=0.25, fy=0.25)
-            rgb_small_frame = small_frame[:, :, ::-1]
+            captured_at = time.perf_counter()
             
-            # Find faces
-            face_locations = face_recognition.face_locations(rgb_small_frame)
-            face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
+            # Slow stages only ever see the newest frames; older ones are dropped
+            self.inference_buffer.put((frame, captured_at))
+            self.display_buffer.put((frame, captured_at))
+            stats.record(captured_at)
             
-            for face_encoding in face_encodings:
-                if known_encodings.size > 0:
-                    matches = face_recognition.compare_faces(known_encodings, face_encoding, tolerance=MATCH_TOLERANCE)
-                    face_distances = face_recognition.face_distance(known_encodings, face_encoding)
+    def inference_loop(self):
+        """Inference stage: detect, track and match faces on the newest captured frame"""
+        matcher = FaceMatcher(self.known_faces)
+        motion = MotionDetector()
+        tracker = FaceTracker()
+        stats = self.stage_stats['inference']
+        last_detection = 0.0
+        small_frame = None
+        rgb_small_frame = None
+        
+        while self.is_scanning:
+            item = self.inference_buffer.get(timeout=0.1)
+            if item is None:
+                continue
+            frame, captured_at = item
+            
+            # Downscale straight away into our own buffers so the pooled frame can be reused
+            height, width = frame.shape[:2]
+            if small_frame is None or small_frame.shape[:2] != (height // 4, width // 4):
+                small_frame = np.empty((height // 4, width // 4, 3), dtype=np.uint8)
+                rgb_small_frame = np.empty_like(small_frame)
+            cv2.resize(frame, (width // 4, height // 4), dst=small_frame)
+            
+            # Skip detection on static frames unless faces are being tracked or it's been idle a while
+            now = time.time()
+            if motion.has_motion(small_frame) or tracker.has_tracks() or (now - last_detection) >= IDLE_DETECT_SECONDS:
+                last_detection = now
+                cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB, dst=rgb_small_frame)
+                
+                # Find faces and follow them across frames
+                face_locations = face_recognition.face_locations(rgb_small_frame)
+                tracks = tracker.update(face_locations)
+                
+                # Only encode faces that aren't already identified by their track
+                pending = [track for track in tracks if tracker.needs_encoding(track)]
+                if pending:
+                    face_encodings = face_recognition.face_encodings(
+                        rgb_small_frame, [track['box'] for track in pending]
+                    )
+                    for track, (name, _) in zip(pending, matcher.match(face_encodings)):
+                        tracker.assign(track, name)
+                
+                # Log only faces matched in this pass, never a name a track may have carried over
+                for track in pending:
+                    name = track['name']
+                    if not name:
+                        continue
+                    current_time = time.time()
                     
-                    if len(face_distances) > 0:
-                        best_match_index = np.argmin(face_distances)
+                    # Check cooldown
+                    if name not in self.last_scan or (current_time - self.last_scan[name]) > COOLDOWN_SECONDS:
+                        status = log_event_excel(name)
+                        self.last_scan[name] = current_time
                         
-                        if matches[best_match_index]:
-                            name = known_names[best_match_index]
-                            current_time = time.time()
-                            
-                            # Check cooldown
-                            if name not in self.last_scan or (current_time - self.last_scan[name]) > COOLDOWN_SECONDS:
-                                status = log_event_excel(name)
-                                self.last_scan[name] = current_time
-                                
-                                # Queue the result for UI update
-                                self.frame_queue.put(('recognition', name, status))
-            
-            # Queue frame for display
-            # Convert BGR to RGB for tkinter
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            self.frame_queue.put(('frame', rgb_frame, None))
+                        # Queue the result for UI update
+                        self.recognition_queue.put((name, status))
             
-            time.sleep(0.03)  # ~30 FPS
+            stats.record(captured_at)
             
     def process_frames(self):
-        """Process frames from camera thread and update UI"""
+        """Display stage: show the newest frame and recognition results on the Tk thread"""
+        item = self.display_buffer.get_latest()
+        if item is not None:
+            frame, captured_at = item
+            
+            # Resize frame for display - match registration window size
+            if frame.shape[:2] != (FRAME_HEIGHT, FRAME_WIDTH):
+                frame = cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT))
+            # Convert BGR to RGB for tkinter into the preallocated display buffer
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=self.display_rgb)
+            
+            # Convert to PIL Image and then to PhotoImage
+            pil_image = Image.fromarray(self.display_rgb)
+            photo = ImageTk.PhotoImage(image=pil_image)
+            
+            self.video_frame.config(image=photo, text="")
+            self.video_frame.image = photo  # Keep a reference
+            self.stage_stats['display'].record(captured_at)
+        
         try:
-            while not self.frame_queue.empty():
-                item = self.frame_queue.get_nowait()
-                
-                if item[0] == 'frame':
-                    # Update video display
-                    rgb_frame = item[1]
-                    # Resize frame for display - match registration window size
-                    display_frame = cv2.resize(rgb_frame, (640, 480))
-                    
-                    # Convert to PIL Image and then to PhotoImage
-                    pil_image = Image.fromarray(display_frame)
-                    photo = ImageTk.PhotoImage(image=pil_image)
-                    
-                    self.video_frame.config(image=photo, text="")
-                    self.video_frame.image = photo  # Keep a reference
-                    
-                elif item[0] == 'recognition':
-                    # Update recognition result
-                    name, status = item[1], item[2]
-                    self.show_recognition_result(name, status)
-                    
+            while True:
+                # Update recognition result
+                name, status = self.recognition_queue.get_nowait()
+                self.show_recognition_result(name, status)
         except queue.Empty:
             pass
         
+        now = time.perf_counter()
+        if now - self.last_perf_update >= PERF_REFRESH_MS / 1000:
+            self.last_perf_update = now
+            self.update_perf_label()
+        
         # Schedule next frame processing
         if self.is_scanning:
-            self.root.after(30, self.process_frames)
+            self.root.after(15, self.process_frames)
+            
+    def update_perf_label(self):
+        """Show per-stage FPS and capture-to-stage latency in the status bar"""
+        if not self.is_scanning:
+            return
+        capture_fps, _ = self.stage_stats['capture'].snapshot()
+        inference_fps, inference_ms = self.stage_stats['inference'].snapshot()
+        display_fps, display_ms = self.stage_stats['display'].snapshot()
+        dropped = self.inference_buffer.dropped + self.display_buffer.dropped
+        self.perf_label.config(
+            text=(f"📷 {capture_fps:.0f} fps | 🧠 {inference_fps:.1f} fps, {inference_ms:.0f} ms | "
+                  f"🖥 {display_fps:.0f} fps, {display_ms:.0f} ms | ⏭ {dropped} dropped")
+        )
             
     def show_recognition_result(self, name, status):
         """Show recognition result in UI"""
@@ -1539,14 +2028,12 @@ class GatePassGUI:
     def load_logs(self, text_widget, today_only=True):
         """Load and display gate logs"""
         try:
-            wb = load_workbook(EXCEL_FILE)
-            ws = wb[GATE_SHEET] if GATE_SHEET in wb.sheetnames else wb.active
+            today = date.today().strftime("%Y-%m-%d")
+            rows = get_event_store().gate_rows(day=today if today_only else None)
             
             text_widget.config(state='normal')
             text_widget.delete(1.0, tk.END)
             
-            today = date.today().strftime("%Y-%m-%d")
-            
             # Header
             if today_only:
                 text_widget.insert(tk.END, f"📅 Today's Gate Logs ({today})\n\n")
@@ -1557,27 +2044,17 @@ class GatePassGUI:
             text_widget.insert(tk.END, "=" * 90 + "\n")
             
             row_count = 0
-            for row in ws.iter_rows(min_row=2):
-                name = row[0].value or ""
-                phone = row[1].value or ""  # Phone_Number is now column 1
-                entry_time = row[2].value or ""  # Entry_Time is now column 2
-                exit_time = row[3].value or ""  # Exit_Time is now column 3
-                status = row[4].value or ""  # Status is now column 4
-                override_used = row[5].value if len(row) > 5 else ""  # Override_Used is now column 5
-                
-                # Filter for today if requested
-                if today_only and entry_time:
-                    try:
-                        entry_date = datetime.strptime(str(entry_time), "%Y-%m-%d %H:%M:%S").date()
-                        if entry_date.strftime("%Y-%m-%d") != today:
-                            continue
-                    except:
-                        continue
+            for row in rows:
+                name = row['name'] or ""
+                phone = row['phone'] or ""
+                entry_time = row['entry_time'] or ""
+                exit_time = row['exit_time'] or ""
+                status = row['status'] or ""
                 
                 # Format times
                 entry_display = str(entry_time)[11:19] if entry_time and len(str(entry_time)) > 19 else str(entry_time)
                 exit_display = str(exit_time)[11:19] if exit_time and len(str(exit_time)) > 19 else str(exit_time)
-                override_display = "YES" if override_used == "YES" else ""
+                override_display = "YES" if row['override'] else ""
                 phone_display = phone[:12] if phone else "N/A"  # Truncate phone for display
                 
                 text_widget.insert(tk.END, f"{name:<15} {phone_display:<12} {entry_display:<15} {exit_display:<15} {status:<8} {override_display:<8}\n")
@@ -1589,7 +2066,6 @@ class GatePassGUI:
                 text_widget.insert(tk.END, f"\nTotal Records: {row_count}\n")
                 
             text_widget.config(state='disabled')
-            wb.close()
             
         except Exception as e:
             text_widget.config(state='normal')
@@ -1606,6 +2082,7 @@ class GatePassGUI:
             
             # Clean up
             cv2.destroyAllWindows()
+            get_event_store().close()
             self.root.quit()
             self.root.destroy()
     
@@ -1713,17 +2190,31 @@ class GatePassGUI:
         )
         close_btn.pack(pady=20)
 
+    def export_logs(self):
+        """Write the gate and going out logs to the Excel workbook now"""
+        self.export_btn.config(state='disabled')
+        
+        def run_export():
+            try:
+                path = get_event_store().export_excel()
+                self.root.after(0, lambda: messagebox.showinfo("Export Complete", f"Logs exported to {os.path.abspath(path)}"))
+            except Exception as e:
+                error = str(e)
+                self.root.after(0, lambda: messagebox.showerror("Export Failed", f"Could not write {EXCEL_FILE}: {error}\n\nClose the workbook if it is open in Excel and try again."))
+            finally:
+                self.root.after(0, lambda: self.export_btn.config(state='normal'))
+        
+        threading.Thread(target=run_export, daemon=True).start()
+        
     def load_logs(self, text_widget, today_only=True):
         """Load and display gate logs"""
         try:
-            wb = load_workbook(EXCEL_FILE)
-            ws = wb[GATE_SHEET] if GATE_SHEET in wb.sheetnames else wb.active
+            today = date.today().strftime("%Y-%m-%d")
+            rows = get_event_store().gate_rows(day=today if today_only else None)
             
             text_widget.config(state='normal')
             text_widget.delete(1.0, tk.END)
             
-            today = date.today().strftime("%Y-%m-%d")
-            
             # Header
             if today_only:
                 text_widget.insert(tk.END, f"📅 Today's Gate Logs ({today})\n\n")
@@ -1734,27 +2225,17 @@ class GatePassGUI:
             text_widget.insert(tk.END, "=" * 90 + "\n")
             
             row_count = 0
-            for row in ws.iter_rows(min_row=2):
-                name = row[0].value or ""
-                phone = row[1].value or ""  # Phone_Number is now column 1
-                entry_time = row[2].value or ""  # Entry_Time is now column 2
-                exit_time = row[3].value or ""  # Exit_Time is now column 3
-                status = row[4].value or ""  # Status is now column 4
-                override_used = row[5].value if len(row) > 5 else ""  # Override_Used is now column 5
-                
-                # Filter for today if requested
-                if today_only and entry_time:
-                    try:
-                        entry_date = datetime.strptime(str(entry_time), "%Y-%m-%d %H:%M:%S").date()
-                        if entry_date.strftime("%Y-%m-%d") != today:
-                            continue
-                    except:
-                        continue
+            for row in rows:
+                name = row['name'] or ""
+                phone = row['phone'] or ""
+                entry_time = row['entry_time'] or ""
+                exit_time = row['exit_time'] or ""
+                status = row['status'] or ""
                 
                 # Format times
                 entry_display = str(entry_time)[11:19] if entry_time and len(str(entry_time)) > 19 else str(entry_time)
                 exit_display = str(exit_time)[11:19] if exit_time and len(str(exit_time)) > 19 else str(exit_time)
-                override_display = "YES" if override_used == "YES" else ""
+                override_display = "YES" if row['override'] else ""
                 phone_display = phone[:12] if phone else "N/A"  # Truncate phone for display
                 
                 text_widget.insert(tk.END, f"{name:<15} {phone_display:<12} {entry_display:<15} {exit_display:<15} {status:<8} {override_display:<8}\n")
@@ -1766,7 +2247,6 @@ class GatePassGUI:
                 text_widget.insert(tk.END, f"\nTotal Records: {row_count}\n")
                 
             text_widget.config(state='disabled')
-            wb.close()
             
         except Exception as e:
             text_widget.config(state='normal')
@@ -2177,22 +2657,12 @@ class GatePassGUI:
     def load_going_out_logs(self, text_widget, today_only=True):
         """Load and display going out logs"""
         try:
-            wb = load_workbook(EXCEL_FILE)
-            if GOING_OUT_SHEET not in wb.sheetnames:
-                text_widget.config(state='normal')
-                text_widget.delete(1.0, tk.END)
-                text_widget.insert(tk.END, "No going out logs found.\n")
-                text_widget.config(state='disabled')
-                wb.close()
-                return
-                
-            ws_going_out = wb[GOING_OUT_SHEET]
+            today = date.today().strftime("%Y-%m-%d")
+            rows = get_event_store().going_out_rows(day=today if today_only else None)
             
             text_widget.config(state='normal')
             text_widget.delete(1.0, tk.END)
             
-            today = date.today().strftime("%Y-%m-%d")
-            
             # Header
             if today_only:
                 text_widget.insert(tk.END, f"📅 Today's Going Out Logs ({today})\n\n")
@@ -2203,23 +2673,14 @@ class GatePassGUI:
             text_widget.insert(tk.END, "=" * 120 + "\n")
             
             row_count = 0
-            for row in ws_going_out.iter_rows(min_row=2):
-                name = row[0].value or ""
-                going_out_time = row[1].value or ""
-                coming_back_time = row[2].value or ""
-                reason_type = row[3].value or ""
-                reason_details = row[4].value or ""
-                status = row[5].value or ""
-                duration = row[6].value or ""
-                
-                # Filter for today if requested
-                if today_only and going_out_time:
-                    try:
-                        going_out_date = datetime.strptime(str(going_out_time), "%Y-%m-%d %H:%M:%S").date()
-                        if going_out_date.strftime("%Y-%m-%d") != today:
-                            continue
-                    except:
-                        continue
+            for row in rows:
+                name = row['name'] or ""
+                going_out_time = row['going_out_time'] or ""
+                coming_back_time = row['coming_back_time'] or ""
+                reason_type = row['reason_type'] or ""
+                reason_details = row['reason_details'] or ""
+                status = row['status'] or ""
+                duration = row['duration_minutes'] or ""
                 
                 # Format times
                 going_out_display = str(going_out_time)[11:19] if going_out_time and len(str(going_out_time)) > 19 else str(going_out_time)
@@ -2238,7 +2699,6 @@ class GatePassGUI:
                 text_widget.insert(tk.END, f"\nTotal Records: {row_count}\n")
                 
             text_widget.config(state='disabled')
-            wb.close()
             
         except Exception as e:
             text_widget.config(state='normal')
@@ -2252,6 +2712,7 @@ class GatePassGUI:
             if self.is_scanning:
                 self.stop_recognition()
             cv2.destroyAllWindows()
+            get_event_store().close()
             self.root.quit()
             self.root.destroy()
     